@@ -0,0 +1,238 @@
+"""Archive members as archive_entries rows against the same listing as JSON.
+
+Builds two databases with the same synthetic archives (5-40 members
+each, with sizes and CRCs): one with the members in archive_entries,
+the other with them as a JSON array on processed_archives, as listings
+were stored before. Reports the bytes each layout takes, tables and
+indexes, and times three questions in both: archives with an STL over a
+size, contains_stls/contains_docs for a page of archives, and the
+library's STL count and total size. The JSON side is timed both with
+SQLite's json_each and with the rows loaded into Python.
+
+    python -m src.benchmarks.bench_archive_entries --archives 100000
+"""
+import argparse
+import json
+import random
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from src.database.database import DatabaseManager
+from src.database.models import DOC_EXTENSIONS, STL_EXTENSION, ArchiveEntry
+
+PARTS = ["bust", "base", "arm_left", "arm_right", "head", "torso", "weapon", "cape", "legs"]
+EXTRAS = ["readme.pdf", "license.txt", "preview.png", "notes.md", "lychee/scene.lys"]
+LARGE = 50_000_000
+
+
+def make_archives(archives: int, seed: int = 0):
+    """(archive id, [member dicts]) in the analyzer's entry format"""
+    rng = random.Random(seed)
+    for i in range(1, archives + 1):
+        stem = f"model_{i}"
+        members = [f"{stem}/{rng.choice(PARTS)}_{j}.stl" for j in range(rng.randint(4, 36))]
+        members += [f"{stem}/{extra}" for extra in rng.sample(EXTRAS, rng.randint(0, 4))]
+        entries = []
+        for path in members:
+            # Log-uniform sizes: most members are small, a few are huge
+            size = int(10 ** rng.uniform(3, 8))
+            entries.append({'path': path, 'size': size,
+                            'compressed_size': size // rng.randint(2, 5),
+                            'crc': rng.getrandbits(32)})
+        yield i, entries
+
+
+def seed_databases(rows_path: Path, json_path: Path, archives: int) -> dict:
+    DatabaseManager(str(rows_path))
+    DatabaseManager(str(json_path))
+    rows_conn, json_conn = sqlite3.connect(rows_path), sqlite3.connect(json_path)
+    seconds = {'rows': 0.0, 'json': 0.0}
+    records, entries, documents = [], [], []
+
+    def flush():
+        start = time.perf_counter()
+        rows_conn.executemany(
+            "INSERT INTO processed_archives (id, file_path, analysis_data) VALUES (?, ?, '{}')",
+            records)
+        rows_conn.executemany(
+            "INSERT INTO archive_entries (archive_id, path, size, compressed_size, crc, ext) "
+            "VALUES (?, ?, ?, ?, ?, ?)", entries)
+        seconds['rows'] += time.perf_counter() - start
+        start = time.perf_counter()
+        json_conn.executemany(
+            "INSERT INTO processed_archives (id, file_path, file_list, analysis_data) "
+            "VALUES (?, ?, ?, '{}')", documents)
+        seconds['json'] += time.perf_counter() - start
+        records.clear()
+        entries.clear()
+        documents.clear()
+
+    count = 0
+    for archive_id, members in make_archives(archives):
+        path = f"/library/{archive_id % 500}/model_{archive_id}.zip"
+        records.append((archive_id, path))
+        entries.extend(
+            (archive_id, m['path'], m['size'], m['compressed_size'], m['crc'],
+             ArchiveEntry.extension_of(m['path']))
+            for m in members)
+        documents.append((archive_id, path, json.dumps(members)))
+        count += len(members)
+        if len(records) >= 5_000:
+            flush()
+    flush()
+    for conn in (rows_conn, json_conn):
+        conn.commit()
+        conn.close()
+    return {'entries': count, 'seed_s': seconds}
+
+
+def storage(db_path: Path, tables) -> dict:
+    """Bytes of the given tables and their indexes, from dbstat"""
+    conn = sqlite3.connect(db_path)
+    conn.execute("VACUUM")
+    sizes = dict(conn.execute(
+        "SELECT s.name, SUM(s.pgsize) FROM dbstat s JOIN sqlite_schema m ON m.name = s.name "
+        "WHERE m.tbl_name IN ({}) GROUP BY s.name".format(",".join("?" * len(tables))),
+        tables
+    ).fetchall())
+    conn.close()
+    return {'total': sum(sizes.values()), 'objects': sizes}
+
+
+def timed(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def json_queries(conn: sqlite3.Connection, page: list) -> dict:
+    """The same questions over the JSON listings: (in SQL, in Python)"""
+    suffix = f"%{STL_EXTENSION}"
+    docs = " OR ".join(f"lower(json_extract(e.value, '$.path')) LIKE '%{ext}'"
+                       for ext in DOC_EXTENSIONS)
+
+    def listings(where="", params=()):
+        return ((i, json.loads(text)) for i, text in conn.execute(
+            f"SELECT id, file_list FROM processed_archives {where}", params))
+
+    def large_stls_python():
+        found = []
+        for archive_id, members in listings():
+            sizes = [m['size'] for m in members
+                     if m['path'].lower().endswith(STL_EXTENSION) and m['size'] >= LARGE]
+            if sizes:
+                found.append((max(sizes), archive_id))
+        return sorted(found, key=lambda row: (-row[0], row[1]))[:100]
+
+    def flags_python():
+        return {
+            archive_id: (any(m['path'].lower().endswith(STL_EXTENSION) for m in members),
+                         any(m['path'].lower().endswith(DOC_EXTENSIONS) for m in members))
+            for archive_id, members in listings(
+                f"WHERE id IN ({','.join('?' * len(page))})", page)
+        }
+
+    def totals_python():
+        count, size = 0, 0
+        for _, members in listings():
+            stls = [m['size'] for m in members if m['path'].lower().endswith(STL_EXTENSION)]
+            count += bool(stls)
+            size += sum(stls)
+        return count, size
+
+    return {
+        "archives with STLs over 50 MB": (
+            lambda: conn.execute(
+                "SELECT p.id, MAX(json_extract(e.value, '$.size')) AS largest "
+                "FROM processed_archives p, json_each(p.file_list) e "
+                "WHERE lower(json_extract(e.value, '$.path')) LIKE ? "
+                "AND json_extract(e.value, '$.size') >= ? "
+                "GROUP BY p.id ORDER BY largest DESC, p.id LIMIT 100",
+                (suffix, LARGE)).fetchall(),
+            large_stls_python),
+        "content flags, 1000 archives": (
+            lambda: conn.execute(
+                f"SELECT p.id, MAX(lower(json_extract(e.value, '$.path')) LIKE ?), "
+                f"MAX({docs}) FROM processed_archives p, json_each(p.file_list) e "
+                f"WHERE p.id IN ({','.join('?' * len(page))}) GROUP BY p.id",
+                (suffix, *page)).fetchall(),
+            flags_python),
+        "library STL totals": (
+            lambda: conn.execute(
+                "SELECT COUNT(DISTINCT p.id), SUM(json_extract(e.value, '$.size')) "
+                "FROM processed_archives p, json_each(p.file_list) e "
+                "WHERE lower(json_extract(e.value, '$.path')) LIKE ?",
+                (suffix,)).fetchall(),
+            totals_python),
+    }
+
+
+def run(archives: int) -> dict:
+    results = {'archives': archives}
+    with tempfile.TemporaryDirectory() as tmp:
+        rows_path, json_path = Path(tmp) / "rows.db", Path(tmp) / "json.db"
+        results.update(seed_databases(rows_path, json_path, archives))
+        results['storage'] = {
+            'rows': storage(rows_path, ['processed_archives', 'archive_entries']),
+            'json': storage(json_path, ['processed_archives']),
+        }
+
+        rng = random.Random(1)
+        start = rng.randint(1, max(1, archives - 1000))
+        page = list(range(start, start + min(1000, archives)))
+        db = DatabaseManager(str(rows_path))
+        rows_conn = sqlite3.connect(rows_path)
+        rows_queries = {
+            "archives with STLs over 50 MB":
+                lambda: db.find_archives_with_members(STL_EXTENSION, min_size=LARGE),
+            "content flags, 1000 archives": lambda: db.get_archive_contents(page),
+            "library STL totals": lambda: rows_conn.execute(
+                "SELECT COUNT(DISTINCT archive_id), SUM(size) FROM archive_entries "
+                "WHERE ext = ?", (STL_EXTENSION,)).fetchall(),
+        }
+        json_conn = sqlite3.connect(json_path)
+        results['queries'] = {}
+        for label, (in_sql, in_python) in json_queries(json_conn, page).items():
+            rows_query = rows_queries[label]
+            results['queries'][label] = {
+                'hits': len(rows_query()),
+                'rows_ms': timed(rows_query) * 1000,
+                'json_each_ms': timed(in_sql, repeat=1) * 1000,
+                'json_python_ms': timed(in_python, repeat=1) * 1000,
+            }
+        rows_conn.close()
+        json_conn.close()
+        db.engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--archives", type=int, default=100000)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run(args.archives)
+    print(f"{results['archives']:,} archives, {results['entries']:,} members; "
+          f"inserted in {results['seed_s']['rows']:.1f}s as rows, "
+          f"{results['seed_s']['json']:.1f}s as JSON")
+    for layout, usage in results['storage'].items():
+        print(f"{layout:<5}{usage['total'] / 2**20:>9.1f} MB")
+        for name, size in sorted(usage['objects'].items()):
+            print(f"       {name:<38}{size / 2**20:>9.1f} MB")
+    print(f"{'':<32}{'rows':>10}{'json_each':>12}{'JSON in Python':>16}")
+    for label, row in results['queries'].items():
+        print(f"{label:<32}{row['rows_ms']:>8.1f}ms{row['json_each_ms']:>10.1f}ms"
+              f"{row['json_python_ms']:>14.1f}ms")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
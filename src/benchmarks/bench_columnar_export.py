@@ -0,0 +1,146 @@
+"""Compare the JSON export against the columnar catalog export.
+
+Seeds a throwaway database with synthetic files, tags and archive listings,
+then times writing each export and reading it back into a notebook-friendly
+form.
+
+    python -m src.benchmarks.bench_columnar_export --files 100000 --archives 20000
+"""
+import argparse
+import json
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from src.database.database import DatabaseManager
+from src.core.catalog_exporter import CatalogExporter
+from src.core.columnar_exporter import ColumnarExporter, load_npz, pa
+
+
+def seed_database(db_path: Path, files: int, archives: int, entries: int, seed: int = 0):
+    """Fill a fresh database with synthetic rows through the real schema"""
+    DatabaseManager(str(db_path))
+    rng = random.Random(seed)
+    words = ["dragon", "bust", "mario", "lamp", "wizard", "helmet", "base", "arm", "leg"]
+    now = datetime(2024, 1, 1).isoformat(sep=' ')
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        "INSERT INTO files (id, original_name, original_path, content_hash, "
+        "quick_hash, status, first_seen, last_modified) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            (i, f"{rng.choice(words)}_{i}.zip", f"/library/{i % 50}/{i}.zip",
+             f"{i:064x}", f"{i:032x}", rng.choice(["pending", "renamed"]), now, now)
+            for i in range(1, files + 1)
+        )
+    )
+    conn.executemany("INSERT INTO tags (id, name) VALUES (?, ?)",
+                     [(i, f"TAG{i}") for i in range(1, 21)])
+    conn.executemany(
+        "INSERT INTO file_tags (file_id, tag_id) VALUES (?, ?)",
+        ((i, rng.randint(1, 20)) for i in range(1, files + 1))
+    )
+    # The listings go in archive_entries, which the columnar export reads,
+    # and as the file_list JSON the JSON baseline reads
+    listings = [
+        [f"{rng.choice(words)}/{rng.choice(words)}_{j}.stl" for j in range(entries)]
+        for _ in range(archives)
+    ]
+    conn.executemany(
+        "INSERT INTO processed_archives (id, file_path, content_hash, file_list, "
+        "analysis_data, processed_date) VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            (i, f"/library/{i}.zip", f"{i:064x}", json.dumps(members), "{}", now)
+            for i, members in enumerate(listings, start=1)
+        )
+    )
+    conn.executemany(
+        "INSERT INTO archive_entries (archive_id, path, size, compressed_size, crc, ext) "
+        "VALUES (?, ?, ?, ?, ?, '.stl')",
+        (
+            (i, path, size, size // 3, rng.getrandbits(32))
+            for i, members in enumerate(listings, start=1)
+            for path in members
+            for size in [rng.randrange(10**3, 10**8)]
+        )
+    )
+    conn.commit()
+    conn.close()
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def run(files: int, archives: int, entries: int) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        db_path = tmp / "bench.db"
+        seed_database(db_path, files, archives, entries)
+        db = DatabaseManager(str(db_path))
+
+        # Current approach: JSON export of files plus JSON file_list blobs
+        json_file = tmp / "export.json"
+        write_time, _ = timed(lambda: CatalogExporter(db).export(str(json_file), "json"))
+
+        def read_json():
+            rows = json.load(open(json_file, encoding="utf-8"))
+            conn = sqlite3.connect(db_path)
+            members = [json.loads(r[0]) for r in conn.execute(
+                "SELECT file_list FROM processed_archives")]
+            conn.close()
+            return len(rows) + sum(len(m) for m in members)
+
+        read_time, _ = timed(read_json)
+        conn = sqlite3.connect(db_path)
+        blob_bytes = conn.execute(
+            "SELECT SUM(LENGTH(file_list)) FROM processed_archives").fetchone()[0] or 0
+        conn.close()
+        results["json"] = {"write_s": write_time, "read_s": read_time,
+                           "bytes": json_file.stat().st_size + blob_bytes}
+
+        exporter = ColumnarExporter(db)
+        npz_file = tmp / "catalog.npz"
+        write_time, _ = timed(lambda: exporter.export(str(npz_file), "npz"))
+        read_time, _ = timed(lambda: load_npz(str(npz_file), decode=False))
+        results["npz"] = {"write_s": write_time, "read_s": read_time,
+                          "bytes": npz_file.stat().st_size}
+
+        if pa is not None:
+            import pyarrow.parquet as pq
+            out_dir = tmp / "parquet"
+            write_time, _ = timed(lambda: exporter.export(str(out_dir), "parquet"))
+            read_time, _ = timed(
+                lambda: [pq.read_table(p) for p in out_dir.glob("*.parquet")]
+            )
+            results["parquet"] = {
+                "write_s": write_time, "read_s": read_time,
+                "bytes": sum(p.stat().st_size for p in out_dir.glob("*.parquet"))
+            }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=50000)
+    parser.add_argument("--archives", type=int, default=10000)
+    parser.add_argument("--entries", type=int, default=20, help="members per archive")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run(args.files, args.archives, args.entries)
+    print(f"{'format':<10}{'write s':>10}{'read s':>10}{'MB':>10}")
+    for name, r in results.items():
+        print(f"{name:<10}{r['write_s']:>10.2f}{r['read_s']:>10.2f}{r['bytes'] / 2**20:>10.1f}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
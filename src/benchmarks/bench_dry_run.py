@@ -0,0 +1,93 @@
+"""Dry-run planning cost against the bare directory walk.
+
+Builds a tree of small archives with realistic names (all sharing one
+tiny ZIP body, so the tree is quick to write), then times the walk on its
+own, a first names-only plan, a plan that reads archive listings where
+content tags are undecided, and planning again from the plan cache the
+first two filled (names and listings already known).
+
+    python -m src.benchmarks.bench_dry_run --files 100000
+"""
+import argparse
+import io
+import json
+import random
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+from src.benchmarks.library_generator import load_vocabulary, make_name
+from src.core.directory_scanner import DirectoryScanner
+from src.core.dry_run import DryRunPlanner
+from src.core.name_analyzer import NameAnalyzer
+from src.core.rules_manager import RulesManager
+from src.core.settings_manager import Settings
+
+
+def build_tree(root: Path, files: int, per_folder: int = 200, seed: int = 0):
+    body = io.BytesIO()
+    with zipfile.ZipFile(body, "w") as zf:
+        zf.writestr("model.stl", b"solid model\nendsolid model\n")
+        zf.writestr("readme.txt", b"print at 0.2mm\n")
+    body = body.getvalue()
+
+    rng = random.Random(seed)
+    vocab = load_vocabulary()
+    for i in range(files):
+        folder = root / f"shop_{i // per_folder:04d}"
+        if i % per_folder == 0:
+            folder.mkdir(parents=True)
+        (folder / f"{make_name(rng, vocab)}_{i}.zip").write_bytes(body)
+
+
+# In order: the cache is empty for the first plan and full for the last
+PLANS = ("off", "auto", "known")
+
+
+def run(files: int) -> dict:
+    settings = Settings()
+    analyzer = NameAnalyzer(RulesManager())
+    results = {"files": files}
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "library"
+        start = time.perf_counter()
+        build_tree(root, files)
+        results["build_s"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        DirectoryScanner().scan(root, settings.get("files", "archive_types"))
+        results["walk_s"] = time.perf_counter() - start
+
+        cache_dir = Path(tmp) / "plan_cache"
+        for content in PLANS:
+            start = time.perf_counter()
+            plan = DryRunPlanner(analyzer, settings, content=content,
+                                 cache_dir=cache_dir).plan(root)
+            results[f"plan_{content}_s"] = time.perf_counter() - start
+            results[f"plan_{content}_stats"] = plan["stats"]
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=100000)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run(args.files)
+    print(f"{'directory walk':<28}{results['walk_s']:>8.2f}s")
+    for content in PLANS:
+        stats = results[f"plan_{content}_stats"]
+        seconds = stats["seconds"]
+        print(f"{'plan, content=' + content:<28}{results[f'plan_{content}_s']:>8.2f}s"
+              f"   (scan {seconds['scan']:.2f}s, names {seconds['names']:.2f}s, "
+              f"content {seconds['content']:.2f}s, conflicts {seconds['conflicts']:.2f}s, "
+              f"{stats['listed']} listings read, {stats['known']} known)")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
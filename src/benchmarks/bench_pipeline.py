@@ -0,0 +1,253 @@
+"""Benchmark the core load pipeline stage by stage on a synthetic library.
+
+Generates a library with library_generator (or reuses one given with
+--library), then measures:
+
+- hashing throughput (content hash MB/s, quick hash files/s)
+- archive listing rate (archives/s and entries/s)
+- RulesManager.test_name and NameAnalyzer.analyze_name ops/s
+- DatabaseManager.add_file rows/s
+- end-to-end files/s for what MainWindow does per loaded file
+
+All metrics are rates, so higher is better. Results are written as JSON;
+with --baseline the run is compared against an earlier result and exits
+non-zero when a metric drops by more than its threshold.
+
+    python -m src.benchmarks.bench_pipeline --output bench.json
+    python -m src.benchmarks.bench_pipeline --baseline bench.json
+"""
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from src.benchmarks.library_generator import generate_library
+from src.core.archive_analyzer import ArchiveAnalyzer
+from src.core.file_hasher import FileHasher
+from src.core.name_analyzer import NameAnalyzer
+from src.core.rules_manager import RulesManager
+from src.database.database import DatabaseManager
+
+# Allowed relative drop before a metric counts as a regression. Anything
+# touching the disk or SQLite is noisier than the pure-CPU stages.
+DEFAULT_THRESHOLD = 0.15
+THRESHOLDS = {
+    "hash.content_mb_s": 0.25,
+    "hash.quick_files_s": 0.25,
+    "archive.list_archives_s": 0.25,
+    "archive.list_entries_s": 0.25,
+    "db.add_file_rows_s": 0.25,
+    "pipeline.files_s": 0.25,
+}
+
+
+def best_rate(func: Callable[[], int], repeat: int) -> float:
+    """Best of ``repeat`` runs of func, which returns the units it processed"""
+    best = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        units = func()
+        elapsed = time.perf_counter() - start
+        if elapsed > 0:
+            best = max(best, units / elapsed)
+    return best
+
+
+def bench_hashing(files: List[Path], repeat: int) -> Dict[str, float]:
+    total_bytes = sum(f.stat().st_size for f in files)
+
+    def content():
+        for f in files:
+            FileHasher.get_content_hash(f)
+        return total_bytes
+
+    def quick():
+        for f in files:
+            FileHasher.get_quick_hash(f)
+        return len(files)
+
+    return {
+        "hash.content_mb_s": best_rate(content, repeat) / 2**20,
+        "hash.quick_files_s": best_rate(quick, repeat),
+    }
+
+
+def bench_listing(files: List[Path], repeat: int) -> Dict[str, float]:
+    analyzer = ArchiveAnalyzer()
+    entries = 0
+
+    def listing():
+        nonlocal entries
+        entries = 0
+        for f in files:
+            info = analyzer.supported_formats[f.suffix.lower()](f)
+            entries += len(info["file_list"])
+        return len(files)
+
+    # Listing a small library takes milliseconds; take more samples
+    archives_s = best_rate(listing, repeat * 3)
+    return {
+        "archive.list_archives_s": archives_s,
+        "archive.list_entries_s": archives_s * entries / len(files),
+    }
+
+
+def bench_names(names: List[str], repeat: int) -> Dict[str, float]:
+    rules = RulesManager()
+    analyzer = NameAnalyzer(rules)
+
+    def test_name():
+        for name in names:
+            rules.test_name(name)
+        return len(names)
+
+    def analyze_name():
+        for name in names:
+            analyzer.analyze_name(name)
+        return len(names)
+
+    return {
+        "rules.test_name_ops_s": best_rate(test_name, repeat),
+        "names.analyze_name_ops_s": best_rate(analyze_name, repeat),
+    }
+
+
+def bench_db(files: List[Path], tmp: Path) -> Dict[str, float]:
+    db = DatabaseManager(str(tmp / "bench_insert.db"))
+    hashes = [(f"{i:032x}", f"{i:064x}") for i in range(len(files))]
+
+    def insert():
+        for f, (quick, content) in zip(files, hashes):
+            db.add_file(f, quick_hash=quick, content_hash=content)
+        return len(files)
+
+    return {"db.add_file_rows_s": best_rate(insert, 1)}
+
+
+def bench_end_to_end(files: List[Path], tmp: Path) -> Dict[str, float]:
+    """The per-file work of a scan (hash, store, analyze), one file at a time"""
+    db = DatabaseManager(str(tmp / "bench_pipeline.db"))
+    analyzer = ArchiveAnalyzer()
+
+    def pipeline():
+        seen = {}
+        for f in files:
+            quick_hash = FileHasher.get_quick_hash(f)
+            if quick_hash in seen and FileHasher.are_files_identical(f, seen[quick_hash]):
+                continue
+            seen[quick_hash] = f
+            content_hash = FileHasher.get_content_hash(f)
+            db.add_file(f, quick_hash=quick_hash, content_hash=content_hash)
+            analysis = analyzer.analyze_archive(f)
+            tags = " ".join(f"[{tag}]" for tag in analysis["suggested_tags"])
+            f"{analysis['suggested_category']} {f.stem} {tags}".strip()
+        return len(files)
+
+    return {"pipeline.files_s": best_rate(pipeline, 1)}
+
+
+def run(library: Path, repeat: int = 3, name_repeat: int = 20) -> Dict[str, float]:
+    files = sorted(p for p in library.iterdir() if p.suffix.lower() in (".zip", ".7z", ".rar"))
+    if not files:
+        raise ValueError(f"No archives found in {library}")
+    names = [f.stem for f in files] * name_repeat
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        results.update(bench_hashing(files, repeat))
+        results.update(bench_listing(files, repeat))
+        results.update(bench_names(names, repeat))
+        results.update(bench_db(files, tmp))
+        results.update(bench_end_to_end(files, tmp))
+    return {name: round(value, 3) for name, value in results.items()}
+
+
+def compare(metrics: Dict[str, float], baseline: Dict[str, float],
+            threshold: float = None) -> List[Dict]:
+    """Metrics that fell more than their threshold below the baseline"""
+    regressions = []
+    for name, base in baseline.items():
+        if name not in metrics or not base:
+            continue
+        limit = threshold if threshold is not None else THRESHOLDS.get(name, DEFAULT_THRESHOLD)
+        change = metrics[name] / base - 1
+        if change < -limit:
+            regressions.append({
+                "metric": name, "baseline": base, "current": metrics[name],
+                "change": round(change, 4), "threshold": limit
+            })
+    return regressions
+
+
+def environment() -> Dict:
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "numpy": np.__version__,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--library", help="existing library directory to benchmark")
+    parser.add_argument("--archives", type=int, default=200)
+    parser.add_argument("--entries", type=int, default=20, help="mean members per archive")
+    parser.add_argument("--entry-size", type=int, default=16 * 1024, help="mean member bytes")
+    parser.add_argument("--duplicate-rate", type=float, default=0.1)
+    parser.add_argument("--formats", default="zip,7z")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per micro benchmark")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float,
+                        help="allowed relative drop for every metric (overrides defaults)")
+    args = parser.parse_args()
+
+    params = {k: getattr(args, k) for k in
+              ("archives", "entries", "entry_size", "duplicate_rate", "formats", "seed")}
+    with tempfile.TemporaryDirectory() as tmp:
+        library = Path(args.library) if args.library else Path(tmp) / "library"
+        if not args.library:
+            start = time.perf_counter()
+            manifest = generate_library(
+                library, args.archives, args.entries, args.entry_size,
+                args.duplicate_rate, tuple(args.formats.split(",")), args.seed
+            )
+            print(f"Generated {len(manifest['archives'])} archives "
+                  f"({manifest['bytes'] / 2**20:.1f} MB) in {time.perf_counter() - start:.1f}s")
+        metrics = run(library, args.repeat)
+
+    for name, value in metrics.items():
+        print(f"{name:<28}{value:>14,.1f}")
+
+    result = {"environment": environment(), "params": params, "metrics": metrics}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("params") != params:
+            print("Warning: baseline was recorded with different parameters")
+        regressions = compare(metrics, baseline["metrics"], args.threshold)
+        for r in regressions:
+            print(f"REGRESSION {r['metric']}: {r['baseline']:,.1f} -> {r['current']:,.1f} "
+                  f"({r['change']:+.1%}, allowed -{r['threshold']:.0%})")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Timings of the catalog's lookups on a large database.
+
+Seeds a database through the real schema (files, their path occurrences,
+tags, processed archives and their members), then times the actual
+DatabaseManager and exporter methods: the first, cold call and the best
+of ``--repeat``. Their query plans are checked by
+src/tests/test_query_plans.py, which uses the same seeding and calls
+(set QUERY_PLAN_FILES to run it at this size).
+
+    python -m src.benchmarks.bench_query_plans --files 1000000
+"""
+import argparse
+import json
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from src.core.catalog_exporter import CatalogExporter
+from src.core.columnar_exporter import ColumnarExporter
+from src.database.database import DatabaseManager
+from src.database.models import File
+
+STATUSES = ["pending", "renamed", "skipped", "error"]
+
+
+def seed_database(db_path: Path, files: int, seed: int = 0):
+    DatabaseManager(str(db_path))
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    conn = sqlite3.connect(db_path)
+
+    def file_rows():
+        for i in range(1, files + 1):
+            modified = (start + timedelta(seconds=rng.randrange(10**8))).isoformat(sep=' ')
+            yield (i, f"model_{i}.zip", f"/library/{i % 500}/model_{i}.zip",
+                   f"{i:064x}", f"{i % (files // 2 or 1):032x}", rng.randrange(10**4, 10**9),
+                   rng.choice(STATUSES), modified, modified)
+
+    conn.executemany(
+        "INSERT INTO files (id, original_name, original_path, content_hash, quick_hash, "
+        "size, status, first_seen, last_modified) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        file_rows()
+    )
+    conn.executemany(
+        "INSERT INTO file_paths (file_id, path, name, status, first_seen, last_seen) "
+        "SELECT id, original_path, original_name, 'present', first_seen, last_modified "
+        "FROM files WHERE id BETWEEN ? AND ?",
+        [(lo, lo + 99_999) for lo in range(1, files + 1, 100_000)]
+    )
+    conn.executemany("INSERT INTO tags (id, name) VALUES (?, ?)",
+                     [(i, f"TAG{i}") for i in range(1, 51)])
+    conn.executemany(
+        "INSERT INTO file_tags (file_id, tag_id) VALUES (?, ?)",
+        ((i, rng.randint(1, 50)) for i in range(1, files + 1))
+    )
+    conn.executemany(
+        "INSERT INTO processed_archives (id, file_path, content_hash, file_list, "
+        "analysis_data, processed_date) VALUES (?, ?, ?, '[]', '{}', ?)",
+        ((i, f"/library/{i % 500}/model_{i}.zip", f"{i:064x}", "2024-01-01 00:00:00")
+         for i in range(1, files // 10 + 1))
+    )
+    conn.executemany(
+        "INSERT INTO archive_entries (archive_id, path, size, compressed_size, crc, ext) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        ((i, f"model_{i}/part_{j}{ext}", size, size // 3, rng.getrandbits(32), ext)
+         for i in range(1, files // 10 + 1)
+         for j, ext in enumerate(rng.choices([".stl", ".stl", ".stl", ".pdf", ".png"], k=10))
+         for size in [rng.randrange(10**3, 10**8)])
+    )
+    conn.executemany(
+        "INSERT INTO rename_batches (id, description, status, entry_count, created, updated) "
+        "VALUES (?, ?, ?, 1, ?, ?)",
+        ((i, f"batch {i}", rng.choice(["applied", "undone", "rolled_back"]),
+          "2024-01-01 00:00:00", "2024-01-01 00:00:00") for i in range(1, 10_001))
+    )
+    conn.commit()
+    conn.close()
+
+
+def checks(db: DatabaseManager, files: int):
+    """(name, paginated, call) for each access pattern; paginated ones
+    must read rows in index order"""
+    rng = random.Random(1)
+    some_id = rng.randint(1, files)
+    path = Path(f"/library/{some_id % 500}/model_{some_id}.zip")
+    with db.get_session() as session:
+        row = session.get(File, some_id)
+        quick_hash, size, modified = row.quick_hash, row.size, row.last_modified
+    catalog = CatalogExporter(db, batch_size=1000)
+    columnar = ColumnarExporter(db, batch_size=1000)
+    return [
+        ("content hash lookup", False, lambda: db.get_file_by_hash(f"{some_id:064x}")),
+        ("quick hash + size lookup", False,
+         lambda: db.get_files_by_quick_hash(quick_hash, size)),
+        ("copies of an archive", False, lambda: db.get_copies(f"{some_id:064x}")),
+        ("previous names of a path", False, lambda: db.get_name_history(path)),
+        ("status filter, first page", True, lambda: db.get_files_by_status("pending")),
+        ("status filter, later page", True,
+         lambda: db.get_files_by_status("pending", before=(modified, some_id))),
+        ("catalog export page", True, lambda: next(catalog.iter_batches())),
+        ("columnar export page", True, lambda: next(columnar._pages(
+            db.get_session(), File.__table__))),
+        ("original names page", True, lambda: next(db.iter_original_names(1000))),
+        ("rename history page", True, lambda: db.get_rename_batches(before_id=5000)),
+        ("archive content flags", False,
+         lambda: db.get_archive_contents(list(range(some_id // 10, some_id // 10 + 50)))),
+        ("archives with large STLs", False,
+         lambda: db.find_archives_with_members(".stl", min_size=99_990_000)),
+        ("latest applied batch", True,
+         lambda: db.get_rename_batches(limit=1, statuses=["applied"])),
+    ]
+
+
+def run(db_path: Path, files: int, seed: bool, repeat: int = 5) -> list:
+    if seed:
+        start = time.perf_counter()
+        seed_database(db_path, files)
+        print(f"seeded {files:,} files in {time.perf_counter() - start:.1f}s")
+    db = DatabaseManager(str(db_path))
+    results = []
+    for name, _, call in checks(db, files):
+        start = time.perf_counter()
+        call()
+        first = time.perf_counter() - start
+        best = first
+        for _ in range(repeat - 1):
+            start = time.perf_counter()
+            call()
+            best = min(best, time.perf_counter() - start)
+        results.append({'name': name, 'first_s': first, 'best_s': best})
+    db.engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=1_000_000)
+    parser.add_argument("--db", help="reuse (or keep) the seeded database at this path")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(args.db) if args.db else Path(tmp) / "plans.db"
+        results = run(db_path, args.files, seed=not db_path.exists(), repeat=args.repeat)
+
+    print(f"{'':<28}{'first':>10}{'best':>10}")
+    for result in results:
+        print(f"{result['name']:<28}{result['first_s'] * 1000:>7.1f} ms"
+              f"{result['best_s'] * 1000:>7.1f} ms")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Rule analytics over a large catalog, against per-name test_name() calls.
+
+Seeds a throwaway database with synthetic archive names, runs the
+chunked analytics over the whole files table, and times test_name() on a
+sample of the same names (the first 5,000) for comparison. With
+``--verify N`` the category, franchise and creator matches of the first
+N names of that sample are also checked against test_name().
+
+    python -m src.benchmarks.bench_rule_analytics --files 1000000 --verify 2000
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from src.benchmarks.library_generator import load_vocabulary, make_name
+from src.core.rule_analytics import RuleAnalytics, format_report
+from src.core.rules_manager import RulesManager
+from src.database.database import DatabaseManager
+
+
+def seed_database(db_path: Path, files: int, seed: int = 0) -> list:
+    """Fill a fresh database with synthetic names; returns a sample of them"""
+    DatabaseManager(str(db_path))
+    rng = random.Random(seed)
+    vocab = load_vocabulary()
+    now = datetime(2024, 1, 1).isoformat(sep=' ')
+    sample = []
+    conn = sqlite3.connect(db_path)
+
+    def rows():
+        for i in range(1, files + 1):
+            name = f"{make_name(rng, vocab)}.zip"
+            if len(sample) < 5000:
+                sample.append(name)
+            yield (i, name, f"/library/{i % 50}/{name}", f"{i:064x}", f"{i:032x}",
+                   "pending", now, now)
+
+    conn.executemany(
+        "INSERT INTO files (id, original_name, original_path, content_hash, "
+        "quick_hash, status, first_seen, last_modified) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        rows()
+    )
+    conn.commit()
+    conn.close()
+    return sample
+
+
+def verify(rules_manager: RulesManager, names: list) -> int:
+    """Names whose token-section matches differ from test_name()"""
+    mismatches = 0
+    for name in names:
+        analytics = RuleAnalytics(rules_manager)
+        stem = os.path.splitext(name)[0]
+        matched = analytics.add_chunk([stem])
+        expected = rules_manager.test_name(stem, {'categories', 'franchises', 'creators'})
+        for section, field in (('categories', 'category'), ('franchises', 'name'),
+                               ('creators', 'name')):
+            data = analytics.sections[section]
+            got = {data['entries'][entry][0] for entry in matched[section][1]}
+            if got != {match[field] for match in expected[section]}:
+                mismatches += 1
+                print(f"  mismatch in {section} for {name!r}: {sorted(got)}")
+                break
+    return mismatches
+
+
+def run(files: int, chunk_size: int, check: int) -> dict:
+    rules_manager = RulesManager()
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        start = time.perf_counter()
+        sample = seed_database(db_path, files)
+        seed_s = time.perf_counter() - start
+
+        analytics = RuleAnalytics(rules_manager, chunk_size=chunk_size)
+        start = time.perf_counter()
+        report = analytics.run_database(DatabaseManager(str(db_path)))
+        total_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for name in sample:
+        rules_manager.test_name(os.path.splitext(name)[0])
+    per_name_rate = len(sample) / (time.perf_counter() - start)
+
+    return {
+        "files": files,
+        "seed_s": seed_s,
+        "analytics_s": total_s,
+        "analytics_per_s": files / total_s,
+        "test_name_per_s": per_name_rate,
+        "test_name_estimate_s": files / per_name_rate,
+        "mismatches": verify(rules_manager, sample[:check]) if check else None,
+        "report": report,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=200000)
+    parser.add_argument("--chunk-size", type=int, default=100000)
+    parser.add_argument("--verify", type=int, default=0, metavar="N",
+                        help="check the matches of N sample names (at most 5,000) "
+                             "against test_name()")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run(args.files, args.chunk_size, args.verify)
+    print(format_report(results["report"], top=10))
+    print()
+    print(f"seeding:      {results['seed_s']:.1f}s")
+    print(f"analytics:    {results['analytics_s']:.1f}s "
+          f"({results['analytics_per_s']:,.0f} names/s, including reads)")
+    print(f"test_name():  {results['test_name_per_s']:,.0f} names/s "
+          f"(~{results['test_name_estimate_s']:.0f}s for all names)")
+    if results["mismatches"] is not None:
+        print(f"mismatches:   {results['mismatches']} of {args.verify} checked")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Catalog search latency: FTS5 index against LIKE over the stored JSON.
+
+Seeds processed_archives and the archive_search index with synthetic
+archives (realistic names, 5-40 member paths each, some named after the
+model and some generic), then times DatabaseManager.search for a rare
+member, a very common one, a prefix and a tag, next to the LIKE scan of
+processed_archives.file_list it replaces.
+
+    python -m src.benchmarks.bench_search --archives 100000
+"""
+import argparse
+import json
+import random
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from src.benchmarks.library_generator import load_vocabulary, make_name
+from src.database.database import DatabaseManager
+from src.database.search import search_document
+
+PARTS = ["bust", "base", "arm_left", "arm_right", "head", "torso", "weapon", "cape", "legs"]
+VARIANTS = ["", "_supported", "_presupported", "_hollow"]
+
+
+def seed_database(db_path: Path, archives: int, seed: int = 0) -> tuple:
+    """Fill processed_archives and archive_search.
+
+    Returns (archive names and model-specific member names, entry count).
+    """
+    DatabaseManager(str(db_path))
+    rng = random.Random(seed)
+    vocab = load_vocabulary()
+    conn = sqlite3.connect(db_path)
+    samples = []
+    entries = 0
+    records, documents = [], []
+
+    def flush():
+        conn.executemany(
+            "INSERT INTO processed_archives (id, file_path, content_hash, file_list, "
+            "analysis_data) VALUES (?, ?, ?, ?, ?)", records)
+        conn.executemany(
+            "INSERT INTO archive_search (rowid, name, suggested_name, tags, members) "
+            "VALUES (?, ?, ?, ?, ?)", documents)
+        records.clear()
+        documents.clear()
+
+    for i in range(1, archives + 1):
+        name = make_name(rng, vocab)
+        stem = name.lower().replace(" ", "_")
+        members = [
+            f"{stem}/{stem}_{rng.choice(PARTS)}{rng.choice(VARIANTS)}.stl"
+            if j % 2 else f"{stem}/{rng.choice(PARTS)}_{j}{rng.choice(VARIANTS)}.stl"
+            for j in range(rng.randint(5, 40))
+        ] + [f"{stem}/readme.pdf"]
+        entries += len(members)
+        if i % max(1, archives // 20) == 0:
+            samples.append(f"{stem}_{i}.zip")
+            samples.append(members[1].split("/")[-1])
+        analysis = {'suggested_category': rng.choice(["FIG", "TERRAIN", "MISC"]),
+                    'suggested_tags': rng.sample(["STL", "SUPPORTED", "32MM", "75MM"], 2)}
+        path = f"/library/{i % 500}/{name}_{i}.zip"
+        records.append((i, path, f"{i:064x}", json.dumps(members), json.dumps(analysis)))
+        documents.append((i, *search_document(path, members, analysis, name).values()))
+        if len(records) >= 10_000:
+            flush()
+    flush()
+    conn.commit()
+    conn.close()
+    return samples, entries
+
+
+def timed(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(archives: int) -> dict:
+    results = {"archives": archives}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "search.db"
+        start = time.perf_counter()
+        samples, entries = seed_database(db_path, archives)
+        results["entries"] = entries
+        results["seed_s"] = time.perf_counter() - start
+        db = DatabaseManager(str(db_path))
+        member = samples[len(samples) // 2 + 1]
+        queries = {
+            "rare member file": member,
+            "common member file": "torso_0_supported.stl",
+            "prefix while typing": member[:5],
+            "tag filter": ("supported", ["tags"]),
+        }
+        for label, query in queries.items():
+            text, fields = query if isinstance(query, tuple) else (query, None)
+            hits = len(db.search(text, fields=fields))
+            results[label] = {"query": text, "hits": hits,
+                              "ms": timed(lambda: db.search(text, fields=fields)) * 1000}
+
+        conn = sqlite3.connect(db_path)
+        for label, text in (("LIKE, rare member", member),
+                            ("LIKE, common member", "torso_0_supported.stl")):
+            like = lambda: conn.execute(
+                "SELECT id, file_path FROM processed_archives WHERE file_list LIKE ? LIMIT 50",
+                (f"%{text}%",)).fetchall()
+            results[label] = {"query": text, "hits": len(like()),
+                              "ms": timed(like, repeat=1) * 1000}
+        conn.close()
+        db.engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--archives", type=int, default=100000)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run(args.archives)
+    print(f"{results['archives']:,} archives, {results['entries']:,} member entries "
+          f"(seeded in {results['seed_s']:.1f}s)")
+    for label, row in results.items():
+        if isinstance(row, dict):
+            print(f"{label:<24}{row['ms']:>10.1f} ms  {row['hits']:>4} hits  ({row['query']})")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
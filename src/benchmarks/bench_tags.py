@@ -0,0 +1,132 @@
+"""Tagging many files: TagService.tag_files against the per-tag ORM loop.
+
+Seeds files, then tags every one with 3-6 of a few hundred names in a
+single TagService.tag_files transaction, tags them all again (which must
+add nothing), and times the per-tag loop add_tags_to_file used before on
+a sample of files with the tags already created, extrapolated to all of
+them. Also times loading the
+name -> id map, which happens once per DatabaseManager.
+
+    python -m src.benchmarks.bench_tags --files 100000
+"""
+import argparse
+import json
+import random
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from src.database.database import DatabaseManager
+from src.database.models import File, Tag
+
+NAMES = ([f"CREATOR{i}" for i in range(200)] + ["STL", "DOCUMENTED", "SUPPORTED", "NSFW"]
+         + [f"{scale}MM" for scale in (28, 32, 54, 75)])
+
+
+def seed_files(db_path: Path, files: int):
+    DatabaseManager(str(db_path))
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        "INSERT INTO files (id, original_name, original_path, content_hash, status) "
+        "VALUES (?, ?, ?, ?, 'pending')",
+        ((i, f"model_{i}.zip", f"/library/{i % 500}/model_{i}.zip", f"{i:064x}")
+         for i in range(1, files + 1))
+    )
+    conn.commit()
+    conn.close()
+
+
+def legacy_add_tags_to_file(db: DatabaseManager, file_id: int, tag_names: list):
+    """add_tag and add_tags_to_file as they were: a session per tag lookup.
+
+    Creating a tag this way fails with "database is locked": the outer
+    session's read transaction blocks the inner session's write. So the
+    tags exist before this runs and only the lookups are timed.
+    """
+    with db.get_session() as session:
+        file = session.get(File, file_id)
+        if file:
+            for name in tag_names:
+                with db.get_session() as tag_session:
+                    tag = tag_session.query(Tag).filter_by(name=name).first()
+                    if not tag:
+                        tag = Tag(name=name)
+                        tag_session.add(tag)
+                        tag_session.commit()
+                tag = session.merge(tag)
+                if tag not in file.tags:
+                    file.tags.append(tag)
+            session.commit()
+
+
+def link_count(db_path: Path) -> int:
+    conn = sqlite3.connect(db_path)
+    count = conn.execute("SELECT COUNT(*) FROM file_tags").fetchone()[0]
+    conn.close()
+    return count
+
+
+def run(files: int, sample: int) -> dict:
+    rng = random.Random(0)
+    tags_by_file = {i: rng.sample(NAMES, rng.randint(3, 6)) for i in range(1, files + 1)}
+    results = {'files': files, 'links': sum(len(names) for names in tags_by_file.values())}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "tags.db"
+        seed_files(db_path, files)
+        db = DatabaseManager(str(db_path))
+
+        start = time.perf_counter()
+        db.tags.tag_files(tags_by_file)
+        results['tag_files_s'] = time.perf_counter() - start
+        results['stored'] = link_count(db_path)
+
+        start = time.perf_counter()
+        db.tags.tag_files(tags_by_file)
+        results['retag_s'] = time.perf_counter() - start
+        results['stored_after_retag'] = link_count(db_path)
+
+        start = time.perf_counter()
+        db.tags.reload()
+        results['map_load_s'] = time.perf_counter() - start
+
+        legacy_path = Path(tmp) / "legacy.db"
+        seed_files(legacy_path, sample)
+        legacy = DatabaseManager(str(legacy_path))
+        legacy.tags.ids(NAMES)
+        start = time.perf_counter()
+        for file_id in range(1, sample + 1):
+            legacy_add_tags_to_file(legacy, file_id, tags_by_file[file_id])
+        seconds = time.perf_counter() - start
+        results['legacy'] = {'sample': sample, 'seconds': seconds,
+                             'extrapolated_s': seconds * files / sample}
+        db.engine.dispose()
+        legacy.engine.dispose()
+    results['ok'] = results['stored'] == results['stored_after_retag'] == results['links']
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=100000)
+    parser.add_argument("--sample", type=int, default=1000,
+                        help="files tagged with the per-tag loop")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run(args.files, min(args.sample, args.files))
+    legacy = results['legacy']
+    print(f"{results['files']:,} files, {results['links']:,} tag links")
+    print(f"tag_files, one transaction  {results['tag_files_s']:>8.2f}s")
+    print(f"tag_files again             {results['retag_s']:>8.2f}s  "
+          f"({'ok' if results['ok'] else 'FAILED'}: {results['stored_after_retag']:,} links)")
+    print(f"per-tag loop                {legacy['extrapolated_s']:>8.2f}s  "
+          f"(extrapolated from {legacy['sample']:,} files in {legacy['seconds']:.2f}s)")
+    print(f"name -> id map load         {results['map_load_s'] * 1000:>8.1f}ms")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Generate synthetic archive libraries for benchmarks.
+
+Archive names are built from the vocabulary in default_rules.json
+(category, franchise, creator and special patterns) mixed with filler
+words, version numbers and sizes, and joined with the separators real
+uploads use, so rule matching sees realistic input. Members are small
+binary STLs, readme files and incompressible "images".
+
+    python -m src.benchmarks.library_generator /tmp/library --archives 500
+"""
+import argparse
+import io
+import json
+import random
+import shutil
+import struct
+import zipfile
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import py7zr
+
+RULES_FILE = Path(__file__).parent.parent / "rules" / "default_rules.json"
+FILLER = ["bust", "statue", "figure", "base", "set", "collection", "pack", "remix",
+          "fan", "art", "model", "scaled", "supported", "presupported", "keychain"]
+SEPARATORS = ["_", "-", " ", ""]
+
+
+def load_vocabulary(rules_file: Path = RULES_FILE) -> Dict[str, List[str]]:
+    """Patterns from the rules file grouped by section"""
+    with open(rules_file, encoding="utf-8") as f:
+        rules = json.load(f)
+    vocab = {}
+    for section in ("categories", "franchises", "creators", "special_patterns"):
+        vocab[section] = sorted({
+            pattern for data in rules.get(section, {}).values()
+            for pattern in data.get("patterns", [])
+        })
+    return vocab
+
+
+def make_name(rng: random.Random, vocab: Dict[str, List[str]]) -> str:
+    """One archive stem such as 'Hex3D_Mandalorian-Helmet_v2_32mm'"""
+    words = []
+    for section, chance in (("creators", 0.4), ("franchises", 0.5),
+                            ("categories", 0.6), ("special_patterns", 0.3)):
+        if vocab.get(section) and rng.random() < chance:
+            words.extend(rng.choice(vocab[section]).split())
+    words.extend(rng.sample(FILLER, rng.randint(1, 3)))
+    if rng.random() < 0.3:
+        words.append(f"v{rng.randint(1, 5)}")
+    if rng.random() < 0.3:
+        words.append(f"{rng.choice([28, 32, 54, 75, 120])}mm")
+    rng.shuffle(words)
+
+    separator = rng.choice(SEPARATORS)
+    if separator == "":
+        # camelCase / PascalCase
+        return "".join(w[:1].upper() + w[1:] for w in words)
+    return separator.join(w.capitalize() if rng.random() < 0.5 else w for w in words)
+
+
+def make_stl(rng: np.random.Generator, size: int) -> bytes:
+    """Binary STL of roughly ``size`` bytes with random triangles"""
+    count = max(1, (size - 84) // 50)
+    triangles = np.zeros(count, dtype=[
+        ("normal", "<f4", (3,)), ("vertices", "<f4", (3, 3)), ("attributes", "<u2")
+    ])
+    triangles["vertices"] = rng.random((count, 3, 3), dtype=np.float32) * 100
+    return b"\0" * 80 + struct.pack("<I", count) + triangles.tobytes()
+
+
+def make_members(rng: random.Random, nprng: np.random.Generator, stem: str,
+                 entries: int, entry_size: int) -> List[tuple]:
+    members = []
+    for i in range(entries):
+        size = max(128, int(entry_size * rng.uniform(0.5, 1.5)))
+        kind = rng.random()
+        if kind < 0.7:
+            members.append((f"{stem}/parts/part_{i:03d}.stl", make_stl(nprng, size)))
+        elif kind < 0.85:
+            members.append((f"{stem}/images/render_{i:03d}.jpg", nprng.bytes(size)))
+        else:
+            text = f"Print settings for {stem}\n" * max(1, size // 40)
+            members.append((f"{stem}/readme_{i:03d}.txt", text.encode("utf-8")))
+    return members
+
+
+def write_archive(path: Path, members: List[tuple]):
+    if path.suffix == ".zip":
+        with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for name, data in members:
+                zf.writestr(name, data)
+    else:
+        with py7zr.SevenZipFile(path, "w") as sz:
+            for name, data in members:
+                sz.writef(io.BytesIO(data), name)
+
+
+def generate_library(root: Path, archives: int = 200, entries: int = 20,
+                     entry_size: int = 16 * 1024, duplicate_rate: float = 0.1,
+                     formats=("zip", "7z"), seed: int = 0) -> Dict:
+    """Write a synthetic library into ``root``; returns a manifest.
+
+    ``duplicate_rate`` is the share of archives that are byte-identical
+    copies of an earlier archive saved under a different name.
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    nprng = np.random.default_rng(seed)
+    vocab = load_vocabulary()
+
+    manifest = {"archives": [], "duplicates": 0, "entries": 0, "bytes": 0}
+    originals = []
+    used = set()
+    for i in range(archives):
+        stem = make_name(rng, vocab)
+        while stem.lower() in used:
+            stem = f"{stem}_{rng.randint(0, 9999)}"
+        used.add(stem.lower())
+        extension = rng.choice(formats)
+        path = root / f"{stem}.{extension}"
+
+        if originals and rng.random() < duplicate_rate:
+            source = rng.choice(originals)
+            path = path.with_suffix(source.suffix)
+            shutil.copyfile(source, path)
+            manifest["duplicates"] += 1
+            member_count = None
+        else:
+            member_count = max(1, int(entries * rng.uniform(0.5, 1.5)))
+            write_archive(path, make_members(rng, nprng, stem, member_count, entry_size))
+            originals.append(path)
+            manifest["entries"] += member_count
+        manifest["bytes"] += path.stat().st_size
+        manifest["archives"].append(str(path))
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("root", help="directory to fill")
+    parser.add_argument("--archives", type=int, default=200)
+    parser.add_argument("--entries", type=int, default=20, help="mean members per archive")
+    parser.add_argument("--entry-size", type=int, default=16 * 1024, help="mean member bytes")
+    parser.add_argument("--duplicate-rate", type=float, default=0.1)
+    parser.add_argument("--formats", default="zip,7z")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    manifest = generate_library(
+        Path(args.root), args.archives, args.entries, args.entry_size,
+        args.duplicate_rate, tuple(args.formats.split(",")), args.seed
+    )
+    print(f"{len(manifest['archives'])} archives, {manifest['duplicates']} duplicates, "
+          f"{manifest['entries']} members, {manifest['bytes'] / 2**20:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,22 +3,27 @@ from pathlib import Path
 import zipfile
 import rarfile
 import py7zr
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set
 import json
 import hashlib
 import logging
 from .rules_manager import RulesManager
+from .stl_inspector import StlInspector
+from ..database.models import DOC_EXTENSIONS, STL_EXTENSION
+from ..utils.instrumentation import metrics, timed
 
 
 class ArchiveAnalyzer:
-    def __init__(self):
+    def __init__(self, rules_manager: Optional[RulesManager] = None):
         self.supported_formats = {
             '.zip': self._analyze_zip,
             '.rar': self._analyze_rar,
             '.7z': self._analyze_7z
         }
-        self.rules_manager = RulesManager()
+        self.rules_manager = rules_manager or RulesManager()
+        self.stl_inspector = StlInspector()
 
+    @timed('archive.analyze')
     def analyze_archive(self, filepath: Path) -> Dict:
         """Main analysis method"""
         result = {
@@ -31,6 +36,7 @@ class ArchiveAnalyzer:
             'contains_stls': False,
             'contains_docs': False,
             'file_list': [],
+            'models': [],
             'error': None
         }
 
@@ -41,15 +47,19 @@ class ArchiveAnalyzer:
 
         try:
             # Analyze archive contents
-            archive_info = self.supported_formats[result['extension']](filepath)
+            with metrics.timer('archive.list'):
+                archive_info = self.supported_formats[result['extension']](filepath)
             result.update(archive_info)
 
-            # Analyze filename for patterns using rules
-            name_analysis = self._analyze_filename(filepath.stem)
-            result.update(name_analysis)
+            # Measure the models themselves (triangle counts, bounding boxes)
+            if result['contains_stls']:
+                with metrics.timer('archive.stl_inspect'):
+                    inspection = self.stl_inspector.inspect_archive(filepath)
+                metrics.add_bytes('archive.stl_inspect', inspection['bytes_read'])
+                result['models'] = inspection['models']
+                result['models_partial'] = inspection['budget_exhausted']
 
-            # Generate suggestions based on rules
-            self._generate_suggestions(result)
+            self.apply_name_rules(result)
 
         except Exception as e:
             result['error'] = str(e)
@@ -57,6 +67,41 @@ class ArchiveAnalyzer:
 
         return result
 
+    def apply_name_rules(self, result: Dict) -> Dict:
+        """Name-analysis stage: derive suggestions from the filename and the
+        listing already in ``result``, without opening the archive again"""
+        result['suggested_tags'] = []
+        result.update(self._analyze_filename(Path(result['filename']).stem))
+        self._generate_suggestions(result)
+        return result
+
+    def refresh_names(self, result: Dict, sections: Set[str]) -> bool:
+        """Re-run the name stage of an earlier result after rules changed.
+
+        ``sections`` are the ones the last RulesManager.update_rules()
+        reported. Names that contain none of the edited patterns are
+        skipped outright; for the rest only the matches fed by those
+        sections are recomputed first, and if they are the same as before
+        the suggestions cannot change and the result is left alone.
+        Returns True when the suggested category or tags changed.
+        """
+        if result.get('error') or 'rule_matches' not in result:
+            return False
+        keys = RulesManager.match_keys(sections)
+        # Model-based tags come from the tag_rules section as well
+        depends_on_models = 'tag_rules' in sections and bool(result.get('models'))
+        stem = Path(result['filename']).stem
+        if not depends_on_models:
+            trigger = self.rules_manager.change_trigger
+            if trigger is not None and not trigger.matches(stem):
+                return False
+            matches = self.rules_manager.test_name(stem, keys)
+            if all(matches[key] == result['rule_matches'].get(key) for key in keys):
+                return False
+        before = (result['suggested_category'], result['suggested_tags'])
+        self.apply_name_rules(result)
+        return (result['suggested_category'], result['suggested_tags']) != before
+
     # These methods remain unchanged as they handle archive operations
     def _analyze_zip(self, filepath: Path) -> Dict:
         """Analyze ZIP archive contents"""
@@ -64,14 +109,10 @@ class ArchiveAnalyzer:
         
         try:
             with zipfile.ZipFile(filepath) as zf:
-                info['file_list'] = zf.namelist()
-                
-                for filename in info['file_list']:
-                    lower_name = filename.lower()
-                    if lower_name.endswith('.stl'):
-                        info['contains_stls'] = True
-                    if lower_name.endswith(('.txt', '.pdf', '.md')):
-                        info['contains_docs'] = True
+                info.update(self._listing(
+                    (member.filename, member.file_size, member.compress_size, member.CRC)
+                    for member in zf.infolist()
+                ))
                         
                 if zf.comment:
                     info['archive_comment'] = zf.comment.decode('utf-8', 'ignore')
@@ -87,14 +128,10 @@ class ArchiveAnalyzer:
         
         try:
             with rarfile.RarFile(filepath) as rf:
-                info['file_list'] = rf.namelist()
-                
-                for filename in info['file_list']:
-                    lower_name = filename.lower()
-                    if lower_name.endswith('.stl'):
-                        info['contains_stls'] = True
-                    if lower_name.endswith(('.txt', '.pdf', '.md')):
-                        info['contains_docs'] = True
+                info.update(self._listing(
+                    (member.filename, member.file_size, member.compress_size, member.CRC)
+                    for member in rf.infolist()
+                ))
                         
                 if rf.comment:
                     info['archive_comment'] = rf.comment
@@ -110,30 +147,46 @@ class ArchiveAnalyzer:
         
         try:
             with py7zr.SevenZipFile(filepath) as sz:
-                info['file_list'] = sz.getnames()
-                
-                for filename in info['file_list']:
-                    lower_name = filename.lower()
-                    if lower_name.endswith('.stl'):
-                        info['contains_stls'] = True
-                    if lower_name.endswith(('.txt', '.pdf', '.md')):
-                        info['contains_docs'] = True
+                # Solid archives compress members together, so per-member
+                # compressed sizes are often None
+                info.update(self._listing(
+                    (member.filename, member.uncompressed, member.compressed, member.crc32)
+                    for member in sz.list()
+                ))
         except Exception as e:
             info['error'] = f"7Z analysis error: {str(e)}"
             logging.error(f"Error analyzing 7Z {filepath}: {e}")
             
         return info
 
+    @staticmethod
+    def _listing(members) -> Dict:
+        """file_list, entries and content flags from (path, size,
+        compressed size, CRC) tuples; entries are what
+        DatabaseManager.record_processed_archive stores"""
+        entries = [
+            {'path': path, 'size': size, 'compressed_size': compressed_size, 'crc': crc}
+            for path, size, compressed_size, crc in members
+        ]
+        file_list = [entry['path'] for entry in entries]
+        lower_names = [name.lower() for name in file_list]
+        return {
+            'file_list': file_list,
+            'entries': entries,
+            'contains_stls': any(name.endswith(STL_EXTENSION) for name in lower_names),
+            'contains_docs': any(name.endswith(DOC_EXTENSIONS) for name in lower_names)
+        }
+
     def _analyze_filename(self, filename: str) -> Dict:
         """Analyze filename using rules"""
+        # Use rules manager to analyze filename
+        rule_matches = self.rules_manager.test_name(filename)
         result = {
             'detected_patterns': [],
-            'potential_tags': []
+            'potential_tags': [],
+            'rule_matches': rule_matches
         }
         
-        # Use rules manager to analyze filename
-        rule_matches = self.rules_manager.test_name(filename)
-        
         # Add matching categories
         if rule_matches['categories']:
             result['detected_patterns'].extend(
@@ -170,4 +223,11 @@ class ArchiveAnalyzer:
         if result['contains_stls']:
             result['suggested_tags'].append('STL')
         if result['contains_docs']:
-            result['suggested_tags'].append('DOCUMENTED')
\ No newline at end of file
+            result['suggested_tags'].append('DOCUMENTED')
+
+        # Add size-class and polycount tags from the measured models
+        if result.get('models'):
+            model_rules = self.rules_manager.rules.get('tag_rules', {}).get('model_based_tags', {})
+            result['suggested_tags'].extend(
+                StlInspector.classify(result['models'], model_rules)
+            )
\ No newline at end of file
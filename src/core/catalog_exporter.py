@@ -0,0 +1,139 @@
+import csv
+import gzip
+import json
+import os
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import selectinload
+
+from ..database.models import File
+
+
+class ExportCancelled(Exception):
+    """An export was cancelled; nothing was left at its target"""
+
+
+class CatalogExporter:
+    """Streams the files table to CSV, JSON or JSON Lines.
+
+    Rows are read in pages using keyset pagination on the primary key, with
+    tags eager-loaded per page through selectinload, and each page is
+    written before the next one is fetched, so memory stays flat no matter
+    how large the history is. Output is gzip-compressed when the file name
+    ends in '.gz'. It goes to a '.tmp' file next to the target, which
+    replaces the target only once the export is complete.
+    """
+
+    FORMATS = ('csv', 'json', 'jsonl')
+    CSV_HEADER = ["Original Name", "New Name", "Status", "Tags", "Category"]
+
+    def __init__(self, db, batch_size: int = 1000):
+        self.db = db
+        self.batch_size = batch_size
+
+    def count(self) -> int:
+        with self.db.get_session() as session:
+            return session.query(func.count(File.id)).scalar()
+
+    def iter_batches(self) -> Iterator[List[Dict]]:
+        """Yield pages of export records ordered by file id"""
+        last_id = 0
+        with self.db.get_session() as session:
+            while True:
+                files = (
+                    session.query(File)
+                    .options(selectinload(File.tags))
+                    .filter(File.id > last_id)
+                    .order_by(File.id)
+                    .limit(self.batch_size)
+                    .all()
+                )
+                if not files:
+                    return
+                last_id = files[-1].id
+                yield [self._record(file) for file in files]
+                # Drop the page from the identity map before fetching the next
+                session.expunge_all()
+
+    def export(self, filename: str, format_type: str,
+               progress: Optional[Callable[[int, int], None]] = None,
+               is_cancelled: Optional[Callable[[], bool]] = None) -> int:
+        """Write the catalog to filename; returns the number of rows written.
+
+        Raises ExportCancelled if ``is_cancelled`` returns True between
+        pages, leaving any earlier file at filename untouched.
+        """
+        if format_type not in self.FORMATS:
+            raise ValueError(f"Unsupported export format: {format_type}")
+
+        total = self.count()
+        written = 0
+        partial = Path(f"{filename}.tmp")
+        try:
+            with self._open(partial, str(filename).endswith('.gz')) as f:
+                writer = self._start(f, format_type)
+                for records in self.iter_batches():
+                    if is_cancelled and is_cancelled():
+                        raise ExportCancelled(f"Export to {filename} cancelled")
+                    for record in records:
+                        writer(record, written)
+                        written += 1
+                    if progress:
+                        progress(written, total)
+                if format_type == 'json':
+                    f.write("\n]\n" if written else "]\n")
+            os.replace(partial, filename)
+        except BaseException:
+            partial.unlink(missing_ok=True)
+            raise
+        return written
+
+    @staticmethod
+    def _open(filename, compress: bool):
+        if compress:
+            return gzip.open(filename, 'wt', newline='', encoding='utf-8')
+        return open(filename, 'w', newline='', encoding='utf-8')
+
+    def _start(self, f, format_type: str) -> Callable[[Dict, int], None]:
+        """Write any header and return a per-record writer"""
+        if format_type == 'csv':
+            csv_writer = csv.writer(f)
+            csv_writer.writerow(self.CSV_HEADER)
+
+            def write(record, index):
+                csv_writer.writerow([
+                    record['original_name'],
+                    record['new_name'] or "",
+                    record['status'],
+                    ", ".join(record['tags']),
+                    record['category']
+                ])
+            return write
+
+        if format_type == 'json':
+            f.write("[")
+
+            def write(record, index):
+                f.write(",\n  " if index else "\n  ")
+                f.write(json.dumps(record))
+            return write
+
+        def write(record, index):
+            f.write(json.dumps(record))
+            f.write("\n")
+        return write
+
+    @staticmethod
+    def _record(file: File) -> Dict:
+        return {
+            "original_name": file.original_name,
+            "new_name": file.new_name,
+            "status": file.status,
+            "tags": [tag.name for tag in file.tags],
+            "category": "",
+            "content_hash": file.content_hash,
+            "processed_date": file.last_modified.isoformat()
+                if file.last_modified else None
+        }
@@ -0,0 +1,315 @@
+import os
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+
+from .catalog_exporter import ExportCancelled
+from ..database.models import ArchiveEntry, File, Tag, ProcessedArchive, file_tags
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+
+class ColumnarExporter:
+    """Exports the catalog as compact column tables for analytics.
+
+    Tables: files, tags, file_tags, archives, archive_entries and
+    entry_names. Each distinct archive member path is stored once in
+    entry_names, and archive_entries holds (archive_id, name_id) with the
+    member's sizes and CRC.
+
+    Formats:
+    - 'parquet' / 'arrow': one file per table in a directory (needs pyarrow).
+      Pages are written as they are read, so memory stays flat apart from
+      the map of distinct member paths behind entry_names. Arrow files are
+      LZ4 compressed; their strings are not dictionary encoded, since the
+      IPC file format cannot change a dictionary between batches.
+    - 'npz': a single NumPy archive where every string column is dictionary
+      encoded as int32 codes plus a UTF-8 buffer and offsets, so it loads
+      without pickle; read it back with ``load_npz``. NumPy writes an npz
+      from complete arrays, so this one is built in memory; use parquet
+      for catalogs that do not fit.
+
+    Files are written under '.tmp' names and renamed into place once all
+    of them are complete, so a cancelled or failed export leaves nothing
+    partial behind.
+    """
+
+    FORMATS = ('parquet', 'arrow', 'npz')
+    TABLES = {
+        'files': (('id', 'int'), ('original_name', 'str'), ('new_name', 'str'),
+                  ('original_path', 'str'), ('content_hash', 'str'), ('quick_hash', 'str'),
+                  ('status', 'str'), ('first_seen', 'time'), ('last_modified', 'time')),
+        'tags': (('id', 'int'), ('name', 'str'), ('category', 'str')),
+        'file_tags': (('file_id', 'int'), ('tag_id', 'int')),
+        'archives': (('id', 'int'), ('file_path', 'str'), ('content_hash', 'str'),
+                     ('processed_date', 'time')),
+        'archive_entries': (('archive_id', 'int'), ('name_id', 'int'), ('size', 'int'),
+                            ('compressed_size', 'int'), ('crc', 'int')),
+        'entry_names': (('id', 'int'), ('name', 'str')),
+    }
+    # Pages are gathered into row groups / record batches of about this size
+    GROUP_ROWS = 64 * 1024
+
+    def __init__(self, db, batch_size: int = 5000):
+        self.db = db
+        self.batch_size = batch_size
+
+    @staticmethod
+    def default_format() -> str:
+        return 'parquet' if pa is not None else 'npz'
+
+    def export(self, target: str, format_type: str = None,
+               progress: Optional[Callable[[int, int], None]] = None,
+               is_cancelled: Optional[Callable[[], bool]] = None) -> int:
+        """Write all tables; returns the total number of rows written"""
+        format_type = format_type or self.default_format()
+        if format_type not in self.FORMATS:
+            raise ValueError(f"Unsupported columnar format: {format_type}")
+        if format_type != 'npz' and pa is None:
+            raise ValueError(f"pyarrow is required for {format_type} export")
+
+        if format_type != 'npz':
+            return self._write_arrow(self.iter_batches(progress, is_cancelled),
+                                     Path(target), format_type)
+        tables = self.collect_tables(progress, is_cancelled)
+        self._write_npz(tables, target)
+        return sum(len(next(iter(t.values()))) for t in tables.values() if t)
+
+    def collect_tables(self, progress=None, is_cancelled=None) -> Dict[str, Dict[str, list]]:
+        """Read the whole catalog into plain column lists"""
+        tables = {name: self._columns(name) for name in self.TABLES}
+        for name, columns in self.iter_batches(progress, is_cancelled):
+            for column, values in columns.items():
+                tables[name][column].extend(values)
+        return tables
+
+    def iter_batches(self, progress=None,
+                     is_cancelled=None) -> Iterator[Tuple[str, Dict[str, list]]]:
+        """Read the catalog one page at a time as (table, columns) pairs.
+
+        Raises ExportCancelled if ``is_cancelled`` returns True between pages.
+        """
+        name_ids: Dict[str, int] = {}
+
+        def page_done():
+            if is_cancelled and is_cancelled():
+                raise ExportCancelled("Catalog export cancelled")
+
+        with self.db.get_session() as session:
+            total = (
+                session.query(File).count()
+                + session.query(ProcessedArchive).count()
+            )
+            done = 0
+
+            for rows in self._pages(session, File.__table__):
+                yield 'files', self._page_columns('files', rows)
+                done += len(rows)
+                if progress:
+                    progress(done, total)
+                page_done()
+
+            for rows in self._pages(session, Tag.__table__):
+                yield 'tags', self._page_columns('tags', rows)
+                page_done()
+            links = session.execute(
+                select(file_tags.c.file_id, file_tags.c.tag_id)
+                .execution_options(yield_per=self.batch_size)
+            )
+            for rows in links.partitions():
+                yield 'file_tags', self._page_columns('file_tags', rows)
+                page_done()
+
+            for rows in self._pages(session, ProcessedArchive.__table__):
+                yield 'archives', self._page_columns('archives', rows)
+                entries = self._columns('archive_entries')
+                for entry in session.execute(
+                    select(ArchiveEntry.archive_id, ArchiveEntry.path, ArchiveEntry.size,
+                           ArchiveEntry.compressed_size, ArchiveEntry.crc)
+                    .where(ArchiveEntry.archive_id.between(rows[0].id, rows[-1].id))
+                    .order_by(ArchiveEntry.archive_id, ArchiveEntry.id)
+                ):
+                    name_id = name_ids.get(entry.path)
+                    if name_id is None:
+                        name_id = name_ids[entry.path] = len(name_ids)
+                    entries['archive_id'].append(entry.archive_id)
+                    entries['name_id'].append(name_id)
+                    entries['size'].append(entry.size)
+                    entries['compressed_size'].append(entry.compressed_size)
+                    entries['crc'].append(entry.crc)
+                if entries['archive_id']:
+                    yield 'archive_entries', entries
+                done += len(rows)
+                if progress:
+                    progress(done, total)
+                page_done()
+
+        names = list(name_ids)
+        for start in range(0, len(names), self.batch_size):
+            page = names[start:start + self.batch_size]
+            yield 'entry_names', {'id': list(range(start, start + len(page))), 'name': page}
+
+    def _pages(self, session, table):
+        """Keyset pagination over a table's integer primary key"""
+        last_id = 0
+        while True:
+            rows = session.execute(
+                select(table).where(table.c.id > last_id)
+                .order_by(table.c.id).limit(self.batch_size)
+            ).all()
+            if not rows:
+                return
+            last_id = rows[-1].id
+            yield rows
+
+    @classmethod
+    def _columns(cls, table: str) -> Dict[str, list]:
+        return {name: [] for name, _ in cls.TABLES[table]}
+
+    @classmethod
+    def _page_columns(cls, table: str, rows) -> Dict[str, list]:
+        return {name: [getattr(row, name) for row in rows] for name, _ in cls.TABLES[table]}
+
+    @classmethod
+    def _arrow_schema(cls, table: str):
+        types = {'int': pa.int64(), 'str': pa.string(), 'time': pa.timestamp('us')}
+        return pa.schema([(name, types[kind]) for name, kind in cls.TABLES[table]])
+
+    def _write_arrow(self, batches: Iterable[Tuple[str, Dict[str, list]]],
+                     directory: Path, format_type: str) -> int:
+        directory.mkdir(parents=True, exist_ok=True)
+        writers = {}
+        pending: Dict[str, list] = {name: [] for name in self.TABLES}
+        written = []
+        rows = 0
+
+        def flush(name):
+            if pending[name]:
+                writers[name].write_table(pa.Table.from_batches(pending[name]))
+                pending[name] = []
+
+        try:
+            for name in self.TABLES:
+                target = directory / f"{name}.{format_type}"
+                partial = target.with_name(target.name + ".tmp")
+                written.append((partial, target))
+                schema = self._arrow_schema(name)
+                if format_type == 'parquet':
+                    writers[name] = pq.ParquetWriter(partial, schema, use_dictionary=True)
+                else:
+                    writers[name] = pa.ipc.new_file(
+                        partial, schema, options=pa.ipc.IpcWriteOptions(compression='lz4'))
+
+            for name, columns in batches:
+                batch = pa.RecordBatch.from_pydict(columns, schema=self._arrow_schema(name))
+                pending[name].append(batch)
+                rows += batch.num_rows
+                if sum(b.num_rows for b in pending[name]) >= self.GROUP_ROWS:
+                    flush(name)
+            for name in self.TABLES:
+                flush(name)
+                writers.pop(name).close()
+        except BaseException:
+            for writer in writers.values():
+                writer.close()
+            for partial, _ in written:
+                partial.unlink(missing_ok=True)
+            raise
+        for partial, target in written:
+            os.replace(partial, target)
+        return rows
+
+    def _write_npz(self, tables: Dict[str, Dict[str, list]], filename: str):
+        arrays = {}
+        for table_name, columns in tables.items():
+            for column, values in columns.items():
+                key = f"{table_name}.{column}"
+                arrays.update(self._encode_column(key, values))
+        if not str(filename).endswith('.npz'):
+            filename = f"{filename}.npz"
+        # Through a file object, so savez does not append '.npz' to the name
+        partial = Path(f"{filename}.tmp")
+        try:
+            with open(partial, 'wb') as f:
+                np.savez_compressed(f, **arrays)
+            os.replace(partial, filename)
+        except BaseException:
+            partial.unlink(missing_ok=True)
+            raise
+
+    @staticmethod
+    def _encode_column(key: str, values: List) -> Dict[str, np.ndarray]:
+        sample = next((v for v in values if v is not None), None)
+        is_id = key.endswith('.id') or key.endswith('_id')
+        if isinstance(sample, int) or (sample is None and is_id):
+            data = np.array([-1 if v is None else v for v in values], dtype=np.int64)
+            return {f"{key}.int": data}
+        if hasattr(sample, 'isoformat'):
+            data = np.array(
+                [np.datetime64(v, 'us') if v is not None else np.datetime64('NaT')
+                 for v in values],
+                dtype='datetime64[us]'
+            )
+            return {f"{key}.datetime": data}
+
+        # Dictionary encode strings: code -1 means NULL
+        dictionary: Dict[str, int] = {}
+        codes = np.empty(len(values), dtype=np.int32)
+        for i, value in enumerate(values):
+            if value is None:
+                codes[i] = -1
+                continue
+            code = dictionary.get(value)
+            if code is None:
+                code = dictionary[value] = len(dictionary)
+            codes[i] = code
+        encoded = [s.encode('utf-8') for s in dictionary]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        return {
+            f"{key}.codes": codes,
+            f"{key}.dict_data": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            f"{key}.dict_offsets": offsets,
+        }
+
+
+def load_npz(filename: str, decode: bool = True) -> Dict[str, Dict[str, np.ndarray]]:
+    """Load an npz catalog export back into {table: {column: array}}.
+
+    With ``decode=False`` string columns stay dictionary encoded as
+    (codes, dictionary) tuples, which is the fast path for grouping and
+    counting.
+    """
+    tables: Dict[str, Dict[str, np.ndarray]] = {}
+    with np.load(filename) as data:
+        keys = set(data.files)
+        for key in sorted(keys):
+            table, column, kind = key.split('.', 2)
+            if kind in ('dict_data', 'dict_offsets'):
+                continue
+            if kind == 'codes':
+                raw = data[f"{table}.{column}.dict_data"].tobytes()
+                offsets = data[f"{table}.{column}.dict_offsets"]
+                dictionary = np.array(
+                    [raw[offsets[i]:offsets[i + 1]].decode('utf-8')
+                     for i in range(len(offsets) - 1)],
+                    dtype=object
+                )
+                codes = data[key]
+                if decode:
+                    values = np.empty(len(codes), dtype=object)
+                    present = codes >= 0
+                    values[present] = dictionary[codes[present]]
+                    value = values
+                else:
+                    value = (codes, dictionary)
+            else:
+                value = data[key]
+            tables.setdefault(table, {})[column] = value
+    return tables
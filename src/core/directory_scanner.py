@@ -0,0 +1,100 @@
+import fnmatch
+import logging
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class ScanResult:
+    """Extension index produced by a single directory walk"""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.index: Dict[str, List[os.DirEntry]] = defaultdict(list)
+        self.directories = 0
+
+    def counts(self) -> Dict[str, int]:
+        """Number of files per extension"""
+        return {ext: len(entries) for ext, entries in self.index.items()}
+
+    def entries(self, extensions: Iterable[str]) -> List[os.DirEntry]:
+        result = []
+        for ext in extensions:
+            result.extend(self.index.get(ext.lower(), []))
+        return result
+
+    def files(self, extensions: Iterable[str]) -> List[Path]:
+        """Paths for the given extensions, in a stable order"""
+        return sorted(Path(entry.path) for entry in self.entries(extensions))
+
+
+class DirectoryScanner:
+    """Single-pass os.scandir walker that indexes files by extension.
+
+    Only directory listings are read; file type comes from the DirEntry
+    d_type and stat() results are cached on the entry, so callers asking
+    for size or mtime don't trigger extra syscalls. With ``max_workers``
+    above one, subdirectories are listed concurrently, which helps on
+    network shares where each listing is a round trip.
+    """
+
+    def __init__(self, ignore_patterns: Optional[Iterable[str]] = None,
+                 max_workers: int = 1):
+        self.ignore_patterns = [p.lower() for p in (ignore_patterns or [])]
+        self.max_workers = max(1, max_workers)
+
+    def scan(self, root: Path, extensions: Optional[Iterable[str]] = None) -> ScanResult:
+        """Walk root recursively, indexing files (optionally only some extensions)"""
+        wanted = {ext.lower() for ext in extensions} if extensions else None
+        result = ScanResult(Path(root))
+
+        if self.max_workers == 1:
+            stack = [str(root)]
+            while stack:
+                files, subdirs = self._list_directory(stack.pop(), wanted)
+                self._merge(result, files)
+                stack.extend(subdirs)
+            return result
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            running = {pool.submit(self._list_directory, str(root), wanted)}
+            while running:
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    files, subdirs = future.result()
+                    self._merge(result, files)
+                    for subdir in subdirs:
+                        running.add(pool.submit(self._list_directory, subdir, wanted))
+        return result
+
+    def _merge(self, result: ScanResult, files: List[Tuple[str, os.DirEntry]]):
+        result.directories += 1
+        for ext, entry in files:
+            result.index[ext].append(entry)
+
+    def _is_ignored(self, name: str) -> bool:
+        lower_name = name.lower()
+        return any(fnmatch.fnmatchcase(lower_name, p) for p in self.ignore_patterns)
+
+    def _list_directory(self, path: str, wanted) -> Tuple[List, List[str]]:
+        files = []
+        subdirs = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if self.ignore_patterns and self._is_ignored(entry.name):
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif entry.is_file():
+                            ext = os.path.splitext(entry.name)[1].lower()
+                            if ext and (wanted is None or ext in wanted):
+                                files.append((ext, entry))
+                    except OSError:
+                        continue
+        except OSError as e:
+            logging.warning(f"Cannot list directory {path}: {e}")
+        return files, subdirs
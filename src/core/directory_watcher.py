@@ -0,0 +1,192 @@
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .directory_scanner import DirectoryScanner
+from .file_hasher import FileHasher
+
+
+class ChangeDetector:
+    """Tracks archives under watched folders and reports settled changes.
+
+    A snapshot of (size, mtime) per archive is kept for each folder. Every
+    scan diffs the folder against its snapshot; new and changed archives are
+    held back until their stat has been stable for ``debounce_seconds`` so a
+    copy that is still being written is only reported once it finishes.
+    Moves are matched either within a scan (same size and mtime) or against
+    the hashes already stored in the database, so a moved archive is
+    re-pointed instead of being analyzed again.
+
+    scan() only lists folders and compares stats. With a database, the
+    arrivals it could not pair are returned as 'unresolved' and the moves
+    are not yet recorded; resolve() does that part, which reads files to
+    hash them, so callers on the GUI thread run it in a worker.
+    """
+
+    def __init__(self, extensions: Iterable[str], debounce_seconds: float = 2.0,
+                 db=None, ignore_patterns: Optional[Iterable[str]] = None):
+        self.extensions = {ext.lower() for ext in extensions}
+        self.scanner = DirectoryScanner(ignore_patterns)
+        self.debounce_seconds = debounce_seconds
+        self.db = db
+        self.folders: Dict[Path, Dict[str, Tuple[int, int]]] = {}
+        # path -> (stat signature, time of last observed change, 'new'|'changed')
+        self.pending: Dict[str, Tuple[Tuple[int, int], float, str]] = {}
+        # vanished path -> (stat signature, time it vanished)
+        self.vanished: Dict[str, Tuple[Tuple[int, int], float]] = {}
+
+    def add_folder(self, folder: Path):
+        """Start tracking a folder; archives already present are not reported"""
+        folder = Path(folder)
+        self.folders[folder] = self._snapshot(folder)
+
+    def remove_folder(self, folder: Path):
+        folder = Path(folder)
+        self.folders.pop(folder, None)
+        prefix = str(folder) + os.sep
+        for store in (self.pending, self.vanished):
+            for path in [p for p in store if p.startswith(prefix)]:
+                del store[path]
+
+    @property
+    def has_pending(self) -> bool:
+        return bool(self.pending or self.vanished)
+
+    def scan(self, folders: Optional[Iterable[Path]] = None,
+             now: Optional[float] = None) -> Dict[str, list]:
+        """Rescan folders and return settled new/changed/moved/removed archives.
+
+        With a database, settled arrivals without a stat match are listed
+        under 'unresolved' as (path, 'new'|'changed') for resolve().
+        """
+        now = time.monotonic() if now is None else now
+        result = {'new': [], 'changed': [], 'moved': [], 'removed': [], 'unresolved': []}
+        targets = list(self.folders) if folders is None else [Path(f) for f in folders]
+
+        for folder in targets:
+            if folder not in self.folders:
+                continue
+            old = self.folders[folder]
+            current = self._snapshot(folder)
+            for path, sig in current.items():
+                previous = old.get(path)
+                if previous == sig:
+                    continue
+                pending = self.pending.get(path)
+                if pending is None:
+                    kind = 'new' if previous is None else 'changed'
+                    self.pending[path] = (sig, now, kind)
+                elif pending[0] != sig:
+                    self.pending[path] = (sig, now, pending[2])
+            for path, sig in old.items():
+                if path not in current:
+                    self.vanished[path] = (sig, now)
+                    self.pending.pop(path, None)
+            self.folders[folder] = current
+
+        # Pair vanished archives with arrivals that carry the same stat signature
+        by_sig: Dict[Tuple[int, int], List[str]] = {}
+        for path, (sig, _) in self.vanished.items():
+            by_sig.setdefault(sig, []).append(path)
+
+        for path, (sig, changed_at, kind) in list(self.pending.items()):
+            if now - changed_at < self.debounce_seconds:
+                continue
+            del self.pending[path]
+            candidates = by_sig.get(sig)
+            if candidates:
+                old_path = candidates.pop()
+                del self.vanished[old_path]
+                result['moved'].append((Path(old_path), Path(path)))
+            elif self.db is not None:
+                result['unresolved'].append((Path(path), kind))
+            else:
+                result[kind].append(Path(path))
+
+        # A vanished archive with no arrival inside the debounce window is gone
+        for path, (sig, vanished_at) in list(self.vanished.items()):
+            if now - vanished_at >= self.debounce_seconds * 2:
+                del self.vanished[path]
+                result['removed'].append(Path(path))
+
+        return result
+
+    def resolve(self, result: Dict[str, list]) -> Dict[str, list]:
+        """Finish a scan() result against the database.
+
+        Records the moves found by stat and checks each unresolved arrival
+        against the stored hashes: a match is a move from a path that no
+        longer exists, anything else is new or changed. Hashes the files
+        involved, so keep it off the GUI thread. Returns a new result and
+        leaves the one passed in untouched.
+        """
+        resolved = {key: list(paths) for key, paths in result.items()}
+        resolved['unresolved'] = []
+        for old_path, new_path in result['moved']:
+            self._record_move(old_path, new_path)
+        for path, kind in result['unresolved']:
+            previous_path = self._find_stored_origin(path)
+            if previous_path is not None:
+                resolved['moved'].append((previous_path, path))
+            else:
+                resolved[kind].append(path)
+        return resolved
+
+    @staticmethod
+    def unresolved_as_found(result: Dict[str, list]) -> Dict[str, list]:
+        """A scan() result with every unresolved arrival taken at face value,
+        for when resolve() cannot run. Leaves the one passed in untouched."""
+        found = {key: list(paths) for key, paths in result.items()}
+        found['unresolved'] = []
+        for path, kind in result['unresolved']:
+            found[kind].append(path)
+        return found
+
+    def _snapshot(self, folder: Path) -> Dict[str, Tuple[int, int]]:
+        """Recursively collect (size, mtime_ns) for every watched archive"""
+        snapshot = {}
+        for entry in self.scanner.scan(folder, self.extensions).entries(self.extensions):
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            snapshot[entry.path] = (st.st_size, st.st_mtime_ns)
+        return snapshot
+
+    def _find_stored_origin(self, path: Path) -> Optional[Path]:
+        """Detect a move from a stored hash whose recorded path has vanished"""
+        if self.db is None:
+            return None
+        quick_hash = FileHasher.get_quick_hash(path)
+        if not quick_hash:
+            return None
+        try:
+            size = path.stat().st_size
+        except OSError:
+            return None
+        content_hash = None
+        for record in self.db.get_files_by_quick_hash(quick_hash, size):
+            if record.original_path == str(path):
+                continue
+            if Path(record.original_path).exists():
+                continue
+            if record.content_hash:
+                content_hash = content_hash or FileHasher.get_content_hash(path)
+                if content_hash != record.content_hash:
+                    continue
+            self.db.update_file_path(record.id, path)
+            logging.info(f"Recognized moved archive {record.original_path} -> {path}")
+            return Path(record.original_path)
+        return None
+
+    def _record_move(self, old_path: Path, new_path: Path):
+        if self.db is None:
+            return
+        quick_hash = FileHasher.get_quick_hash(new_path)
+        if not quick_hash:
+            return
+        for record in self.db.get_files_by_quick_hash(quick_hash):
+            if record.original_path == str(old_path):
+                self.db.update_file_path(record.id, new_path)
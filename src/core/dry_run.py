@@ -0,0 +1,344 @@
+"""Dry-run rename planning for a whole library tree.
+
+    python -m src.core.dry_run /path/to/library [--content auto] [--all]
+"""
+import argparse
+import json
+import logging
+import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from .archive_analyzer import ArchiveAnalyzer
+from .directory_scanner import DirectoryScanner
+from .name_analyzer import NameAnalyzer
+from .rename_planner import RenamePlanner
+from .rules_manager import RulesManager
+from .settings_manager import Settings
+
+
+class PlanCache:
+    """What earlier plans worked out, kept for the next one.
+
+    Holds the analyze_name() result per file name and, per archive path,
+    the content-based tags its listing gave together with the size and
+    mtime the archive had then. One pickle per ruleset in ``cache_dir``,
+    keyed by RulesManager.digest, so a rules change starts a fresh cache.
+    Entries are flat tuples of strings: a library's worth of dicts and
+    sets would keep the garbage collector busy for longer than the
+    lookups take.
+    """
+
+    # The analyze_name() fields that suggest_name() and the planner use
+    FIELDS = ('category', 'franchise', 'base_name', 'version', 'technical_specs', 'tags')
+
+    def __init__(self, cache_dir: Path, rules: RulesManager):
+        self.cache_dir = Path(cache_dir)
+        self.path = self.cache_dir / f"plan_{rules.digest}.pickle"
+        self.names: Dict[str, Tuple] = {}
+        self.listings: Dict[str, Tuple[int, int, Tuple[str, ...]]] = {}
+        self.changed = False
+        try:
+            with open(self.path, 'rb') as f:
+                cached = pickle.load(f)
+            self.names, self.listings = cached['names'], cached['listings']
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable plan cache {self.path.name}: {e}")
+
+    def analysis(self, name: str) -> Optional[Dict]:
+        """The cached analysis of a file name, with FIELDS only"""
+        packed = self.names.get(name)
+        if packed is None:
+            return None
+        analysis = dict(zip(self.FIELDS, packed))
+        analysis['technical_specs'] = list(analysis['technical_specs'])
+        analysis['tags'] = set(analysis['tags'])
+        return analysis
+
+    def add_analysis(self, name: str, analysis: Dict):
+        self.names[name] = tuple(
+            tuple(sorted(analysis[field])) if field == 'tags'
+            else tuple(analysis[field]) if field == 'technical_specs'
+            else analysis[field]
+            for field in self.FIELDS
+        )
+        self.changed = True
+
+    def listing_tags(self, path: str, stat: os.stat_result) -> Optional[Set[str]]:
+        """Content tags of an archive listed before, if it is unchanged"""
+        known = self.listings.get(path)
+        if known and known[:2] == (stat.st_size, stat.st_mtime_ns):
+            return set(known[2])
+        return None
+
+    def add_listing(self, path: str, stat: os.stat_result, tags: Set[str]):
+        self.listings[path] = (stat.st_size, stat.st_mtime_ns, tuple(sorted(tags)))
+        self.changed = True
+
+    def save(self):
+        if not self.changed:
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            temp = self.path.with_suffix('.tmp')
+            with open(temp, 'wb') as f:
+                pickle.dump({'names': self.names, 'listings': self.listings}, f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            temp.replace(self.path)
+            # Results under other rules would never be read again
+            for old in self.cache_dir.glob("plan_*.pickle"):
+                if old != self.path:
+                    old.unlink(missing_ok=True)
+            self.changed = False
+        except OSError as e:
+            logging.warning(f"Could not write plan cache: {e}")
+
+
+class DryRunPlanner:
+    """Suggested names for every archive under a folder, without renaming.
+
+    Suggestions come from the file names alone (NameAnalyzer.analyze_name
+    and suggest_name with the naming options from Settings), so the cost
+    is one directory walk plus rule matching; nothing is hashed or
+    renamed. With a ``cache_dir`` the analyses are kept (see PlanCache),
+    and planning a library again, e.g. after a look at the results,
+    costs about the walk: only names not seen under the current rules
+    are analyzed.
+
+    The one thing a name cannot tell is which content-based tags
+    (tag_rules.content_based_tags) apply. A listing is only wanted when
+    one of those tags is still undecided for an archive, i.e. not already
+    among the tags the name produced. With the default ``content='known'``
+    no archive is opened: listings an earlier plan read are reused if the
+    archive is unchanged, and the other rows are flagged. ``'auto'`` also
+    reads the missing listings (only the archive directory; no members
+    are extracted), and ``'off'`` uses no listings at all.
+
+    Targets go through RenamePlanner, so the preview shows the same
+    conflict resolution a real rename would apply.
+    """
+
+    CONTENT_MODES = ('known', 'auto', 'off')
+
+    def __init__(self, name_analyzer: NameAnalyzer, settings: Settings,
+                 content: str = 'known', cache_dir: Path = None):
+        if content not in self.CONTENT_MODES:
+            raise ValueError(f"Unknown content mode: {content}")
+        self.name_analyzer = name_analyzer
+        self.settings = settings
+        self.content = content
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.extensions = settings.get("files", "archive_types")
+        self.workers = settings.get("files", "scan_workers", 1)
+        self.scanner = DirectoryScanner(
+            ignore_patterns=settings.get("files", "ignore_patterns"),
+            max_workers=self.workers
+        )
+        self.listers = ArchiveAnalyzer(name_analyzer.rules).supported_formats
+
+    @staticmethod
+    def naming_options(settings: Settings) -> Dict:
+        """The suggest_name() options held in Settings"""
+        return {
+            'add_category_prefix': settings.get("naming", "add_category_prefix", True),
+            'preserve_version_numbers': settings.get("naming", "preserve_version_numbers", True),
+            'tag_style': settings.get("tags", "tag_style", "brackets")
+        }
+
+    def undecided_content_tags(self, analysis: Dict) -> List[str]:
+        """Content-based tags the archive's listing could still add"""
+        content_rules = self.name_analyzer.rules.rules['tag_rules'].get('content_based_tags', {})
+        return [tag for tag in content_rules if tag not in analysis['tags']]
+
+    def plan(self, root: Path,
+             progress: Optional[Callable[[str, int, int], None]] = None,
+             is_cancelled: Optional[Callable[[], bool]] = None) -> Dict:
+        """Plan renames for every archive under root.
+
+        Returns 'rows' (one per archive, in path order, with 'source',
+        'target', 'changed' and 'content': 'name' when the name decided
+        everything, 'listed' when the archive directory was read, 'known'
+        when an earlier plan's listing was reused, 'unread' when it was
+        needed but skipped or unreadable), the RenamePlanner 'conflicts',
+        and 'stats' with counts and timings.
+        """
+        root = Path(root)
+        timings = {}
+        started = perf_counter()
+        entries = sorted(self.scanner.scan(root, self.extensions).entries(self.extensions),
+                         key=lambda entry: entry.path)
+        timings['scan'] = perf_counter() - started
+
+        mark = perf_counter()
+        cache = PlanCache(self.cache_dir, self.name_analyzer.rules) if self.cache_dir else None
+        rows = []
+        needs_content = []
+        for done, entry in enumerate(entries, 1):
+            analysis = cache.analysis(entry.name) if cache else None
+            if analysis is None:
+                analysis = self.name_analyzer.analyze_name(entry.name)
+                if cache:
+                    cache.add_analysis(entry.name, analysis)
+            row = {'source': Path(entry.path), 'analysis': analysis, 'content': 'name'}
+            ext = os.path.splitext(entry.name)[1].lower()
+            if ext in self.listers and self.undecided_content_tags(analysis):
+                row['content'] = 'unread'
+                needs_content.append((row, entry))
+            rows.append(row)
+            if progress and done % 1000 == 0:
+                progress("names", done, len(entries))
+            if is_cancelled and is_cancelled():
+                return {}
+        timings['names'] = perf_counter() - mark
+
+        mark = perf_counter()
+        if self.content != 'off' and needs_content:
+            self._add_content_tags(needs_content, cache, progress, is_cancelled)
+        timings['content'] = perf_counter() - mark
+
+        mark = perf_counter()
+        options = self.naming_options(self.settings)
+        for row in rows:
+            new_name = self.name_analyzer.suggest_name(row.pop('analysis'), options)
+            row['target'] = RenamePlanner.target_for(row['source'], new_name)
+        planner = RenamePlanner(self.settings.get("naming", "conflict_strategy", "counter"))
+        result = planner.plan(rows)
+        for row in result['plan']:
+            row['changed'] = row['source'] != row['target']
+        timings['conflicts'] = perf_counter() - mark
+        if cache:
+            cache.save()
+        timings['total'] = perf_counter() - started
+
+        return {
+            'root': root,
+            'rows': result['plan'],
+            'conflicts': result['conflicts'],
+            'skipped': result['skipped'],
+            'stats': {
+                'files': len(rows),
+                'changed': sum(row['changed'] for row in result['plan']),
+                'listed': sum(row['content'] == 'listed' for row in rows),
+                'known': sum(row['content'] == 'known' for row in rows),
+                'unread': sum(row['content'] == 'unread' for row in rows),
+                'seconds': timings
+            }
+        }
+
+    def _add_content_tags(self, rows: List[Tuple[Dict, os.DirEntry]],
+                          cache: Optional[PlanCache],
+                          progress: Optional[Callable[[str, int, int], None]],
+                          is_cancelled: Optional[Callable[[], bool]]):
+        unread = []
+        for row, entry in rows:
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            tags = cache.listing_tags(entry.path, stat) if cache else None
+            if tags is not None:
+                row['analysis']['tags'].update(tags)
+                row['content'] = 'known'
+            else:
+                unread.append((row, entry.path, stat))
+        if self.content != 'auto' or not unread:
+            return
+
+        def list_archive(item):
+            if is_cancelled and is_cancelled():
+                return None
+            source = item[0]['source']
+            info = self.listers[source.suffix.lower()](source)
+            return None if info.get('error') else info['file_list']
+
+        # Listing is I/O bound; several in flight help on network shares
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for done, ((row, path, stat), file_list) in enumerate(
+                    zip(unread, pool.map(list_archive, unread)), 1):
+                if file_list is not None:
+                    found = {'tags': set()}
+                    self.name_analyzer.add_content_tags(found, {'file_list': file_list})
+                    row['analysis']['tags'].update(found['tags'])
+                    row['content'] = 'listed'
+                    if cache:
+                        cache.add_listing(path, stat, found['tags'])
+                if progress and done % 100 == 0:
+                    progress("content", done, len(unread))
+
+
+
+def format_diff(result: Dict, changed_only: bool = True) -> str:
+    """old -> new names grouped by folder, relative to the planned root"""
+    lines = []
+    folder = None
+    root = result['root']
+    for row in result['rows']:
+        if changed_only and not row['changed']:
+            continue
+        source, target = row['source'], row['target']
+        if source.parent != folder:
+            folder = source.parent
+            relative = folder.relative_to(root) if folder != root else Path('.')
+            lines.append(f"{relative}/")
+        note = "  (content not read)" if row['content'] == 'unread' else ""
+        if row['changed']:
+            lines.append(f"  - {source.name}\n  + {target.name}{note}")
+        else:
+            lines.append(f"    {source.name}{note}")
+    return "\n".join(lines)
+
+
+def format_summary(result: Dict) -> str:
+    stats = result['stats']
+    seconds = stats['seconds']
+    return (
+        f"{stats['changed']:,} of {stats['files']:,} files would be renamed, "
+        f"{len(result['conflicts']):,} name conflicts, "
+        f"{stats['listed']:,} archive listings read, {stats['known']:,} known from "
+        f"earlier plans, {stats['unread']:,} not read "
+        f"({seconds['total']:.1f}s: scan {seconds['scan']:.1f}s, "
+        f"names {seconds['names']:.1f}s, content {seconds['content']:.1f}s)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("root", help="library folder to plan")
+    parser.add_argument("--content", choices=DryRunPlanner.CONTENT_MODES, default="known",
+                        help="where content tags are undecided: reuse listings read "
+                             "before (known), also read the rest (auto) or neither (off)")
+    parser.add_argument("--all", action="store_true", help="also list unchanged files")
+    parser.add_argument("--output", help="also write the plan as JSON")
+    args = parser.parse_args()
+
+    settings = Settings()
+    planner = DryRunPlanner(NameAnalyzer(RulesManager.from_settings(settings)), settings,
+                            content=args.content,
+                            cache_dir=settings.data_directory / "plan_cache")
+    result = planner.plan(Path(args.root))
+
+    print(format_diff(result, changed_only=not args.all))
+    if result['conflicts']:
+        print()
+        print(RenamePlanner.format_report(result['conflicts']))
+    print()
+    print(format_summary(result))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                'rows': [
+                    {'source': str(row['source']), 'target': str(row['target']),
+                     'changed': row['changed'], 'content': row['content']}
+                    for row in result['rows']
+                ],
+                'stats': result['stats']
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import logging
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .file_hasher import FileHasher
+from .mesh_fingerprint import MeshFingerprinter
+
+
+class DuplicateFinder:
+    """Finds identical archives, and with a fingerprinter, archives that
+    share a model.
+
+    Files are grouped by quick hash first, and only groups of more than
+    one are content hashed; the shared-model pass content hashes every
+    file and fingerprints those the catalog has not seen. Hashes are
+    reused between the passes.
+    """
+
+    def __init__(self, fingerprinter: Optional[MeshFingerprinter] = None):
+        self.fingerprinter = fingerprinter
+        self.content_hashes: Dict[Path, Optional[str]] = {}
+
+    def find(self, files: List[Path],
+             progress: Optional[Callable[[str, int, int], None]] = None,
+             is_cancelled: Optional[Callable[[], bool]] = None) -> List[Dict]:
+        """Pairs of duplicates among files.
+
+        Each has 'file1', 'file2', a 'match_type' description and
+        'shared_model' (True when only a model is the same). progress
+        gets ('quick', 'content' or 'models', done, total). Returns []
+        if cancelled.
+        """
+        quick_hash_map: Dict[str, List[Path]] = {}
+        for done, file in enumerate(files, 1):
+            try:
+                quick_hash = FileHasher.get_quick_hash(file)
+                if quick_hash:
+                    quick_hash_map.setdefault(quick_hash, []).append(file)
+            except Exception as e:
+                logging.error(f"Error processing file {file}: {e}")
+            if progress:
+                progress('quick', done, len(files))
+            if is_cancelled and is_cancelled():
+                return []
+
+        duplicates = []
+        candidates = [group for group in quick_hash_map.values() if len(group) > 1]
+        for done, group in enumerate(candidates, 1):
+            full_hash_map: Dict[str, Path] = {}
+            for file in group:
+                try:
+                    full_hash = self._content_hash(file)
+                    if not full_hash:
+                        continue
+                    if full_hash in full_hash_map:
+                        duplicates.append({
+                            'file1': full_hash_map[full_hash],
+                            'file2': file,
+                            'match_type': 'Identical Content',
+                            'shared_model': False
+                        })
+                    else:
+                        full_hash_map[full_hash] = file
+                except Exception as e:
+                    logging.error(f"Error verifying duplicate {file}: {e}")
+            if progress:
+                progress('content', done, len(candidates))
+            if is_cancelled and is_cancelled():
+                return []
+
+        if self.fingerprinter:
+            shared = self.find_shared_models(files, progress, is_cancelled)
+            if is_cancelled and is_cancelled():
+                return []
+            duplicates.extend(shared)
+        return duplicates
+
+    def find_shared_models(self, files: List[Path], progress=None,
+                           is_cancelled=None) -> List[Dict]:
+        """Pairs of archives whose STL models share a geometry fingerprint"""
+        archives: Dict[str, Path] = {}
+        for done, file in enumerate(files, 1):
+            content_hash = self._content_hash(file)
+            if content_hash:
+                archives.setdefault(content_hash, file)
+            if progress:
+                progress('content', done, len(files))
+            if is_cancelled and is_cancelled():
+                return []
+
+        def model_progress(done, total):
+            if progress:
+                progress('models', done, total)
+
+        pairs = []
+        for group in self.fingerprinter.shared_models(archives, model_progress, is_cancelled):
+            first_path, first_member = group['copies'][0]
+            for path, member in group['copies'][1:]:
+                if path == first_path:
+                    continue
+                pairs.append({
+                    'file1': first_path,
+                    'file2': path,
+                    'match_type': (
+                        f"Shared Model: {Path(first_member).name} / {Path(member).name} "
+                        f"({group['triangles']:,} triangles)"
+                    ),
+                    'shared_model': True
+                })
+        return pairs
+
+    def _content_hash(self, file: Path) -> Optional[str]:
+        if file not in self.content_hashes:
+            self.content_hashes[file] = FileHasher.get_content_hash(file)
+        return self.content_hashes[file]
@@ -5,9 +5,11 @@ import logging
 from pathlib import Path
 import hashlib
 from typing import Optional
+from ..utils.instrumentation import metrics, timed
 
 class FileHasher:
     @staticmethod
+    @timed('hash.content')
     def get_content_hash(file_path: Path) -> Optional[str]:
         """Calculate SHA-256 hash of file contents"""
         try:
@@ -15,12 +17,14 @@ class FileHasher:
             with open(file_path, "rb") as f:
                 for byte_block in iter(lambda: f.read(8192), b""):
                     sha256_hash.update(byte_block)
+                metrics.add_bytes('hash.content', f.tell())
             return sha256_hash.hexdigest()
         except Exception as e:
             logging.error(f"Error calculating content hash for {file_path}: {e}")
             return None
 
     @staticmethod
+    @timed('hash.quick')
     def get_quick_hash(file_path: Path) -> Optional[str]:
         """Quick hash of first and last megabyte"""
         SAMPLE_SIZE = 1024 * 1024  # 1MB
@@ -44,6 +48,7 @@ class FileHasher:
                 else:
                     end = b''
 
+                metrics.add_bytes('hash.quick', len(start) + len(end))
                 return hashlib.md5(start + end).hexdigest()
         except Exception as e:
             logging.error(f"Error calculating quick hash for {file_path}: {e}")
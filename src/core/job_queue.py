@@ -0,0 +1,306 @@
+import errno
+import json
+import logging
+import os
+import random
+import socket
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+
+from ..database.models import Job
+from ..utils.instrumentation import metrics
+
+STAGES = ('hash', 'analyze', 'rename')
+UNFINISHED = ('pending', 'leased')
+
+# Windows sharing / lock violations
+_WINDOWS_LOCK_ERRORS = (32, 33)
+
+
+class RetryableError(Exception):
+    """A job failed for a reason that may go away, e.g. a locked file"""
+
+
+def is_lock_error(error: BaseException) -> bool:
+    """Whether an OSError means the file is busy rather than broken.
+
+    Windows reports a file opened exclusively by another process as a
+    sharing violation (a PermissionError); elsewhere it shows up as
+    EBUSY, ETXTBSY or EAGAIN.
+    """
+    if not isinstance(error, OSError):
+        return False
+    if getattr(error, 'winerror', None) in _WINDOWS_LOCK_ERRORS:
+        return True
+    return error.errno in (errno.EBUSY, errno.ETXTBSY, errno.EAGAIN)
+
+
+class JobQueue:
+    """Persistent work queue in the application's SQLite database.
+
+    Each job is one file (or one rename batch) for one stage, and moves
+    pending -> leased -> done/failed. Workers lease jobs in batches with a
+    single UPDATE ... RETURNING, so two workers never get the same job,
+    and stamp them with an owner and an expiry. Nothing lives only in
+    memory: after a crash or a closed window, jobs still leased are
+    handed out again once their lease expires (or straight away, through
+    recover(), when the owner was a previous run of the app on this
+    machine), so a scan resumes where it stopped.
+
+    A job that raises RetryableError (a file locked by another process)
+    goes back to pending with an exponential, jittered delay; after
+    ``max_attempts`` leases, or on any other error, it is marked failed.
+    Each lease counts as an attempt, so a file that crashes the app every
+    time does not block a scan forever: once a job has used up its
+    attempts, lease() and recover() fail it instead of handing it out.
+    """
+
+    def __init__(self, db, lease_seconds: float = 120.0, max_attempts: int = 5,
+                 backoff_base: float = 2.0, backoff_max: float = 300.0):
+        self.db = db
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.host = socket.gethostname()
+        self.owner = f"{self.host}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    # -- runs ---------------------------------------------------------
+
+    def new_run(self) -> int:
+        """Id for a new scan; jobs of earlier, finished runs are dropped"""
+        with self.db.get_session() as session:
+            unfinished = select(Job.run_id).where(Job.status.in_(UNFINISHED))
+            session.execute(delete(Job).where(Job.run_id.not_in(unfinished)))
+            last = session.execute(select(func.max(Job.run_id))).scalar()
+            session.commit()
+        return (last or 0) + 1
+
+    def unfinished_run(self) -> Optional[int]:
+        """Latest run that still has pending or leased jobs"""
+        with self.db.get_session() as session:
+            return session.execute(
+                select(func.max(Job.run_id)).where(Job.status.in_(UNFINISHED))
+            ).scalar()
+
+    def cancel_run(self, run_id: int) -> int:
+        with self.db.get_session() as session:
+            cancelled = session.execute(
+                update(Job)
+                .where(Job.run_id == run_id, Job.status.in_(UNFINISHED))
+                .values(status='cancelled', lease_owner=None, finished=time.time())
+            ).rowcount
+            session.commit()
+        return cancelled
+
+    def run_jobs(self, run_id: int, stage: str) -> List[Dict]:
+        """Every job of a stage in a run, in the order they were queued"""
+        with self.db.get_session() as session:
+            rows = session.execute(
+                select(Job.id, Job.path, Job.status, Job.result, Job.error)
+                .where(Job.run_id == run_id, Job.stage == stage)
+                .order_by(Job.id)
+            ).all()
+        return [
+            {'id': row.id, 'path': row.path, 'status': row.status,
+             'result': json.loads(row.result) if row.result else None,
+             'error': row.error}
+            for row in rows
+        ]
+
+    # -- queueing -----------------------------------------------------
+
+    def enqueue(self, stage: str, items: Iterable[Dict], run_id: int) -> int:
+        """Queue {'path', 'payload'?} items for a stage"""
+        if stage not in STAGES:
+            raise ValueError(f"Unknown job stage: {stage}")
+        with self.db.get_session() as session:
+            count = self._insert(session, stage, items, run_id)
+            session.commit()
+        return count
+
+    def _insert(self, session, stage: str, items: Iterable[Dict], run_id: int) -> int:
+        now = time.time()
+        rows = [
+            {'run_id': run_id, 'stage': stage, 'path': str(item['path']),
+             'payload': json.dumps(item['payload'], default=str) if item.get('payload') else None,
+             'status': 'pending', 'attempts': 0, 'available_at': now, 'created': now}
+            for item in items
+        ]
+        if rows:
+            session.execute(insert(Job), rows)
+        return len(rows)
+
+    def lease(self, stage: str, limit: int) -> List[Dict]:
+        """Take up to ``limit`` due jobs of a stage, oldest first.
+
+        Due jobs that already had ``max_attempts`` leases (their last one
+        never finished, e.g. the app crashed on them) are failed instead.
+        """
+        now = time.time()
+        is_due = and_(
+            Job.stage == stage,
+            or_(
+                and_(Job.status == 'pending', Job.available_at <= now),
+                and_(Job.status == 'leased', Job.lease_expires < now)
+            )
+        )
+        due = (
+            select(Job.id)
+            .where(is_due, Job.attempts < self.max_attempts)
+            .order_by(Job.id)
+            .limit(limit)
+            .scalar_subquery()
+        )
+        with self.db.get_session() as session:
+            self._give_up(session, and_(is_due, Job.attempts >= self.max_attempts), now)
+            rows = session.execute(
+                update(Job)
+                .where(Job.id.in_(due))
+                .values(status='leased', lease_owner=self.owner,
+                        lease_expires=now + self.lease_seconds,
+                        attempts=Job.attempts + 1)
+                .returning(Job.id, Job.run_id, Job.stage, Job.path, Job.payload, Job.attempts)
+                .execution_options(synchronize_session=False)
+            ).all()
+            session.commit()
+        jobs = [
+            {'id': row.id, 'run_id': row.run_id, 'stage': row.stage, 'path': row.path,
+             'payload': json.loads(row.payload) if row.payload else {},
+             'attempts': row.attempts}
+            for row in rows
+        ]
+        return sorted(jobs, key=lambda job: job['id'])
+
+    def _give_up(self, session, condition, now: float) -> int:
+        """Fail the jobs matching condition that have used up their attempts"""
+        failed = session.execute(
+            update(Job)
+            .where(condition)
+            .values(status='failed', finished=now, lease_owner=None,
+                    error=f"Gave up after {self.max_attempts} attempts")
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if failed:
+            logging.warning(f"Gave up on {failed} jobs after {self.max_attempts} attempts")
+            metrics.count("jobs.given_up", failed)
+        return failed
+
+    def complete(self, results: List[Tuple[Dict, Optional[Dict]]],
+                 next_stage: Optional[str] = None, next_items: Iterable[Dict] = ()):
+        """Mark jobs done and queue their follow-up work in one transaction,
+        so a crash never loses the hand-over between stages"""
+        if not results:
+            return
+        now = time.time()
+        rows = [
+            {'id': job['id'], 'status': 'done', 'finished': now, 'lease_owner': None,
+             'error': None, 'result': json.dumps(result, default=str) if result is not None else None}
+            for job, result in results
+        ]
+        with self.db.get_session() as session:
+            session.execute(update(Job), rows)
+            if next_stage:
+                self._insert(session, next_stage, next_items, results[0][0]['run_id'])
+            session.commit()
+        metrics.count(f"jobs.{results[0][0]['stage']}.done", len(rows))
+
+    def fail(self, job: Dict, error: BaseException) -> bool:
+        """Record a failed attempt; returns True when the job will be retried"""
+        now = time.time()
+        retry = isinstance(error, RetryableError) and job['attempts'] < self.max_attempts
+        values = {'lease_owner': None, 'error': str(error)}
+        if retry:
+            delay = min(self.backoff_max, self.backoff_base * 2 ** (job['attempts'] - 1))
+            values.update(status='pending', available_at=now + delay * random.uniform(0.5, 1.0))
+        else:
+            values.update(status='failed', finished=now)
+        with self.db.get_session() as session:
+            session.execute(update(Job).where(Job.id == job['id']).values(**values))
+            session.commit()
+        metrics.count(f"jobs.{job['stage']}.{'retried' if retry else 'failed'}")
+        return retry
+
+    def release(self) -> int:
+        """Hand this queue's leases back without counting them as attempts"""
+        with self.db.get_session() as session:
+            released = session.execute(
+                update(Job)
+                .where(Job.status == 'leased', Job.lease_owner == self.owner)
+                .values(status='pending', lease_owner=None, available_at=time.time(),
+                        attempts=Job.attempts - 1)
+            ).rowcount
+            session.commit()
+        return released
+
+    def recover(self, not_retried: Iterable[str] = ('rename',)) -> int:
+        """Reclaim leases left by an earlier run of the app on this machine.
+
+        Only one instance of the app uses a database, so a lease from this
+        host with another owner is stale. Stages in ``not_retried`` are
+        failed instead of re-queued; interrupted renames are recovered from
+        the rename journal. Jobs whose interrupted lease was their last
+        attempt are failed rather than re-queued.
+        """
+        now = time.time()
+        stale = and_(
+            Job.status == 'leased',
+            Job.lease_owner != self.owner,
+            Job.lease_owner.like(f"{self.host}:%")
+        )
+        not_retried = list(not_retried)
+        with self.db.get_session() as session:
+            failed = session.execute(
+                update(Job)
+                .where(stale, Job.stage.in_(not_retried))
+                .values(status='failed', finished=now, lease_owner=None,
+                        error='Interrupted; see the rename history')
+            ).rowcount
+            self._give_up(session, and_(stale, Job.attempts >= self.max_attempts), now)
+            released = session.execute(
+                update(Job)
+                .where(stale, Job.stage.not_in(not_retried))
+                .values(status='pending', lease_owner=None, available_at=now)
+            ).rowcount
+            session.commit()
+        if failed or released:
+            logging.info(f"Recovered {released} interrupted jobs ({failed} renames not retried)")
+        return released
+
+    # -- reporting ----------------------------------------------------
+
+    def counts(self, run_id: Optional[int] = None) -> Dict[str, Dict[str, int]]:
+        """{stage: {status: jobs}}"""
+        query = select(Job.stage, Job.status, func.count()).group_by(Job.stage, Job.status)
+        if run_id is not None:
+            query = query.where(Job.run_id == run_id)
+        counts: Dict[str, Dict[str, int]] = {}
+        with self.db.get_session() as session:
+            for stage, status, count in session.execute(query):
+                counts.setdefault(stage, {})[status] = count
+        return counts
+
+    def next_due(self) -> Optional[float]:
+        """Seconds until the next pending job becomes due (0 if one is)"""
+        with self.db.get_session() as session:
+            due = session.execute(
+                select(func.min(Job.available_at)).where(Job.status == 'pending')
+            ).scalar()
+        return None if due is None else max(0.0, due - time.time())
+
+    def throughput(self, window: float = 60.0) -> Dict[str, float]:
+        """Jobs finished per second for each stage over the last ``window`` s"""
+        now = time.time()
+        with self.db.get_session() as session:
+            rows = session.execute(
+                select(Job.stage, func.count(), func.min(Job.finished))
+                .where(Job.status == 'done', Job.finished >= now - window)
+                .group_by(Job.stage)
+            ).all()
+        return {
+            stage: count / max(1.0, now - first)
+            for stage, count, first in rows
+        }
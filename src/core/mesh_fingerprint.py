@@ -0,0 +1,192 @@
+from pathlib import Path
+from typing import Dict, List, Optional
+import hashlib
+import logging
+
+import numpy as np
+
+from .file_hasher import FileHasher
+from .stl_inspector import StlInspector
+from ..utils.instrumentation import metrics, timed
+
+
+class MeshFingerprint:
+    """Accumulates the vertices of one mesh into a geometry fingerprint.
+
+    Exact duplicate vertices are dropped from every chunk as it arrives and
+    the running minimum corner is tracked. At the end that corner is
+    subtracted in floating point, the vertices are snapped to a grid of
+    ``step`` millimetres and each one is packed into a single int64 (21
+    bits per axis), so de-duplication is a plain sort over integers; the
+    set is hashed with BLAKE2b. The result ignores triangle order, winding,
+    normals, ASCII vs binary encoding, duplicated vertices and where the
+    model sits in space, which is what changes when a slicer or modelling
+    tool re-saves the same model. A coordinate that sits right on a grid
+    boundary can still round differently after a lossy re-export, so this
+    finds copies, not near-copies.
+    """
+
+    BITS = 21
+    MASK = (1 << BITS) - 1
+    VERSION = b'mesh-v2'
+
+    def __init__(self, step: float = 0.01):
+        self.step = step
+        self.chunks: List[np.ndarray] = []
+        self.origin: Optional[np.ndarray] = None
+        self.overflow = False
+        self.vertex_count = 0
+
+    def __call__(self, vertices: np.ndarray):
+        self.add(vertices)
+
+    def add(self, vertices: np.ndarray):
+        if not len(vertices):
+            return
+        low = vertices.min(axis=0).astype(np.float64)
+        self.origin = low if self.origin is None else np.minimum(self.origin, low)
+        self.chunks.append(self._unique_rows(vertices))
+
+    def hexdigest(self) -> Optional[str]:
+        unique = self.canonical()
+        if unique is None:
+            return None
+        digest = hashlib.blake2b(self.VERSION, digest_size=16)
+        digest.update(unique.astype('<i8').tobytes())
+        return digest.hexdigest()
+
+    @staticmethod
+    def _sorted_unique(values: np.ndarray) -> np.ndarray:
+        # Sort-based unique; on NumPy 2 np.unique goes through a hash table
+        # that is several times slower for large int64 arrays
+        values.sort()
+        keep = np.empty(len(values), dtype=bool)
+        keep[:1] = True
+        np.not_equal(values[1:], values[:-1], out=keep[1:])
+        return values[keep]
+
+    @staticmethod
+    def _unique_rows(vertices: np.ndarray) -> np.ndarray:
+        """Drop vertices repeated within a chunk, keeping the input precision.
+
+        Rows are sorted by a hash of their bits, then a row is dropped only
+        when it equals the one before it; a hash collision keeps both.
+        """
+        bits = vertices.view(np.uint32 if vertices.itemsize == 4 else np.uint64)
+        bits = bits.astype(np.uint64)
+        key = (bits[:, 0] * np.uint64(0x9E3779B97F4A7C15)
+               ^ bits[:, 1] * np.uint64(0xC2B2AE3D27D4EB4F) ^ bits[:, 2])
+        order = np.argsort(key)
+        key, ordered = key[order], vertices[order]
+        keep = np.empty(len(ordered), dtype=bool)
+        keep[:1] = True
+        keep[1:] = (key[1:] != key[:-1]) | np.any(ordered[1:] != ordered[:-1], axis=1)
+        return ordered[keep]
+
+    def canonical(self) -> Optional[np.ndarray]:
+        """The sorted, packed vertex set, relative to its minimum corner"""
+        if self.overflow or not self.chunks:
+            return None
+        packed = []
+        for chunk in self.chunks:
+            grid = np.rint((chunk - self.origin) / self.step).astype(np.int64)
+            if grid.min() < 0 or grid.max() > self.MASK:
+                # More than 2**21 grid steps across; not worth a wider encoding
+                self.overflow = True
+                return None
+            packed.append((grid[:, 0] << (2 * self.BITS)) | (grid[:, 1] << self.BITS) | grid[:, 2])
+        unique = self._sorted_unique(np.concatenate(packed))
+        self.vertex_count = len(unique)
+        return unique
+
+
+class MeshFingerprinter:
+    """Fingerprints the STL members of archives and indexes them.
+
+    Uses the same chunked reader as StlInspector, with a budget large
+    enough to read whole models; members that cannot be read completely get
+    no fingerprint. Fingerprints are stored per archive content hash, so an
+    archive is only read once no matter how often it moves or is renamed.
+    """
+
+    def __init__(self, db=None, step: float = 0.01,
+                 byte_budget: int = 1024 * 1024 * 1024):
+        self.db = db
+        self.step = step
+        self.inspector = StlInspector(byte_budget=byte_budget)
+
+    @timed('mesh.fingerprint_archive')
+    def fingerprint_archive(self, filepath: Path) -> List[Dict]:
+        """Fingerprint every STL member of an archive"""
+        sinks: Dict[str, MeshFingerprint] = {}
+
+        def sink_factory(name):
+            sinks[name] = MeshFingerprint(self.step)
+            return sinks[name]
+
+        inspection = self.inspector.inspect_archive(filepath, sink_factory)
+        models = []
+        for model in inspection['models']:
+            if model['partial'] or model['format'] == 'unknown':
+                continue
+            sink = sinks[model['name']]
+            fingerprint = sink.hexdigest()
+            if fingerprint is None:
+                continue
+            models.append({
+                'member': model['name'],
+                'fingerprint': fingerprint,
+                'triangles': model['triangles'],
+                'vertices': sink.vertex_count
+            })
+        return models
+
+    def index_archive(self, filepath: Path, content_hash: str = None,
+                      force: bool = False) -> Optional[str]:
+        """Store fingerprints for an archive unless it was fingerprinted before.
+
+        An archive without readable models, or one that could not be read,
+        counts as fingerprinted too; ``force`` reads it again. Returns the
+        archive's content hash.
+        """
+        content_hash = content_hash or FileHasher.get_content_hash(filepath)
+        if content_hash is None:
+            return None
+        if not force and self.db.get_fingerprinted_hashes([content_hash]):
+            return content_hash
+        try:
+            models, error = self.fingerprint_archive(filepath), None
+        except Exception as e:
+            logging.error(f"Error fingerprinting models in {filepath}: {e}")
+            models, error = [], str(e)
+        # Recorded either way, so the archive is not read again next time
+        self.db.add_mesh_fingerprints(content_hash, models, error)
+        return content_hash
+
+    def shared_models(self, archives: Dict[str, Path], progress=None,
+                      is_cancelled=None) -> List[Dict]:
+        """Group models that appear in more than one of the given archives.
+
+        ``archives`` maps content hash -> path. Each result has the
+        fingerprint, triangle count and a list of (path, member) copies.
+        Returns [] if cancelled while archives are being fingerprinted.
+        """
+        known = self.db.get_fingerprinted_hashes(list(archives))
+        for done, (content_hash, path) in enumerate(archives.items(), 1):
+            metrics.cache('mesh_fingerprints', content_hash in known)
+            if content_hash not in known:
+                self.index_archive(path, content_hash, force=True)
+            if progress:
+                progress(done, len(archives))
+            if is_cancelled and is_cancelled():
+                return []
+
+        groups: Dict[str, Dict] = {}
+        for row in self.db.find_shared_models(list(archives)):
+            group = groups.setdefault(row['fingerprint'], {
+                'fingerprint': row['fingerprint'],
+                'triangles': row['triangles'],
+                'copies': []
+            })
+            group['copies'].append((archives[row['content_hash']], row['member_name']))
+        return list(groups.values())
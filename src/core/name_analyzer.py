@@ -2,16 +2,22 @@
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 from .rules_manager import RulesManager
+from ..utils.instrumentation import timed
 
 class NameAnalyzer:
    def __init__(self, rules_manager: RulesManager):
        self.rules = rules_manager
 
+   @timed('names.analyze_name')
    def analyze_name(self, filename: str, content_analysis: dict = None) -> dict:
        """Comprehensive name analysis using loaded rules"""
+       # Rules see the stem (as in ArchiveAnalyzer); one match serves both
+       # the analysis and the base-name cleanup
+       stem = Path(filename).stem
+       matches = self.rules.test_name(stem)
        result = {
            'original_name': filename,
-           'base_name': self._clean_base_name(filename),
+           'base_name': self._clean_base_name(stem, matches),
            'category': None,
            'franchise': None,
            'creator': None,
@@ -24,9 +30,6 @@ class NameAnalyzer:
            'priority_override': False
        }
 
-       # Use rules manager to find matches
-       matches = self.rules.test_name(filename)
-       
        # Apply NSFW status
        nsfw_status = matches['nsfw_status']
        result['is_nsfw'] = nsfw_status['is_nsfw']
@@ -76,16 +79,16 @@ class NameAnalyzer:
 
        # Add content-based tags if content analysis is provided
        if content_analysis:
-           self._add_content_tags(result, content_analysis)
+           self.add_content_tags(result, content_analysis)
 
        return result
 
-   def _clean_base_name(self, filename: str) -> str:
-       """Remove common patterns and clean up the base name"""
-       name = Path(filename).stem
+   def _clean_base_name(self, name: str, test_results: dict = None) -> str:
+       """Remove common patterns and clean up the base name (of a stem)"""
 
        # Remove known patterns using rules
-       test_results = self.rules.test_name(name)
+       if test_results is None:
+           test_results = self.rules.test_name(name)
        
        # Remove version numbers if found
        if test_results['version']:
@@ -108,13 +111,15 @@ class NameAnalyzer:
 
        return name
 
-   def _add_content_tags(self, result: dict, content_analysis: dict):
-       """Add tags based on archive content analysis"""
+   def add_content_tags(self, result: dict, content_analysis: dict):
+       """Add tags based on archive content analysis to an analyze_name()
+       result, which is then the same as analyzing the name with it"""
        content_rules = self.rules.rules['tag_rules']['content_based_tags']
+       content = str(content_analysis).lower()
        
        for tag, rules in content_rules.items():
            file_patterns = rules.get('file_contains', [])
-           if any(pattern in str(content_analysis).lower() for pattern in file_patterns):
+           if any(pattern in content for pattern in file_patterns):
                result['tags'].add(tag)
 
    def suggest_name(self, analysis: dict, settings: dict = None) -> str:
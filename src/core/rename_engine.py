@@ -0,0 +1,329 @@
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .job_queue import is_lock_error
+from .rename_planner import list_directories, other_file_named
+
+
+class RenameEngine:
+    """Applies a whole rename plan as one journaled, reversible batch.
+
+    A plan is a list of dicts with 'source' and 'target' paths and an
+    optional 'file_id'. The plan is validated up front from one directory
+    listing per folder, journaled to SQLite before anything is touched, and
+    then applied with one worker per directory. Renames whose target is
+    another entry's source (cycles such as A -> B, B -> A) or that only change
+    case are staged through a temporary name first. If any rename fails the
+    batch is rolled back. A batch interrupted by a crash can be resumed or
+    rolled back from the journal; progress is read back from the file system
+    by matching the inode recorded for each source.
+    """
+
+    ILLEGAL_CHARS = set('<>:"/\\|?*') | {chr(i) for i in range(32)}
+    RESERVED_NAMES = (
+        {'CON', 'PRN', 'AUX', 'NUL'}
+        | {f'COM{i}' for i in range(1, 10)}
+        | {f'LPT{i}' for i in range(1, 10)}
+    )
+    MAX_NAME_LENGTH = 255
+
+    def __init__(self, db, max_workers: int = 4):
+        self.db = db
+        self.max_workers = max_workers
+
+    def validate(self, plan: List[Dict]) -> Dict[str, list]:
+        """Check a plan without touching any file.
+
+        Returns a report with 'errors' (entries that cannot be applied, each
+        with a 'reason'), 'cycles' (lists of sources that rename into each
+        other) and 'case_only' (entries that only change letter case).
+        """
+        return self._validate(plan, self._list_directories(plan))
+
+    def execute(self, plan: List[Dict], description: str = None) -> Dict:
+        """Validate, journal and apply a plan as one batch"""
+        plan = [e for e in plan if Path(e['source']) != Path(e['target'])]
+        listings = self._list_directories(plan)
+        report = self._validate(plan, listings)
+        if report['errors']:
+            raise ValueError(
+                f"Rename plan has {len(report['errors'])} invalid entries"
+            )
+
+        sources = {self._key(e['source']) for e in plan}
+        token = uuid.uuid4().hex[:8]
+        entries = []
+        for seq, entry in enumerate(plan):
+            source, target = Path(entry['source']), Path(entry['target'])
+            needs_stage = (
+                self._key(target) in sources
+                or self._key(target) == self._key(source)
+            )
+            entries.append({
+                'seq': seq,
+                'file_id': entry.get('file_id'),
+                'source': source,
+                'target': target,
+                'temp': source.parent / f".renaming-{token}-{seq}{source.suffix}"
+                        if needs_stage else None,
+                'inode': listings[source.parent]['exact'].get(source.name)
+            })
+
+        batch_id = self.db.create_rename_batch(entries, description)
+        self.db.set_rename_batch_status(batch_id, 'applying')
+        outcomes = self._run_groups(entries)
+        return self._finish(batch_id, entries, outcomes)
+
+    def resume(self, batch_id: int) -> Dict:
+        """Finish applying an interrupted batch"""
+        entries = self._load_entries(batch_id)
+        states = self._disk_states(entries)
+        pending = []
+        for entry in entries:
+            state = states[entry['seq']]
+            if state == 'staged':
+                pending.append({**entry, 'staged': True})
+            elif state == 'planned':
+                pending.append(entry)
+        outcomes = self._run_groups(pending)
+        for entry in entries:
+            if states[entry['seq']] == 'done':
+                outcomes[entry['seq']] = {'seq': entry['seq'], 'status': 'done'}
+        return self._finish(batch_id, entries, outcomes)
+
+    def rollback(self, batch_id: int, batch_status: str = 'rolled_back',
+                 file_status: str = 'pending') -> Dict:
+        """Return every file of a batch to its original name"""
+        entries = self._load_entries(batch_id)
+        outcomes = self._rollback_entries(batch_id, entries)
+        failed = [o for o in outcomes.values() if o['status'] == 'failed']
+        status = 'failed' if failed else batch_status
+        self.db.update_journal_entries(batch_id, list(outcomes.values()), status)
+        self.db.update_file_statuses([
+            {'id': e['file_id'], 'new_name': None, 'status': file_status,
+             'previous_path': e['target'], 'path': e['source']}
+            for e in entries
+            if e['file_id'] is not None and outcomes.get(e['seq'], {}).get('status') == 'reverted'
+        ])
+        reverted = [
+            e for e in entries
+            if outcomes.get(e['seq'], {}).get('status') == 'reverted'
+        ]
+        return {'batch_id': batch_id, 'status': status,
+                'renamed': [], 'reverted': reverted, 'errors': failed}
+
+    def incomplete_batches(self) -> List[int]:
+        return self.db.get_incomplete_rename_batches()
+
+    def journaled_plan(self, batch_id: int) -> List[Dict]:
+        """The batch's plan as recorded in the journal"""
+        return self._load_entries(batch_id)
+
+    def _finish(self, batch_id: int, entries: List[Dict], outcomes: Dict[int, Dict]) -> Dict:
+        errors = [o for o in outcomes.values() if o['status'] == 'failed']
+        if errors or len(outcomes) < len(entries):
+            logging.error(
+                f"Rename batch {batch_id}: {len(errors)} renames failed, rolling back"
+            )
+            reverted = self._rollback_entries(batch_id, entries)
+            reverted.update({e['seq']: e for e in errors})
+            self.db.update_journal_entries(
+                batch_id, list(reverted.values()), 'rolled_back'
+            )
+            return {'batch_id': batch_id, 'status': 'rolled_back',
+                    'renamed': [], 'errors': errors}
+
+        self.db.update_journal_entries(batch_id, list(outcomes.values()), 'applied')
+        self.db.update_file_statuses([
+            {'id': e['file_id'], 'new_name': e['target'].name, 'status': 'renamed',
+             'previous_path': e['source'], 'path': e['target']}
+            for e in entries if e['file_id'] is not None
+        ])
+        logging.info(f"Rename batch {batch_id}: renamed {len(entries)} files")
+        return {'batch_id': batch_id, 'status': 'applied',
+                'renamed': entries, 'errors': []}
+
+    def _rollback_entries(self, batch_id: int, entries: List[Dict]) -> Dict[int, Dict]:
+        states = self._disk_states(entries)
+        moves = []
+        for entry in entries:
+            state = states[entry['seq']]
+            if state == 'done':
+                # Reverting a cycle has the same ordering problem, so always stage
+                source = entry['source']
+                temp = source.parent / f".rollback-{batch_id}-{entry['seq']}{source.suffix}"
+                moves.append({**entry, 'source': entry['target'],
+                              'target': source, 'temp': temp})
+            elif state == 'staged':
+                moves.append({**entry, 'target': entry['source'], 'staged': True})
+        outcomes = self._run_groups(moves)
+        return {
+            seq: {**o, 'status': 'reverted' if o['status'] == 'done' else o['status']}
+            for seq, o in outcomes.items()
+        }
+
+    def _run_groups(self, entries: List[Dict]) -> Dict[int, Dict]:
+        groups: Dict[Path, List[Dict]] = {}
+        for entry in entries:
+            groups.setdefault(entry['target'].parent, []).append(entry)
+        outcomes = {}
+        if not groups:
+            return outcomes
+        workers = min(self.max_workers, len(groups))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for result in pool.map(self._apply_group, groups.values()):
+                outcomes.update(result)
+        return outcomes
+
+    def _apply_group(self, entries: List[Dict]) -> Dict[int, Dict]:
+        """Apply the renames of one directory in a safe order.
+
+        Staged entries first move out of the way to their temporary name,
+        then plain renames run, and finally staged entries move to their
+        targets. Stops at the first error; the caller rolls back.
+        """
+        outcomes = {}
+        current = None
+        try:
+            for entry in entries:
+                if entry['temp'] and not entry.get('staged'):
+                    current = entry
+                    os.rename(entry['source'], entry['temp'])
+            for entry in entries:
+                if not entry['temp']:
+                    current = entry
+                    os.rename(entry['source'], entry['target'])
+                    outcomes[entry['seq']] = {'seq': entry['seq'], 'status': 'done'}
+            for entry in entries:
+                if entry['temp']:
+                    current = entry
+                    os.rename(entry['temp'], entry['target'])
+                    outcomes[entry['seq']] = {'seq': entry['seq'], 'status': 'done'}
+        except OSError as e:
+            logging.error(f"Failed to rename {current['source']}: {e}")
+            outcomes[current['seq']] = {
+                'seq': current['seq'], 'status': 'failed', 'error': str(e),
+                'locked': is_lock_error(e)
+            }
+        return outcomes
+
+    def _load_entries(self, batch_id: int) -> List[Dict]:
+        return [
+            {
+                'seq': row.seq,
+                'file_id': row.file_id,
+                'source': Path(row.source_path),
+                'target': Path(row.target_path),
+                'temp': Path(row.temp_path) if row.temp_path else None,
+                'inode': row.source_inode
+            }
+            for row in self.db.get_journal_entries(batch_id)
+        ]
+
+    def _disk_states(self, entries: List[Dict]) -> Dict[int, str]:
+        """Work out how far each rename got from one listing per directory"""
+        listings = self._list_directories(entries)
+        states = {}
+        for entry in entries:
+            names = listings[entry['target'].parent]['exact']
+            if entry['temp'] and entry['temp'].name in names:
+                states[entry['seq']] = 'staged'
+            elif entry['target'].name in names and (
+                names[entry['target'].name] == entry['inode']
+                if entry['inode'] is not None
+                else entry['source'].name not in names
+            ):
+                states[entry['seq']] = 'done'
+            else:
+                states[entry['seq']] = 'planned'
+        return states
+
+    def _validate(self, plan: List[Dict], listings: Dict) -> Dict[str, list]:
+        report = {'errors': [], 'cycles': [], 'case_only': []}
+
+        valid = []
+        for entry in plan:
+            source, target = Path(entry['source']), Path(entry['target'])
+            reason = self._check_name(target.name)
+            if reason is None and source.parent != target.parent:
+                reason = "Target must stay in the same directory"
+            if reason is None and source.name not in listings[source.parent]['exact']:
+                reason = "Source file no longer exists"
+            if reason:
+                report['errors'].append({**entry, 'reason': reason})
+            else:
+                valid.append(entry)
+
+        sources = {self._key(e['source']) for e in valid}
+        seen_targets = {}
+        for entry in valid:
+            source, target = Path(entry['source']), Path(entry['target'])
+            key = self._key(target)
+            if key in seen_targets:
+                report['errors'].append({
+                    **entry,
+                    'reason': f"Same target as {Path(seen_targets[key]).name}"
+                })
+                continue
+            seen_targets[key] = entry['source']
+            if key == self._key(source):
+                if other_file_named(source, target, listings[target.parent]['exact']):
+                    report['errors'].append({**entry, 'reason': "Target already exists"})
+                else:
+                    report['case_only'].append(entry)
+            elif key not in sources and target.name.casefold() in listings[target.parent]['folded']:
+                report['errors'].append({**entry, 'reason': "Target already exists"})
+
+        report['cycles'] = self._find_cycles(valid)
+        return report
+
+    def _list_directories(self, entries: List[Dict]) -> Dict[Path, Dict]:
+        directories = set()
+        for entry in entries:
+            directories.add(Path(entry['source']).parent)
+            directories.add(Path(entry['target']).parent)
+        return list_directories(directories)
+
+    def _check_name(self, name: str) -> Optional[str]:
+        if not name or name in ('.', '..'):
+            return "Empty file name"
+        bad = sorted({c for c in name if c in self.ILLEGAL_CHARS})
+        if bad:
+            shown = ' '.join(repr(c) for c in bad)
+            return f"Illegal characters in name: {shown}"
+        if name[-1] in ' .':
+            return "Name cannot end with a space or dot"
+        if name.split('.')[0].upper() in self.RESERVED_NAMES:
+            return "Reserved file name"
+        if len(name.encode('utf-8')) > self.MAX_NAME_LENGTH:
+            return "Name is too long"
+        return None
+
+    def _find_cycles(self, plan: List[Dict]) -> List[List[Path]]:
+        by_source = {self._key(e['source']): e for e in plan}
+        cycles = []
+        visited = set()
+        for start in by_source:
+            path = []
+            on_path = {}
+            key = start
+            while key in by_source and key not in visited:
+                visited.add(key)
+                on_path[key] = len(path)
+                path.append(key)
+                nxt = self._key(by_source[key]['target'])
+                if nxt in on_path:
+                    cycle = path[on_path[nxt]:]
+                    if len(cycle) > 1:
+                        cycles.append([Path(by_source[k]['source']) for k in cycle])
+                    break
+                key = nxt
+        return cycles
+
+    @staticmethod
+    def _key(path) -> str:
+        return str(path).casefold()
@@ -0,0 +1,70 @@
+from typing import Dict, List, Optional
+
+from .rename_engine import RenameEngine
+
+
+class RenameHistory:
+    """Undo/redo over the rename journal.
+
+    Every Apply All run is one journaled batch, so undo and redo work on
+    whole batches. Undo reverts a batch through the engine's bulk rollback
+    (parallel per directory, cycle safe) and marks it 'undone'; redo replays
+    the journaled plan. Redo is only offered for batches undone after the
+    most recent applied batch, like a regular redo stack.
+    """
+
+    def __init__(self, db, engine: RenameEngine):
+        self.db = db
+        self.engine = engine
+
+    def batches(self, limit: int = 50, before_id: int = None,
+                statuses: List[str] = None) -> List[Dict]:
+        """A page of history, newest first; pass the last id to get the next page"""
+        return self.db.get_rename_batches(limit, before_id, statuses)
+
+    def undoable(self) -> Optional[Dict]:
+        applied = self.db.get_rename_batches(limit=1, statuses=['applied'])
+        return applied[0] if applied else None
+
+    def redoable(self) -> Optional[Dict]:
+        undone = self.db.get_rename_batches(limit=1, statuses=['undone'])
+        if not undone:
+            return None
+        applied = self.undoable()
+        if applied and applied['id'] > undone[0]['id']:
+            return None
+        return undone[0]
+
+    def undo(self, batch_id: int = None) -> Dict:
+        """Revert a batch (default: the latest applied one)"""
+        batch = self.db.get_rename_batch(batch_id) if batch_id else self.undoable()
+        if batch is None or batch['status'] != 'applied':
+            raise ValueError("Nothing to undo")
+
+        reverse = [
+            {'source': e['target'], 'target': e['source']}
+            for e in self.engine.journaled_plan(batch['id'])
+        ]
+        self._check(reverse, "undo")
+        return self.engine.rollback(batch['id'], 'undone', 'undone')
+
+    def redo(self, batch_id: int = None) -> Dict:
+        """Re-apply an undone batch (default: the latest undone one)"""
+        batch = self.db.get_rename_batch(batch_id) if batch_id else self.redoable()
+        if batch is None or batch['status'] != 'undone':
+            raise ValueError("Nothing to redo")
+
+        self._check(self.engine.journaled_plan(batch['id']), "redo")
+        result = self.engine.resume(batch['id'])
+        if result['status'] != 'applied':
+            self.db.set_rename_batch_status(batch['id'], 'undone')
+        return result
+
+    def _check(self, plan: List[Dict], action: str):
+        report = self.engine.validate(plan)
+        if report['errors']:
+            first = report['errors'][0]
+            raise ValueError(
+                f"Cannot {action}: {len(report['errors'])} files are in the way "
+                f"({first['source'].name}: {first['reason']})"
+            )
@@ -0,0 +1,179 @@
+import os
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .file_hasher import FileHasher
+
+
+def as_path(path) -> Path:
+    return path if isinstance(path, Path) else Path(path)
+
+
+def list_directories(directories: Iterable[Path]) -> Dict[Path, Dict]:
+    """One scandir per directory: exact name -> inode, plus casefolded names"""
+    listings = {}
+    for directory in directories:
+        directory = as_path(directory)
+        if directory in listings:
+            continue
+        names = {}
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    names[entry.name] = entry.inode()
+        except OSError:
+            pass
+        listings[directory] = {
+            'exact': names,
+            'folded': {name.casefold() for name in names}
+        }
+    return listings
+
+
+def other_file_named(source: Path, target: Path, names: Dict[str, int]) -> bool:
+    """Whether a target that differs from source only in case names a
+    different file already in the folder (``names`` is a listing's
+    'exact' map). Only a case-sensitive filesystem can hold both; on the
+    others the listing has just the source's own spelling.
+    """
+    if target.name == source.name or target.name not in names:
+        return False
+    return names[target.name] != names.get(source.name)
+
+
+class RenamePlanner:
+    """Computes final targets for a whole batch and resolves name conflicts.
+
+    All targets are checked together: against each other (two rows asking
+    for the same name) and against one listing per target folder (a file
+    that already has the name and isn't itself being renamed away). The
+    first row asking for a name keeps it; later rows are resolved with the
+    configured strategy:
+
+    - 'counter': append " (2)", " (3)", ... before the extension
+    - 'hash': append a short content hash, e.g. " [1a2b3c4d]"
+    - 'skip': leave the row out of the plan
+    """
+
+    STRATEGIES = ('counter', 'hash', 'skip')
+
+    def __init__(self, strategy: str = 'counter',
+                 hash_func: Optional[Callable[[Path], Optional[str]]] = None):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown conflict strategy: {strategy}")
+        self.strategy = strategy
+        self.hash_func = hash_func or FileHasher.get_quick_hash
+
+    @staticmethod
+    def target_for(source: Path, new_name: str) -> Path:
+        """Target path for a suggested name, keeping the source's extension"""
+        new_name = new_name.strip()
+        if not new_name.lower().endswith(source.suffix.lower()):
+            new_name += source.suffix
+        return source.parent / new_name
+
+    def plan(self, entries: List[Dict]) -> Dict[str, list]:
+        """Resolve a batch of {'source', 'target', ...} entries.
+
+        Returns 'plan' (entries with their final 'target'), 'conflicts' (one
+        record per resolved or skipped conflict) and 'skipped' entries.
+        """
+        # Convert once, with one shared Path per folder so the per-folder
+        # lookups below hash it only once; Path() and Path hashing cost
+        # more than the rest of the loop
+        folders: Dict[str, Path] = {}
+        paths = []
+        for entry in entries:
+            source, target = as_path(entry['source']), as_path(entry['target'])
+            folder = os.path.dirname(str(target))
+            directory = folders.get(folder)
+            if directory is None:
+                directory = folders[folder] = target.parent
+            paths.append((source, target, directory))
+        listings = list_directories(folders.values())
+        moving_away = {
+            str(source).casefold() for source, target, _ in paths
+            if str(source) != str(target)
+        }
+
+        # Names that stay occupied on disk: existing files not renamed away
+        taken: Dict[Path, set] = {}
+        for directory, listing in listings.items():
+            folder = str(directory)
+            taken[directory] = {
+                name for name in listing['folded']
+                if os.path.join(folder, name).casefold() not in moving_away
+            }
+
+        result = {'plan': [], 'conflicts': [], 'skipped': []}
+        claimed: Dict[str, Path] = {}
+        for entry, (source, target, directory) in zip(entries, paths):
+            folded = target.name.casefold()
+            target_key = str(target).casefold()
+            unchanged = str(source).casefold() == target_key
+
+            kind = None
+            other = None
+            if target_key in claimed:
+                kind, other = 'batch', claimed[target_key]
+            elif folded in taken[directory] and not unchanged:
+                kind, other = 'disk', target
+            elif unchanged and other_file_named(source, target, listings[directory]['exact']):
+                # Not a case-only rename: "A.zip" next to "a.zip" is its own file
+                kind, other = 'disk', target
+
+            if kind is None:
+                claimed[target_key] = source
+                taken[directory].add(folded)
+                result['plan'].append(entry)
+                continue
+
+            resolved = None
+            if self.strategy != 'skip':
+                resolved = self._resolve(source, target, taken[directory])
+            result['conflicts'].append({
+                'source': source,
+                'requested': target,
+                'resolved': resolved,
+                'kind': kind,
+                'conflicts_with': other
+            })
+            if resolved is None:
+                result['skipped'].append(entry)
+                continue
+            claimed[str(resolved).casefold()] = source
+            taken[directory].add(resolved.name.casefold())
+            result['plan'].append({**entry, 'target': resolved})
+        return result
+
+    def _resolve(self, source: Path, target: Path, taken: set) -> Optional[Path]:
+        stem, suffix = target.stem, target.suffix
+        if self.strategy == 'hash':
+            digest = self.hash_func(source)
+            if digest:
+                candidate = target.with_name(f"{stem} [{digest[:8]}]{suffix}")
+                if candidate.name.casefold() not in taken:
+                    return candidate
+                stem = f"{stem} [{digest[:8]}]"
+        counter = 2
+        while True:
+            candidate = target.with_name(f"{stem} ({counter}){suffix}")
+            if candidate.name.casefold() not in taken:
+                return candidate
+            counter += 1
+
+    @staticmethod
+    def format_report(conflicts: List[Dict]) -> str:
+        """Human readable summary of a conflict report"""
+        lines = []
+        for conflict in conflicts:
+            where = "another row" if conflict['kind'] == 'batch' else "an existing file"
+            outcome = (
+                f"renamed to '{conflict['resolved'].name}'"
+                if conflict['resolved'] else "skipped"
+            )
+            lines.append(
+                f"{conflict['source'].name}: '{conflict['requested'].name}' "
+                f"clashes with {where}, {outcome}"
+            )
+        return "\n".join(lines)
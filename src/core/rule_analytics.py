@@ -0,0 +1,480 @@
+"""Rule-effectiveness statistics over every file name in the catalog.
+
+    python -m src.core.rule_analytics --output rule_report.json
+"""
+import argparse
+import json
+import os
+import re
+import time
+import unicodedata
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .rules_manager import TOKEN_SECTIONS, RulesManager
+from .token_index import TokenIndex, tokenize
+
+# The same token boundaries tokenize() finds, applied to a whole chunk at once
+_BOUNDARY = re.compile(
+    r'(?<=[a-z])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])|(?<=[A-Za-z])(?=\d)|(?<=\d)(?=[A-Za-z])'
+)
+_NON_ALNUM = re.compile(r'[^0-9A-Za-z\n]+')
+_PLURAL = re.compile(r'(?<![a-z0-9])([a-z]{2,}[a-rt-z])s(?![a-z0-9])')
+_COMBINING = re.compile(r'[̀-ͯ]+')
+
+SUBSTRING_SECTIONS = ('special_patterns', 'tag_rules')
+# Multiplier for hashing runs of token ids into one uint64
+_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+_MASK64 = (1 << 64) - 1
+
+
+class RuleAnalytics:
+    """How the rules behave over a whole catalog of names.
+
+    Counts, for every pattern, how many names it matches (exactly, and
+    through the fuzzy fallback for token-matched sections), which
+    categories match the same names and which of those ties are decided
+    only by rule order, which patterns never match, and what share of the
+    names ends up in MISC.
+
+    Names are processed in chunks. Instead of calling test_name() per name,
+    each chunk is tokenized with a few regex passes over the joined chunk,
+    its tokens are mapped to integer ids and runs of tokens are hashed into
+    numpy arrays, so exact pattern lookups become np.isin over the whole
+    chunk. Only the fuzzy fallback, for names without an exact match, works
+    per distinct token or token pair, and is memoized. The results follow
+    the same rules as RulesManager.test_name and NameAnalyzer: whole-token
+    matches, fuzzy fallback per section, override special patterns first,
+    then the highest-priority category with ties going to the first
+    category in rule order.
+    """
+
+    def __init__(self, rules_manager: RulesManager, chunk_size: int = 100_000):
+        self.rules = rules_manager.rules
+        self.chunk_size = chunk_size
+        self.vocab: Dict[str, int] = {}
+        self.vocab_list: List[str] = []
+
+        self.sections: Dict[str, Dict] = {}
+        for section in TOKEN_SECTIONS:
+            entries = list(self.rules.get(section, {}).items())
+            index = TokenIndex(entry.get('patterns', []) for _, entry in entries)
+            keys = list(index.keys)
+            self.sections[section] = {
+                'entries': entries,
+                'index': index,
+                'keys': keys,
+                'key_ids': {key: i for i, key in enumerate(keys)},
+                'exact': np.zeros(len(keys), dtype=np.int64),
+                'fuzzy': np.zeros(len(keys), dtype=np.int64),
+            }
+        for section in SUBSTRING_SECTIONS:
+            if section == 'tag_rules':
+                entries = [(tag, {'patterns': patterns}) for tag, patterns
+                           in self.rules.get('tag_rules', {}).get('auto_tags', {}).items()]
+            else:
+                entries = list(self.rules.get(section, {}).items())
+            patterns = sorted({p for _, entry in entries for p in entry.get('patterns', [])})
+            self.sections[section] = {
+                'entries': entries,
+                'patterns': patterns,
+                'hits': np.zeros(len(patterns), dtype=np.int64),
+            }
+
+        categories = self.sections['categories']['entries']
+        self.priorities = np.array([entry.get('priority', 0) for _, entry in categories],
+                                   dtype=np.int64)
+        self.final_categories: Counter = Counter()
+        self.conflicts: Counter = Counter()
+        self.conflict_examples: Dict[Tuple[int, int], str] = {}
+        self.names = 0
+        self.elapsed = 0.0
+
+    # -- tokenizing -------------------------------------------------------
+
+    @staticmethod
+    def tokenize_chunk(names: List[str]) -> List[List[str]]:
+        """tokenize() for a whole chunk, with one regex pass per step"""
+        blob = '\n'.join(name.replace('\n', ' ') for name in names)
+        if not blob.isascii():
+            blob = _COMBINING.sub('', unicodedata.normalize('NFKD', blob))
+        blob = _BOUNDARY.sub(' ', blob)
+        blob = _NON_ALNUM.sub(' ', blob).lower()
+        blob = _PLURAL.sub(r'\1', blob)
+        return [line.split() for line in blob.split('\n')]
+
+    def _token_ids(self, tokens: List[List[str]]) -> Tuple[np.ndarray, np.ndarray]:
+        vocab, vocab_list = self.vocab, self.vocab_list
+        flat = []
+        for name_tokens in tokens:
+            for token in name_tokens:
+                token_id = vocab.get(token)
+                if token_id is None:
+                    token_id = vocab[token] = len(vocab_list)
+                    vocab_list.append(token)
+                flat.append(token_id)
+        ids = np.array(flat, dtype=np.int64)
+        lengths = np.fromiter((len(t) for t in tokens), dtype=np.int64, count=len(tokens))
+        name_of = np.repeat(np.arange(len(tokens), dtype=np.int64), lengths)
+        return ids, name_of
+
+    @staticmethod
+    def _run_hashes(ids: np.ndarray, n: int) -> np.ndarray:
+        """Hash of every run of n consecutive token ids"""
+        if n == 1:
+            return ids.astype(np.uint64)
+        codes = ids[:len(ids) - n + 1].astype(np.uint64)
+        with np.errstate(over='ignore'):
+            for offset in range(1, n):
+                codes = codes * _HASH_MULTIPLIER + ids[offset:len(ids) - n + 1 + offset].astype(np.uint64)
+        return codes
+
+    @staticmethod
+    def _hash_sequence(sequence: Tuple[int, ...]) -> int:
+        if len(sequence) == 1:
+            return sequence[0]
+        code = sequence[0]
+        for token_id in sequence[1:]:
+            code = (code * int(_HASH_MULTIPLIER) + token_id) & _MASK64
+        return code
+
+    def _splits(self, key: str, max_span: int) -> List[Tuple[int, ...]]:
+        """Every way of writing key as up to max_span known tokens"""
+        results = []
+
+        def walk(start: int, prefix: Tuple[int, ...]):
+            if start == len(key):
+                results.append(prefix)
+                return
+            if len(prefix) == max_span:
+                return
+            for end in range(start + 1, len(key) + 1):
+                token_id = self.vocab.get(key[start:end])
+                if token_id is not None:
+                    walk(end, prefix + (token_id,))
+
+        walk(0, ())
+        return results
+
+    # -- matching ---------------------------------------------------------
+
+    def _token_section(self, section: str, ids: np.ndarray, name_of: np.ndarray,
+                       runs: Dict[int, Tuple[np.ndarray, np.ndarray]],
+                       count: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(name, entry) pairs matched in a token section, counting key hits"""
+        data = self.sections[section]
+        index = data['index']
+
+        # Exact: hashed token runs against every split of every key
+        targets = {}
+        for key_id, key in enumerate(data['keys']):
+            for split in self._splits(key, index.max_span):
+                targets.setdefault(len(split), {})[self._hash_sequence(split)] = key_id
+        pair_names, pair_keys = [], []
+        for n, by_code in targets.items():
+            if n not in runs:
+                continue
+            codes, starts = runs[n]
+            target_codes = np.fromiter(by_code.keys(), dtype=np.uint64, count=len(by_code))
+            target_keys = np.fromiter(by_code.values(), dtype=np.int64, count=len(by_code))
+            order = np.argsort(target_codes)
+            target_codes, target_keys = target_codes[order], target_keys[order]
+            hit = np.isin(codes, target_codes)
+            positions = np.searchsorted(target_codes, codes[hit])
+            pair_names.append(name_of[starts[hit]])
+            pair_keys.append(target_keys[positions])
+        exact = self._unique_pairs(pair_names, pair_keys, len(data['keys']))
+        np.add.at(data['exact'], exact[1], 1)
+
+        # Fuzzy fallback for names without an exact hit in this section
+        fuzzy = (np.empty(0, dtype=np.int64),) * 2
+        if index.fuzzy_window:
+            has_exact = np.zeros(count, dtype=bool)
+            has_exact[exact[0]] = True
+            fuzzy = self._fuzzy(data, ids, name_of, runs, ~has_exact)
+            np.add.at(data['fuzzy'], fuzzy[1], 1)
+
+        names = np.concatenate([exact[0], fuzzy[0]])
+        keys = np.concatenate([exact[1], fuzzy[1]])
+        return self._key_pairs_to_entries(data, names, keys)
+
+    def _fuzzy(self, data: Dict, ids: np.ndarray, name_of: np.ndarray,
+               runs: Dict[int, Tuple[np.ndarray, np.ndarray]],
+               fallback: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        index = data['index']
+        window = np.array(sorted(index.fuzzy_window), dtype=np.int64)
+        token_lengths = np.fromiter(map(len, self.vocab_list), dtype=np.int64,
+                                    count=len(self.vocab_list))
+        pair_names, pair_keys = [], []
+        for n in range(1, index.FUZZY_SPAN + 1):
+            if n not in runs:
+                continue
+            codes, starts = runs[n]
+            lengths = sum(token_lengths[ids[starts + offset]] for offset in range(n))
+            candidate = fallback[name_of[starts]] & np.isin(lengths, window)
+            if not candidate.any():
+                continue
+            distinct, first, inverse = np.unique(
+                codes[candidate], return_index=True, return_inverse=True
+            )
+            candidate_starts = starts[candidate]
+            matched = []
+            for start in candidate_starts[first]:
+                text = ''.join(self.vocab_list[t] for t in ids[start:start + n])
+                matched.append([data['key_ids'][key] for key in index.similar(text)])
+            counts = np.fromiter(map(len, matched), dtype=np.int64, count=len(matched))
+            if not counts.any():
+                continue
+            flat = np.fromiter((k for keys in matched for k in keys), dtype=np.int64,
+                               count=int(counts.sum()))
+            offsets = np.concatenate([[0], np.cumsum(counts)])
+            per_run = counts[inverse]
+            run_names = name_of[candidate_starts]
+            pair_names.append(np.repeat(run_names, per_run))
+            # For each run, the keys of its distinct span
+            take = np.repeat(offsets[inverse], per_run) + (
+                np.arange(per_run.sum()) - np.repeat(np.cumsum(per_run) - per_run, per_run)
+            )
+            pair_keys.append(flat[take])
+        return self._unique_pairs(pair_names, pair_keys, len(data['keys']))
+
+    @staticmethod
+    def _unique_pairs(names: List[np.ndarray], keys: List[np.ndarray],
+                      key_count: int) -> Tuple[np.ndarray, np.ndarray]:
+        if not names:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        combined = np.unique(np.concatenate(names) * max(key_count, 1) + np.concatenate(keys))
+        return combined // max(key_count, 1), combined % max(key_count, 1)
+
+    @staticmethod
+    def _key_pairs_to_entries(data: Dict, names: np.ndarray,
+                              keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        key_entries = data['index'].keys
+        entries_per_key = [key_entries[key] for key in data['keys']]
+        counts = np.fromiter(map(len, entries_per_key), dtype=np.int64,
+                             count=len(entries_per_key))
+        flat = np.fromiter((e for entries in entries_per_key for e in entries),
+                           dtype=np.int64, count=int(counts.sum()))
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        per_pair = counts[keys]
+        take = np.repeat(offsets[keys], per_pair) + (
+            np.arange(per_pair.sum()) - np.repeat(np.cumsum(per_pair) - per_pair, per_pair)
+        )
+        entry_count = max(len(data['entries']), 1)
+        combined = np.unique(np.repeat(names, per_pair) * entry_count + flat[take])
+        return combined // entry_count, combined % entry_count
+
+    def _substring_section(self, section: str, lower_blob: str,
+                           line_starts: np.ndarray) -> Dict[str, np.ndarray]:
+        """Names containing each pattern of a substring-matched section"""
+        data = self.sections[section]
+        matches = {}
+        for i, pattern in enumerate(data['patterns']):
+            if not pattern:
+                names = np.arange(len(line_starts), dtype=np.int64)
+            else:
+                positions = np.fromiter(
+                    (m.start() for m in re.finditer(re.escape(pattern), lower_blob)),
+                    dtype=np.int64
+                )
+                names = np.unique(np.searchsorted(line_starts, positions, side='right') - 1)
+            data['hits'][i] += len(names)
+            matches[pattern] = names
+        return matches
+
+    # -- running ----------------------------------------------------------
+
+    def add_chunk(self, names: List[str]) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """Analyze one chunk of names (stems, as the analyzer sees them).
+
+        Returns the (name index, entry index) pairs matched in each
+        token-matched section.
+        """
+        started = time.perf_counter()
+        count = len(names)
+        tokens = self.tokenize_chunk(names)
+        ids, name_of = self._token_ids(tokens)
+
+        max_span = max(self.sections[s]['index'].max_span for s in TOKEN_SECTIONS)
+        runs = {}
+        for n in range(1, max(max_span, TokenIndex.FUZZY_SPAN) + 1):
+            if len(ids) < n:
+                break
+            starts = np.arange(len(ids) - n + 1, dtype=np.int64)
+            valid = name_of[starts] == name_of[starts + n - 1]
+            runs[n] = (self._run_hashes(ids, n)[valid], starts[valid])
+
+        matched = {
+            section: self._token_section(section, ids, name_of, runs, count)
+            for section in TOKEN_SECTIONS
+        }
+
+        lower_blob = '\n'.join(name.replace('\n', ' ') for name in names).lower()
+        lengths = np.fromiter(map(len, names), dtype=np.int64, count=count) + 1
+        line_starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        special = self._substring_section('special_patterns', lower_blob, line_starts)
+        self._substring_section('tag_rules', lower_blob, line_starts)
+
+        self._resolve_categories(names, matched['categories'], special)
+        self.names += count
+        self.elapsed += time.perf_counter() - started
+        return matched
+
+    def _resolve_categories(self, names: List[str], categories: Tuple[np.ndarray, np.ndarray],
+                            special: Dict[str, np.ndarray]):
+        """Final category per name the way NameAnalyzer picks it"""
+        count = len(names)
+        category_entries = self.sections['categories']['entries']
+
+        # Override special patterns win, first in rule order
+        override = np.full(count, -1, dtype=np.int64)
+        for i, (kind, entry) in enumerate(self.sections['special_patterns']['entries']):
+            if not entry.get('override_category'):
+                continue
+            hits = np.unique(np.concatenate(
+                [special[p] for p in entry.get('patterns', []) if p in special] or
+                [np.empty(0, dtype=np.int64)]
+            ))
+            unset = hits[override[hits] < 0]
+            override[unset] = i
+            self.final_categories[kind] += len(unset)
+
+        # Otherwise the highest priority; ties go to the first in rule order
+        pair_names, pair_entries = categories
+        best = np.full(count, np.iinfo(np.int64).min, dtype=np.int64)
+        np.maximum.at(best, pair_names, self.priorities[pair_entries])
+        top = self.priorities[pair_entries] == best[pair_names]
+        winner = np.full(count, len(category_entries), dtype=np.int64)
+        np.minimum.at(winner, pair_names[top], pair_entries[top])
+
+        free = override < 0
+        has_category = winner < len(category_entries)
+        self.final_categories['MISC'] += int((free & ~has_category).sum())
+        chosen = winner[free & has_category]
+        for entry, n in zip(*np.unique(chosen, return_counts=True)):
+            self.final_categories[category_entries[entry][0]] += int(n)
+
+        # Every other category matching the same name is a conflict
+        losing = (pair_entries != winner[pair_names]) & free[pair_names]
+        pairs = winner[pair_names[losing]] * len(category_entries) + pair_entries[losing]
+        unique, first, counts = np.unique(pairs, return_index=True, return_counts=True)
+        loser_names = pair_names[losing]
+        for code, index, n in zip(unique, first, counts):
+            pair = divmod(int(code), len(category_entries))
+            self.conflicts[pair] += int(n)
+            self.conflict_examples.setdefault(pair, names[loser_names[index]])
+
+    def run(self, chunks: Iterable[List[str]],
+            progress: Optional[Callable[[int], None]] = None) -> Dict:
+        for chunk in chunks:
+            self.add_chunk(chunk)
+            if progress:
+                progress(self.names)
+        return self.report()
+
+    def run_database(self, db, progress: Optional[Callable[[int], None]] = None) -> Dict:
+        """Analyze every original_name in the files table"""
+        chunks = (
+            [os.path.splitext(name)[0] for name in names]
+            for names in db.iter_original_names(self.chunk_size)
+        )
+        return self.run(chunks, progress)
+
+    # -- reporting --------------------------------------------------------
+
+    def report(self) -> Dict:
+        patterns = []
+        for section in TOKEN_SECTIONS:
+            data = self.sections[section]
+            for entry_name, entry in data['entries']:
+                for pattern in entry.get('patterns', []):
+                    key = ''.join(tokenize(pattern))
+                    key_id = data['key_ids'].get(key)
+                    patterns.append({
+                        'section': section, 'rule': entry_name, 'pattern': pattern,
+                        'hits': int(data['exact'][key_id]) if key_id is not None else 0,
+                        'fuzzy_hits': int(data['fuzzy'][key_id]) if key_id is not None else 0,
+                    })
+        for section in SUBSTRING_SECTIONS:
+            data = self.sections[section]
+            hits = dict(zip(data['patterns'], data['hits'].tolist()))
+            for entry_name, entry in data['entries']:
+                for pattern in entry.get('patterns', []):
+                    patterns.append({
+                        'section': section, 'rule': entry_name, 'pattern': pattern,
+                        'hits': hits.get(pattern, 0), 'fuzzy_hits': 0,
+                    })
+
+        category_entries = self.sections['categories']['entries']
+        conflicts = []
+        for (winner, loser), count in self.conflicts.most_common():
+            conflicts.append({
+                'winner': category_entries[winner][0],
+                'other': category_entries[loser][0],
+                'names': count,
+                'tied': bool(self.priorities[winner] == self.priorities[loser]),
+                'example': self.conflict_examples[(winner, loser)],
+            })
+
+        misc = self.final_categories.get('MISC', 0)
+        return {
+            'names': self.names,
+            'seconds': round(self.elapsed, 3),
+            'names_per_second': round(self.names / self.elapsed, 1) if self.elapsed else 0.0,
+            'misc_share': misc / self.names if self.names else 0.0,
+            'categories': dict(self.final_categories.most_common()),
+            'patterns': sorted(patterns, key=lambda p: -(p['hits'] + p['fuzzy_hits'])),
+            'never_matched': [p for p in patterns if not p['hits'] and not p['fuzzy_hits']],
+            'conflicts': conflicts,
+        }
+
+
+def format_report(report: Dict, top: int = 20) -> str:
+    lines = [
+        f"{report['names']:,} names in {report['seconds']:.1f}s "
+        f"({report['names_per_second']:,.0f} names/s)",
+        f"MISC: {report['misc_share']:.1%} of names",
+        "",
+        "Final categories",
+    ]
+    for category, count in report['categories'].items():
+        lines.append(f"  {category:<20}{count:>12,}")
+    lines += ["", f"Top {top} patterns"]
+    for p in report['patterns'][:top]:
+        lines.append(f"  {p['section']:<18}{p['rule']:<20}{p['pattern']!r:<24}"
+                     f"{p['hits']:>10,}{p['fuzzy_hits']:>10,} fuzzy")
+    lines += ["", f"Category conflicts (top {top}; * = equal priority, decided by rule order)"]
+    for c in report['conflicts'][:top]:
+        mark = '*' if c['tied'] else ' '
+        lines.append(f" {mark}{c['winner']:<14} over {c['other']:<14}{c['names']:>10,}"
+                     f"   e.g. {c['example']}")
+    lines += ["", f"Patterns that never matched ({len(report['never_matched'])})"]
+    for p in report['never_matched']:
+        lines.append(f"  {p['section']:<18}{p['rule']:<20}{p['pattern']!r}")
+    return "\n".join(lines)
+
+
+def main():
+    from ..database.database import DatabaseManager
+    from .settings_manager import Settings
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help="database file (default: the application database)")
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--top", type=int, default=20, help="rows per report section")
+    parser.add_argument("--output", help="also write the full report as JSON")
+    args = parser.parse_args()
+
+    rules_manager = RulesManager.from_settings(Settings())
+    analytics = RuleAnalytics(rules_manager, chunk_size=args.chunk_size)
+    report = analytics.run_database(DatabaseManager(args.db))
+    print(format_report(report, args.top))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,431 @@
 # src/core/rules_manager.py
+import hashlib
 import json
+import logging
+import pickle
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
 import re
+from .token_index import TokenIndex
+from ..utils.instrumentation import metrics, timed
+
+RULES_DIR = Path(__file__).parent.parent / "rules"
+
+# Which test_name() results each rules section feeds
+SECTION_MATCHES = {
+    'categories': ('categories',),
+    'franchises': ('franchises',),
+    'creators': ('creators',),
+    'special_patterns': ('special_patterns',),
+    'tag_rules': ('tags',),
+    'naming_patterns': ('technical', 'version', 'nsfw_status'),
+}
+
+# Sections matched on whole tokens (TokenIndex) rather than substrings
+TOKEN_SECTIONS = ('categories', 'franchises', 'creators')
+
+
+class PatternTable:
+    """Finds which entries have a literal pattern occurring in a text.
+
+    Patterns are indexed by their first three characters, so a lookup
+    costs one dict probe per position of the text instead of one
+    substring search per pattern; shorter patterns are checked directly.
+    Small tables (up to LINEAR_MAX patterns, like the default special
+    patterns and auto tags) skip the index: a few C-level substring
+    searches beat a dict probe per position. Gives the same answer as
+    ``any(p in text for p in patterns)`` per entry, and is plain data, so
+    it pickles and loads without rebuilding.
+    """
+
+    GRAM = 3
+    LINEAR_MAX = 64
+
+    def __init__(self, entries: Iterable[Iterable[str]]):
+        self.grams: Dict[str, List[Tuple[str, int]]] = {}
+        self.short: List[Tuple[str, int]] = []
+        self.linear: Optional[List[Tuple[str, int]]] = []
+        for index, patterns in enumerate(entries):
+            for pattern in set(patterns):
+                self.linear.append((pattern, index))
+                if len(pattern) < self.GRAM:
+                    self.short.append((pattern, index))
+                else:
+                    self.grams.setdefault(pattern[:self.GRAM], []).append((pattern, index))
+        if len(self.linear) > self.LINEAR_MAX:
+            self.linear = None
+
+    def matching(self, text: str) -> List[int]:
+        """Indexes of the entries with a pattern in text, in entry order"""
+        if self.linear is not None:
+            return sorted({index for pattern, index in self.linear if pattern in text})
+        found = {index for pattern, index in self.short if pattern in text}
+        get = self.grams.get
+        for pos in range(len(text) - self.GRAM + 1):
+            candidates = get(text[pos:pos + self.GRAM])
+            if candidates:
+                for pattern, index in candidates:
+                    if index not in found and text.startswith(pattern, pos):
+                        found.add(index)
+        return sorted(found)
+
+
+class ChangeTrigger:
+    """Tells whether a name's matches could differ after a rules update.
+
+    ``substrings`` are the changed patterns of substring-matched sections,
+    ``tokens`` those of token-matched ones. A token pattern counts when it
+    matches the name exactly or within the fuzzy distance, since either
+    can change the name's result.
+    """
+
+    def __init__(self, substrings: Iterable[str], tokens: Iterable[str]):
+        self.substrings = RulesManager._any_of(substrings)
+        self.tokens = TokenIndex([tokens])
+
+    def matches(self, name: str) -> bool:
+        if self.substrings.search(name.lower()):
+            return True
+        return bool(self.tokens.keys) and bool(self.tokens.matching(name, always_fuzzy=True))
+
 
 class RulesManager:
-    def __init__(self, rules_file: str = None):
-        self.rules_file = rules_file or Path(__file__).parent.parent / "rules" / "default_rules.json"
-        self.rules = self.load_rules()
-        
-    def load_rules(self) -> Dict[str, Any]:
-        """Load rules from JSON file"""
+    """Rules merged from up to three layers into one compiled ruleset.
+
+    Layers are applied in order, later ones overriding earlier ones key by
+    key: the bundled defaults, an optional shop-wide rule pack (a JSON file
+    or a folder of them, usually shared between machines) and the user's
+    own files in rules/custom_rules. The merged rules and their compiled
+    form (regexes, pattern tables and a per-section prefilter) are cached
+    in ``cache_dir`` under a key made from the content of every layer
+    file, so a start with unchanged rules skips parsing and compiling.
+    """
+
+    LAYERS = ('defaults', 'shop', 'user')
+    CACHE_VERSION = 3
+
+    def __init__(self, rules_file: str = None, custom_dir: str = None,
+                 shop_pack: str = None, cache_dir: str = None):
+        self.rules_file = Path(rules_file) if rules_file else RULES_DIR / "default_rules.json"
+        self.custom_dir = Path(custom_dir) if custom_dir else RULES_DIR / "custom_rules"
+        self.shop_pack = Path(shop_pack) if shop_pack else None
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._rules: Dict[str, Any] = {}
+        self._digests: Dict[str, str] = {}
+        self._compiled: Dict[str, Any] = {}
+        # Tells which names the last update_rules() could have changed;
+        # None when that cannot be narrowed down (regex changes)
+        self.change_trigger: Optional[ChangeTrigger] = None
+        self.load(strict=False)
+
+    @classmethod
+    def from_settings(cls, settings) -> 'RulesManager':
+        """The application's rules: the configured shop pack, cached in the
+        data directory"""
+        return cls(
+            shop_pack=settings.get("rules", "shop_pack") or None,
+            cache_dir=settings.data_directory / "rules_cache"
+        )
+
+    @property
+    def rules(self) -> Dict[str, Any]:
+        return self._rules
+
+    @rules.setter
+    def rules(self, rules: Dict[str, Any]):
+        self.update_rules(rules)
+
+    @property
+    def digest(self) -> str:
+        """Key of the ruleset in use; changes whenever any section does"""
+        digest = hashlib.blake2b(digest_size=16)
+        for section, section_digest in sorted(self._digests.items()):
+            digest.update(f"{section}:{section_digest}".encode())
+        return digest.hexdigest()
+
+    def layer_files(self) -> List[Tuple[str, Path]]:
+        """(layer, file) pairs in the order they are merged"""
+        files = [('defaults', self.rules_file)]
+        files.extend(('shop', path) for path in self._json_files(self.shop_pack))
+        files.extend(('user', path) for path in self._json_files(self.custom_dir))
+        return files
+
+    def watch_paths(self) -> List[Path]:
+        """Override folders and files whose changes should trigger a reload"""
+        paths = []
+        for source in (self.shop_pack, self.custom_dir):
+            if source is None:
+                continue
+            if source.is_dir():
+                paths.append(source)
+            elif source.parent.is_dir():
+                paths.append(source.parent)
+        paths.extend(path for layer, path in self.layer_files() if layer != 'defaults')
+        return paths
+
+    @staticmethod
+    def _json_files(source: Optional[Path]) -> List[Path]:
+        if source is None:
+            return []
+        if source.is_dir():
+            return sorted(source.glob("*.json"))
+        return [source] if source.is_file() else []
+
+    def load(self, strict: bool = True) -> Set[str]:
+        """Load all layers, from the compiled cache when the files are unchanged.
+
+        Returns the rules sections that differ from the active ruleset. An
+        unreadable override file raises ValueError, or with ``strict=False``
+        is logged and skipped.
+        """
+        sources = self._read_layers()
+        key = self._cache_key(sources)
+        cached = self._read_cache(key)
+        if cached is not None:
+            return self._install(cached['rules'], cached['digests'], cached['compiled'])
+        rules = self._merge_layers(sources, strict)
+        if strict:
+            self.validate_rules(rules)
+        changed = self.update_rules(rules)
+        self._write_cache(key)
+        return changed
+
+    def load_rules(self, strict: bool = True) -> Dict[str, Any]:
+        """Merged rules of all layers, parsed from the files"""
+        return self._merge_layers(self._read_layers(), strict)
+
+    def _read_layers(self) -> List[Tuple[str, Path, bytes]]:
+        sources = []
+        for layer, path in self.layer_files():
+            try:
+                sources.append((layer, path, path.read_bytes()))
+            except FileNotFoundError:
+                if layer == 'defaults':
+                    raise FileNotFoundError(f"Rules file not found: {path}")
+                # Deleted between listing and reading; the watcher will fire again
+        return sources
+
+    def _merge_layers(self, sources: List[Tuple[str, Path, bytes]],
+                      strict: bool) -> Dict[str, Any]:
+        rules = {}
+        for layer, path, data in sources:
+            try:
+                layer_rules = self._parse_layer_file(path, data)
+            except ValueError as e:
+                if strict or layer == 'defaults':
+                    raise
+                logging.error(f"Skipping {layer} rules: {e}")
+                continue
+            self._merge(rules, layer_rules)
+        return rules
+
+    @staticmethod
+    def _parse_layer_file(path: Path, data: bytes) -> Dict[str, Any]:
+        text = data.decode('utf-8')
+        if not text.strip():
+            return {}
+        try:
+            rules = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON in {path.name}: {e}")
+        if not isinstance(rules, dict):
+            raise ValueError(f"Rules in {path.name} must be a JSON object")
+        return rules
+
+    @staticmethod
+    def _merge(base: Dict[str, Any], override: Dict[str, Any]):
+        """Merge override into base; nested objects are merged key by key"""
+        for key, value in override.items():
+            if isinstance(value, dict) and isinstance(base.get(key), dict):
+                RulesManager._merge(base[key], value)
+            else:
+                base[key] = value
+
+    def _cache_key(self, sources: List[Tuple[str, Path, bytes]]) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"v{self.CACHE_VERSION}".encode())
+        for layer, _, data in sources:
+            digest.update(layer.encode())
+            digest.update(hashlib.blake2b(data, digest_size=16).digest())
+        return digest.hexdigest()
+
+    def _read_cache(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.cache_dir is None:
+            return None
+        path = self.cache_dir / f"rules_{key}.pickle"
         try:
-            with open(self.rules_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            with open(path, 'rb') as f:
+                cached = pickle.load(f)
         except FileNotFoundError:
-            raise FileNotFoundError(f"Rules file not found: {self.rules_file}")
+            metrics.cache('rules_compiled', False)
+            return None
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable rules cache {path.name}: {e}")
+            metrics.cache('rules_compiled', False)
+            return None
+        metrics.cache('rules_compiled', True)
+        return cached
 
-    def save_rules(self, rules: Dict[str, Any] = None):
-        """Save current or provided rules to file"""
-        rules = rules or self.rules
-        with open(self.rules_file, 'w', encoding='utf-8') as f:
-            json.dump(rules, f, indent=4)
+    def _write_cache(self, key: str):
+        if self.cache_dir is None:
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            path = self.cache_dir / f"rules_{key}.pickle"
+            temp = path.with_suffix('.tmp')
+            with open(temp, 'wb') as f:
+                pickle.dump({
+                    'rules': self._rules,
+                    'digests': self._digests,
+                    'compiled': self._compiled,
+                }, f, protocol=pickle.HIGHEST_PROTOCOL)
+            temp.replace(path)
+            # Only the ruleset in use is worth keeping
+            for old in self.cache_dir.glob("rules_*.pickle"):
+                if old != path:
+                    old.unlink(missing_ok=True)
+        except OSError as e:
+            logging.warning(f"Could not write rules cache: {e}")
+
+    def reload(self) -> Set[str]:
+        """Re-read the rule files; returns the sections that changed"""
+        return self.load(strict=True)
+
+    def update_rules(self, rules: Dict[str, Any]) -> Set[str]:
+        """Replace the rules, recompiling only the sections that changed.
+
+        Returns the names of the changed sections, so callers can limit
+        re-analysis to results those sections feed (see SECTION_MATCHES).
+        """
+        digests = {
+            section: hashlib.blake2b(
+                json.dumps(data, sort_keys=True).encode('utf-8'), digest_size=16
+            ).hexdigest()
+            for section, data in rules.items()
+        }
+        return self._install(rules, digests)
+
+    def _install(self, rules: Dict[str, Any], digests: Dict[str, str],
+                 compiled: Dict[str, Any] = None) -> Set[str]:
+        changed = {
+            section for section in set(digests) | set(self._digests)
+            if digests.get(section) != self._digests.get(section)
+        }
+        self.change_trigger = self._change_trigger(self._rules, rules, changed)
+        self._rules = rules
+        self._digests = digests
+        if compiled is not None:
+            self._compiled = compiled
+        else:
+            for section in changed & set(SECTION_MATCHES):
+                self._compiled[section] = self._compile_section(section, rules.get(section, {}))
+        if changed:
+            logging.debug(f"Rules recompiled: {', '.join(sorted(changed))}")
+        return changed
+
+    @staticmethod
+    def _compile_section(section: str, data: Dict[str, Any]):
+        """Compiled form of one section.
+
+        Categories, franchises and creators become their entries plus a
+        TokenIndex, the other pattern sections a PatternTable over the
+        entries' patterns; naming patterns become compiled regexes.
+        """
+        if section == 'naming_patterns':
+            return {
+                name: re.compile(entry['regex'])
+                for name, entry in data.items() if 'regex' in entry
+            }
+        if section == 'tag_rules':
+            entries = list(data.get('auto_tags', {}).items())
+            return entries, PatternTable(patterns for _, patterns in entries)
+        entries = list(data.items())
+        patterns = (entry.get('patterns', []) for _, entry in entries)
+        if section in TOKEN_SECTIONS:
+            return entries, TokenIndex(patterns)
+        return entries, PatternTable(patterns)
+
+    @staticmethod
+    def _any_of(patterns: Iterable[str]) -> re.Pattern:
+        """Regex matching wherever any of the literal patterns occurs"""
+        patterns = sorted(set(patterns))
+        if '' in patterns:
+            return re.compile('')  # an empty pattern occurs in every name
+        if not patterns:
+            return re.compile(r'(?!)')  # matches nothing
+        return re.compile('|'.join(map(re.escape, patterns)))
+
+    @staticmethod
+    def _change_trigger(old: Dict[str, Any], new: Dict[str, Any],
+                        changed: Set[str]) -> Optional['ChangeTrigger']:
+        """Which names the patterns of every changed rule could affect.
+
+        A name can only gain or lose a match if it contains a pattern of a
+        rule that was added, removed or edited, so names the trigger does
+        not match keep their results.
+        """
+        substrings, tokens = set(), set()
+        for section in changed & set(SECTION_MATCHES):
+            before, after = old.get(section, {}), new.get(section, {})
+            if section == 'naming_patterns':
+                return None
+            if section == 'tag_rules':
+                before, after = before.get('auto_tags', {}), after.get('auto_tags', {})
+            target = tokens if section in TOKEN_SECTIONS else substrings
+            for key in set(before) | set(after):
+                if before.get(key) == after.get(key):
+                    continue
+                for entry in (before.get(key), after.get(key)):
+                    if isinstance(entry, dict):
+                        entry = entry.get('patterns', [])
+                    target.update(entry or [])
+        return ChangeTrigger(substrings, tokens)
+
+    @staticmethod
+    def match_keys(sections: Iterable[str]) -> Set[str]:
+        """test_name() result keys that depend on the given rules sections"""
+        return {key for section in sections for key in SECTION_MATCHES.get(section, ())}
+
+    def save_rules(self, rules: Dict[str, Any], filename: str = "my_rules.json") -> Path:
+        """Save a ruleset as a user override file in custom_dir and reload.
+
+        Only what differs from the other layers is written, so the
+        defaults and the shop pack stay in their own files and keep
+        applying when they are updated. Layers can only add or replace
+        entries, so a ruleset that drops one raises ValueError.
+        """
+        target = self.custom_dir / filename
+        base: Dict[str, Any] = {}
+        for layer, path, data in self._read_layers():
+            if path != target:
+                self._merge(base, self._parse_layer_file(path, data))
+        self.validate_rules(rules)
+        overrides = self._difference(base, rules)
+        self.custom_dir.mkdir(parents=True, exist_ok=True)
+        temp = target.with_suffix('.tmp')
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(overrides, f, indent=4)
+        temp.replace(target)
+        self.reload()
+        return target
+
+    @staticmethod
+    def _difference(base: Dict[str, Any], rules: Dict[str, Any],
+                    where: str = "") -> Dict[str, Any]:
+        """The override that _merge() turns ``base`` into ``rules`` with"""
+        removed = set(base) - set(rules)
+        if removed:
+            raise ValueError(
+                f"Rule overrides cannot remove {where}{', '.join(sorted(removed))}")
+        overrides = {}
+        for key, value in rules.items():
+            if isinstance(value, dict) and isinstance(base.get(key), dict):
+                nested = RulesManager._difference(base[key], value, f"{where}{key}.")
+                if nested:
+                    overrides[key] = nested
+            elif key not in base or base[key] != value:
+                overrides[key] = value
+        return overrides
 
     def get_category_patterns(self) -> Dict[str, list]:
         """Get category patterns in simple format"""
@@ -30,61 +434,69 @@ class RulesManager:
             for cat, data in self.rules["categories"].items()
         }
 
-    def test_name(self, name: str) -> Dict[str, Any]:
-        """Test how a name would be processed with current rules"""
+    @timed('rules.test_name')
+    def test_name(self, name: str, keys: Optional[Set[str]] = None) -> Dict[str, Any]:
+        """Test how a name would be processed with current rules.
+
+        ``keys`` limits the result to those entries (see match_keys()).
+        """
+        matchers = {
+            'categories': self._find_matching_categories,
+            'franchises': self._find_matching_franchises,
+            'creators': self._find_matching_creators,
+            'special_patterns': self._find_special_patterns,
+            'tags': self._find_matching_tags,
+            'technical': self._extract_technical_specs,
+            'version': self._extract_version,
+            'nsfw_status': self._check_nsfw_status
+        }
         return {
-            'categories': self._find_matching_categories(name),
-            'franchises': self._find_matching_franchises(name),
-            'creators': self._find_matching_creators(name),
-            'special_patterns': self._find_special_patterns(name),
-            'tags': self._find_matching_tags(name),
-            'technical': self._extract_technical_specs(name),
-            'version': self._extract_version(name),
-            'nsfw_status': self._check_nsfw_status(name)
+            key: matcher(name) for key, matcher in matchers.items()
+            if keys is None or key in keys
         }
 
     def _find_matching_categories(self, name: str) -> List[Dict[str, Any]]:
         """Find all matching categories for a name"""
-        lower_name = name.lower()
         matches = []
         
-        for category, data in self.rules["categories"].items():
-            if any(pattern in lower_name for pattern in data["patterns"]):
-                matches.append({
-                    "category": category,
-                    "priority": data["priority"],
-                    "description": data["description"]
-                })
+        entries, table = self._compiled["categories"]
+        for index in table.matching(name):
+            category, data = entries[index]
+            matches.append({
+                "category": category,
+                "priority": data["priority"],
+                "description": data["description"]
+            })
         
         return sorted(matches, key=lambda x: x["priority"], reverse=True)
 
     def _find_matching_franchises(self, name: str) -> List[Dict[str, Any]]:
         """Find all matching franchises"""
-        lower_name = name.lower()
         matches = []
         
-        for franchise, data in self.rules["franchises"].items():
-            if any(pattern in lower_name for pattern in data["patterns"]):
-                matches.append({
-                    "name": franchise,
-                    "aliases": data.get("aliases", []),
-                    "related_categories": data.get("related_categories", [])
-                })
+        entries, table = self._compiled["franchises"]
+        for index in table.matching(name):
+            franchise, data = entries[index]
+            matches.append({
+                "name": franchise,
+                "aliases": data.get("aliases", []),
+                "related_categories": data.get("related_categories", [])
+            })
         
         return matches
 
     def _find_matching_creators(self, name: str) -> List[Dict[str, Any]]:
         """Find all matching creators"""
-        lower_name = name.lower()
         matches = []
         
-        for creator, data in self.rules["creators"].items():
-            if any(pattern in lower_name for pattern in data["patterns"]):
-                matches.append({
-                    "name": creator,
-                    "always_tag": data.get("always_tag", False),
-                    "trusted": data.get("trusted", False)
-                })
+        entries, table = self._compiled["creators"]
+        for index in table.matching(name):
+            creator, data = entries[index]
+            matches.append({
+                "name": creator,
+                "always_tag": data.get("always_tag", False),
+                "trusted": data.get("trusted", False)
+            })
         
         return matches
 
@@ -93,12 +505,13 @@ class RulesManager:
         lower_name = name.lower()
         matches = []
         
-        for pattern_type, data in self.rules["special_patterns"].items():
-            if any(pattern in lower_name for pattern in data["patterns"]):
-                matches.append({
-                    "type": pattern_type,
-                    "override_category": data.get("override_category", False)
-                })
+        entries, table = self._compiled["special_patterns"]
+        for index in table.matching(lower_name):
+            pattern_type, data = entries[index]
+            matches.append({
+                "type": pattern_type,
+                "override_category": data.get("override_category", False)
+            })
         
         return matches
 
@@ -108,21 +521,19 @@ class RulesManager:
         tags = set()
         
         # Check auto tags
-        for tag, patterns in self.rules["tag_rules"]["auto_tags"].items():
-            if any(pattern in lower_name for pattern in patterns):
-                tags.add(tag)
+        entries, table = self._compiled["tag_rules"]
+        for index in table.matching(lower_name):
+            tags.add(entries[index][0])
         
         return list(tags)
 
     def _extract_technical_specs(self, name: str) -> List[str]:
         """Extract technical specifications based on patterns"""
-        pattern = self.rules["naming_patterns"]["technical_specs"]["regex"]
-        return re.findall(pattern, name)
+        return self._compiled["naming_patterns"]["technical_specs"].findall(name)
 
     def _extract_version(self, name: str) -> Optional[str]:
         """Extract version number if present"""
-        pattern = self.rules["naming_patterns"]["version"]["regex"]
-        match = re.search(pattern, name)
+        match = self._compiled["naming_patterns"]["version"].search(name)
         return match.group(1) if match else None
 
     def _check_nsfw_status(self, name: str) -> Dict[str, bool]:
@@ -132,8 +543,7 @@ class RulesManager:
         has_both = False
         
         # Check for NSFW indicators
-        nsfw_pattern = self.rules["naming_patterns"]["nsfw_indicators"]["regex"]
-        if re.search(nsfw_pattern, lower_name):
+        if self._compiled["naming_patterns"]["nsfw_indicators"].search(lower_name):
             has_both = True
             has_nsfw = True
         elif "nsfw" in lower_name:
@@ -144,8 +554,9 @@ class RulesManager:
             "has_both_versions": has_both
         }
 
-    def validate_rules(self) -> bool:
-        """Validate the structure and content of rules"""
+    def validate_rules(self, rules: Dict[str, Any] = None) -> bool:
+        """Validate the structure and content of current or provided rules"""
+        rules = self.rules if rules is None else rules
         required_sections = [
             "categories", "franchises", "creators", "special_patterns",
             "tag_rules", "naming_patterns"
@@ -154,11 +565,11 @@ class RulesManager:
         try:
             # Check for required sections
             for section in required_sections:
-                if section not in self.rules:
+                if section not in rules:
                     raise ValueError(f"Missing required section: {section}")
                 
             # Validate category structure
-            for category, data in self.rules["categories"].items():
+            for category, data in rules["categories"].items():
                 if not isinstance(data.get("patterns"), list):
                     raise ValueError(f"Invalid patterns for category: {category}")
                 if not isinstance(data.get("priority"), int):
@@ -169,4 +580,4 @@ class RulesManager:
             return True
             
         except Exception as e:
-            raise ValueError(f"Rules validation failed: {str(e)}")
\ No newline at end of file
+            raise ValueError(f"Rules validation failed: {str(e)}")
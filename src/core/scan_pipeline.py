@@ -0,0 +1,146 @@
+import logging
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .archive_analyzer import ArchiveAnalyzer
+from .file_hasher import FileHasher
+from .job_queue import JobQueue, RetryableError, is_lock_error
+from .rename_engine import RenameEngine
+from ..utils.instrumentation import metrics
+
+
+class ScanPipeline:
+    """Stage handlers that drain a JobQueue.
+
+    - 'hash': quick and content hash, then a files row; queues 'analyze'
+    - 'analyze': ArchiveAnalyzer.analyze_archive; the analysis is the result
+      and is recorded (and indexed for search) in processed_archives, and
+      each batch's suggested tags are stored in one transaction
+    - 'rename': one validated rename plan applied as a journaled batch
+
+    run_once() leases one batch from the furthest stage that has work, so
+    files already hashed reach the table before more files are hashed.
+    A file another process has locked raises RetryableError and is
+    retried later by the queue; other errors fail the job.
+    """
+
+    ORDER = ('rename', 'analyze', 'hash')
+
+    def __init__(self, db, queue: JobQueue, analyzer: ArchiveAnalyzer,
+                 rename_engine: RenameEngine, batch_size: int = 32,
+                 name_formatter: Optional[Callable[[Path, Dict], str]] = None):
+        self.db = db
+        # Suggested name of an analysed file, for the search index
+        self.name_formatter = name_formatter
+        self.queue = queue
+        self.analyzer = analyzer
+        self.rename_engine = rename_engine
+        self.batch_size = batch_size
+        self.handlers = {
+            'hash': self._hash,
+            'analyze': self._analyze,
+            'rename': self._rename,
+        }
+
+    def run_once(self) -> Tuple[str, List[Tuple[Dict, Dict]], List[Tuple[Dict, str]]]:
+        """Process one leased batch.
+
+        Returns (stage, [(job, result)], [(job, error)]) where the errors
+        are the jobs that failed for good; stage is '' when nothing was due.
+        """
+        for stage in self.ORDER:
+            jobs = self.queue.lease(stage, 1 if stage == 'rename' else self.batch_size)
+            if jobs:
+                break
+        else:
+            return '', [], []
+
+        results, failed = [], []
+        next_items: List[Dict] = []
+        with metrics.timer(f'jobs.{stage}'):
+            for job in jobs:
+                try:
+                    result, follow_up = self.handlers[stage](job)
+                except Exception as e:
+                    if not self.queue.fail(job, e):
+                        logging.error(f"{stage} job for {job['path']} failed: {e}")
+                        failed.append((job, str(e)))
+                    continue
+                results.append((job, result))
+                if follow_up:
+                    next_items.append(follow_up)
+            if stage == 'analyze':
+                self._tag_files(results)
+        self.queue.complete(results, 'analyze' if stage == 'hash' else None, next_items)
+        return stage, results, failed
+
+    @staticmethod
+    def _check_readable(path: Path):
+        """Open the file once so a lock shows up as an error we can classify"""
+        try:
+            with open(path, 'rb'):
+                pass
+        except OSError as e:
+            if is_lock_error(e):
+                raise RetryableError(f"File is locked: {e}") from e
+            raise
+
+    def _hash(self, job: Dict) -> Tuple[Dict, Optional[Dict]]:
+        path = Path(job['path'])
+        self._check_readable(path)
+        quick_hash = FileHasher.get_quick_hash(path)
+        content_hash = FileHasher.get_content_hash(path)
+        if content_hash is None:
+            raise OSError(f"Could not hash {path}")
+        # add_file upserts on the content hash, so a retried job is harmless
+        file_id = self.db.add_file(path, quick_hash=quick_hash, content_hash=content_hash).id
+        result = {'file_id': file_id, 'quick_hash': quick_hash, 'content_hash': content_hash}
+        return result, {'path': path,
+                        'payload': {'file_id': file_id, 'content_hash': content_hash}}
+
+    def _analyze(self, job: Dict) -> Tuple[Dict, None]:
+        path = Path(job['path'])
+        self._check_readable(path)
+        analysis = self.analyzer.analyze_archive(path)
+        if not analysis.get('error'):
+            suggested = self.name_formatter(path, analysis) if self.name_formatter else None
+            self.db.record_processed_archive(
+                path, job['payload'].get('content_hash'), analysis.get('entries', []),
+                analysis, suggested
+            )
+        return {'file_id': job['payload'].get('file_id'), 'analysis': analysis}, None
+
+    def _tag_files(self, results: List[Tuple[Dict, Dict]]):
+        """Store the batch's suggested tags in one transaction"""
+        tags_by_file = {
+            result['file_id']: result['analysis']['suggested_tags']
+            for _, result in results
+            if result['file_id'] is not None and not result['analysis'].get('error')
+        }
+        try:
+            self.db.tags.tag_files(tags_by_file)
+        except Exception as e:
+            # The analyses stand; tags are derived again on the next scan
+            logging.error(f"Could not store tags for {len(tags_by_file)} files: {e}")
+
+    def _rename(self, job: Dict) -> Tuple[Dict, None]:
+        plan = [
+            {**entry, 'source': Path(entry['source']), 'target': Path(entry['target'])}
+            for entry in job['payload']['plan']
+        ]
+        result = self.rename_engine.execute(plan, job['payload'].get('description'))
+        if result['status'] == 'rolled_back' and all(e.get('locked') for e in result['errors']):
+            # Nothing was renamed; try the whole batch again once the files are free
+            raise RetryableError(result['errors'][0]['error'])
+        return {
+            'status': result['status'],
+            'batch_id': result['batch_id'],
+            'renamed': [
+                {'source': str(e['source']), 'target': str(e['target'])}
+                for e in result['renamed']
+            ],
+            'errors': [
+                {'seq': e['seq'], 'source': str(plan[e['seq']]['source']), 'error': e['error']}
+                for e in result['errors'] if 'error' in e
+            ]
+        }, None
@@ -15,18 +15,43 @@ class Settings:
         "files": {
             "archive_types": [".zip", ".rar", ".7z"],
             "ignore_patterns": ["thumbs.db", ".ds_store"],
-            "backup_originals": True
+            "backup_originals": True,
+            "scan_workers": 1
         },
         "naming": {
             "auto_capitalize": True,
             "preserve_version_numbers": True,
             "add_category_prefix": True,
-            "default_category": "MISC"
+            "default_category": "MISC",
+            "conflict_strategy": "counter"  # counter, hash, or skip
         },
         "tags": {
             "auto_suggest_tags": True,
             "tag_style": "brackets",  # brackets, parentheses, or none
             "tag_separator": " "
+        },
+        "watch": {
+            "folders": [],
+            "debounce_seconds": 2.0,
+            "poll_interval_seconds": 10.0,
+            "force_polling": False
+        },
+        "rules": {
+            "shop_pack": ""  # shared rule pack: a JSON file or a folder of them
+        },
+        "thumbnails": {
+            "size": 256,
+            "cache_mb": 256,
+            "workers": 2
+        },
+        "jobs": {
+            "batch_size": 32,
+            "max_attempts": 5,  # retries for files locked by other programs
+            "lease_seconds": 120
+        },
+        "diagnostics": {
+            "instrumentation": False,
+            "profile_scans": False
         }
     }
 
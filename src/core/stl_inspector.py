@@ -0,0 +1,234 @@
+from pathlib import Path
+from typing import Collection, Dict, List, Optional, Tuple
+import io
+import logging
+import re
+import struct
+import zipfile
+
+import numpy as np
+import py7zr
+import rarfile
+
+
+class StlInspector:
+    """Reads STL members out of archives to measure triangle count and size.
+
+    Binary STLs are recognized from the 80-byte header and triangle count
+    (the count alone gives the polycount); vertex data is then streamed in
+    chunks through ``np.frombuffer`` to track the bounding box without
+    building Python objects per triangle. ASCII STLs are scanned for
+    ``vertex`` lines chunk by chunk. Reading is capped by a per-archive byte
+    budget; when it runs out the bounding box covers only the part that was
+    read and the model is flagged as partial.
+    """
+
+    HEADER_SIZE = 84
+    TRIANGLE = np.dtype([
+        ('normal', '<f4', (3,)),
+        ('vertices', '<f4', (3, 3)),
+        ('attributes', '<u2'),
+    ])
+    VERTEX_RE = re.compile(
+        rb'vertex\s+([-+0-9.eE]+)\s+([-+0-9.eE]+)\s+([-+0-9.eE]+)'
+    )
+
+    def __init__(self, byte_budget: int = 32 * 1024 * 1024,
+                 chunk_triangles: int = 65536):
+        self.byte_budget = byte_budget
+        self.chunk_triangles = chunk_triangles
+
+    def inspect_archive(self, filepath: Path, sink_factory=None,
+                        only: Optional[Collection[str]] = None) -> Dict:
+        """Inspect every STL member of an archive within the byte budget.
+
+        ``only`` restricts the inspection to the named members.
+
+        ``sink_factory`` is called with each member name and may return a
+        callable that receives every chunk of vertices as an (n, 3) float
+        array; it is how the mesh fingerprinter rides along the same read.
+        """
+        result = {'models': [], 'bytes_read': 0, 'budget_exhausted': False}
+        extension = filepath.suffix.lower()
+
+        def wanted(name):
+            return name.lower().endswith('.stl') and (only is None or name in only)
+
+        try:
+            if extension == '.zip':
+                with zipfile.ZipFile(filepath) as zf:
+                    members = [(i.filename, i.file_size) for i in zf.infolist()
+                               if wanted(i.filename)]
+                    self._inspect_members(result, members, zf.open, sink_factory)
+            elif extension == '.rar':
+                with rarfile.RarFile(filepath) as rf:
+                    members = [(i.filename, i.file_size) for i in rf.infolist()
+                               if wanted(i.filename)]
+                    self._inspect_members(result, members, rf.open, sink_factory)
+            elif extension == '.7z':
+                self._inspect_7z(result, filepath, sink_factory, wanted)
+        except Exception as e:
+            result['error'] = str(e)
+            logging.error(f"Error inspecting STL models in {filepath}: {e}")
+        return result
+
+    def _inspect_members(self, result: Dict, members: List[Tuple[str, int]], opener,
+                         sink_factory=None):
+        for name, size in members:
+            remaining = self.byte_budget - result['bytes_read']
+            if remaining <= self.HEADER_SIZE:
+                result['budget_exhausted'] = True
+                break
+            sink = sink_factory(name) if sink_factory else None
+            with opener(name) as stream:
+                model = self.inspect_stream(stream, size, remaining, sink)
+            model['name'] = name
+            result['bytes_read'] += model.pop('bytes_read')
+            result['models'].append(model)
+
+    def _inspect_7z(self, result: Dict, filepath: Path, sink_factory, wanted):
+        # py7zr can only hand out whole members, so pick the ones that fit
+        with py7zr.SevenZipFile(filepath) as sz:
+            members = [(i.filename, i.uncompressed) for i in sz.list()
+                       if wanted(i.filename)]
+        selected = []
+        budget = self.byte_budget
+        for name, size in members:
+            if size <= budget:
+                selected.append((name, size))
+                budget -= size
+            else:
+                result['budget_exhausted'] = True
+        if not selected:
+            return
+        targets = [name for name, _ in selected]
+        with py7zr.SevenZipFile(filepath) as sz:
+            if hasattr(sz, 'read'):
+                data = sz.read(targets=targets)
+            else:
+                # py7zr 1.x dropped read() in favour of writer factories
+                factory = py7zr.io.BytesIOFactory(self.byte_budget)
+                sz.extract(targets=targets, factory=factory)
+                data = {}
+                for name, product in factory.products.items():
+                    product.seek(0)
+                    data[name] = io.BytesIO(product.read())
+        self._inspect_members(result, selected, lambda name: data[name], sink_factory)
+
+    def inspect_stream(self, stream, size: int, budget: Optional[int] = None,
+                       sink=None) -> Dict:
+        """Measure one STL from a file-like object of known size"""
+        budget = self.byte_budget if budget is None else budget
+        head = stream.read(self.HEADER_SIZE)
+        if len(head) == self.HEADER_SIZE:
+            (count,) = struct.unpack_from('<I', head, 80)
+            if self.HEADER_SIZE + count * self.TRIANGLE.itemsize == size:
+                return self._read_binary(stream, count, budget - len(head), len(head), sink)
+        if head.lstrip().lower().startswith(b'solid'):
+            return self._read_ascii(stream, head, budget - len(head), sink)
+        return self._summary('unknown', 0, None, None, len(head), partial=True)
+
+    def _read_binary(self, stream, count: int, budget: int, bytes_read: int,
+                     sink=None) -> Dict:
+        lo = np.full(3, np.inf, dtype=np.float32)
+        hi = np.full(3, -np.inf, dtype=np.float32)
+        record = self.TRIANGLE.itemsize
+        remaining = count
+        while remaining and budget >= record:
+            n = min(remaining, self.chunk_triangles, budget // record)
+            data = stream.read(n * record)
+            n = len(data) // record
+            if n == 0:
+                break
+            triangles = np.frombuffer(data, dtype=self.TRIANGLE, count=n)
+            vertices = triangles['vertices'].reshape(-1, 3)
+            np.minimum(lo, vertices.min(axis=0), out=lo)
+            np.maximum(hi, vertices.max(axis=0), out=hi)
+            if sink:
+                sink(vertices)
+            remaining -= n
+            budget -= len(data)
+            bytes_read += len(data)
+        return self._summary('binary', count, lo, hi, bytes_read, partial=remaining > 0)
+
+    def _read_ascii(self, stream, head: bytes, budget: int, sink=None) -> Dict:
+        lo = np.full(3, np.inf, dtype=np.float64)
+        hi = np.full(3, -np.inf, dtype=np.float64)
+        facets = 0
+        bytes_read = len(head)
+        pending = head
+        chunk_size = self.chunk_triangles * 256
+        partial = False
+        while True:
+            if budget > 0:
+                data = stream.read(min(chunk_size, budget))
+            else:
+                data = b''
+                partial = True
+            budget -= len(data)
+            bytes_read += len(data)
+            buffer = pending + data
+            if data:
+                # Keep the trailing partial line for the next round
+                cut = buffer.rfind(b'\n') + 1
+                buffer, pending = buffer[:cut], buffer[cut:]
+            facets += buffer.count(b'endfacet')
+            coords = self.VERTEX_RE.findall(buffer)
+            if coords:
+                vertices = np.array(coords, dtype=np.float64)
+                np.minimum(lo, vertices.min(axis=0), out=lo)
+                np.maximum(hi, vertices.max(axis=0), out=hi)
+                if sink:
+                    sink(vertices)
+            if not data:
+                break
+        return self._summary('ascii', facets, lo, hi, bytes_read, partial=partial)
+
+    @staticmethod
+    def _summary(fmt: str, triangles: int, lo, hi, bytes_read: int,
+                 partial: bool = False) -> Dict:
+        summary = {
+            'format': fmt,
+            'triangles': int(triangles),
+            'bbox_min': None,
+            'bbox_max': None,
+            'dimensions': None,
+            'max_dimension': None,
+            'partial': partial,
+            'bytes_read': bytes_read
+        }
+        if lo is not None and np.all(np.isfinite(lo)) and np.all(np.isfinite(hi)):
+            dims = hi - lo
+            summary['bbox_min'] = [float(v) for v in lo]
+            summary['bbox_max'] = [float(v) for v in hi]
+            summary['dimensions'] = [round(float(v), 2) for v in dims]
+            summary['max_dimension'] = round(float(dims.max()), 2)
+        return summary
+
+    @staticmethod
+    def classify(models: List[Dict], rules: Dict) -> List[str]:
+        """Size-class and polycount tags for an archive's measured models.
+
+        ``rules`` is the ``model_based_tags`` section: tag -> [min, max]
+        ranges (max may be null) for 'size_classes' (largest model dimension
+        in mm) and 'polycount_classes' (total triangles).
+        """
+        tags = []
+        sizes = [m['max_dimension'] for m in models if m.get('max_dimension')]
+        triangles = sum(m['triangles'] for m in models)
+
+        def pick(value, classes):
+            for tag, (low, high) in classes.items():
+                if value >= low and (high is None or value < high):
+                    return tag
+            return None
+
+        if sizes:
+            tag = pick(max(sizes), rules.get('size_classes', {}))
+            if tag:
+                tags.append(tag)
+        if triangles:
+            tag = pick(triangles, rules.get('polycount_classes', {}))
+            if tag:
+                tags.append(tag)
+        return tags
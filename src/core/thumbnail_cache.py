@@ -0,0 +1,91 @@
+from pathlib import Path
+from typing import Optional
+import hashlib
+import logging
+import os
+import threading
+
+from ..utils.instrumentation import metrics
+
+
+class ThumbnailCache:
+    """Size-capped on-disk PNG cache addressed by content hash.
+
+    A thumbnail's key is derived from the archive content hash, the member
+    path and the render size, so renamed or moved archives keep their
+    thumbnails and a changed archive never shows a stale one. Files are
+    fanned out over 256 subdirectories. Recency is tracked through file
+    mtimes (touched on every hit) so it survives restarts; when the cache
+    grows past ``max_bytes`` the least recently used files are removed
+    until it is back under 90% of the cap.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._total = sum(size for _, size, _ in self._entries())
+
+    @staticmethod
+    def key(content_hash: str, member: str, size: int) -> str:
+        data = f"{content_hash}\0{member}\0{size}".encode('utf-8')
+        return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+    def path_for(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.png"
+
+    def get(self, key: str) -> Optional[Path]:
+        """Path of a cached thumbnail, marking it as recently used"""
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except OSError:
+            metrics.cache('thumbnails', False)
+            return None
+        metrics.cache('thumbnails', True)
+        return path
+
+    def put(self, key: str, png: bytes) -> Path:
+        path = self.path_for(key)
+        path.parent.mkdir(exist_ok=True)
+        # Write to a temporary name first so readers never see half a file
+        temp = path.with_suffix(f".{os.getpid()}.tmp")
+        temp.write_bytes(png)
+        with self._lock:
+            previous = path.stat().st_size if path.exists() else 0
+            os.replace(temp, path)
+            self._total += len(png) - previous
+            if self._total > self.max_bytes:
+                self._evict(int(self.max_bytes * 0.9))
+        return path
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total
+
+    def clear(self):
+        with self._lock:
+            self._evict(0)
+
+    def _entries(self):
+        for sub in self.directory.iterdir():
+            if not sub.is_dir():
+                continue
+            for entry in os.scandir(sub):
+                if entry.name.endswith('.png'):
+                    stat = entry.stat()
+                    yield entry.path, stat.st_size, stat.st_mtime_ns
+
+    def _evict(self, target: int):
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError as e:
+                logging.warning(f"Could not evict thumbnail {path}: {e}")
+        self._total = total
@@ -0,0 +1,155 @@
+from pathlib import Path
+from typing import List, Optional
+import logging
+
+import numpy as np
+from PySide6.QtCore import QBuffer, QByteArray, QIODevice
+from PySide6.QtGui import QImage
+
+from .stl_inspector import StlInspector
+
+
+class ThumbnailRenderer:
+    """Software renderer for STL thumbnails; no GPU or OpenGL context.
+
+    Triangles are projected orthographically from a fixed three-quarter
+    view (STL z-up, seen from the front right and slightly above), flat
+    shaded from their face normals and rasterized into a z-buffer with
+    NumPy. Triangles are grouped by the size of their screen bounding box
+    so each group is rasterized as one (n, k, k) block of candidate pixels;
+    for dense meshes nearly everything lands in the 1-2 pixel groups. The
+    image is encoded to PNG with QImage, which needs no QApplication, so
+    ``render_member`` can run in a worker process.
+    """
+
+    EYE = np.array([1.0, -1.2, 0.9])
+    LIGHT = np.array([-0.3, 0.5, 1.0])
+    COLOR = np.array([176.0, 188.0, 204.0])
+    MAX_CANDIDATES = 1 << 22
+
+    def __init__(self, size: int = 256, max_triangles: int = 2_000_000,
+                 byte_budget: int = 256 * 1024 * 1024):
+        self.size = size
+        self.max_triangles = max_triangles
+        self.byte_budget = byte_budget
+
+        eye = self.EYE / np.linalg.norm(self.EYE)
+        right = np.cross([0.0, 0.0, 1.0], eye)
+        right /= np.linalg.norm(right)
+        up = np.cross(eye, right)
+        # Rows map world coordinates to (screen x, screen y, depth toward eye)
+        self.view = np.stack([right, up, eye])
+        self.light = self.LIGHT / np.linalg.norm(self.LIGHT)
+
+    def render_member(self, archive: str, member: str) -> Optional[bytes]:
+        """Read one STL member of an archive and return it as PNG bytes"""
+        chunks: List[np.ndarray] = []
+        inspector = StlInspector(byte_budget=self.byte_budget)
+        result = inspector.inspect_archive(
+            Path(archive), lambda name: chunks.append, only=[member]
+        )
+        if result.get('error') or not chunks:
+            logging.warning(f"No geometry read for {member} in {archive}")
+            return None
+        vertices = np.concatenate(chunks)
+        # ASCII chunks split on lines, not facets; drop any trailing partial
+        triangles = vertices[:len(vertices) - len(vertices) % 3].reshape(-1, 3, 3)
+        return self.to_png(self.render(triangles))
+
+    def render(self, triangles: np.ndarray) -> np.ndarray:
+        """Rasterize (n, 3, 3) triangles into a (size, size, 4) RGBA image"""
+        size = self.size
+        image = np.zeros((size, size, 4), dtype=np.uint8)
+        if len(triangles) == 0:
+            return image
+        if len(triangles) > self.max_triangles:
+            step = -(-len(triangles) // self.max_triangles)
+            triangles = triangles[::step]
+
+        projected = triangles.astype(np.float64) @ self.view.T
+        x, y, z = projected[..., 0], projected[..., 1], projected[..., 2]
+
+        # Fit the projected bounding box into the image with a small margin
+        lo = np.array([x.min(), y.min()])
+        hi = np.array([x.max(), y.max()])
+        span = max(hi - lo) or 1.0
+        scale = size * 0.92 / span
+        center = (lo + hi) / 2
+        px = (x - center[0]) * scale + size / 2
+        py = size / 2 - (y - center[1]) * scale
+
+        normals = np.cross(projected[:, 1] - projected[:, 0], projected[:, 2] - projected[:, 0])
+        lengths = np.linalg.norm(normals, axis=1)
+        lengths[lengths == 0] = 1.0
+        shade = 0.25 + 0.75 * np.abs(normals @ self.light) / lengths
+
+        area = ((px[:, 1] - px[:, 0]) * (py[:, 2] - py[:, 0])
+                - (px[:, 2] - px[:, 0]) * (py[:, 1] - py[:, 0]))
+        visible = area != 0
+        x0 = np.clip(np.floor(px.min(axis=1)), 0, size - 1).astype(np.int64)
+        y0 = np.clip(np.floor(py.min(axis=1)), 0, size - 1).astype(np.int64)
+        x1 = np.clip(np.floor(px.max(axis=1)), 0, size - 1).astype(np.int64)
+        y1 = np.clip(np.floor(py.max(axis=1)), 0, size - 1).astype(np.int64)
+        extent = np.maximum(x1 - x0, y1 - y0) + 1
+
+        depth = np.full(size * size, -np.inf)
+        color = np.zeros(size * size)
+        k = 1
+        while k < 2 * size:
+            group = np.nonzero(visible & (extent <= k) & (extent > k // 2))[0]
+            per_chunk = max(1, self.MAX_CANDIDATES // (k * k))
+            for start in range(0, len(group), per_chunk):
+                idx = group[start:start + per_chunk]
+                self._rasterize(idx, k, px, py, z, area, x0, y0, shade, depth, color)
+            k *= 2
+
+        covered = np.isfinite(depth).reshape(size, size)
+        rgb = np.clip(color.reshape(size, size, 1) * self.COLOR, 0, 255)
+        image[..., :3] = np.where(covered[..., None], rgb, 0).astype(np.uint8)
+        image[..., 3] = np.where(covered, 255, 0)
+        return image
+
+    def _rasterize(self, idx, k, px, py, z, area, x0, y0, shade, depth, color):
+        size = self.size
+        offsets = np.arange(k)
+        # Candidate pixel centres in each triangle's bounding box: (n, k, k)
+        cx = (x0[idx, None, None] + offsets[None, None, :]) + 0.5
+        cy = (y0[idx, None, None] + offsets[None, :, None]) + 0.5
+        tx, ty, tz = px[idx, :, None, None], py[idx, :, None, None], z[idx, :, None, None]
+        inv = 1.0 / area[idx, None, None]
+
+        # Barycentric weights from edge functions
+        w0 = ((tx[:, 1] - cx) * (ty[:, 2] - cy) - (tx[:, 2] - cx) * (ty[:, 1] - cy)) * inv
+        w1 = ((tx[:, 2] - cx) * (ty[:, 0] - cy) - (tx[:, 0] - cx) * (ty[:, 2] - cy)) * inv
+        w2 = 1.0 - w0 - w1
+        inside = (w0 >= 0) & (w1 >= 0) & (w2 >= 0) & (cx < size) & (cy < size)
+        if not inside.any():
+            return
+
+        tri, row, col = np.nonzero(inside)
+        frag_depth = (w0 * tz[:, 0] + w1 * tz[:, 1] + w2 * tz[:, 2])[tri, row, col]
+        pixel = (y0[idx][tri] + row) * size + (x0[idx][tri] + col)
+        frag_shade = shade[idx][tri]
+
+        # Nearest fragment per pixel: sort by pixel, then by depth descending
+        order = np.lexsort((-frag_depth, pixel))
+        pixel, frag_depth, frag_shade = pixel[order], frag_depth[order], frag_shade[order]
+        first = np.ones(len(pixel), dtype=bool)
+        first[1:] = pixel[1:] != pixel[:-1]
+        pixel, frag_depth, frag_shade = pixel[first], frag_depth[first], frag_shade[first]
+
+        closer = frag_depth > depth[pixel]
+        depth[pixel[closer]] = frag_depth[closer]
+        color[pixel[closer]] = frag_shade[closer]
+
+    @staticmethod
+    def to_png(image: np.ndarray) -> bytes:
+        height, width = image.shape[:2]
+        data = np.ascontiguousarray(image)
+        qimage = QImage(data.data, width, height, width * 4, QImage.Format_RGBA8888)
+        buffer = QByteArray()
+        device = QBuffer(buffer)
+        device.open(QIODevice.WriteOnly)
+        qimage.save(device, "PNG")
+        device.close()
+        return bytes(buffer)
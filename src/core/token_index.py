@@ -0,0 +1,182 @@
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+import re
+import unicodedata
+
+# Runs of letters split at camelCase boundaries ("HPLovecraft" -> HP, Lovecraft),
+# and runs of digits
+_WORD = re.compile(r'[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+')
+_SEPARATORS = re.compile(r'[^0-9A-Za-z]+')
+
+
+def normalize_token(token: str) -> str:
+    """Lower-case and drop a plural 's' ("Busts" -> "bust")"""
+    token = token.lower()
+    if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+        token = token[:-1]
+    return token
+
+
+@lru_cache(maxsize=65536)
+def tokenize(name: str) -> Tuple[str, ...]:
+    """Normalized tokens of a file name.
+
+    Splits on anything that is not a letter or digit (``_``, ``-``,
+    spaces, dots...), at camelCase boundaries and between letters and
+    digits: 'Mario_Kart-v2' -> ['mario', 'kart', 'v', '2'] and
+    'HarryPotter' -> ['harry', 'potter']. Accents are dropped. Results
+    are cached, since every token-matched rules section tokenizes the
+    same name.
+    """
+    if not name.isascii():
+        name = unicodedata.normalize('NFKD', name)
+        name = ''.join(ch for ch in name if not unicodedata.combining(ch))
+    return tuple(
+        normalize_token(word)
+        for chunk in _SEPARATORS.split(name) if chunk
+        for word in _WORD.findall(chunk)
+    )
+
+
+def bounded_levenshtein(a: str, b: str, limit: int) -> int:
+    """Edit distance of a and b, or limit + 1 once it is known to exceed limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb)
+            ))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class TokenIndex:
+    """Whole-token matcher for rule patterns, with a fuzzy fallback.
+
+    Every pattern is tokenized like the names are and stored under the
+    concatenation of its tokens, so 'harry potter', 'Harry_Potter' and
+    'HarryPotter' all share the key 'harrypotter'. A name is matched by
+    looking up the concatenations of its runs of up to ``max_span``
+    consecutive tokens, which costs O(tokens) dict lookups however many
+    patterns there are, and a pattern never matches inside a longer word.
+    A run stops growing once it is no longer the prefix of any key.
+
+    When no pattern matches exactly, single tokens and pairs of tokens of
+    at least FUZZY_MIN_LENGTH characters are compared against keys within
+    a small edit distance (1, or 2 from 10 characters on). Candidates come
+    from a trigram index: a string within k edits of another shares all
+    but at most 3k of its distinct trigrams, so only keys sharing enough
+    trigrams are compared at all.
+    """
+
+    FUZZY_MIN_LENGTH = 6
+    FUZZY_SPAN = 2
+    MEMO_SIZE = 65536
+
+    def __init__(self, entries: Iterable[Iterable[str]], fuzzy: bool = True):
+        self.keys: Dict[str, List[int]] = {}
+        self.max_span = 1
+        for index, patterns in enumerate(entries):
+            for pattern in patterns:
+                tokens = tokenize(pattern)
+                if not tokens:
+                    continue
+                self.max_span = max(self.max_span, len(tokens))
+                indexes = self.keys.setdefault(''.join(tokens), [])
+                if index not in indexes:
+                    indexes.append(index)
+
+        # Every prefix of every key: a span that is not one cannot grow into a match
+        self.prefixes = {key[:end] for key in self.keys for end in range(1, len(key) + 1)}
+
+        self.trigrams: Optional[Dict[str, List[str]]] = None
+        self.fuzzy_lengths = set()
+        if fuzzy:
+            self.trigrams = {}
+            for key in self.keys:
+                if len(key) >= self.FUZZY_MIN_LENGTH - 2:
+                    self.fuzzy_lengths.add(len(key))
+                    for gram in self._grams(key):
+                        self.trigrams.setdefault(gram, []).append(key)
+        # Span lengths that have a key within their fuzzy distance
+        self.fuzzy_window = {
+            length
+            for length in range(self.FUZZY_MIN_LENGTH, max(self.fuzzy_lengths, default=0) + 3)
+            if any(length + d in self.fuzzy_lengths
+                   for d in range(-self.fuzzy_limit(length), self.fuzzy_limit(length) + 1))
+        }
+        # Fuzzy lookups by text; file names repeat the same words a lot
+        self._memo: Dict[str, List[str]] = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_memo'] = {}
+        return state
+
+    @staticmethod
+    def _grams(text: str) -> set:
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    @staticmethod
+    def fuzzy_limit(length: int) -> int:
+        return 1 if length < 10 else 2
+
+    def matching(self, name: str, always_fuzzy: bool = False) -> List[int]:
+        """Indexes of the entries with a pattern in the name, in entry order.
+
+        The fuzzy pass only runs when nothing matched exactly, unless
+        ``always_fuzzy`` is set.
+        """
+        tokens = tokenize(name)
+        found = set()
+        get = self.keys.get
+        prefixes = self.prefixes
+        max_span = self.max_span
+        # The hot loop of every rules lookup
+        for start in range(len(tokens)):
+            joined = ''
+            for token in tokens[start:start + max_span]:
+                joined += token
+                if joined not in prefixes:
+                    break
+                indexes = get(joined)
+                if indexes:
+                    found.update(indexes)
+        if self.fuzzy_window and (always_fuzzy or not found):
+            window = self.fuzzy_window
+            for start in range(len(tokens)):
+                joined = ''
+                for token in tokens[start:start + self.FUZZY_SPAN]:
+                    joined += token
+                    if len(joined) in window:
+                        for key in self.similar(joined):
+                            found.update(self.keys[key])
+        return sorted(found)
+
+    def similar(self, text: str) -> List[str]:
+        """Keys within the fuzzy edit distance of text"""
+        keys = self._memo.get(text)
+        if keys is not None:
+            return keys
+        limit = self.fuzzy_limit(len(text))
+        grams = self._grams(text)
+        needed = max(1, len(grams) - 3 * limit)
+        counts: Dict[str, int] = {}
+        for gram in grams:
+            for key in self.trigrams.get(gram, ()):
+                counts[key] = counts.get(key, 0) + 1
+        keys = [
+            key for key, shared in counts.items()
+            if shared >= needed and bounded_levenshtein(text, key, limit) <= limit
+        ]
+        if len(self._memo) >= self.MEMO_SIZE:
+            self._memo.clear()
+        self._memo[text] = keys
+        return keys
@@ -1,24 +1,55 @@
 # src/database/database.py
 import logging
-from sqlalchemy import create_engine
+from sqlalchemy import (
+    bindparam, column, create_engine, delete, func, insert, inspect, or_, select, table,
+    text, tuple_, update
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm.session import Session
-from .models import Base, File, Tag, ProcessedArchive
+from .models import (
+    Base, File, FileOccurrence, Tag, ProcessedArchive, ArchiveEntry, RenameBatch,
+    RenameJournalEntry, MeshFingerprint, FingerprintedArchive, DOC_EXTENSIONS,
+    LISTING_KEYS, STL_EXTENSION
+)
+from .migrations import upgrade
+from .search import match_query, matching_members, search_document
+from .tags import TagService
 from pathlib import Path
 from datetime import datetime 
+from typing import Iterator
 import json
+from ..utils.instrumentation import timed
 
 class DatabaseManager:
+    # Matches that DatabaseManager.search ranks, newest first
+    SEARCH_CANDIDATES = 1000
+
     def __init__(self, db_path: str = None):
         if db_path is None:
             db_path = Path(__file__).parent.parent / "data" / "file_renamer.db"
         self.engine = create_engine(f"sqlite:///{db_path}")
-        Base.metadata.create_all(self.engine)
+        upgrade(self.engine)
+        self.ensure_indexes()
         self.Session = sessionmaker(bind=self.engine)
+        self.tags = TagService(self)
 
     def get_session(self) -> Session:
         return self.Session()
 
+    def ensure_indexes(self):
+        """Create any index the models declare that the database lacks"""
+        with self.engine.begin() as conn:
+            existing = {
+                table: {index['name'] for index in inspect(conn).get_indexes(table)}
+                for table in Base.metadata.tables
+            }
+            for table in Base.metadata.tables.values():
+                for index in table.indexes:
+                    if index.name not in existing[table.name]:
+                        index.create(conn)
+                        logging.info(f"Created index: {index.name}")
+
     def update_file_status(self, file_id: int, new_name: str, status: str):
         with self.get_session() as session:
             file = session.query(File).get(file_id)
@@ -28,79 +59,609 @@ class DatabaseManager:
                 file.last_modified = datetime.utcnow()
                 session.commit()
 
+    @timed('db.update_file_statuses')
+    def update_file_statuses(self, updates: list[dict]):
+        """Write new_name/status for many files in a single transaction.
+
+        Each update is a dict with 'id', 'new_name' and 'status', and
+        optionally 'previous_path' and 'path' when the file was renamed
+        on disk, which moves its path occurrence.
+        """
+        if not updates:
+            return
+        now = datetime.utcnow()
+        rows = [
+            {'id': u['id'], 'new_name': u['new_name'], 'status': u['status'],
+             'last_modified': now}
+            for u in updates
+        ]
+        moves = [
+            {'file_id': u['id'], 'old_path': u['previous_path'], 'new_path': u['path']}
+            for u in updates if u.get('path')
+        ]
+        with self.get_session() as session:
+            session.execute(update(File), rows)
+            self._move_occurrences(session, moves, 'renamed', now)
+            if moves:
+                # Search finds archives by the name they have now
+                session.execute(
+                    text("UPDATE archive_search SET name = :name WHERE rowid IN ("
+                         "SELECT p.id FROM processed_archives p JOIN files f "
+                         "ON f.content_hash = p.content_hash WHERE f.id = :file_id)"),
+                    [{'name': Path(m['new_path']).name, 'file_id': m['file_id']} for m in moves]
+                )
+            session.commit()
+
+    @staticmethod
+    def _record_occurrences(session: Session, rows: list[dict], now: datetime):
+        """Mark each {'file_id', 'path'} present, replacing other content there"""
+        if not rows:
+            return
+        table = FileOccurrence.__table__
+        conn = session.connection()
+        conn.execute(
+            update(table)
+            .where(table.c.path == bindparam('b_path'),
+                   table.c.file_id != bindparam('b_file_id'),
+                   table.c.status == 'present')
+            .values(status='replaced', last_seen=now),
+            [{'b_path': str(r['path']), 'b_file_id': r['file_id']} for r in rows]
+        )
+        stmt = sqlite_insert(table)
+        conn.execute(
+            stmt.on_conflict_do_update(
+                index_elements=['path', 'file_id'],
+                set_={'name': stmt.excluded.name, 'status': 'present',
+                      'last_seen': stmt.excluded.last_seen}
+            ),
+            [
+                {'file_id': r['file_id'], 'path': str(r['path']), 'name': Path(r['path']).name,
+                 'status': 'present', 'first_seen': now, 'last_seen': now}
+                for r in rows
+            ]
+        )
+
+    def _move_occurrences(self, session: Session, moves: list[dict], reason: str,
+                          now: datetime):
+        """Retire each move's old path with ``reason`` and record its new one"""
+        if not moves:
+            return
+        table = FileOccurrence.__table__
+        session.connection().execute(
+            update(table)
+            .where(table.c.file_id == bindparam('b_file_id'),
+                   table.c.path == bindparam('b_path'))
+            .values(status=reason, last_seen=now),
+            [{'b_file_id': m['file_id'], 'b_path': str(m['old_path'])} for m in moves]
+        )
+        self._record_occurrences(
+            session, [{'file_id': m['file_id'], 'path': m['new_path']} for m in moves], now
+        )
+
+    def create_rename_batch(self, entries: list[dict], description: str = None) -> int:
+        """Journal a rename plan before any file is touched"""
+        with self.get_session() as session:
+            batch = RenameBatch(
+                description=description, status='planned', entry_count=len(entries)
+            )
+            session.add(batch)
+            session.flush()
+            rows = [
+                {
+                    'batch_id': batch.id,
+                    'seq': seq,
+                    'file_id': entry.get('file_id'),
+                    'source_path': str(entry['source']),
+                    'target_path': str(entry['target']),
+                    'temp_path': str(entry['temp']) if entry.get('temp') else None,
+                    'source_inode': entry.get('inode'),
+                    'status': 'planned'
+                }
+                for seq, entry in enumerate(entries)
+            ]
+            if rows:
+                session.execute(insert(RenameJournalEntry), rows)
+            session.commit()
+            return batch.id
+
+    def set_rename_batch_status(self, batch_id: int, status: str):
+        with self.get_session() as session:
+            batch = session.get(RenameBatch, batch_id)
+            if batch:
+                batch.status = status
+                session.commit()
+
+    def update_journal_entries(self, batch_id: int, updates: list[dict],
+                               batch_status: str = None):
+        """Record per-entry outcomes (by seq) and optionally the batch status"""
+        with self.get_session() as session:
+            ids = dict(
+                session.query(RenameJournalEntry.seq, RenameJournalEntry.id)
+                .filter_by(batch_id=batch_id)
+            )
+            rows = [
+                {'id': ids[u['seq']], 'status': u['status'], 'error': u.get('error')}
+                for u in updates if u['seq'] in ids
+            ]
+            if rows:
+                session.execute(update(RenameJournalEntry), rows)
+            if batch_status:
+                session.get(RenameBatch, batch_id).status = batch_status
+            session.commit()
+
+    def get_journal_entries(self, batch_id: int) -> list[RenameJournalEntry]:
+        with self.get_session() as session:
+            entries = (
+                session.query(RenameJournalEntry)
+                .filter_by(batch_id=batch_id)
+                .order_by(RenameJournalEntry.seq)
+                .all()
+            )
+            session.expunge_all()
+            return entries
+
+    def get_incomplete_rename_batches(self) -> list[int]:
+        """Batches that were journaled but never finished applying"""
+        with self.get_session() as session:
+            return [
+                batch_id for (batch_id,) in
+                session.query(RenameBatch.id)
+                .filter(RenameBatch.status.in_(['planned', 'applying']))
+                .order_by(RenameBatch.id)
+            ]
+
+    def get_rename_batches(self, limit: int = 50, before_id: int = None,
+                           statuses: list[str] = None) -> list[dict]:
+        """Page through rename history, newest first (keyset on batch id)"""
+        with self.get_session() as session:
+            query = session.query(
+                RenameBatch.id, RenameBatch.description, RenameBatch.status,
+                RenameBatch.entry_count, RenameBatch.created, RenameBatch.updated
+            )
+            if statuses:
+                query = query.filter(RenameBatch.status.in_(statuses))
+            if before_id is not None:
+                query = query.filter(RenameBatch.id < before_id)
+            return [
+                row._asdict()
+                for row in query.order_by(RenameBatch.id.desc()).limit(limit)
+            ]
+
+    def get_rename_batch(self, batch_id: int) -> dict:
+        batches = self.get_rename_batches(limit=1, before_id=batch_id + 1)
+        return batches[0] if batches and batches[0]['id'] == batch_id else None
+
+    def get_file(self, file_id: int) -> File:
+        with self.get_session() as session:
+            file = session.get(File, file_id)
+            if file:
+                session.expunge(file)
+            return file
+
     def get_file_by_hash(self, content_hash: str) -> File:
         with self.get_session() as session:
             return session.query(File).filter_by(content_hash=content_hash).first()
 
     def add_tag(self, name: str, category: str = None) -> Tag:
+        tag_id = self.tags.ids([name], category)[name.strip()]
         with self.get_session() as session:
-            tag = session.query(Tag).filter_by(name=name).first()
-            if not tag:
-                tag = Tag(name=name, category=category)
-                session.add(tag)
-                session.commit()
+            tag = session.get(Tag, tag_id)
+            session.expunge(tag)
             return tag
 
     def add_tags_to_file(self, file_id: int, tag_names: list[str]):
-        with self.get_session() as session:
-            file = session.query(File).get(file_id)
-            if file:
-                for name in tag_names:
-                    tag = self.add_tag(name)
-                    if tag not in file.tags:
-                        file.tags.append(tag)
-                session.commit()
+        self.tags.tag_files({file_id: tag_names})
+
+    @timed('db.record_processed_archive')
+    def record_processed_archive(self, filepath: Path, content_hash: str,
+                               entries: list, analysis_data: dict,
+                               suggested_name: str = None) -> int:
+        """Store an archive's members and analysis and index it for search.
 
-    def record_processed_archive(self, filepath: Path, content_hash: str, 
-                               file_list: list, analysis_data: dict):
+        ``entries`` are the analyzer's member dicts ('path', 'size',
+        'compressed_size', 'crc'); they become archive_entries rows in one
+        executemany. The listing is left out of the stored analysis_data,
+        since it is in archive_entries. Replaces the earlier record of the
+        same content (or, without a hash, of the same path), its entries
+        and its search entry, so each archive is indexed once. Returns the
+        record id.
+        """
+        if content_hash is not None:
+            stale = ProcessedArchive.content_hash == content_hash
+        else:
+            stale = ProcessedArchive.file_path == str(filepath)
         with self.get_session() as session:
+            stale_ids = session.execute(select(ProcessedArchive.id).where(stale)).scalars().all()
+            if stale_ids:
+                session.execute(
+                    text("DELETE FROM archive_search WHERE rowid IN :ids")
+                    .bindparams(bindparam('ids', expanding=True)),
+                    {'ids': stale_ids}
+                )
+                session.execute(delete(ArchiveEntry).where(ArchiveEntry.archive_id.in_(stale_ids)))
+                session.execute(delete(ProcessedArchive).where(ProcessedArchive.id.in_(stale_ids)))
             archive = ProcessedArchive(
                 file_path=str(filepath),
                 content_hash=content_hash,
-                file_list=json.dumps(file_list),
-                analysis_data=json.dumps(analysis_data)
+                analysis_data=json.dumps({
+                    key: value for key, value in analysis_data.items()
+                    if key not in LISTING_KEYS
+                })
             )
             session.add(archive)
+            session.flush()
+            if entries:
+                session.execute(insert(ArchiveEntry), [
+                    {'archive_id': archive.id,
+                     'path': entry['path'],
+                     'size': entry.get('size'),
+                     'compressed_size': entry.get('compressed_size'),
+                     'crc': entry.get('crc'),
+                     'ext': ArchiveEntry.extension_of(entry['path'])}
+                    for entry in entries
+                ])
+            members = [entry['path'] for entry in entries]
+            session.execute(
+                text("INSERT INTO archive_search (rowid, name, suggested_name, tags, members) "
+                     "VALUES (:id, :name, :suggested_name, :tags, :members)"),
+                {'id': archive.id,
+                 **search_document(filepath, members, analysis_data, suggested_name)}
+            )
             session.commit()
-            
-    def add_file(self, filepath: Path, quick_hash: str = None, content_hash: str = None) -> File: 
-            with self.get_session() as session:
-                file = File(
-                    original_name=filepath.name,
-                    original_path=str(filepath),
-                    quick_hash=quick_hash,
-                    content_hash=content_hash,
-                    status='pending'
+            return archive.id
+
+    def get_archive_contents(self, archive_ids: list[int]) -> dict[int, dict]:
+        """Member aggregates per processed archive, computed from archive_entries.
+
+        Maps each id that has entries to its 'entries' count, total
+        'size' and 'compressed_size' (None if unknown) and the
+        'contains_stls' and 'contains_docs' flags.
+        """
+        if not archive_ids:
+            return {}
+        with self.get_session() as session:
+            rows = session.execute(
+                select(
+                    ArchiveEntry.archive_id,
+                    func.count().label('entries'),
+                    func.sum(ArchiveEntry.size).label('size'),
+                    func.sum(ArchiveEntry.compressed_size).label('compressed_size'),
+                    func.max(ArchiveEntry.ext == STL_EXTENSION).label('contains_stls'),
+                    func.max(ArchiveEntry.ext.in_(DOC_EXTENSIONS)).label('contains_docs')
+                )
+                .where(ArchiveEntry.archive_id.in_(archive_ids))
+                .group_by(ArchiveEntry.archive_id)
+            ).all()
+        return {
+            row.archive_id: {
+                'entries': row.entries,
+                'size': row.size,
+                'compressed_size': row.compressed_size,
+                'contains_stls': bool(row.contains_stls),
+                'contains_docs': bool(row.contains_docs)
+            }
+            for row in rows
+        }
+
+    def find_archives_with_members(self, ext: str, min_size: int = None,
+                                   limit: int = 100) -> list[dict]:
+        """Processed archives with members of extension ``ext`` (e.g. '.stl'),
+        at least ``min_size`` bytes if given, largest member first.
+
+        Each result has the archive 'id', 'path' and 'content_hash', the
+        number of 'matches' and the size of the 'largest' one.
+        """
+        condition = ArchiveEntry.ext == ext.lower()
+        if min_size is not None:
+            condition &= ArchiveEntry.size >= min_size
+        # Rank on the covering (ext, size, archive_id) index alone and
+        # look up only the archives that make the cut
+        largest = func.max(ArchiveEntry.size)
+        top = (
+            select(ArchiveEntry.archive_id, func.count().label('matches'),
+                   largest.label('largest'))
+            .where(condition)
+            .group_by(ArchiveEntry.archive_id)
+            .order_by(largest.desc(), ArchiveEntry.archive_id)
+            .limit(limit)
+            .subquery()
+        )
+        with self.get_session() as session:
+            rows = session.execute(
+                select(ProcessedArchive.id, ProcessedArchive.file_path,
+                       ProcessedArchive.content_hash, top.c.matches, top.c.largest)
+                .join(top, top.c.archive_id == ProcessedArchive.id)
+                .order_by(top.c.largest.desc(), ProcessedArchive.id)
+            ).all()
+        return [
+            {'id': row.id, 'path': row.file_path, 'content_hash': row.content_hash,
+             'matches': row.matches, 'largest': row.largest}
+            for row in rows
+        ]
+
+    @timed('db.search')
+    def search(self, query: str, limit: int = 50, fields: list[str] = None) -> list[dict]:
+        """Full-text search over archive names, suggested names, tags and members.
+
+        ``fields`` limits the search to some of 'name', 'suggested_name',
+        'tags' and 'members'. Results are best match first (a hit in the
+        name counts most, one in a member path least), each with the
+        archive's recorded 'path', its current 'locations' in the catalog
+        and up to 20 'members' that contain the query's words.
+
+        Scoring every hit of a common word costs far more than finding
+        them, so only the SEARCH_CANDIDATES most recently recorded
+        matches are ranked.
+        """
+        match = match_query(query, fields)
+        if match is None:
+            return []
+        with self.get_session() as session:
+            rows = session.execute(
+                text(
+                    "SELECT s.rowid AS id, s.name, s.suggested_name, s.tags, s.members, "
+                    "p.file_path, p.content_hash FROM ("
+                    "  SELECT rowid AS id, bm25(archive_search, 10.0, 5.0, 2.0, 1.0) AS score"
+                    "  FROM archive_search WHERE archive_search MATCH :match"
+                    "  ORDER BY rowid DESC LIMIT :candidates"
+                    ") c JOIN archive_search s ON s.rowid = c.id "
+                    "JOIN processed_archives p ON p.id = c.id "
+                    "ORDER BY c.score LIMIT :limit"
+                ),
+                {'match': match, 'limit': limit,
+                 'candidates': max(limit, self.SEARCH_CANDIDATES)}
+            ).all()
+            hashes = [row.content_hash for row in rows if row.content_hash]
+            locations = {}
+            if hashes:
+                for content_hash, path in session.execute(
+                    select(File.content_hash, FileOccurrence.path)
+                    .join(FileOccurrence, FileOccurrence.file_id == File.id)
+                    .where(File.content_hash.in_(hashes), FileOccurrence.status == 'present')
+                ):
+                    locations.setdefault(content_hash, []).append(path)
+        return [
+            {
+                'id': row.id,
+                'name': row.name,
+                'suggested_name': row.suggested_name,
+                'tags': row.tags.split(),
+                'path': row.file_path,
+                'content_hash': row.content_hash,
+                'locations': locations.get(row.content_hash, []),
+                'members': matching_members(row.members, query)
+                if not fields or 'members' in fields else []
+            }
+            for row in rows
+        ]
+
+    @timed('db.add_file')
+    def add_file(self, filepath: Path, quick_hash: str = None, content_hash: str = None) -> File:
+        """Record a loaded file; there is one files row per content hash.
+
+        Loading content the catalog already knows, from any path, updates
+        that row (last seen path, status back to pending) instead of adding
+        one, and marks the path present among the content's occurrences.
+        """
+        now = datetime.utcnow()
+        try:
+            size = filepath.stat().st_size
+        except OSError:
+            size = None
+        stmt = sqlite_insert(File).values(
+            original_name=filepath.name,
+            original_path=str(filepath),
+            quick_hash=quick_hash,
+            content_hash=content_hash,
+            size=size,
+            status='pending',
+            last_modified=now
         )
-                
-            session.add(file)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[File.content_hash],
+            set_={
+                'original_name': stmt.excluded.original_name,
+                'original_path': stmt.excluded.original_path,
+                'quick_hash': stmt.excluded.quick_hash,
+                'size': stmt.excluded.size,
+                'new_name': None,
+                'status': stmt.excluded.status,
+                'last_modified': stmt.excluded.last_modified
+            }
+        ).returning(File.id)
+        with self.get_session() as session:
+            file_id = session.execute(stmt).scalar_one()
+            self._record_occurrences(session, [{'file_id': file_id, 'path': filepath}], now)
             session.commit()
+            file = session.get(File, file_id)
+            session.expunge(file)
             return file
 
-# Add to database.py
-def ensure_indexes(self):
-    """Ensure all indexes exist in the database"""
-    try:
+    def get_copies(self, content_hash: str) -> list[dict]:
+        """Every path this content is currently known at, oldest first"""
         with self.get_session() as session:
-            # Get database engine connection
-            connection = session.connection()
-            
-            # Check each index and create if missing
-            for table in Base.metadata.tables.values():
-                for index in table.indexes:
-                    if not index.exists(connection):
-                        index.create(connection)
-                        logging.info(f"Created index: {index.name}")
-                        
-    except Exception as e:
-        logging.error(f"Error ensuring indexes: {e}")
-        raise
-
-# Update __init__ method
-def __init__(self, db_path: str = None):
-    if db_path is None:
-        db_path = Path(__file__).parent.parent / "data" / "file_renamer.db"
-    self.engine = create_engine(f"sqlite:///{db_path}")
-    Base.metadata.create_all(self.engine)
-    self.Session = sessionmaker(bind=self.engine)
-    self.ensure_indexes()  # Add this line    
\ No newline at end of file
+            return [
+                row._asdict() for row in session.execute(
+                    select(FileOccurrence.path, FileOccurrence.name,
+                           FileOccurrence.first_seen, FileOccurrence.last_seen)
+                    .join(File, File.id == FileOccurrence.file_id)
+                    .where(File.content_hash == content_hash,
+                           FileOccurrence.status == 'present')
+                    .order_by(FileOccurrence.first_seen, FileOccurrence.id)
+                )
+            ]
+
+    def get_name_history(self, filepath: Path) -> list[dict]:
+        """Every path the content now at ``filepath`` has had, oldest first.
+
+        Each entry has 'path', 'name', 'status' ('present', 'renamed',
+        'moved' or 'replaced'), 'first_seen' and 'last_seen'.
+        """
+        current = (
+            select(FileOccurrence.file_id)
+            .where(FileOccurrence.path == str(filepath), FileOccurrence.status == 'present')
+        )
+        with self.get_session() as session:
+            return [
+                row._asdict() for row in session.execute(
+                    select(FileOccurrence.path, FileOccurrence.name, FileOccurrence.status,
+                           FileOccurrence.first_seen, FileOccurrence.last_seen)
+                    .where(FileOccurrence.file_id.in_(current))
+                    .order_by(FileOccurrence.first_seen, FileOccurrence.id)
+                )
+            ]
+
+    def get_files_by_quick_hash(self, quick_hash: str, size: int = None) -> list[File]:
+        """Files with this quick hash, and this size when given.
+
+        Rows stored before sizes were recorded (size NULL) still match.
+        """
+        with self.get_session() as session:
+            query = session.query(File).filter(File.quick_hash == quick_hash)
+            if size is not None:
+                query = query.filter(or_(File.size == size, File.size.is_(None)))
+            files = query.all()
+            session.expunge_all()
+            return files
+
+    def get_files_by_status(self, status: str, limit: int = 100,
+                            before: tuple = None) -> list[dict]:
+        """Page through files with a status, most recently changed first.
+
+        ``before`` is the (last_modified, id) of the last row of the
+        previous page.
+        """
+        with self.get_session() as session:
+            query = (
+                select(File.id, File.original_name, File.new_name, File.original_path,
+                       File.last_modified)
+                .where(File.status == status)
+            )
+            if before is not None:
+                # A row-value comparison keeps the page a range on the index
+                query = query.where(tuple_(File.last_modified, File.id) < tuple_(*before))
+            query = query.order_by(File.last_modified.desc(), File.id.desc()).limit(limit)
+            return [row._asdict() for row in session.execute(query)]
+
+    def update_file_path(self, file_id: int, new_path: Path):
+        """Point an existing record at the file's new location after a move"""
+        with self.get_session() as session:
+            file = session.get(File, file_id)
+            if file:
+                now = datetime.utcnow()
+                self._move_occurrences(session, [{
+                    'file_id': file_id, 'old_path': file.original_path, 'new_path': new_path
+                }], 'moved', now)
+                file.original_path = str(new_path)
+                file.last_modified = now
+                session.commit()
+
+    @timed('db.add_mesh_fingerprints')
+    def add_mesh_fingerprints(self, content_hash: str, models: list[dict],
+                              error: str = None):
+        """Replace the stored geometry fingerprints of one archive.
+
+        The archive is marked fingerprinted even with no models, and with
+        the ``error`` that stopped its models being read, if any.
+        """
+        rows = [
+            {
+                'content_hash': content_hash,
+                'member_name': m['member'],
+                'fingerprint': m['fingerprint'],
+                'triangles': m['triangles'],
+                'vertices': m['vertices']
+            }
+            for m in models
+        ]
+        marker = sqlite_insert(FingerprintedArchive).values(
+            content_hash=content_hash, models=len(rows), error=error,
+            fingerprinted=datetime.utcnow()
+        )
+        marker = marker.on_conflict_do_update(
+            index_elements=[FingerprintedArchive.content_hash],
+            set_={
+                'models': marker.excluded.models,
+                'error': marker.excluded.error,
+                'fingerprinted': marker.excluded.fingerprinted
+            }
+        )
+        with self.get_session() as session:
+            session.execute(
+                delete(MeshFingerprint).where(MeshFingerprint.content_hash == content_hash)
+            )
+            if rows:
+                session.execute(insert(MeshFingerprint), rows)
+            session.execute(marker)
+            session.commit()
+
+    def get_fingerprinted_hashes(self, content_hashes: list[str]) -> set[str]:
+        """Which of these archives have been fingerprinted, models or not"""
+        found = set()
+        hashes = list(content_hashes)
+        with self.get_session() as session:
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(hashes), 500):
+                chunk = hashes[start:start + 500]
+                found.update(session.execute(
+                    select(FingerprintedArchive.content_hash)
+                    .where(FingerprintedArchive.content_hash.in_(chunk))
+                ).scalars())
+        return found
+
+    def find_shared_models(self, content_hashes: list[str] = None) -> list[dict]:
+        """Models whose fingerprint occurs in more than one archive.
+
+        Optionally restricted to the given archives, which go through a
+        temporary table rather than an IN list, since a library can hold
+        more archives than SQLite allows bound parameters. Returns one
+        dict per (fingerprint, archive, member), ordered by fingerprint.
+        """
+        with self.get_session() as session:
+            shared = select(MeshFingerprint.fingerprint)
+            query = select(
+                MeshFingerprint.fingerprint, MeshFingerprint.content_hash,
+                MeshFingerprint.member_name, MeshFingerprint.triangles
+            )
+            if content_hashes is not None:
+                conn = session.connection()
+                conn.exec_driver_sql(
+                    "CREATE TEMP TABLE IF NOT EXISTS fingerprint_scope "
+                    "(content_hash TEXT PRIMARY KEY)"
+                )
+                conn.exec_driver_sql("DELETE FROM fingerprint_scope")
+                conn.exec_driver_sql(
+                    "INSERT OR IGNORE INTO fingerprint_scope (content_hash) VALUES (?)",
+                    [(content_hash,) for content_hash in content_hashes]
+                )
+                scope = select(column('content_hash')).select_from(table('fingerprint_scope'))
+                shared = shared.where(MeshFingerprint.content_hash.in_(scope))
+                query = query.where(MeshFingerprint.content_hash.in_(scope))
+            shared = (
+                shared.group_by(MeshFingerprint.fingerprint)
+                .having(func.count(func.distinct(MeshFingerprint.content_hash)) > 1)
+            )
+            rows = [
+                row._asdict() for row in session.execute(
+                    query.where(MeshFingerprint.fingerprint.in_(shared))
+                    .order_by(MeshFingerprint.fingerprint, MeshFingerprint.content_hash)
+                )
+            ]
+            session.rollback()
+            return rows
+
+    def iter_original_names(self, batch_size: int = 100_000) -> Iterator[list[str]]:
+        """Yield the original_name of every file in pages, ordered by id"""
+        last_id = 0
+        with self.get_session() as session:
+            while True:
+                rows = session.execute(
+                    select(File.id, File.original_name)
+                    .where(File.id > last_id)
+                    .order_by(File.id)
+                    .limit(batch_size)
+                ).all()
+                if not rows:
+                    return
+                last_id = rows[-1].id
+                yield [row.original_name or "" for row in rows]
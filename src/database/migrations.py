@@ -0,0 +1,265 @@
+"""Versioned schema migrations.
+
+The schema version is SQLite's ``PRAGMA user_version``. A new database
+gets the current schema from the models and the latest version straight
+away; an existing one runs every migration above its version, in order,
+each in its own transaction together with the version bump. Tables the
+models add are created by ``create_all`` before the migrations run, and
+indexes the models declare on existing tables by
+DatabaseManager.ensure_indexes after them.
+
+To change the schema, update the models and append a migration for the
+databases already out there; never edit one that has shipped.
+"""
+import json
+import logging
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection, Engine
+
+from .models import LISTING_KEYS, ArchiveEntry, Base
+from .search import search_document
+
+
+def _merge_content_duplicates(conn: Connection):
+    """One files row per content hash.
+
+    Earlier versions added a files row on every load of an archive and
+    indexed content_hash without a unique constraint. The latest row of each content hash
+    is kept, journal and tag references are pointed at it, and every
+    path the removed rows recorded becomes a file_paths occurrence, so
+    the name history survives the merge.
+    """
+    indexes = conn.exec_driver_sql("PRAGMA index_list('files')").all()
+    if any(row.name == 'idx_files_content_hash' and row.unique for row in indexes):
+        return
+    conn.exec_driver_sql(
+        "CREATE TEMP TABLE file_merge AS "
+        "SELECT f.id AS old_id, k.keep_id AS new_id FROM files f JOIN ("
+        "  SELECT content_hash, MAX(id) AS keep_id FROM files"
+        "  WHERE content_hash IS NOT NULL GROUP BY content_hash"
+        ") k ON f.content_hash = k.content_hash"
+    )
+    conn.exec_driver_sql("CREATE INDEX temp.idx_file_merge_old ON file_merge (old_id)")
+
+    # Rows are visited oldest first, so the latest status of a path wins.
+    # Dates are copied as stored, hence plain SQL rather than the model.
+    occurrences = []
+    for row in conn.exec_driver_sql(
+        "SELECT COALESCE(m.new_id, f.id), f.original_path, f.original_name, "
+        "f.new_name, f.status, f.first_seen, f.last_modified "
+        "FROM files f LEFT JOIN file_merge m ON m.old_id = f.id ORDER BY f.id"
+    ):
+        file_id, path, name, new_name, status, first_seen, last_seen = row
+        renamed = status == 'renamed' and bool(new_name)
+        occurrences.append((file_id, path, name, 'renamed' if renamed else 'present',
+                            first_seen, last_seen))
+        if renamed:
+            target = str(Path(path).with_name(new_name))
+            occurrences.append((file_id, target, new_name, 'present',
+                                last_seen, last_seen))
+    if occurrences:
+        conn.exec_driver_sql(
+            "INSERT INTO file_paths (file_id, path, name, status, first_seen, last_seen) "
+            "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (path, file_id) DO UPDATE SET "
+            "status = excluded.status, last_seen = excluded.last_seen",
+            occurrences
+        )
+
+    merged = "SELECT old_id FROM file_merge WHERE old_id != new_id"
+    new_id = "(SELECT new_id FROM file_merge WHERE old_id = {0}.file_id)"
+    conn.exec_driver_sql(
+        "UPDATE files SET first_seen = (SELECT MIN(f.first_seen) FROM files f "
+        "WHERE f.content_hash = files.content_hash) "
+        "WHERE id IN (SELECT new_id FROM file_merge)"
+    )
+    for table in ('rename_journal', 'file_tags'):
+        conn.exec_driver_sql(
+            f"UPDATE {table} SET file_id = {new_id.format(table)} "
+            f"WHERE file_id IN ({merged})"
+        )
+    conn.exec_driver_sql(
+        "DELETE FROM file_tags WHERE rowid NOT IN "
+        "(SELECT MIN(rowid) FROM file_tags GROUP BY file_id, tag_id)"
+    )
+    removed = conn.exec_driver_sql(f"DELETE FROM files WHERE id IN ({merged})").rowcount
+    conn.exec_driver_sql("DROP INDEX IF EXISTS idx_files_content_hash")
+    conn.exec_driver_sql("CREATE UNIQUE INDEX idx_files_content_hash ON files (content_hash)")
+    conn.exec_driver_sql("DROP TABLE file_merge")
+    logging.info(f"Merged {removed} duplicate files rows, "
+                 f"recorded {len(occurrences)} paths")
+
+
+def _add_file_size(conn: Connection):
+    """files.size, so quick-hash lookups can check the size too.
+
+    The composite (quick_hash, size) and (status, last_modified) indexes
+    replace the single-column ones they start with; ensure_indexes
+    creates them. Existing rows keep a NULL size until they are loaded
+    again.
+    """
+    columns = {column['name'] for column in inspect(conn).get_columns('files')}
+    if 'size' not in columns:
+        conn.exec_driver_sql("ALTER TABLE files ADD COLUMN size INTEGER")
+    conn.exec_driver_sql("DROP INDEX IF EXISTS idx_files_quick_hash")
+    conn.exec_driver_sql("DROP INDEX IF EXISTS idx_files_status")
+
+
+def _index_processed_archives(conn: Connection):
+    """Fill archive_search from the archives processed so far.
+
+    Only the latest record of each archive is indexed. There is no
+    suggested name on record, so the name a renamed file was given
+    stands in for it.
+    """
+    rows = conn.exec_driver_sql(
+        "SELECT p.id, p.file_path, p.file_list, p.analysis_data, f.new_name "
+        "FROM processed_archives p LEFT JOIN files f ON f.content_hash = p.content_hash "
+        "WHERE p.id IN (SELECT MAX(id) FROM processed_archives "
+        "GROUP BY COALESCE(content_hash, file_path))"
+    )
+    documents = []
+    for archive_id, file_path, file_list, analysis_data, new_name in rows:
+        try:
+            members = json.loads(file_list) if file_list else []
+            analysis = json.loads(analysis_data) if analysis_data else {}
+        except ValueError:
+            logging.warning(f"Unreadable processed archive record for {file_path}")
+            continue
+        document = search_document(file_path, members, analysis,
+                                   Path(new_name).stem if new_name else None)
+        documents.append((archive_id, *document.values()))
+    conn.exec_driver_sql("DELETE FROM archive_search")
+    if documents:
+        conn.exec_driver_sql(
+            "INSERT INTO archive_search (rowid, name, suggested_name, tags, members) "
+            "VALUES (?, ?, ?, ?, ?)",
+            documents
+        )
+    logging.info(f"Indexed {len(documents)} archives for search")
+
+
+def _normalize_archive_listings(conn: Connection, batch_size: int = 1000):
+    """Move processed archive listings from JSON into archive_entries.
+
+    Listings on record have member paths only, so their sizes and CRCs
+    stay NULL until the archive is analyzed again. file_list is cleared
+    and the listing keys are dropped from analysis_data; the freed pages
+    are reused by SQLite but the file only shrinks on a VACUUM, which
+    cannot run inside the migration's transaction.
+    """
+    last_id, moved = 0, 0
+    while True:
+        rows = conn.exec_driver_sql(
+            "SELECT id, file_path, file_list, analysis_data FROM processed_archives "
+            "WHERE id > ? AND file_list IS NOT NULL ORDER BY id LIMIT ?",
+            (last_id, batch_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        entries, records = [], []
+        for archive_id, file_path, file_list, analysis_data in rows:
+            try:
+                members = json.loads(file_list)
+                analysis = json.loads(analysis_data) if analysis_data else {}
+            except ValueError:
+                logging.warning(f"Unreadable processed archive record for {file_path}")
+                continue
+            entries.extend((archive_id, path, ArchiveEntry.extension_of(path))
+                           for path in members)
+            analysis = {key: value for key, value in analysis.items()
+                        if key not in LISTING_KEYS}
+            records.append((json.dumps(analysis), archive_id))
+        if entries:
+            conn.exec_driver_sql(
+                "INSERT INTO archive_entries (archive_id, path, ext) VALUES (?, ?, ?)",
+                entries
+            )
+        if records:
+            conn.exec_driver_sql(
+                "UPDATE processed_archives SET file_list = NULL, analysis_data = ? "
+                "WHERE id = ?",
+                records
+            )
+        moved += len(entries)
+    logging.info(f"Moved {moved} archive members into archive_entries")
+
+
+def _unique_file_tags(conn: Connection):
+    """One file_tags row per (file, tag), enforced by a unique index.
+
+    The unique index leads with file_id, so it replaces the file_id one.
+    """
+    removed = conn.exec_driver_sql(
+        "DELETE FROM file_tags WHERE rowid NOT IN "
+        "(SELECT MIN(rowid) FROM file_tags GROUP BY file_id, tag_id)"
+    ).rowcount
+    conn.exec_driver_sql(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_file_tags_file_tag ON file_tags (file_id, tag_id)"
+    )
+    conn.exec_driver_sql("DROP INDEX IF EXISTS idx_file_tags_file_id")
+    logging.info(f"Removed {removed} duplicate file tags")
+
+
+def _mark_fingerprinted_archives(conn: Connection):
+    """fingerprinted_archives for the archives fingerprinted so far.
+
+    Only archives with at least one model left rows to go by; the others
+    are fingerprinted once more and recorded then.
+    """
+    conn.exec_driver_sql(
+        "INSERT OR IGNORE INTO fingerprinted_archives (content_hash, models, fingerprinted) "
+        "SELECT content_hash, COUNT(*), MAX(created) FROM mesh_fingerprints "
+        "GROUP BY content_hash"
+    )
+
+
+def _drop_translated_fingerprints(conn: Connection):
+    """Mesh fingerprints from before they ignored where a model sits.
+
+    The old ones snapped vertices to the grid before moving the model to
+    the origin, so the same model shifted by a fraction of a step hashed
+    differently. Dropping them has every archive fingerprinted again.
+    """
+    conn.exec_driver_sql("DELETE FROM mesh_fingerprints")
+    conn.exec_driver_sql("DELETE FROM fingerprinted_archives")
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "one files row per content hash", _merge_content_duplicates),
+    (2, "file sizes and composite lookup indexes", _add_file_size),
+    (3, "full-text search over processed archives", _index_processed_archives),
+    (4, "archive members as rows instead of JSON", _normalize_archive_listings),
+    (5, "unique file tags", _unique_file_tags),
+    (6, "record fingerprinted archives", _mark_fingerprinted_archives),
+    (7, "translation-invariant mesh fingerprints", _drop_translated_fingerprints),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn: Connection) -> int:
+    return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def upgrade(engine: Engine) -> int:
+    """Bring the database up to SCHEMA_VERSION; returns the starting version"""
+    with engine.connect() as conn:
+        fresh = not inspect(conn).has_table('files')
+        version = schema_version(conn)
+    Base.metadata.create_all(engine)
+    if fresh:
+        with engine.begin() as conn:
+            conn.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        return SCHEMA_VERSION
+
+    for target, description, migration in MIGRATIONS:
+        if target <= version:
+            continue
+        logging.info(f"Migrating database to version {target}: {description}")
+        with engine.begin() as conn:
+            migration(conn)
+            conn.exec_driver_sql(f"PRAGMA user_version = {target}")
+    return version
@@ -1,21 +1,33 @@
-from datetime import datetime
+import os
+from datetime import datetime, timezone
 from sqlalchemy import (
-    Column, Integer, String, DateTime, ForeignKey, Table, Index
+    DDL, Column, Integer, String, DateTime, Float, Text, ForeignKey, Table, Index, event
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
 Base = declarative_base()
 
+# Member extensions behind an archive's contains_stls and contains_docs
+STL_EXTENSION = '.stl'
+DOC_EXTENSIONS = ('.txt', '.pdf', '.md')
+# Analysis keys derived from the member listing, which archive_entries holds
+LISTING_KEYS = ('file_list', 'entries', 'contains_stls', 'contains_docs')
+
 file_tags = Table(
     'file_tags', Base.metadata,
     Column('file_id', Integer, ForeignKey('files.id')),
     Column('tag_id', Integer, ForeignKey('tags.id')),
-    Index('idx_file_tags_file_id', 'file_id'),
+    Index('uq_file_tags_file_tag', 'file_id', 'tag_id', unique=True),
     Index('idx_file_tags_tag_id', 'tag_id')
 )
 
 class File(Base):
+    """One archive's content, identified by its content hash.
+
+    original_name/original_path are where it was last seen; every path it
+    has had or has is a FileOccurrence.
+    """
     __tablename__ = 'files'
     id = Column(Integer, primary_key=True)
     original_name = Column(String, nullable=False)
@@ -23,22 +35,50 @@ class File(Base):
     original_path = Column(String, nullable=False)
     content_hash = Column(String)
     quick_hash = Column(String)
+    size = Column(Integer)
     first_seen = Column(
-        DateTime, default=lambda: datetime.now(datetime.timezone.utc)
+        DateTime, default=lambda: datetime.now(timezone.utc)
     )
     last_modified = Column(
-        DateTime, default=lambda: datetime.now(datetime.timezone.utc)
+        DateTime, default=lambda: datetime.now(timezone.utc)
     )
     status = Column(String)
     tags = relationship('Tag', secondary=file_tags, back_populates='files')
+    occurrences = relationship('FileOccurrence', back_populates='file')
 
     __table_args__ = (
-        Index('idx_files_content_hash', 'content_hash'),
-        Index('idx_files_quick_hash', 'quick_hash'),
-        Index('idx_files_status', 'status'),
+        Index('idx_files_content_hash', 'content_hash', unique=True),
+        Index('idx_files_quick_hash_size', 'quick_hash', 'size'),
+        Index('idx_files_status_modified', 'status', 'last_modified'),
         Index('idx_files_original_name', 'original_name'),
     )
 
+class FileOccurrence(Base):
+    """A path at which an archive's content was seen.
+
+    status is 'present' while the file is believed to be there, and
+    'renamed', 'moved' or 'replaced' (other content now at that path)
+    once it is not.
+    """
+    __tablename__ = 'file_paths'
+    id = Column(Integer, primary_key=True)
+    file_id = Column(Integer, ForeignKey('files.id'), nullable=False)
+    path = Column(String, nullable=False)
+    name = Column(String, nullable=False)
+    status = Column(String, nullable=False, default='present')
+    first_seen = Column(
+        DateTime, default=lambda: datetime.now(timezone.utc)
+    )
+    last_seen = Column(
+        DateTime, default=lambda: datetime.now(timezone.utc)
+    )
+    file = relationship('File', back_populates='occurrences')
+
+    __table_args__ = (
+        Index('uq_file_paths_path_file', 'path', 'file_id', unique=True),
+        Index('idx_file_paths_file_status', 'file_id', 'status'),
+    )
+
 class Tag(Base):
     __tablename__ = 'tags'
     id = Column(Integer, primary_key=True)
@@ -52,6 +92,12 @@ class Tag(Base):
     )
 
 class ProcessedArchive(Base):
+    """An analyzed archive.
+
+    Its members are ArchiveEntry rows. file_list is the JSON listing
+    earlier versions stored and is no longer written; analysis_data holds
+    the rest of the analysis (category, tags, measured models) as JSON.
+    """
     __tablename__ = 'processed_archives'
     id = Column(Integer, primary_key=True)
     file_path = Column(String, nullable=False)
@@ -59,11 +105,154 @@ class ProcessedArchive(Base):
     file_list = Column(String)
     analysis_data = Column(String)
     processed_date = Column(
-        DateTime, default=lambda: datetime.now(datetime.timezone.utc)
+        DateTime, default=lambda: datetime.now(timezone.utc)
     )
+    entries = relationship('ArchiveEntry', back_populates='archive')
 
     __table_args__ = (
         Index('idx_processed_archives_content_hash', 'content_hash'),
         Index('idx_processed_archives_file_path', 'file_path'),
         Index('idx_processed_archives_date', 'processed_date'),
     )
+
+class ArchiveEntry(Base):
+    """One member of a processed archive.
+
+    ext is the lowercased extension ('' for none and for directories).
+    Sizes and crc are NULL where the archive format does not record them
+    and for listings migrated from file_list.
+    """
+    __tablename__ = 'archive_entries'
+    id = Column(Integer, primary_key=True)
+    archive_id = Column(Integer, ForeignKey('processed_archives.id'), nullable=False)
+    path = Column(String, nullable=False)
+    size = Column(Integer)
+    compressed_size = Column(Integer)
+    crc = Column(Integer)
+    ext = Column(String, nullable=False, default='')
+    archive = relationship('ProcessedArchive', back_populates='entries')
+
+    @staticmethod
+    def extension_of(path: str) -> str:
+        if path.endswith(('/', '\\')):
+            return ''
+        return os.path.splitext(path.replace('\\', '/').rsplit('/', 1)[-1])[1].lower()
+
+    __table_args__ = (
+        Index('idx_archive_entries_archive_ext', 'archive_id', 'ext'),
+        Index('idx_archive_entries_ext_size', 'ext', 'size', 'archive_id'),
+        Index('idx_archive_entries_size', 'size'),
+    )
+
+# Full-text index over processed archives; rowid is processed_archives.id.
+# SQLAlchemy has no model for virtual tables, so it is created alongside
+# the mapped tables and kept in step by DatabaseManager.
+archive_search_ddl = DDL(
+    "CREATE VIRTUAL TABLE IF NOT EXISTS archive_search USING fts5("
+    "name, suggested_name, tags, members, "
+    "tokenize = 'unicode61 remove_diacritics 2')"
+)
+event.listen(Base.metadata, 'after_create', archive_search_ddl)
+
+class RenameBatch(Base):
+    __tablename__ = 'rename_batches'
+    id = Column(Integer, primary_key=True)
+    description = Column(String)
+    status = Column(String, nullable=False)
+    entry_count = Column(Integer, nullable=False, default=0)
+    created = Column(
+        DateTime, default=lambda: datetime.now(timezone.utc)
+    )
+    updated = Column(
+        DateTime, default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc)
+    )
+    entries = relationship(
+        'RenameJournalEntry', back_populates='batch',
+        order_by='RenameJournalEntry.seq'
+    )
+
+    __table_args__ = (
+        Index('idx_rename_batches_status_id', 'status', 'id'),
+    )
+
+class RenameJournalEntry(Base):
+    __tablename__ = 'rename_journal'
+    id = Column(Integer, primary_key=True)
+    batch_id = Column(Integer, ForeignKey('rename_batches.id'), nullable=False)
+    seq = Column(Integer, nullable=False)
+    file_id = Column(Integer, ForeignKey('files.id'))
+    source_path = Column(String, nullable=False)
+    target_path = Column(String, nullable=False)
+    temp_path = Column(String)
+    source_inode = Column(Integer)
+    status = Column(String, nullable=False)
+    error = Column(String)
+    batch = relationship('RenameBatch', back_populates='entries')
+
+    __table_args__ = (
+        Index('idx_rename_journal_batch_seq', 'batch_id', 'seq'),
+    )
+
+class MeshFingerprint(Base):
+    __tablename__ = 'mesh_fingerprints'
+    id = Column(Integer, primary_key=True)
+    content_hash = Column(String, nullable=False)
+    member_name = Column(String, nullable=False)
+    fingerprint = Column(String, nullable=False)
+    triangles = Column(Integer)
+    vertices = Column(Integer)
+    created = Column(
+        DateTime, default=lambda: datetime.now(timezone.utc)
+    )
+
+    __table_args__ = (
+        Index('idx_mesh_fingerprints_fingerprint', 'fingerprint', 'content_hash'),
+        Index('idx_mesh_fingerprints_content_hash', 'content_hash'),
+    )
+
+class FingerprintedArchive(Base):
+    """An archive whose STL members have been fingerprinted.
+
+    Recorded even when the archive has no readable models or reading it
+    failed (error), so it is not opened again on every comparison.
+    """
+    __tablename__ = 'fingerprinted_archives'
+    id = Column(Integer, primary_key=True)
+    content_hash = Column(String, nullable=False)
+    models = Column(Integer, nullable=False, default=0)
+    error = Column(String)
+    fingerprinted = Column(
+        DateTime, default=lambda: datetime.now(timezone.utc)
+    )
+
+    __table_args__ = (
+        Index('uq_fingerprinted_archives_content_hash', 'content_hash', unique=True),
+    )
+
+class Job(Base):
+    """A queued unit of scan or rename work (see core/job_queue.py).
+
+    Times are epoch seconds so leases and backoff compare as plain numbers.
+    """
+    __tablename__ = 'jobs'
+    id = Column(Integer, primary_key=True)
+    run_id = Column(Integer, nullable=False)
+    stage = Column(String, nullable=False)
+    path = Column(String, nullable=False)
+    payload = Column(Text)
+    status = Column(String, nullable=False, default='pending')
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(Float, nullable=False)
+    lease_owner = Column(String)
+    lease_expires = Column(Float)
+    error = Column(String)
+    result = Column(Text)
+    created = Column(Float)
+    finished = Column(Float)
+
+    __table_args__ = (
+        Index('idx_jobs_stage_status_available', 'stage', 'status', 'available_at'),
+        Index('idx_jobs_run_stage', 'run_id', 'stage'),
+        Index('idx_jobs_stage_finished', 'stage', 'finished'),
+    )
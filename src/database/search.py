@@ -0,0 +1,61 @@
+"""Helpers for the archive_search full-text index (see models.py)."""
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+
+SEARCH_FIELDS = ('name', 'suggested_name', 'tags', 'members')
+
+_WORD = re.compile(r'\w+')
+
+
+def search_document(filepath, file_list: List[str], analysis: Dict,
+                    suggested_name: Optional[str] = None) -> Dict[str, str]:
+    """The archive_search columns for one processed archive"""
+    tags = list(analysis.get('suggested_tags', []))
+    if analysis.get('suggested_category'):
+        tags.insert(0, analysis['suggested_category'])
+    return {
+        'name': Path(filepath).name,
+        'suggested_name': suggested_name or '',
+        'tags': ' '.join(tags),
+        'members': '\n'.join(file_list)
+    }
+
+
+def match_query(query: str, fields: Optional[List[str]] = None) -> Optional[str]:
+    """FTS5 MATCH expression for what a user typed.
+
+    Each whitespace-separated term must match, as a phrase of its words,
+    so "dragon_bust_supported.stl" finds exactly that run of words; the
+    last term also matches as a prefix so results follow typing. Only
+    word characters reach FTS5, so user input cannot break the syntax.
+    Returns None when the query has no words.
+    """
+    phrases = []
+    for term in query.split():
+        words = _WORD.findall(term)
+        if words:
+            phrases.append('"' + ' '.join(words) + '"')
+    if not phrases:
+        return None
+    phrases[-1] += ' *'
+    expression = ' AND '.join(phrases)
+    if fields:
+        unknown = set(fields) - set(SEARCH_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown search fields: {', '.join(sorted(unknown))}")
+        expression = '{' + ' '.join(fields) + '}: (' + expression + ')'
+    return expression
+
+
+def matching_members(members: str, query: str, limit: int = 20) -> List[str]:
+    """Member paths containing every word of the query"""
+    words = [word.lower() for word in _WORD.findall(query)]
+    matches = []
+    for member in members.split('\n'):
+        lowered = member.lower()
+        if member and all(word in lowered for word in words):
+            matches.append(member)
+            if len(matches) >= limit:
+                break
+    return matches
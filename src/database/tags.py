@@ -0,0 +1,107 @@
+"""Tag ids and file tagging in bulk."""
+import threading
+from typing import Dict, Iterable, Mapping
+
+from sqlalchemy import bindparam, delete, insert, select
+
+from .models import Tag, file_tags
+from ..utils.instrumentation import timed
+
+
+class TagService:
+    """Tags by name, backed by an in-process name -> id map.
+
+    The map is loaded once, when the service is created, and kept current
+    by the service's own inserts; tags are never deleted, so an id in the
+    map stays valid. Names missing from it are inserted with one
+    INSERT OR IGNORE batch and their ids read back in one SELECT, which
+    also picks up tags another process added meanwhile. file_tags links
+    are written with one executemany; the unique (file_id, tag_id) index
+    makes re-tagging a file a no-op.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.reload()
+
+    def reload(self):
+        """Re-read the name -> id map from the database"""
+        with self.db.get_session() as session:
+            ids = dict(session.execute(select(Tag.name, Tag.id)).all())
+        with self._lock:
+            self._ids = ids
+
+    def ids(self, names: Iterable[str], category: str = None) -> Dict[str, int]:
+        """Ids of the named tags, creating missing ones with ``category``;
+        blank names are skipped"""
+        found, missing = self._lookup(names)
+        if missing:
+            with self.db.get_session() as session:
+                created = self._create(session, missing, category)
+                session.commit()
+            self._remember(created)
+            found.update(created)
+        return found
+
+    def _lookup(self, names: Iterable[str]):
+        """(cached ids, names not in the map)"""
+        wanted = {name.strip() for name in names if name and name.strip()}
+        with self._lock:
+            found = {name: self._ids[name] for name in wanted if name in self._ids}
+        return found, sorted(wanted - found.keys())
+
+    @staticmethod
+    def _create(session, names: list, category: str = None) -> Dict[str, int]:
+        session.execute(
+            insert(Tag).prefix_with('OR IGNORE'),
+            [{'name': name, 'category': category} for name in names]
+        )
+        return dict(session.execute(
+            select(Tag.name, Tag.id).where(Tag.name.in_(bindparam('names', expanding=True))),
+            {'names': names}
+        ).all())
+
+    def _remember(self, created: Dict[str, int]):
+        # Only called once the ids are committed
+        with self._lock:
+            self._ids.update(created)
+
+    @timed('db.tag_files')
+    def tag_files(self, tags_by_file: Mapping[int, Iterable[str]],
+                  replace: bool = False) -> int:
+        """Tag many files in one transaction.
+
+        ``tags_by_file`` maps file ids to tag names. With ``replace`` each
+        listed file loses the tags not named for it. Returns the number of
+        links written, including ones that already existed.
+        """
+        tags_by_file = {file_id: list(names) for file_id, names in tags_by_file.items()}
+        if not tags_by_file:
+            return 0
+        ids, missing = self._lookup(name for names in tags_by_file.values() for name in names)
+        with self.db.get_session() as session:
+            created = self._create(session, missing) if missing else {}
+            ids.update(created)
+            links = {
+                (file_id, ids[name.strip()])
+                for file_id, names in tags_by_file.items()
+                for name in names if name and name.strip()
+            }
+            if replace:
+                session.execute(
+                    delete(file_tags).where(file_tags.c.file_id == bindparam('file')),
+                    [{'file': file_id} for file_id in tags_by_file]
+                )
+            if links:
+                # Plain tuples in index order: for hundreds of thousands of
+                # links SQLAlchemy's per-row parameter handling costs as
+                # much as the inserts
+                session.connection().exec_driver_sql(
+                    "INSERT OR IGNORE INTO file_tags (file_id, tag_id) VALUES (?, ?)",
+                    sorted(links)
+                )
+            session.commit()
+        self._remember(created)
+        return len(links)
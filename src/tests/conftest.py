@@ -0,0 +1,10 @@
+import pytest
+
+from src.database.database import DatabaseManager
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = DatabaseManager(str(tmp_path / "catalog.db"))
+    yield manager
+    manager.engine.dispose()
@@ -0,0 +1,96 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from src.core.catalog_exporter import CatalogExporter, ExportCancelled
+from src.core.columnar_exporter import ColumnarExporter, load_npz, pa
+
+
+@pytest.fixture
+def catalog(db):
+    for i in range(25):
+        db.add_file(Path(f"/library/model_{i}.zip"), content_hash=f"{i:064x}")
+    return db
+
+
+@pytest.fixture
+def archives(catalog):
+    catalog.add_tags_to_file(1, ["STL", "Dragon"])
+    for i in range(12):
+        entries = [{'path': f"model_{i}/part_{j}.stl", 'size': j * 100, 'crc': i}
+                   for j in range(3)] + [{'path': "readme.txt"}]
+        catalog.record_processed_archive(
+            Path(f"/library/model_{i}.zip"), f"{i:064x}", entries, {})
+    return catalog
+
+
+@pytest.mark.parametrize("format_type", CatalogExporter.FORMATS)
+def test_export_writes_every_row(catalog, tmp_path, format_type):
+    target = tmp_path / f"export.{format_type}"
+    written = CatalogExporter(catalog, batch_size=10).export(str(target), format_type)
+    assert written == 25
+    assert target.exists()
+    assert not Path(f"{target}.tmp").exists()
+    if format_type == 'json':
+        assert len(json.loads(target.read_text())) == 25
+
+
+def test_cancelled_export_leaves_earlier_file(catalog, tmp_path):
+    target = tmp_path / "export.json"
+    target.write_text("earlier export")
+    pages = []
+
+    def is_cancelled():
+        pages.append(None)
+        return len(pages) > 1
+
+    with pytest.raises(ExportCancelled):
+        CatalogExporter(catalog, batch_size=10).export(
+            str(target), 'json', is_cancelled=is_cancelled)
+    assert target.read_text() == "earlier export"
+    assert not Path(f"{target}.tmp").exists()
+
+
+@pytest.mark.parametrize("format_type", ColumnarExporter.FORMATS)
+def test_cancelled_columnar_export_writes_nothing(catalog, tmp_path, format_type):
+    if format_type != 'npz' and pa is None:
+        pytest.skip("pyarrow is not installed")
+    target = tmp_path / f"catalog.{format_type}"
+    pages = []
+
+    def is_cancelled():
+        pages.append(None)
+        return len(pages) > 1
+
+    with pytest.raises(ExportCancelled):
+        ColumnarExporter(catalog, batch_size=10).export(
+            str(target), format_type, is_cancelled=is_cancelled)
+    assert not target.exists() or not list(target.iterdir())
+    assert not Path(f"{target}.tmp").exists()
+
+
+@pytest.mark.parametrize("format_type", ColumnarExporter.FORMATS)
+def test_columnar_export_across_pages(archives, tmp_path, format_type):
+    if format_type != 'npz' and pa is None:
+        pytest.skip("pyarrow is not installed")
+    exporter = ColumnarExporter(archives, batch_size=5)
+    expected = exporter.collect_tables()
+    assert len(expected['archive_entries']['archive_id']) == 48
+    assert len(expected['entry_names']['name']) == 37
+
+    target = tmp_path / f"catalog.{format_type}"
+    written = exporter.export(str(target), format_type)
+    assert written == sum(len(next(iter(t.values()))) for t in expected.values())
+    if format_type == 'npz':
+        tables = {name: {column: list(values) for column, values in columns.items()}
+                  for name, columns in load_npz(str(target)).items()}
+        assert tables['entry_names'] == expected['entry_names']
+        assert tables['archive_entries']['name_id'] == expected['archive_entries']['name_id']
+        return
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+    read = pq.read_table if format_type == 'parquet' else feather.read_table
+    for name, columns in expected.items():
+        assert read(target / f"{name}.{format_type}").to_pydict() == columns
+    assert not list(target.glob("*.tmp"))
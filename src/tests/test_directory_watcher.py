@@ -0,0 +1,104 @@
+import pytest
+
+from src.core.directory_watcher import ChangeDetector
+from src.core.file_hasher import FileHasher
+
+
+@pytest.fixture
+def library(tmp_path):
+    directory = tmp_path / "library"
+    directory.mkdir()
+    return directory
+
+
+def settle(detector, library):
+    """First scan sees the arrival, the second one after the debounce reports it"""
+    detector.scan([library], now=0.0)
+    return detector.scan([library], now=10.0)
+
+
+def hashing_fails(monkeypatch):
+    def fail(path):
+        raise AssertionError(f"{path.name} was hashed during scan")
+    monkeypatch.setattr(FileHasher, "get_quick_hash", staticmethod(fail))
+    monkeypatch.setattr(FileHasher, "get_content_hash", staticmethod(fail))
+
+
+def test_scan_leaves_hashing_to_resolve(db, library, tmp_path, monkeypatch):
+    old = tmp_path / "old" / "dragon.zip"
+    old.parent.mkdir()
+    old.write_bytes(b"dragon archive")
+    db.add_file(old, FileHasher.get_quick_hash(old), FileHasher.get_content_hash(old))
+    detector = ChangeDetector([".zip"], db=db)
+    detector.add_folder(library)
+
+    moved = library / "Dragon.zip"
+    old.rename(moved)
+    (library / "lamp.zip").write_bytes(b"lamp archive")
+    with monkeypatch.context() as patch:
+        hashing_fails(patch)
+        changes = settle(detector, library)
+    assert changes['new'] == [] and changes['moved'] == []
+    assert sorted(changes['unresolved']) == [(moved, 'new'), (library / "lamp.zip", 'new')]
+
+    changes = detector.resolve(changes)
+    assert changes['moved'] == [(old, moved)]
+    assert changes['new'] == [library / "lamp.zip"]
+    assert changes['unresolved'] == []
+    record, = db.get_files_by_quick_hash(FileHasher.get_quick_hash(moved))
+    assert record.original_path == str(moved)
+
+
+def test_stat_matched_move_is_recorded_by_resolve(db, library, monkeypatch):
+    (library / "a").mkdir()
+    archive = library / "a" / "dragon.zip"
+    archive.write_bytes(b"dragon archive")
+    db.add_file(archive, FileHasher.get_quick_hash(archive))
+    detector = ChangeDetector([".zip"], db=db)
+    detector.add_folder(library)
+
+    target = library / "dragon.zip"
+    archive.rename(target)
+    with monkeypatch.context() as patch:
+        hashing_fails(patch)
+        changes = settle(detector, library)
+    assert changes['moved'] == [(archive, target)]
+
+    detector.resolve(changes)
+    record, = db.get_files_by_quick_hash(FileHasher.get_quick_hash(target))
+    assert record.original_path == str(target)
+
+
+def test_without_database_scan_is_final(library, monkeypatch):
+    detector = ChangeDetector([".zip"])
+    detector.add_folder(library)
+    (library / "lamp.zip").write_bytes(b"lamp archive")
+    hashing_fails(monkeypatch)
+    changes = settle(detector, library)
+    assert changes['new'] == [library / "lamp.zip"]
+    assert changes['unresolved'] == []
+
+
+def test_failed_resolve_leaves_scan_result_intact(db, library, monkeypatch):
+    detector = ChangeDetector([".zip"], db=db)
+    detector.add_folder(library)
+    for name in ("dragon.zip", "lamp.zip"):
+        (library / name).write_bytes(name.encode())
+    changes = settle(detector, library)
+    arrivals = sorted(changes['unresolved'])
+
+    checked = []
+
+    def fail_on_second(path):
+        checked.append(path)
+        if len(checked) == 2:
+            raise OSError("disk went away")
+
+    monkeypatch.setattr(detector, "_find_stored_origin", fail_on_second)
+    with pytest.raises(OSError):
+        detector.resolve(changes)
+    assert changes['new'] == [] and sorted(changes['unresolved']) == arrivals
+
+    fallback = ChangeDetector.unresolved_as_found(changes)
+    assert sorted(fallback['new']) == [path for path, _ in arrivals]
+    assert fallback['unresolved'] == [] and changes['unresolved']
@@ -0,0 +1,82 @@
+import zipfile
+
+import pytest
+
+from src.core.dry_run import DryRunPlanner
+from src.core.name_analyzer import NameAnalyzer
+from src.core.rules_manager import RulesManager
+from src.core.settings_manager import Settings
+
+NAMES = ["Dragon_Bust_v2.zip", "HarryPotter Hedwig.zip", "lamp.zip", "Goblin STL.zip"]
+
+
+@pytest.fixture(scope="module")
+def analyzer():
+    return NameAnalyzer(RulesManager())
+
+
+@pytest.fixture
+def library(tmp_path):
+    directory = tmp_path / "library"
+    (directory / "shop").mkdir(parents=True)
+    for name in NAMES:
+        with zipfile.ZipFile(directory / "shop" / name, 'w') as zf:
+            zf.writestr("model.stl", "solid model\nendsolid model\n")
+    return directory
+
+
+def plan(analyzer, library, content, cache_dir=None):
+    planner = DryRunPlanner(analyzer, Settings(), content=content, cache_dir=cache_dir)
+    return planner.plan(library)
+
+
+def targets(result):
+    return {row['source'].name: row['target'].name for row in result['rows']}
+
+
+def opening_nothing(planner):
+    planner.listers = {'.zip': lambda path: pytest.fail(f"{path.name} was opened")}
+    return planner
+
+
+def test_known_opens_no_archive(analyzer, library, tmp_path):
+    planner = DryRunPlanner(analyzer, Settings(), cache_dir=tmp_path / "cache")
+    result = opening_nothing(planner).plan(library)
+    assert result['stats']['listed'] == result['stats']['known'] == 0
+    assert result['stats']['unread'] == len(NAMES)
+
+
+def test_listings_are_reused(analyzer, library, tmp_path):
+    cache_dir = tmp_path / "cache"
+    read = plan(analyzer, library, 'auto', cache_dir)
+    assert read['stats']['listed'] == len(NAMES)
+    # The same plan as one that reads every listing without a cache
+    assert targets(read) == targets(plan(analyzer, library, 'auto'))
+
+    planner = DryRunPlanner(analyzer, Settings(), cache_dir=cache_dir)
+    again = opening_nothing(planner).plan(library)
+    assert (again['stats']['known'], again['stats']['unread']) == (len(NAMES), 0)
+    assert targets(again) == targets(read)
+
+
+def test_names_are_not_analyzed_again(analyzer, library, tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    first = plan(analyzer, library, 'off', cache_dir)
+
+    def analyze_name(*args, **kwargs):
+        raise AssertionError("name analyzed again")
+
+    monkeypatch.setattr(analyzer, "analyze_name", analyze_name)
+    assert targets(plan(analyzer, library, 'off', cache_dir)) == targets(first)
+
+
+def test_changed_archive_is_read_again(analyzer, library, tmp_path):
+    cache_dir = tmp_path / "cache"
+    plan(analyzer, library, 'auto', cache_dir)
+    with zipfile.ZipFile(library / "shop" / "lamp.zip", 'w') as zf:
+        zf.writestr("instructions.pdf", "print upright, no supports needed")
+
+    again = plan(analyzer, library, 'auto', cache_dir)
+    assert (again['stats']['known'], again['stats']['listed']) == (len(NAMES) - 1, 1)
+    lamp = next(row for row in again['rows'] if row['source'].name == "lamp.zip")
+    assert "[STL]" not in lamp['target'].name
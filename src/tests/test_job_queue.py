@@ -0,0 +1,139 @@
+import pytest
+
+from src.core.job_queue import JobQueue, RetryableError
+
+
+@pytest.fixture
+def queue(db):
+    return JobQueue(db, lease_seconds=60, max_attempts=3, backoff_base=0.0)
+
+
+def enqueue(queue, stage, paths):
+    run_id = queue.new_run()
+    queue.enqueue(stage, ({'path': path} for path in paths), run_id)
+    return run_id
+
+
+def statuses(queue, run_id, stage):
+    return {job['path']: job['status'] for job in queue.run_jobs(run_id, stage)}
+
+
+def test_lease_is_exclusive(db, queue):
+    enqueue(queue, 'hash', ["a", "b", "c"])
+    other = JobQueue(db)
+
+    first = queue.lease('hash', 2)
+    second = other.lease('hash', 2)
+    assert [job['path'] for job in first] == ["a", "b"]
+    assert [job['path'] for job in second] == ["c"]
+    assert other.lease('hash', 2) == []
+    assert all(job['attempts'] == 1 for job in first + second)
+
+
+def test_expired_lease_is_handed_out_again(db, queue):
+    enqueue(queue, 'hash', ["a"])
+    expiring = JobQueue(db, lease_seconds=-1)
+    assert [job['path'] for job in expiring.lease('hash', 1)] == ["a"]
+
+    job, = queue.lease('hash', 1)
+    assert (job['path'], job['attempts']) == ("a", 2)
+
+
+def test_complete_queues_next_stage(queue):
+    run_id = enqueue(queue, 'hash', ["a", "b"])
+    jobs = queue.lease('hash', 2)
+    queue.complete([(job, {'hash': job['path'] * 2}) for job in jobs],
+                   'analyze', [{'path': "a", 'payload': {'hash': "aa"}}])
+
+    assert statuses(queue, run_id, 'hash') == {"a": 'done', "b": 'done'}
+    job, = queue.lease('analyze', 5)
+    assert (job['path'], job['payload']) == ("a", {'hash': "aa"})
+
+
+def test_fail_retries_retryable_errors(queue):
+    run_id = enqueue(queue, 'hash', ["locked"])
+    for attempt in range(1, 4):
+        job, = queue.lease('hash', 1)
+        assert job['attempts'] == attempt
+        retried = queue.fail(job, RetryableError("file is locked"))
+        assert retried == (attempt < 3)
+
+    job, = queue.run_jobs(run_id, 'hash')
+    assert (job['status'], job['error']) == ('failed', "file is locked")
+
+
+def test_fail_gives_up_on_other_errors(queue):
+    run_id = enqueue(queue, 'hash', ["broken"])
+    job, = queue.lease('hash', 1)
+    assert queue.fail(job, ValueError("not a zip")) is False
+    assert statuses(queue, run_id, 'hash') == {"broken": 'failed'}
+    assert queue.next_due() is None
+
+
+def test_job_that_never_finishes_is_given_up(db):
+    # Every lease expires unfinished, as when processing the file kills the app
+    crashing = JobQueue(db, lease_seconds=-1, max_attempts=3)
+    run_id = enqueue(crashing, 'hash', ["crashes", "fine"])
+    for attempt in range(1, 4):
+        assert [(job['path'], job['attempts']) for job in crashing.lease('hash', 1)] == [
+            ("crashes", attempt)]
+
+    job, = crashing.lease('hash', 1)
+    assert job['path'] == "fine"
+    crashed, = [job for job in crashing.run_jobs(run_id, 'hash') if job['path'] == "crashes"]
+    assert (crashed['status'], crashed['error']) == ('failed', "Gave up after 3 attempts")
+
+
+def test_recover_gives_up_on_last_attempt(db, queue):
+    run_id = enqueue(queue, 'hash', ["crashes", "once"])
+    expiring = JobQueue(db, lease_seconds=-1)
+    expiring.lease('hash', 1)
+    expiring.lease('hash', 1)
+    # An earlier run of the app died holding both, the first on its third attempt
+    JobQueue(db).lease('hash', 2)
+
+    assert queue.recover() == 1
+    assert statuses(queue, run_id, 'hash') == {"crashes": 'failed', "once": 'pending'}
+
+
+def test_release_does_not_count_an_attempt(queue):
+    enqueue(queue, 'hash', ["a"])
+    queue.lease('hash', 1)
+    assert queue.release() == 1
+    job, = queue.lease('hash', 1)
+    assert job['attempts'] == 1
+
+
+def test_recover_stale_leases(db, queue):
+    run_id = queue.new_run()
+    queue.enqueue('hash', [{'path': "a"}], run_id)
+    queue.enqueue('rename', [{'path': "batch"}], run_id)
+    crashed = JobQueue(db)
+    crashed.lease('hash', 1)
+    crashed.lease('rename', 1)
+    remote = JobQueue(db)
+    remote.owner = "elsewhere:1:abcd"
+    queue.enqueue('analyze', [{'path': "b"}], run_id)
+    remote.lease('analyze', 1)
+
+    assert queue.recover() == 1
+    assert statuses(queue, run_id, 'hash') == {"a": 'pending'}
+    assert statuses(queue, run_id, 'rename') == {"batch": 'failed'}
+    # Leases held on another machine are left to expire
+    assert statuses(queue, run_id, 'analyze') == {"b": 'leased'}
+    assert [job['path'] for job in queue.lease('hash', 1)] == ["a"]
+
+
+def test_recover_leaves_own_leases(queue):
+    enqueue(queue, 'hash', ["a"])
+    queue.lease('hash', 1)
+    assert queue.recover() == 0
+
+
+def test_new_run_keeps_unfinished_runs(queue):
+    first = enqueue(queue, 'hash', ["a"])
+    second = queue.new_run()
+    assert second == first + 1
+    assert queue.unfinished_run() == first
+    assert queue.cancel_run(first) == 1
+    assert queue.unfinished_run() is None
@@ -0,0 +1,155 @@
+import struct
+import zipfile
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.core.duplicate_finder import DuplicateFinder
+from src.core.mesh_fingerprint import MeshFingerprint, MeshFingerprinter
+
+
+def binary_stl(scale: float = 1.0) -> bytes:
+    faces = [
+        ((0, 0, 0), (1, 0, 0), (0, 1, 0)),
+        ((0, 0, 0), (0, 1, 0), (0, 0, 1)),
+        ((0, 0, 0), (0, 0, 1), (1, 0, 0)),
+        ((1, 0, 0), (0, 1, 0), (0, 0, 1)),
+    ]
+    data = b"\0" * 80 + struct.pack("<I", len(faces))
+    for face in faces:
+        data += struct.pack("<3f", 0, 0, 0)
+        for vertex in face:
+            data += struct.pack("<3f", *(c * scale for c in vertex))
+        data += b"\0\0"
+    return data
+
+
+def ascii_stl(offset=(0.0, 0.0, 0.0)) -> str:
+    faces = [
+        ((1, 0, 0), (0, 0, 0), (0, 1, 0)),
+        ((0, 0, 1), (0, 1, 0), (1, 0, 0)),
+        ((0, 0, 0), (0, 0, 1), (0, 1, 0)),
+        ((1, 0, 0), (0, 0, 1), (0, 0, 0)),
+    ]
+    lines = ["solid tetra"]
+    for face in faces:
+        lines += ["facet normal 0 0 0", "outer loop"]
+        lines += [f"vertex {' '.join(repr(c + o) for c, o in zip(vertex, offset))}"
+                  for vertex in face]
+        lines += ["endloop", "endfacet"]
+    return "\n".join(lines + ["endsolid tetra", ""])
+
+
+def fingerprint(*chunks) -> str:
+    sink = MeshFingerprint()
+    for chunk in chunks:
+        sink(chunk)
+    return sink.hexdigest()
+
+
+@pytest.fixture(scope="module")
+def mesh():
+    """A triangle soup: 300 triangles over 100 vertices"""
+    rng = np.random.default_rng(7)
+    points = rng.uniform(-40.0, 40.0, size=(100, 3))
+    return points[rng.integers(0, len(points), size=900)]
+
+
+def make_zip(path: Path, members: dict) -> Path:
+    with zipfile.ZipFile(path, 'w') as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return path
+
+
+def test_archives_without_models_are_recorded(db, tmp_path):
+    fingerprinter = MeshFingerprinter(db)
+    empty = make_zip(tmp_path / "docs.zip", {"readme.txt": "no models"})
+    broken = tmp_path / "broken.zip"
+    broken.write_bytes(b"not a zip")
+
+    for path, content_hash in ((empty, "a" * 64), (broken, "b" * 64)):
+        fingerprinter.index_archive(path, content_hash)
+
+    assert db.get_fingerprinted_hashes(["a" * 64, "b" * 64, "c" * 64]) == {"a" * 64, "b" * 64}
+
+
+def test_fingerprinted_archives_are_not_read_again(db, tmp_path, monkeypatch):
+    fingerprinter = MeshFingerprinter(db)
+    empty = make_zip(tmp_path / "docs.zip", {"readme.txt": "no models"})
+    fingerprinter.shared_models({"a" * 64: empty})
+
+    def fail(path):
+        raise AssertionError(f"{path} read again")
+
+    monkeypatch.setattr(fingerprinter, "fingerprint_archive", fail)
+    assert fingerprinter.shared_models({"a" * 64: empty}) == []
+
+
+def test_shared_models_beyond_parameter_limit(db):
+    models = [{'member': "part.stl", 'fingerprint': "f" * 40, 'triangles': 4, 'vertices': 4}]
+    db.add_mesh_fingerprints("a" * 64, models)
+    db.add_mesh_fingerprints("b" * 64, models)
+    # More archives than SQLite accepts as bound parameters in one statement
+    scope = [f"{i:064x}" for i in range(40_000)] + ["a" * 64, "b" * 64]
+    rows = db.find_shared_models(scope)
+    assert {row['content_hash'] for row in rows} == {"a" * 64, "b" * 64}
+    assert db.find_shared_models(["a" * 64]) == []
+
+
+def test_duplicate_finder(db, tmp_path):
+    first = make_zip(tmp_path / "dragon.zip", {"dragon/body.stl": binary_stl()})
+    copy = tmp_path / "dragon copy.zip"
+    copy.write_bytes(first.read_bytes())
+    repack = make_zip(tmp_path / "dragon repack.zip",
+                      {"readme.txt": "repacked", "body_v2.stl": binary_stl()})
+    other = make_zip(tmp_path / "lamp.zip", {"lamp.stl": binary_stl(2.0)})
+
+    stages = set()
+    duplicates = DuplicateFinder(MeshFingerprinter(db)).find(
+        [first, copy, repack, other], progress=lambda stage, done, total: stages.add(stage))
+
+    identical = [d for d in duplicates if not d['shared_model']]
+    shared = [d for d in duplicates if d['shared_model']]
+    assert [(d['file1'], d['file2']) for d in identical] == [(first, copy)]
+    assert {frozenset((d['file1'], d['file2'])) for d in shared} == {frozenset((first, repack))}
+    assert stages == {'quick', 'content', 'models'}
+
+
+def test_duplicate_finder_cancelled(tmp_path):
+    files = [make_zip(tmp_path / f"{i}.zip", {"a.txt": "same"}) for i in range(3)]
+    assert DuplicateFinder().find(files, is_cancelled=lambda: True) == []
+
+
+@pytest.mark.parametrize("shift", [10.0, 0.005, -3.3, 1234.5678, (0.25, -7.125, 0.0033)])
+def test_fingerprint_ignores_translation(mesh, shift):
+    assert fingerprint(mesh + np.asarray(shift)) == fingerprint(mesh)
+
+
+def test_fingerprint_ignores_order_chunks_and_duplicates(mesh):
+    expected = fingerprint(mesh)
+    triangles = mesh.reshape(-1, 3, 3)
+    assert fingerprint(mesh[::-1]) == expected
+    # Reversed winding, reordered triangles, split across reads
+    rewound = triangles[::-1, ::-1].reshape(-1, 3)
+    assert fingerprint(*np.array_split(rewound, 7)) == expected
+    assert fingerprint(mesh, mesh[:50]) == expected
+
+
+def test_fingerprint_tells_shapes_apart(mesh):
+    assert fingerprint(mesh * 2.0) != fingerprint(mesh)
+    # One corner pulled out by a single grid step
+    pulled = mesh.copy()
+    pulled[(mesh == mesh[0]).all(axis=1), 2] += 0.01
+    assert fingerprint(pulled) != fingerprint(mesh)
+
+
+def test_binary_and_ascii_of_a_moved_model_match(tmp_path):
+    archive = make_zip(tmp_path / "tetra.zip", {
+        "binary.stl": binary_stl(),
+        "moved.stl": ascii_stl(offset=(12.5, -0.004, 3.0)),
+    })
+    models = MeshFingerprinter().fingerprint_archive(archive)
+    assert len(models) == 2
+    assert models[0]['fingerprint'] == models[1]['fingerprint']
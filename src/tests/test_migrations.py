@@ -0,0 +1,229 @@
+"""Each schema migration, run against a database created by the first
+release's models."""
+import json
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine, inspect
+
+from src.database.database import DatabaseManager
+from src.database.migrations import MIGRATIONS, SCHEMA_VERSION
+from src.database.models import Base
+
+BASELINE_SCHEMA = """
+CREATE TABLE files (
+    id INTEGER NOT NULL,
+    original_name VARCHAR NOT NULL,
+    new_name VARCHAR,
+    original_path VARCHAR NOT NULL,
+    content_hash VARCHAR,
+    quick_hash VARCHAR,
+    first_seen DATETIME,
+    last_modified DATETIME,
+    status VARCHAR,
+    PRIMARY KEY (id)
+);
+CREATE INDEX idx_files_content_hash ON files (content_hash);
+CREATE INDEX idx_files_original_name ON files (original_name);
+CREATE INDEX idx_files_quick_hash ON files (quick_hash);
+CREATE INDEX idx_files_status ON files (status);
+CREATE TABLE tags (
+    id INTEGER NOT NULL,
+    name VARCHAR NOT NULL,
+    category VARCHAR,
+    PRIMARY KEY (id),
+    UNIQUE (name)
+);
+CREATE INDEX idx_tags_category ON tags (category);
+CREATE INDEX idx_tags_name ON tags (name);
+CREATE TABLE processed_archives (
+    id INTEGER NOT NULL,
+    file_path VARCHAR NOT NULL,
+    content_hash VARCHAR,
+    file_list VARCHAR,
+    analysis_data VARCHAR,
+    processed_date DATETIME,
+    PRIMARY KEY (id)
+);
+CREATE INDEX idx_processed_archives_content_hash ON processed_archives (content_hash);
+CREATE INDEX idx_processed_archives_file_path ON processed_archives (file_path);
+CREATE INDEX idx_processed_archives_date ON processed_archives (processed_date);
+CREATE TABLE file_tags (
+    file_id INTEGER,
+    tag_id INTEGER,
+    FOREIGN KEY(file_id) REFERENCES files (id),
+    FOREIGN KEY(tag_id) REFERENCES tags (id)
+);
+CREATE INDEX idx_file_tags_file_id ON file_tags (file_id);
+CREATE INDEX idx_file_tags_tag_id ON file_tags (tag_id);
+"""
+
+H1, H2 = "1" * 64, "2" * 64
+MEMBERS = ["dragon/body.stl", "dragon/readme.pdf"]
+
+
+@pytest.fixture
+def baseline(tmp_path):
+    """A database as the first release left it: the same archive loaded
+    twice (once renamed), tags on both copies and two analyses of it"""
+    path = tmp_path / "baseline.db"
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.executemany(
+        "INSERT INTO files (id, original_name, new_name, original_path, content_hash, "
+        "quick_hash, first_seen, last_modified, status) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [(1, "model.zip", None, "/lib/model.zip", H1, "q1",
+          "2024-01-01 00:00:00", "2024-01-02 00:00:00", "pending"),
+         (2, "model copy.zip", "Dragon.zip", "/lib/copy/model copy.zip", H1, "q1",
+          "2024-02-01 00:00:00", "2024-02-02 00:00:00", "renamed"),
+         (3, "lamp.zip", None, "/lib/lamp.zip", H2, "q2",
+          "2024-03-01 00:00:00", "2024-03-01 00:00:00", "pending")]
+    )
+    conn.executemany("INSERT INTO tags (id, name) VALUES (?, ?)", [(1, "STL"), (2, "NSFW")])
+    conn.executemany("INSERT INTO file_tags (file_id, tag_id) VALUES (?, ?)",
+                     [(1, 1), (2, 1), (2, 2), (3, 1), (3, 1)])
+    analysis = {'file_list': MEMBERS, 'contains_stls': True, 'suggested_tags': ["STL"]}
+    conn.executemany(
+        "INSERT INTO processed_archives (id, file_path, content_hash, file_list, "
+        "analysis_data, processed_date) VALUES (?, ?, ?, ?, ?, ?)",
+        [(1, "/lib/model.zip", H1, json.dumps(MEMBERS[:1]), "{}", "2024-01-01 00:00:00"),
+         (2, "/lib/copy/model copy.zip", H1, json.dumps(MEMBERS), json.dumps(analysis),
+          "2024-02-01 00:00:00")]
+    )
+    conn.commit()
+    conn.close()
+    return path
+
+
+def migrate(path, through):
+    """What migrations.upgrade does, stopping after version ``through``"""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    for target, _, migration in MIGRATIONS:
+        if target > through:
+            break
+        with engine.begin() as conn:
+            migration(conn)
+            conn.exec_driver_sql(f"PRAGMA user_version = {target}")
+    engine.dispose()
+    return sqlite3.connect(path)
+
+
+def indexes(conn, table):
+    return {row[1]: bool(row[2]) for row in conn.execute(f"PRAGMA index_list('{table}')")}
+
+
+def test_every_migration_is_tested():
+    # Add a test below for each new migration
+    assert [target for target, _, _ in MIGRATIONS] == [1, 2, 3, 4, 5, 6, 7]
+
+
+def test_merge_content_duplicates(baseline):
+    conn = migrate(baseline, 1)
+    assert conn.execute(
+        "SELECT id, content_hash, first_seen FROM files ORDER BY id").fetchall() == [
+        (2, H1, "2024-01-01 00:00:00"), (3, H2, "2024-03-01 00:00:00")]
+    assert indexes(conn, 'files')['idx_files_content_hash'] is True
+    assert conn.execute(
+        "SELECT path, name, status FROM file_paths WHERE file_id = 2 ORDER BY path"
+    ).fetchall() == [
+        ("/lib/copy/Dragon.zip", "Dragon.zip", "present"),
+        ("/lib/copy/model copy.zip", "model copy.zip", "renamed"),
+        ("/lib/model.zip", "model.zip", "present"),
+    ]
+    assert conn.execute(
+        "SELECT file_id, tag_id FROM file_tags ORDER BY file_id, tag_id").fetchall() == [
+        (2, 1), (2, 2), (3, 1)]
+
+
+def test_add_file_size(baseline):
+    conn = migrate(baseline, 2)
+    columns = [row[1] for row in conn.execute("PRAGMA table_info('files')")]
+    assert "size" in columns
+    assert conn.execute("SELECT size FROM files WHERE id = 2").fetchone() == (None,)
+    assert not {'idx_files_quick_hash', 'idx_files_status'} & indexes(conn, 'files').keys()
+
+
+def test_index_processed_archives(baseline):
+    conn = migrate(baseline, 3)
+    assert conn.execute(
+        "SELECT rowid, name, suggested_name, tags, members FROM archive_search"
+    ).fetchall() == [(2, "model copy.zip", "Dragon", "STL", "\n".join(MEMBERS))]
+
+
+def test_normalize_archive_listings(baseline):
+    conn = migrate(baseline, 4)
+    assert conn.execute(
+        "SELECT archive_id, path, size, ext FROM archive_entries ORDER BY archive_id, path"
+    ).fetchall() == [
+        (1, "dragon/body.stl", None, ".stl"),
+        (2, "dragon/body.stl", None, ".stl"),
+        (2, "dragon/readme.pdf", None, ".pdf"),
+    ]
+    rows = conn.execute("SELECT file_list, analysis_data FROM processed_archives "
+                        "ORDER BY id").fetchall()
+    assert [file_list for file_list, _ in rows] == [None, None]
+    assert json.loads(rows[1][1]) == {'suggested_tags': ["STL"]}
+
+
+def test_unique_file_tags(baseline):
+    conn = migrate(baseline, 4)
+    conn.execute("INSERT INTO file_tags (file_id, tag_id) VALUES (3, 1)")
+    conn.commit()
+    conn.close()
+
+    conn = migrate(baseline, 5)
+    assert conn.execute("SELECT COUNT(*) FROM file_tags WHERE file_id = 3").fetchone() == (1,)
+    file_tag_indexes = indexes(conn, 'file_tags')
+    assert file_tag_indexes['uq_file_tags_file_tag'] is True
+    assert 'idx_file_tags_file_id' not in file_tag_indexes
+
+
+def test_mark_fingerprinted_archives(baseline):
+    conn = migrate(baseline, 5)
+    conn.executemany(
+        "INSERT INTO mesh_fingerprints (content_hash, member_name, fingerprint, created) "
+        "VALUES (?, ?, ?, ?)",
+        [(H1, "body.stl", "f1", "2024-01-01 00:00:00"),
+         (H1, "base.stl", "f2", "2024-01-03 00:00:00")]
+    )
+    conn.commit()
+    conn.close()
+
+    conn = migrate(baseline, 6)
+    assert conn.execute(
+        "SELECT content_hash, models, error, fingerprinted FROM fingerprinted_archives"
+    ).fetchall() == [(H1, 2, None, "2024-01-03 00:00:00")]
+
+
+def test_drop_translated_fingerprints(baseline):
+    conn = migrate(baseline, 6)
+    conn.execute(
+        "INSERT INTO mesh_fingerprints (content_hash, member_name, fingerprint, created) "
+        "VALUES (?, 'body.stl', 'f1', '2024-01-01 00:00:00')", (H1,)
+    )
+    conn.execute(
+        "INSERT INTO fingerprinted_archives (content_hash, models, fingerprinted) "
+        "VALUES (?, 1, '2024-01-01 00:00:00')", (H1,)
+    )
+    conn.commit()
+    conn.close()
+
+    conn = migrate(baseline, 7)
+    assert conn.execute("SELECT COUNT(*) FROM mesh_fingerprints").fetchone() == (0,)
+    assert conn.execute("SELECT COUNT(*) FROM fingerprinted_archives").fetchone() == (0,)
+
+
+def test_upgrade_from_baseline(baseline):
+    db = DatabaseManager(str(baseline))
+    db.engine.dispose()
+    conn = sqlite3.connect(baseline)
+    assert conn.execute("PRAGMA user_version").fetchone() == (SCHEMA_VERSION,)
+    inspector = inspect(create_engine(f"sqlite:///{baseline}"))
+    for table in Base.metadata.sorted_tables:
+        declared = {index.name for index in table.indexes}
+        assert declared <= {index['name'] for index in inspector.get_indexes(table.name)}
+
+    # Opening it again has nothing left to do
+    DatabaseManager(str(baseline)).engine.dispose()
+    assert conn.execute("SELECT COUNT(*) FROM files").fetchone() == (2,)
@@ -0,0 +1,104 @@
+"""EXPLAIN QUERY PLAN checks for the catalog's lookups.
+
+Each access pattern is called through the real DatabaseManager and
+exporter methods with the SQL they emit recorded, and every statement's
+plan is checked: a full table or index scan (other than of a subquery's
+materialized rows) fails, and so does a temporary sort for the paginated
+queries, which must read rows in index order.
+
+The catalog is seeded with a few thousand files by default. Set
+QUERY_PLAN_FILES (e.g. to 1000000) to check a library-sized one; the
+timings are reported by src.benchmarks.bench_query_plans.
+"""
+import os
+
+import pytest
+from sqlalchemy import event
+
+from src.benchmarks.bench_query_plans import checks, seed_database
+from src.database.database import DatabaseManager
+
+FILES = int(os.environ.get("QUERY_PLAN_FILES", 2000))
+
+QUERIES = [
+    "content hash lookup",
+    "quick hash + size lookup",
+    "copies of an archive",
+    "previous names of a path",
+    "status filter, first page",
+    "status filter, later page",
+    "catalog export page",
+    "columnar export page",
+    "original names page",
+    "rename history page",
+    "archive content flags",
+    "archives with large STLs",
+    "latest applied batch",
+]
+
+
+class QueryRecorder:
+    """Collects the SELECTs an engine runs"""
+
+    def __init__(self, engine):
+        self.statements = []
+        event.listen(engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith("SELECT"):
+            self.statements.append((statement, parameters))
+
+    def take(self):
+        statements, self.statements = self.statements, []
+        return statements
+
+
+def plan_problems(plan, paginated: bool) -> list:
+    # Scanning a subquery's materialized rows reads only what it selected
+    materialized = {detail.split()[1] for detail in plan if detail.startswith("MATERIALIZE")}
+    problems = []
+    for detail in plan:
+        if (detail.startswith("SCAN") and "CONSTANT ROW" not in detail
+                and detail.split()[1] not in materialized):
+            problems.append(detail)
+        elif paginated and "TEMP B-TREE" in detail:
+            problems.append(detail)
+    return problems
+
+
+@pytest.fixture(scope="module")
+def catalog(tmp_path_factory):
+    db_path = tmp_path_factory.mktemp("plans") / "plans.db"
+    seed_database(db_path, FILES)
+    db = DatabaseManager(str(db_path))
+    recorder = QueryRecorder(db.engine)
+    raw = db.engine.raw_connection()
+    yield db, recorder, raw, {name: (paginated, call)
+                              for name, paginated, call in checks(db, FILES)}
+    raw.close()
+    db.engine.dispose()
+
+
+def explain(raw, statement, parameters) -> list:
+    cursor = raw.cursor()
+    cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+    plan = [row[3] for row in cursor.fetchall()]
+    cursor.close()
+    return plan
+
+
+def test_every_query_is_checked(catalog):
+    assert sorted(catalog[3]) == sorted(QUERIES)
+
+
+@pytest.mark.parametrize("name", QUERIES)
+def test_query_plan(catalog, name):
+    db, recorder, raw, queries = catalog
+    paginated, call = queries[name]
+    recorder.take()
+    call()
+    statements = recorder.take()
+    assert statements, f"{name} ran no SELECT"
+    for statement, parameters in statements:
+        plan = explain(raw, statement, parameters)
+        assert not plan_problems(plan, paginated), f"{statement}\n" + "\n".join(plan)
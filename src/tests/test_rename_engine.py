@@ -0,0 +1,160 @@
+import os
+
+import pytest
+
+from src.core.rename_engine import RenameEngine
+from src.core.rename_planner import RenamePlanner
+
+
+def make_files(directory, contents):
+    for name, data in contents.items():
+        (directory / name).write_text(data)
+
+
+def listing(directory):
+    return {name: (directory / name).read_text() for name in os.listdir(directory)}
+
+
+def plan_of(directory, renames):
+    return [{'source': directory / source, 'target': directory / target}
+            for source, target in renames]
+
+
+@pytest.fixture
+def engine(db):
+    return RenameEngine(db)
+
+
+@pytest.fixture
+def library(tmp_path):
+    directory = tmp_path / "library"
+    directory.mkdir()
+    return directory
+
+
+def test_plain_rename(engine, library):
+    make_files(library, {"a.zip": "a"})
+    result = engine.execute(plan_of(library, [("a.zip", "Dragon.zip")]))
+    assert result['status'] == 'applied'
+    assert listing(library) == {"Dragon.zip": "a"}
+
+
+def test_swap_cycle(engine, library):
+    make_files(library, {"a.zip": "a", "b.zip": "b", "c.zip": "c", "d.zip": "d"})
+    plan = plan_of(library, [("a.zip", "b.zip"), ("b.zip", "a.zip"),
+                             ("c.zip", "d.zip"), ("d.zip", "e.zip")])
+    report = engine.validate(plan)
+    assert report['errors'] == []
+    assert report['cycles'] == [[library / "a.zip", library / "b.zip"]]
+
+    assert engine.execute(plan)['status'] == 'applied'
+    assert listing(library) == {"a.zip": "b", "b.zip": "a", "d.zip": "c", "e.zip": "d"}
+
+
+def test_three_way_cycle(engine, library):
+    make_files(library, {"a.zip": "a", "b.zip": "b", "c.zip": "c"})
+    plan = plan_of(library, [("a.zip", "b.zip"), ("b.zip", "c.zip"), ("c.zip", "a.zip")])
+    assert engine.execute(plan)['status'] == 'applied'
+    assert listing(library) == {"b.zip": "a", "c.zip": "b", "a.zip": "c"}
+
+
+def test_case_only_rename(engine, library):
+    make_files(library, {"dragon.zip": "a"})
+    plan = plan_of(library, [("dragon.zip", "Dragon.zip")])
+    assert engine.validate(plan)['case_only'] == plan
+    assert engine.execute(plan)['status'] == 'applied'
+    assert os.listdir(library) == ["Dragon.zip"]
+
+
+def test_case_variant_of_another_file(engine, library):
+    make_files(library, {"a.zip": "a", "A.zip": "other"})
+    if len(os.listdir(library)) < 2:
+        pytest.skip("case-insensitive filesystem")
+    plan = plan_of(library, [("a.zip", "A.zip")])
+    report = engine.validate(plan)
+    assert report['case_only'] == []
+    assert [e['reason'] for e in report['errors']] == ["Target already exists"]
+    with pytest.raises(ValueError):
+        engine.execute(plan)
+    assert listing(library) == {"a.zip": "a", "A.zip": "other"}
+
+    result = RenamePlanner().plan(plan)
+    assert [c['kind'] for c in result['conflicts']] == ['disk']
+    assert result['plan'][0]['target'] == library / "A (2).zip"
+
+
+def test_target_exists(engine, library):
+    make_files(library, {"a.zip": "a", "Taken.zip": "taken"})
+    plan = plan_of(library, [("a.zip", "taken.zip")])
+    assert [e['reason'] for e in engine.validate(plan)['errors']] == ["Target already exists"]
+    with pytest.raises(ValueError):
+        engine.execute(plan)
+    assert listing(library) == {"a.zip": "a", "Taken.zip": "taken"}
+
+
+def test_same_target_twice(engine, library):
+    make_files(library, {"a.zip": "a", "b.zip": "b"})
+    plan = plan_of(library, [("a.zip", "c.zip"), ("b.zip", "C.zip")])
+    assert [e['reason'] for e in engine.validate(plan)['errors']] == ["Same target as a.zip"]
+    with pytest.raises(ValueError):
+        engine.execute(plan)
+
+
+@pytest.mark.parametrize("name, reason", [
+    ("a<b.zip", "Illegal characters in name: '<'"),
+    ("a:b?.zip", "Illegal characters in name: ':' '?'"),
+    ("tab\there.zip", "Illegal characters in name: '\\t'"),
+    ("trailing.", "Name cannot end with a space or dot"),
+    ("trailing ", "Name cannot end with a space or dot"),
+    ("CON.zip", "Reserved file name"),
+    ("lpt1.tar.gz", "Reserved file name"),
+    ("x" * 252 + ".zip", "Name is too long"),
+])
+def test_illegal_names(engine, library, name, reason):
+    make_files(library, {"a.zip": "a"})
+    plan = [{'source': library / "a.zip", 'target': library / name}]
+    assert [e['reason'] for e in engine.validate(plan)['errors']] == [reason]
+    with pytest.raises(ValueError):
+        engine.execute(plan)
+    assert listing(library) == {"a.zip": "a"}
+
+
+def test_missing_source_and_other_directory(engine, library):
+    other = library / "other"
+    other.mkdir()
+    make_files(library, {"a.zip": "a"})
+    plan = [{'source': library / "gone.zip", 'target': library / "b.zip"},
+            {'source': library / "a.zip", 'target': other / "a.zip"}]
+    assert [e['reason'] for e in engine.validate(plan)['errors']] == [
+        "Source file no longer exists", "Target must stay in the same directory"]
+
+
+def test_rollback(engine, library):
+    make_files(library, {"a.zip": "a", "b.zip": "b", "c.zip": "c"})
+    plan = plan_of(library, [("a.zip", "b.zip"), ("b.zip", "a.zip"), ("c.zip", "C2.zip")])
+    batch_id = engine.execute(plan)['batch_id']
+
+    result = engine.rollback(batch_id)
+    assert result['status'] == 'rolled_back'
+    assert len(result['reverted']) == 3
+    assert listing(library) == {"a.zip": "a", "b.zip": "b", "c.zip": "c"}
+    assert engine.incomplete_batches() == []
+
+
+def test_failed_rename_rolls_back_batch(engine, library, monkeypatch):
+    make_files(library, {"a.zip": "a", "b.zip": "b", "c.zip": "c"})
+    plan = plan_of(library, [("a.zip", "b.zip"), ("b.zip", "a.zip"), ("c.zip", "d.zip")])
+    rename = os.rename
+
+    def failing_rename(source, target):
+        if os.path.basename(target) == "d.zip":
+            raise PermissionError(13, "Permission denied")
+        rename(source, target)
+
+    monkeypatch.setattr(os, "rename", failing_rename)
+    result = engine.execute(plan)
+    monkeypatch.undo()
+
+    assert result['status'] == 'rolled_back'
+    assert [e['seq'] for e in result['errors']] == [2]
+    assert listing(library) == {"a.zip": "a", "b.zip": "b", "c.zip": "c"}
@@ -0,0 +1,94 @@
+import copy
+import json
+import random
+import shutil
+
+import pytest
+
+from src.core.rules_manager import RULES_DIR, ChangeTrigger, PatternTable, RulesManager
+
+
+@pytest.fixture
+def layers(tmp_path):
+    """A copy of the default rules, a shop pack and an empty custom folder"""
+    defaults = tmp_path / "default_rules.json"
+    shutil.copy(RULES_DIR / "default_rules.json", defaults)
+    shop = tmp_path / "shop.json"
+    shop.write_text(json.dumps({'creators': {'ACME': {'patterns': ["acme"]}}}))
+    return defaults, shop, tmp_path / "custom"
+
+
+def manager(layers) -> RulesManager:
+    defaults, shop, custom = layers
+    return RulesManager(rules_file=str(defaults), custom_dir=str(custom), shop_pack=str(shop))
+
+
+def test_save_rules_writes_only_the_user_layer(layers):
+    defaults, _, custom = layers
+    original = defaults.read_bytes()
+    rules_manager = manager(layers)
+    rules = copy.deepcopy(rules_manager.rules)
+    rules['categories']['GAME']['patterns'].append("tetris")
+    rules['franchises']['Discworld'] = {'patterns': ["discworld"]}
+
+    saved = rules_manager.save_rules(rules)
+    assert saved == custom / "my_rules.json"
+    assert defaults.read_bytes() == original
+    assert json.loads(saved.read_text()) == {
+        'categories': {'GAME': {'patterns': rules['categories']['GAME']['patterns']}},
+        'franchises': {'Discworld': {'patterns': ["discworld"]}},
+    }
+    assert rules_manager.rules == rules
+    assert manager(layers).rules == rules
+
+
+def test_save_rules_cannot_drop_entries(layers):
+    rules_manager = manager(layers)
+    rules = copy.deepcopy(rules_manager.rules)
+    del rules['creators']['ACME']
+    with pytest.raises(ValueError, match="creators.ACME"):
+        rules_manager.save_rules(rules)
+    assert not (layers[2] / "my_rules.json").exists()
+
+
+def random_entries(rng, count):
+    """Short patterns over a small alphabet, so texts hit many of them"""
+    return [
+        ["".join(rng.choice("abcde _") for _ in range(rng.randint(1, 6)))
+         for _ in range(rng.randint(1, 3))]
+        for _ in range(count)
+    ]
+
+
+@pytest.mark.parametrize("entries, indexed", [(10, False), (200, True)])
+def test_pattern_table_matches_any(entries, indexed):
+    rng = random.Random(entries)
+    entries = random_entries(rng, entries)
+    table = PatternTable(entries)
+    assert (table.linear is None) == indexed
+    for _ in range(300):
+        text = "".join(rng.choice("abcdef _") for _ in range(rng.randint(0, 40)))
+        expected = [i for i, patterns in enumerate(entries)
+                    if any(p in text for p in patterns)]
+        assert table.matching(text) == expected
+
+
+def test_change_trigger():
+    trigger = ChangeTrigger(substrings=["kit card"], tokens=["dragon", "harry potter"])
+    assert trigger.matches("Buildable KIT CARD Sonic")
+    assert trigger.matches("HarryPotter_Hedwig")
+    # Token patterns count within the fuzzy distance too
+    assert trigger.matches("Dragan Bust")
+    assert not trigger.matches("Wizard Bust")
+    assert not ChangeTrigger([], []).matches("Dragon Bust")
+
+
+def test_update_rules_reports_changed_sections(layers):
+    rules_manager = manager(layers)
+    rules = copy.deepcopy(rules_manager.rules)
+    rules['franchises']['Discworld'] = {'patterns': ["discworld"]}
+    assert rules_manager.update_rules(rules) == {'franchises'}
+    assert rules_manager.match_keys({'franchises'}) == {'franchises'}
+    assert rules_manager.change_trigger.matches("Discworld Luggage")
+    assert not rules_manager.change_trigger.matches("Mario Kart")
+    assert rules_manager.test_name("Discworld Luggage")['franchises']
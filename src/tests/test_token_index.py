@@ -0,0 +1,70 @@
+import pytest
+
+from src.core.token_index import TokenIndex, bounded_levenshtein, tokenize
+
+
+@pytest.mark.parametrize("name, tokens", [
+    ("Mario_Kart-v2", ("mario", "kart", "v", "2")),
+    ("HarryPotter", ("harry", "potter")),
+    ("HPLovecraft Busts", ("hp", "lovecraft", "bust")),
+    ("Pokémon.stl", ("pokemon", "stl")),
+    ("glass", ("glass",)),
+])
+def test_tokenize(name, tokens):
+    assert tokenize(name) == tokens
+
+
+def test_pattern_spellings_share_a_key():
+    index = TokenIndex([["harry potter"], ["Star_Wars"]])
+    for name in ("HarryPotter Hedwig", "harry_potter-hedwig", "Harry Potter v2"):
+        assert index.matching(name) == [0]
+    assert index.matching("StarWars Yoda") == [1]
+
+
+def test_short_patterns_match_whole_tokens_only():
+    index = TokenIndex([["cat"], ["art"]])
+    assert index.matching("Catapult_Artemis") == []
+    assert index.matching("Cat Bust") == [0]
+    assert index.matching("Wall-Art Cat") == [0, 1]
+
+
+def test_bounded_levenshtein():
+    assert bounded_levenshtein("dragon", "dragan", 1) == 1
+    assert bounded_levenshtein("dragon", "drgaon", 2) == 2
+    # Past the limit it only reports limit + 1
+    assert bounded_levenshtein("dragon", "wizard", 1) == 2
+    assert bounded_levenshtein("dragon", "dragonborn", 2) == 3
+
+
+def test_fuzzy_distance_grows_with_length():
+    assert (TokenIndex.fuzzy_limit(9), TokenIndex.fuzzy_limit(10)) == (1, 2)
+    index = TokenIndex([["lovecraft"], ["spiderwoman"]])
+    assert index.matching("Lovecrft Bust") == [0]
+    # Two edits is too many below 10 characters...
+    assert index.matching("Lovcrft Bust") == []
+    # ...but allowed from 10 on
+    assert index.matching("Spidrwomen Statue") == [1]
+    assert index.matching("Spdrwomen Statue") == []
+
+
+def test_short_tokens_are_not_fuzzy_matched():
+    assert TokenIndex.FUZZY_MIN_LENGTH == 6
+    index = TokenIndex([["sonic"], ["dragon"]])
+    assert index.matching("Sonix Figure") == []
+    assert index.matching("Dragan Figure") == [1]
+
+
+def test_fuzzy_spans_at_most_two_tokens():
+    assert TokenIndex.FUZZY_SPAN == 2
+    index = TokenIndex([["harry potter"], ["dead by daylight"]])
+    assert index.matching("Harry Poter Hedwig") == [0]
+    # Exactly it spans all three tokens, but a typo needs all three in one span
+    assert index.matching("Dead By Daylight Killer") == [1]
+    assert index.matching("Dead By Daylite Killer") == []
+
+
+def test_fuzzy_only_when_nothing_matched_exactly():
+    index = TokenIndex([["dragon"], ["wizard"]])
+    assert index.matching("Wizard Dragan") == [1]
+    assert index.matching("Wizard Dragan", always_fuzzy=True) == [0, 1]
+    assert TokenIndex([["dragon"]], fuzzy=False).matching("Dragan") == []
@@ -9,35 +9,61 @@ from PySide6.QtWidgets import (
     QTableWidget,
     QTableWidgetItem,
     QTabWidget,
-    QWidget
+    QWidget,
+    QListWidget,
+    QListWidgetItem,
+    QListView
 )
+from PySide6.QtCore import QSize
+from PySide6.QtGui import QIcon, QPixmap
 from pathlib import Path
 from src.core.archive_analyzer import ArchiveAnalyzer
 from .base_dialog import BaseDialog
+from ..workers import PreviewWorker, ThumbnailWorker
 
 class ArchivePreviewDialog(BaseDialog):
-    def __init__(self, filepath: Path, parent=None):
+    def __init__(self, filepath: Path, parent=None, content_hash: str = None,
+                 renderer=None, cache=None, executor=None, db=None, analyzer=None,
+                 analysis: dict = None):
         super().__init__(parent)
         self.filepath = filepath
-        self.analyzer = ArchiveAnalyzer()
+        self.content_hash = content_hash
+        self.db = db
+        self.renderer = renderer
+        self.cache = cache
+        self.executor = executor
+        self.analysis = analysis
+        self.thumbnail_worker = None
+        self.preview_worker = None
+        self.model_items = {}
         self.setup_ui()
 
+        if analysis is not None and content_hash is not None:
+            self.show_analysis(analysis, content_hash)
+            return
+        # Reading and hashing a large archive takes a while. The main
+        # window's analyzer carries the configured rules; the thread is
+        # parented to the window so it can outlive the dialog.
+        self.preview_worker = PreviewWorker(
+            analyzer or ArchiveAnalyzer(), filepath, analysis, content_hash, self.parent()
+        )
+        self.preview_worker.completed.connect(self.show_analysis)
+        self.preview_worker.failed.connect(self.on_preview_failed)
+        self.preview_worker.finished.connect(self.on_preview_finished)
+        self.preview_worker.finished.connect(self.preview_worker.deleteLater)
+        self.preview_worker.start()
+
     def setup_ui(self):
         self.setWindowTitle(f"Archive Preview: {self.filepath.name}")
         self.setMinimumSize(600, 400)
         layout = QVBoxLayout(self)
 
-        # Create tab widget
-        tab_widget = QTabWidget()
-        layout.addWidget(tab_widget)
-
-        # Analysis tab
-        analysis_widget = self._create_analysis_tab()
-        tab_widget.addTab(analysis_widget, "Analysis")
+        self.status_label = QLabel("Reading archive...")
+        layout.addWidget(self.status_label)
 
-        # Contents tab
-        contents_widget = self._create_contents_tab()
-        tab_widget.addTab(contents_widget, "Contents")
+        # Tabs are added once the analysis is available
+        self.tab_widget = QTabWidget()
+        layout.addWidget(self.tab_widget)
 
         # Bottom buttons
         button_layout = QHBoxLayout()
@@ -49,12 +75,41 @@ class ArchivePreviewDialog(BaseDialog):
         
         layout.addLayout(button_layout)
 
+    def show_analysis(self, analysis: dict, content_hash: str):
+        self.analysis = analysis
+        self.content_hash = content_hash
+        self.status_label.hide()
+        tab_widget = self.tab_widget
+
+        # Analysis tab
+        analysis_widget = self._create_analysis_tab()
+        tab_widget.addTab(analysis_widget, "Analysis")
+
+        # Contents tab
+        contents_widget = self._create_contents_tab()
+        tab_widget.addTab(contents_widget, "Contents")
+
+        # Models tab with rendered thumbnails
+        members = [name for name in self.analysis.get('file_list', [])
+                   if name.lower().endswith('.stl')]
+        if members and self.cache is not None and self.executor is not None:
+            tab_widget.addTab(self._create_models_tab(members), "Models")
+
+        # Where else the catalog has seen this content
+        if self.db is not None and self.content_hash is not None:
+            tab_widget.addTab(self._create_locations_tab(), "Locations")
+
+    def on_preview_failed(self, error: str):
+        self.status_label.setText(f"Could not read archive: {error}")
+
+    def on_preview_finished(self):
+        self.preview_worker = None
+
     def _create_analysis_tab(self):
         widget = QWidget()
         layout = QVBoxLayout(widget)
 
-        # Get analysis results
-        analysis = self.analyzer.analyze_archive(self.filepath)
+        analysis = self.analysis
 
         # Display basic info
         info_text = QTextEdit()
@@ -67,6 +122,13 @@ class ArchivePreviewDialog(BaseDialog):
             f"Contains STL files: {'Yes' if analysis['contains_stls'] else 'No'}\n"
             f"Contains Documentation: {'Yes' if analysis['contains_docs'] else 'No'}\n"
         )
+        for model in analysis.get('models', []):
+            dims = model['dimensions']
+            size = " x ".join(f"{d:g}" for d in dims) + " mm" if dims else "unknown size"
+            partial = " (partial)" if model['partial'] else ""
+            info_text.append(
+                f"{model['name']}: {model['triangles']:,} triangles, {size}{partial}"
+            )
         layout.addWidget(info_text)
 
         return widget
@@ -75,9 +137,8 @@ class ArchivePreviewDialog(BaseDialog):
         widget = QWidget()
         layout = QVBoxLayout(widget)
 
-        # Get file list
-        analysis = self.analyzer.analyze_archive(self.filepath)
-        
+        analysis = self.analysis
+
         # Create table for file list
         table = QTableWidget()
         table.setColumnCount(2)
@@ -95,4 +156,104 @@ class ArchivePreviewDialog(BaseDialog):
 
         layout.addWidget(table)
 
-        return widget
\ No newline at end of file
+        return widget
+
+    def _create_locations_tab(self):
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
+
+        copies = self.db.get_copies(self.content_hash)
+        layout.addWidget(QLabel(f"Copies in the catalog ({len(copies)}):"))
+        copies_list = QListWidget()
+        for copy in copies:
+            copies_list.addItem(copy['path'])
+        layout.addWidget(copies_list)
+
+        history = [
+            entry for entry in self.db.get_name_history(self.filepath)
+            if entry['status'] != 'present'
+        ]
+        layout.addWidget(QLabel(f"Previous names ({len(history)}):"))
+        table = QTableWidget()
+        table.setColumnCount(3)
+        table.setHorizontalHeaderLabels(["Name", "Folder", "Until"])
+        table.setRowCount(len(history))
+        for i, entry in enumerate(history):
+            table.setItem(i, 0, QTableWidgetItem(entry['name']))
+            table.setItem(i, 1, QTableWidgetItem(str(Path(entry['path']).parent)))
+            until = entry['last_seen'].strftime("%Y-%m-%d %H:%M") if entry['last_seen'] else ""
+            table.setItem(i, 2, QTableWidgetItem(f"{until} ({entry['status']})"))
+        table.resizeColumnsToContents()
+        layout.addWidget(table)
+
+        return widget
+
+    def _create_models_tab(self, members: list):
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
+
+        icon_size = self.renderer.size // 2
+        model_list = QListWidget()
+        model_list.setViewMode(QListView.IconMode)
+        model_list.setResizeMode(QListView.Adjust)
+        model_list.setIconSize(QSize(icon_size, icon_size))
+        model_list.setGridSize(QSize(icon_size + 24, icon_size + 36))
+        model_list.setWordWrap(True)
+        layout.addWidget(model_list)
+
+        # Cached thumbnails show up straight away; the rest render in the pool
+        missing = []
+        for member in members:
+            item = QListWidgetItem(Path(member).name)
+            item.setToolTip(member)
+            model_list.addItem(item)
+            self.model_items[member] = item
+            key = self.cache.key(self.content_hash, member, self.renderer.size)
+            cached = self.cache.get(key)
+            if cached:
+                item.setIcon(QIcon(QPixmap(str(cached))))
+            else:
+                item.setText(f"{Path(member).name}\n(rendering...)")
+                missing.append(member)
+
+        if missing:
+            # Parent the thread to the main window so it can outlive the dialog
+            self.thumbnail_worker = ThumbnailWorker(
+                self.executor, self.renderer, self.cache, self.filepath,
+                self.content_hash, missing, self.parent()
+            )
+            self.thumbnail_worker.rendered.connect(self.on_thumbnail_rendered)
+            self.thumbnail_worker.failed.connect(self.on_thumbnail_failed)
+            self.thumbnail_worker.finished.connect(self.on_thumbnails_finished)
+            self.thumbnail_worker.finished.connect(self.thumbnail_worker.deleteLater)
+            self.thumbnail_worker.start()
+
+        return widget
+
+    def on_thumbnail_rendered(self, member: str, path: str):
+        item = self.model_items.get(member)
+        if item is not None:
+            item.setText(Path(member).name)
+            item.setIcon(QIcon(QPixmap(path)))
+
+    def on_thumbnail_failed(self, member: str, error: str):
+        item = self.model_items.get(member)
+        if item is not None:
+            item.setText(f"{Path(member).name}\n(no preview)")
+            item.setToolTip(f"{member}: {error}")
+
+    def on_thumbnails_finished(self):
+        self.thumbnail_worker = None
+
+    def done(self, result):
+        if self.preview_worker is not None:
+            self.preview_worker.completed.disconnect(self.show_analysis)
+            self.preview_worker.failed.disconnect(self.on_preview_failed)
+            self.preview_worker.finished.disconnect(self.on_preview_finished)
+            self.preview_worker = None
+        if self.thumbnail_worker is not None:
+            self.thumbnail_worker.rendered.disconnect(self.on_thumbnail_rendered)
+            self.thumbnail_worker.failed.disconnect(self.on_thumbnail_failed)
+            self.thumbnail_worker.cancel()
+            self.thumbnail_worker = None
+        super().done(result)
@@ -0,0 +1,140 @@
+# src/ui/dialogs/diagnostics_dialog.py
+from PySide6.QtWidgets import (
+    QVBoxLayout,
+    QHBoxLayout,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QAbstractItemView,
+    QCheckBox,
+    QLabel,
+    QFileDialog,
+    QMessageBox
+)
+from PySide6.QtCore import QTimer
+from datetime import datetime
+import logging
+from src.core.settings_manager import Settings
+from src.utils.instrumentation import metrics
+from .base_dialog import BaseDialog
+
+class DiagnosticsDialog(BaseDialog):
+    """Live view of the instrumentation metrics for the current scan"""
+
+    STAGE_COLUMNS = ["Stage", "Calls", "Total (s)", "Mean (ms)", "p50 (ms)", "p95 (ms)", "Max (ms)"]
+
+    def __init__(self, settings: Settings, parent=None):
+        super().__init__(parent)
+        self.settings = settings
+        self.setWindowTitle("Diagnostics")
+        self.setMinimumSize(800, 500)
+        self.setup_ui()
+        self.refresh()
+
+        # Keep the numbers moving while a scan runs in the background
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(1000)
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.enabled_check = QCheckBox("Collect timings (small overhead on every file)")
+        self.enabled_check.setChecked(metrics.enabled)
+        self.enabled_check.toggled.connect(self.set_enabled)
+        layout.addWidget(self.enabled_check)
+
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+
+        self.stage_table = self._table(self.STAGE_COLUMNS)
+        layout.addWidget(self.stage_table, 3)
+
+        self.counter_table = self._table(["Counter / Cache", "Value"])
+        layout.addWidget(self.counter_table, 2)
+
+        button_layout = QHBoxLayout()
+
+        reset_btn = QPushButton("Reset")
+        reset_btn.clicked.connect(self.reset)
+        button_layout.addWidget(reset_btn)
+
+        save_btn = QPushButton("Save JSON...")
+        save_btn.clicked.connect(self.save_json)
+        button_layout.addWidget(save_btn)
+
+        button_layout.addStretch()
+
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.accept)
+        button_layout.addWidget(close_btn)
+
+        layout.addLayout(button_layout)
+
+    @staticmethod
+    def _table(headers):
+        table = QTableWidget()
+        table.setColumnCount(len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.horizontalHeader().setStretchLastSection(True)
+        return table
+
+    def refresh(self):
+        snapshot = metrics.snapshot()
+        state = "on" if metrics.enabled else "off"
+        self.summary_label.setText(
+            f"Collection is {state}; {len(snapshot['stages'])} stages over "
+            f"{snapshot['elapsed_s']:.1f}s since {snapshot['started'][:19]}"
+        )
+
+        stages = snapshot['stages']
+        self.stage_table.setRowCount(len(stages))
+        for row, (name, stats) in enumerate(stages.items()):
+            values = [
+                name, str(stats['count']), f"{stats['total_s']:.3f}",
+                f"{stats['mean_ms']:.2f}", f"{stats['p50_ms']:.2f}",
+                f"{stats['p95_ms']:.2f}", f"{stats['max_ms']:.2f}"
+            ]
+            for col, value in enumerate(values):
+                self.stage_table.setItem(row, col, QTableWidgetItem(value))
+
+        rows = []
+        for name, value in snapshot['counters'].items():
+            if name.endswith('.bytes'):
+                rows.append((name, f"{value / 1e6:.2f} MB"))
+            else:
+                rows.append((name, str(value)))
+        for name, stats in snapshot['caches'].items():
+            rows.append((
+                f"{name} cache",
+                f"{stats['hit_rate']:.0%} ({stats['hits']} hits, {stats['misses']} misses)"
+            ))
+        self.counter_table.setRowCount(len(rows))
+        for row, (name, value) in enumerate(rows):
+            self.counter_table.setItem(row, 0, QTableWidgetItem(name))
+            self.counter_table.setItem(row, 1, QTableWidgetItem(value))
+
+    def set_enabled(self, enabled: bool):
+        metrics.enable(enabled)
+        self.settings.set("diagnostics", "instrumentation", enabled)
+        self.refresh()
+
+    def reset(self):
+        metrics.reset()
+        self.refresh()
+
+    def save_json(self):
+        filename, _ = QFileDialog.getSaveFileName(
+            self,
+            "Save Metrics",
+            f"metrics_{datetime.now():%Y%m%d_%H%M%S}.json",
+            "JSON Files (*.json)"
+        )
+        if not filename:
+            return
+        try:
+            metrics.dump_json(filename)
+        except Exception as e:
+            logging.error(f"Error saving metrics to {filename}: {e}")
+            QMessageBox.warning(self, "Diagnostics", f"Could not save metrics: {str(e)}")
@@ -11,20 +11,28 @@ from PySide6.QtWidgets import (
     QProgressBar,
     QMessageBox
 )
-import logging
 from pathlib import Path
-from src.core.file_hasher import FileHasher
+from src.core.duplicate_finder import DuplicateFinder
+from src.core.mesh_fingerprint import MeshFingerprinter
 from .base_dialog import BaseDialog
+from ..workers import DuplicateWorker
 
 class DuplicateHandlerDialog(BaseDialog):
-    def __init__(self, files: list[Path], parent=None):
+    def __init__(self, files: list[Path], parent=None, db=None):
         super().__init__(parent)
         self.files = files
         self.duplicates = []
         self.setWindowTitle("Duplicate File Handler")
         self.setMinimumSize(800, 600)
         self.setup_ui()
-        self.find_duplicates()
+
+        # Hashing and fingerprinting can take minutes on a large library
+        finder = DuplicateFinder(MeshFingerprinter(db) if db else None)
+        self.worker = DuplicateWorker(finder, files, self)
+        self.worker.progress.connect(self.on_progress)
+        self.worker.completed.connect(self.on_completed)
+        self.worker.failed.connect(self.on_failed)
+        self.worker.start()
 
     def setup_ui(self):
         layout = QVBoxLayout(self)
@@ -65,80 +73,73 @@ class DuplicateHandlerDialog(BaseDialog):
         button_layout.addWidget(close_btn)
         
         layout.addLayout(button_layout)
-def find_duplicates(self):
-    """Find duplicate files using multiple methods"""
-    try:
-        total_files = len(self.files)
-        self.progress_bar.setMaximum(total_files)
-        processed = 0
-
-        # First pass: Quick hash
-        quick_hash_map = {}
-        for file in self.files:
-            try:
-                quick_hash = FileHasher.get_quick_hash(file)
-                if quick_hash:
-                    if quick_hash in quick_hash_map:
-                        quick_hash_map[quick_hash].append(file)
-                    else:
-                        quick_hash_map[quick_hash] = [file]
-            except Exception as e:
-                logging.error(f"Error processing file {file}: {e}")
-            finally:
-                processed += 1
-                self.progress_bar.setValue(processed)
-
-        # Second pass: Full hash for potential duplicates
-        for files in quick_hash_map.values():
-            if len(files) > 1:
-                # Verify with full hash
-                full_hash_map = {}
-                for file in files:
-                    try:
-                        full_hash = FileHasher.get_content_hash(file)
-                        if full_hash:  # Add null check
-                            if full_hash in full_hash_map:
-                                self.duplicates.append({
-                                    'file1': full_hash_map[full_hash],
-                                    'file2': file,
-                                    'match_type': 'Identical Content'
-                                })
-                            else:
-                                full_hash_map[full_hash] = file
-                    except Exception as e:
-                        logging.error(f"Error verifying duplicate {file}: {e}")
+    STAGES = {
+        'quick': "Checking file sizes and headers",
+        'content': "Hashing contents",
+        'models': "Comparing models across archives",
+    }
 
+    def on_progress(self, stage: str, done: int, total: int):
+        self.progress_label.setText(f"{self.STAGES.get(stage, stage)}... {done:,} of {total:,}")
+        self.progress_bar.setMaximum(total)
+        self.progress_bar.setValue(done)
+
+    def on_completed(self, duplicates: list):
+        self.duplicates = duplicates
+        self.progress_bar.hide()
         self.update_table()
-        self.progress_label.setText(f"Found {len(self.duplicates)} duplicate pairs")
-        
-    except Exception as e:
-        logging.error(f"Error in duplicate detection: {e}")
-        QMessageBox.warning(self, "Error", f"Error detecting duplicates: {str(e)}")
+        shared = sum(1 for d in self.duplicates if d['shared_model'])
+        self.progress_label.setText(
+            f"Found {len(self.duplicates) - shared} duplicate pairs "
+            f"and {shared} shared models"
+        )
+
+    def on_failed(self, error: str):
+        self.progress_bar.hide()
+        self.progress_label.setText(f"Duplicate detection failed: {error}")
+        QMessageBox.warning(self, "Error", f"Error detecting duplicates: {error}")
+
+    def _stop_worker(self):
+        if self.worker.isRunning():
+            self.worker.cancel()
+            self.worker.wait()
+
+    def accept(self):
+        self._stop_worker()
+        super().accept()
+
+    def reject(self):
+        self._stop_worker()
+        super().reject()
+
     def update_table(self):
         """Update the table with found duplicates"""
         self.table.setRowCount(len(self.duplicates))
-        
+
         for row, duplicate in enumerate(self.duplicates):
             # File 1
             self.table.setItem(row, 0, QTableWidgetItem(duplicate['file1'].name))
-            
+
             # File 2
             self.table.setItem(row, 1, QTableWidgetItem(duplicate['file2'].name))
-            
+
             # Match type
             self.table.setItem(row, 2, QTableWidgetItem(duplicate['match_type']))
-            
-            # Action combo box
+
+            # Action combo box; archives that only share a model are not dupes
             action_combo = QComboBox()
-            action_combo.addItems([
-                "Keep Both",
-                "Mark Newer as DUPE",
-                "Mark Older as DUPE",
-                "Delete Newer",
-                "Delete Older"
-            ])
+            if duplicate['shared_model']:
+                action_combo.addItems(["Keep Both"])
+            else:
+                action_combo.addItems([
+                    "Keep Both",
+                    "Mark Newer as DUPE",
+                    "Mark Older as DUPE",
+                    "Delete Newer",
+                    "Delete Older"
+                ])
             self.table.setCellWidget(row, 3, action_combo)
-            
+
             # Status
             self.table.setItem(row, 4, QTableWidgetItem("Pending"))
 
@@ -172,4 +173,5 @@ def find_duplicates(self):
     def mark_all_dupes(self):
         """Set all actions to Mark Newer as DUPE"""
         for row in range(self.table.rowCount()):
-            self.table.cellWidget(row, 3).setCurrentText("Mark Newer as DUPE")
\ No newline at end of file
+            if not self.duplicates[row]['shared_model']:
+                self.table.cellWidget(row, 3).setCurrentText("Mark Newer as DUPE")
\ No newline at end of file
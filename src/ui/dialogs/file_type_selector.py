@@ -8,13 +8,14 @@ from PySide6.QtWidgets import (
     QLabel
 )
 from pathlib import Path
-from collections import defaultdict
+from src.core.directory_scanner import DirectoryScanner, ScanResult
 from .base_dialog import BaseDialog
 
 class FileTypeSelector(BaseDialog):
-    def __init__(self, directory: Path, parent=None):
+    def __init__(self, directory: Path, parent=None, scan_result: ScanResult = None):
         super().__init__(parent)
         self.directory = directory
+        self.scan_result = scan_result
         self.selected_types = set()
         self.setup_ui()
 
@@ -62,13 +63,9 @@ class FileTypeSelector(BaseDialog):
 
     def _scan_directory(self):
         """Scan directory for file extensions and their counts"""
-        extensions = defaultdict(int)
-        for file in self.directory.rglob("*"):
-            if file.is_file():
-                ext = file.suffix.lower()
-                if ext:
-                    extensions[ext] += 1
-        return extensions
+        if self.scan_result is None:
+            self.scan_result = DirectoryScanner().scan(self.directory)
+        return self.scan_result.counts()
 
     def select_all(self):
         for cb in self.checkboxes.values():
@@ -11,7 +11,8 @@ from PySide6.QtWidgets import (
     QComboBox,
     QLineEdit,
     QLabel,
-    QFileDialog
+    QFileDialog,
+    QSpinBox
 )
 from src.core.settings_manager import Settings
 from .base_dialog import BaseDialog
@@ -35,6 +36,7 @@ class PreferencesDialog(BaseDialog):
         tab_widget.addTab(self._create_files_tab(), "Files")
         tab_widget.addTab(self._create_naming_tab(), "Naming")
         tab_widget.addTab(self._create_tags_tab(), "Tags")
+        tab_widget.addTab(self._create_diagnostics_tab(), "Diagnostics")
         
         layout.addWidget(tab_widget)
 
@@ -107,6 +109,30 @@ class PreferencesDialog(BaseDialog):
         )
         layout.addRow("Backup Original Files:", self.backup_originals)
 
+        # Directory scan threads (useful on network shares)
+        self.scan_workers = QSpinBox()
+        self.scan_workers.setRange(1, 32)
+        self.scan_workers.setValue(
+            self.settings.get("files", "scan_workers", 1)
+        )
+        layout.addRow("Directory Scan Threads:", self.scan_workers)
+
+        # Model thumbnails
+        self.thumbnail_cache_mb = QSpinBox()
+        self.thumbnail_cache_mb.setRange(16, 16384)
+        self.thumbnail_cache_mb.setSuffix(" MB")
+        self.thumbnail_cache_mb.setValue(
+            self.settings.get("thumbnails", "cache_mb", 256)
+        )
+        layout.addRow("Thumbnail Cache Size:", self.thumbnail_cache_mb)
+
+        self.thumbnail_workers = QSpinBox()
+        self.thumbnail_workers.setRange(1, 32)
+        self.thumbnail_workers.setValue(
+            self.settings.get("thumbnails", "workers", 2)
+        )
+        layout.addRow("Thumbnail Render Processes:", self.thumbnail_workers)
+
         return widget
 
     def _create_naming_tab(self):
@@ -140,6 +166,27 @@ class PreferencesDialog(BaseDialog):
         )
         layout.addRow("Default Category:", self.default_category)
 
+        # Name conflict resolution
+        self.conflict_strategy = QComboBox()
+        self.conflict_strategy.addItems(["counter", "hash", "skip"])
+        self.conflict_strategy.setCurrentText(
+            self.settings.get("naming", "conflict_strategy", "counter")
+        )
+        layout.addRow("Resolve Name Conflicts By:", self.conflict_strategy)
+
+        # Shared rule pack, merged between the defaults and the user's rules
+        self.shop_pack = QLineEdit(
+            self.settings.get("rules", "shop_pack", "")
+        )
+        self.shop_pack.setPlaceholderText("JSON file or folder (optional)")
+        browse_btn = QPushButton("Browse")
+        browse_btn.clicked.connect(self._browse_shop_pack)
+
+        pack_layout = QHBoxLayout()
+        pack_layout.addWidget(self.shop_pack)
+        pack_layout.addWidget(browse_btn)
+        layout.addRow("Shop Rule Pack:", pack_layout)
+
         return widget
 
     def _create_tags_tab(self):
@@ -169,6 +216,30 @@ class PreferencesDialog(BaseDialog):
 
         return widget
 
+    def _create_diagnostics_tab(self):
+        widget = QWidget()
+        layout = QFormLayout(widget)
+
+        # Stage timings shown in Edit > Diagnostics
+        self.instrumentation = QCheckBox()
+        self.instrumentation.setChecked(
+            self.settings.get("diagnostics", "instrumentation", False)
+        )
+        layout.addRow("Collect Stage Timings:", self.instrumentation)
+
+        # cProfile/tracemalloc capture of every scan, saved to the logs folder
+        self.profile_scans = QCheckBox()
+        self.profile_scans.setChecked(
+            self.settings.get("diagnostics", "profile_scans", False)
+        )
+        self.profile_scans.setToolTip(
+            "Profiles each scan's hashing and analysis (much slower) and "
+            "saves the report next to the log files"
+        )
+        layout.addRow("Profile Scans:", self.profile_scans)
+
+        return widget
+
     def _browse_directory(self):
         directory = QFileDialog.getExistingDirectory(
             self,
@@ -178,6 +249,15 @@ class PreferencesDialog(BaseDialog):
         if directory:
             self.default_dir.setText(directory)
 
+    def _browse_shop_pack(self):
+        directory = QFileDialog.getExistingDirectory(
+            self,
+            "Select Shop Rule Pack Folder",
+            self.shop_pack.text()
+        )
+        if directory:
+            self.shop_pack.setText(directory)
+
     def save_preferences(self):
         # Save General settings
         self.settings.set("general", "default_directory", self.default_dir.text())
@@ -193,6 +273,12 @@ class PreferencesDialog(BaseDialog):
                          self.ignore_patterns.text().split())
         self.settings.set("files", "backup_originals", 
                          self.backup_originals.isChecked())
+        self.settings.set("files", "scan_workers", 
+                         self.scan_workers.value())
+        self.settings.set("thumbnails", "cache_mb",
+                         self.thumbnail_cache_mb.value())
+        self.settings.set("thumbnails", "workers",
+                         self.thumbnail_workers.value())
 
         # Save Naming settings
         self.settings.set("naming", "auto_capitalize", 
@@ -203,6 +289,10 @@ class PreferencesDialog(BaseDialog):
                          self.add_category.isChecked())
         self.settings.set("naming", "default_category", 
                          self.default_category.text())
+        self.settings.set("naming", "conflict_strategy", 
+                         self.conflict_strategy.currentText())
+        self.settings.set("rules", "shop_pack",
+                         self.shop_pack.text().strip())
 
         # Save Tags settings
         self.settings.set("tags", "auto_suggest_tags", 
@@ -212,4 +302,10 @@ class PreferencesDialog(BaseDialog):
         self.settings.set("tags", "tag_separator", 
                          self.tag_separator.text())
 
+        # Save Diagnostics settings
+        self.settings.set("diagnostics", "instrumentation",
+                         self.instrumentation.isChecked())
+        self.settings.set("diagnostics", "profile_scans",
+                         self.profile_scans.isChecked())
+
         self.accept()
\ No newline at end of file
@@ -0,0 +1,108 @@
+from PySide6.QtWidgets import (
+    QVBoxLayout,
+    QHBoxLayout,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QAbstractItemView,
+    QMessageBox
+)
+from PySide6.QtCore import Signal
+import logging
+from src.core.rename_history import RenameHistory
+from .base_dialog import BaseDialog
+
+class RenameHistoryDialog(BaseDialog):
+    """Browse rename batches page by page and undo/redo them"""
+
+    PAGE_SIZE = 100
+
+    # (engine result, True for undo / False for redo)
+    history_changed = Signal(dict, bool)
+
+    def __init__(self, history: RenameHistory, parent=None):
+        super().__init__(parent)
+        self.history = history
+        self.batches = []
+        self.setWindowTitle("Rename History")
+        self.setMinimumSize(700, 400)
+        self.setup_ui()
+        self.load_more()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.table = QTableWidget()
+        self.table.setColumnCount(5)
+        self.table.setHorizontalHeaderLabels([
+            "Batch", "Date", "Description", "Files", "Status"
+        ])
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.table)
+
+        button_layout = QHBoxLayout()
+
+        self.load_more_btn = QPushButton("Load More")
+        self.load_more_btn.clicked.connect(self.load_more)
+        button_layout.addWidget(self.load_more_btn)
+
+        button_layout.addStretch()
+
+        undo_btn = QPushButton("Undo Selected")
+        undo_btn.clicked.connect(lambda: self.run_selected(undo=True))
+        button_layout.addWidget(undo_btn)
+
+        redo_btn = QPushButton("Redo Selected")
+        redo_btn.clicked.connect(lambda: self.run_selected(undo=False))
+        button_layout.addWidget(redo_btn)
+
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.accept)
+        button_layout.addWidget(close_btn)
+
+        layout.addLayout(button_layout)
+
+    def load_more(self):
+        before_id = self.batches[-1]['id'] if self.batches else None
+        page = self.history.batches(self.PAGE_SIZE, before_id)
+        self.batches.extend(page)
+        self.load_more_btn.setEnabled(len(page) == self.PAGE_SIZE)
+
+        self.table.setRowCount(len(self.batches))
+        for row in range(len(self.batches) - len(page), len(self.batches)):
+            self._fill_row(row)
+
+    def _fill_row(self, row: int):
+        batch = self.batches[row]
+        created = batch['created'].strftime("%Y-%m-%d %H:%M") if batch['created'] else ""
+        values = [
+            str(batch['id']), created, batch['description'] or "",
+            str(batch['entry_count']), batch['status']
+        ]
+        for col, value in enumerate(values):
+            self.table.setItem(row, col, QTableWidgetItem(value))
+
+    def run_selected(self, undo: bool):
+        row = self.table.currentRow()
+        if row < 0:
+            return
+        batch = self.batches[row]
+        try:
+            if undo:
+                result = self.history.undo(batch['id'])
+            else:
+                result = self.history.redo(batch['id'])
+        except ValueError as e:
+            QMessageBox.warning(self, "Rename History", str(e))
+            return
+        except Exception as e:
+            logging.error(f"History operation on batch {batch['id']} failed: {e}")
+            QMessageBox.warning(self, "Rename History", f"Operation failed: {str(e)}")
+            return
+
+        self.batches[row] = self.history.db.get_rename_batch(batch['id'])
+        self._fill_row(row)
+        self.history_changed.emit(result, undo)
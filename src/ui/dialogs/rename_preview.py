@@ -0,0 +1,168 @@
+from PySide6.QtWidgets import (
+    QVBoxLayout,
+    QHBoxLayout,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QAbstractItemView,
+    QCheckBox,
+    QLabel,
+    QProgressBar,
+    QFileDialog,
+    QMessageBox
+)
+from PySide6.QtGui import QColor
+from pathlib import Path
+import logging
+from src.core.dry_run import DryRunPlanner, format_diff, format_summary
+from src.core.rename_planner import RenamePlanner
+from ..workers import DryRunWorker
+from .base_dialog import BaseDialog
+
+class RenamePreviewDialog(BaseDialog):
+    """Dry run of a whole library: old -> new names, nothing is renamed"""
+
+    STAGES = {"names": "Analyzing names", "content": "Reading archive listings"}
+
+    def __init__(self, planner: DryRunPlanner, root: Path, parent=None):
+        super().__init__(parent)
+        self.planner = planner
+        self.root = root
+        self.result = None
+        self.worker = None
+        self.setWindowTitle(f"Rename Preview - {root}")
+        self.setMinimumSize(900, 600)
+        self.setup_ui()
+        self.start_plan()
+
+    def start_plan(self):
+        self.save_btn.setEnabled(False)
+        self.read_btn.setEnabled(False)
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.show()
+        self.worker = DryRunWorker(self.planner, self.root, self)
+        self.worker.progress.connect(self.on_progress)
+        self.worker.completed.connect(self.on_completed)
+        self.worker.failed.connect(self.on_failed)
+        self.worker.start()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.summary_label = QLabel("Scanning library...")
+        self.summary_label.setWordWrap(True)
+        layout.addWidget(self.summary_label)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 0)
+        layout.addWidget(self.progress_bar)
+
+        self.table = QTableWidget()
+        self.table.setColumnCount(4)
+        self.table.setHorizontalHeaderLabels([
+            "Folder", "Current Name", "Suggested Name", "Notes"
+        ])
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.table)
+
+        button_layout = QHBoxLayout()
+
+        self.show_unchanged = QCheckBox("Show unchanged files")
+        self.show_unchanged.toggled.connect(self.fill_table)
+        button_layout.addWidget(self.show_unchanged)
+
+        button_layout.addStretch()
+
+        self.read_btn = QPushButton("Read Archive Listings")
+        self.read_btn.setToolTip(
+            "Open the archives whose content tags are still unknown and plan again"
+        )
+        self.read_btn.clicked.connect(self.read_listings)
+        button_layout.addWidget(self.read_btn)
+
+        self.save_btn = QPushButton("Save Diff...")
+        self.save_btn.setEnabled(False)
+        self.save_btn.clicked.connect(self.save_diff)
+        button_layout.addWidget(self.save_btn)
+
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.reject)
+        button_layout.addWidget(close_btn)
+
+        layout.addLayout(button_layout)
+
+    def on_progress(self, stage: str, done: int, total: int):
+        self.summary_label.setText(f"{self.STAGES.get(stage, stage)}... {done:,} of {total:,}")
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(done)
+
+    def on_completed(self, result: dict):
+        self.result = result
+        self.progress_bar.hide()
+        self.summary_label.setText(format_summary(result))
+        self.save_btn.setEnabled(True)
+        self.read_btn.setEnabled(
+            self.planner.content != 'auto' and result['stats']['unread'] > 0
+        )
+        self.fill_table()
+
+    def read_listings(self):
+        """Plan again, reading listings; names come from the plan cache"""
+        self.planner.content = 'auto'
+        self.start_plan()
+
+    def on_failed(self, error: str):
+        self.progress_bar.hide()
+        self.summary_label.setText(f"Dry run failed: {error}")
+
+    def fill_table(self):
+        if not self.result:
+            return
+        rows = self.result['rows']
+        if not self.show_unchanged.isChecked():
+            rows = [row for row in rows if row['changed']]
+        notes = {
+            conflict['source']: f"conflict with {'another row' if conflict['kind'] == 'batch' else 'existing file'}"
+            for conflict in self.result['conflicts']
+        }
+
+        self.table.setUpdatesEnabled(False)
+        self.table.setRowCount(len(rows))
+        for index, row in enumerate(rows):
+            source = row['source']
+            folder = source.parent.relative_to(self.root) if source.parent != self.root else Path('.')
+            note = notes.get(source, "")
+            if row['content'] == 'unread':
+                note = "; ".join(filter(None, [note, "content not read"]))
+            values = [str(folder), source.name, row['target'].name, note]
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if col == 2 and not row['changed']:
+                    item.setForeground(QColor("gray"))
+                self.table.setItem(index, col, item)
+        self.table.setUpdatesEnabled(True)
+        self.table.resizeColumnsToContents()
+
+    def save_diff(self):
+        filename, _ = QFileDialog.getSaveFileName(
+            self, "Save Rename Preview", "rename_preview.txt", "Text Files (*.txt)"
+        )
+        if not filename:
+            return
+        try:
+            with open(filename, "w", encoding="utf-8") as f:
+                f.write(format_diff(self.result, changed_only=not self.show_unchanged.isChecked()))
+                if self.result['conflicts']:
+                    f.write("\n\n" + RenamePlanner.format_report(self.result['conflicts']))
+                f.write("\n\n" + format_summary(self.result) + "\n")
+        except OSError as e:
+            logging.error(f"Could not save rename preview to {filename}: {e}")
+            QMessageBox.warning(self, "Rename Preview", f"Could not save: {e}")
+
+    def reject(self):
+        if self.worker and self.worker.isRunning():
+            self.worker.cancel()
+            self.worker.wait()
+        super().reject()
@@ -0,0 +1,157 @@
+from PySide6.QtCore import QObject, QFileSystemWatcher, QTimer, Signal
+from pathlib import Path
+from typing import List
+import logging
+import os
+
+from ..core.directory_watcher import ChangeDetector
+from .workers import ChangeResolveWorker
+
+
+class LibraryWatcher(QObject):
+    """Watch library folders and emit archives that need analysis.
+
+    Directory notifications come from QFileSystemWatcher (inotify on Linux).
+    Folders the native watcher refuses, or every folder when polling is
+    forced, are rescanned on a timer instead. Notifications only mark
+    folders dirty; the actual rescan runs after a debounce delay so a burst
+    of partial writes results in a single pass. The rescan itself only
+    stats files; telling a moved archive from a new one by its stored hash
+    happens in a ChangeResolveWorker.
+    """
+
+    files_ready = Signal(list)
+    files_moved = Signal(list)
+
+    def __init__(self, detector: ChangeDetector, poll_interval: float = 10.0,
+                 force_polling: bool = False, parent=None):
+        super().__init__(parent)
+        self.detector = detector
+        self.force_polling = force_polling
+        self.polled_folders = set()
+        self.dirty_folders = set()
+        self.resolvers = set()
+
+        self.fs_watcher = QFileSystemWatcher(self)
+        self.fs_watcher.directoryChanged.connect(self._on_directory_changed)
+
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(int(detector.debounce_seconds * 1000))
+        self.debounce_timer.timeout.connect(self._process_changes)
+
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(int(poll_interval * 1000))
+        self.poll_timer.timeout.connect(self._poll)
+
+    @property
+    def folders(self) -> List[Path]:
+        return list(self.detector.folders)
+
+    def watch(self, folder: Path):
+        folder = Path(folder)
+        if folder in self.detector.folders:
+            return
+        self.detector.add_folder(folder)
+
+        if self.force_polling:
+            self._use_polling(folder)
+            return
+
+        directories = [str(folder)]
+        for root, dirs, _ in os.walk(folder):
+            directories.extend(os.path.join(root, d) for d in dirs)
+        failed = self.fs_watcher.addPaths(directories)
+        if failed:
+            logging.warning(
+                f"Native watcher rejected {len(failed)} directories under "
+                f"{folder}; falling back to polling"
+            )
+            self.fs_watcher.removePaths([d for d in directories if d not in failed])
+            self._use_polling(folder)
+        else:
+            logging.info(f"Watching {folder} ({len(directories)} directories)")
+
+    def unwatch(self, folder: Path):
+        folder = Path(folder)
+        watched = [
+            d for d in self.fs_watcher.directories()
+            if Path(d) == folder or folder in Path(d).parents
+        ]
+        if watched:
+            self.fs_watcher.removePaths(watched)
+        self.polled_folders.discard(folder)
+        self.dirty_folders.discard(folder)
+        if not self.polled_folders:
+            self.poll_timer.stop()
+        self.detector.remove_folder(folder)
+
+    def stop(self):
+        for folder in self.folders:
+            self.unwatch(folder)
+        self.debounce_timer.stop()
+        # Results for folders no longer watched are dropped
+        for worker in list(self.resolvers):
+            worker.completed.disconnect(self._emit_changes)
+            worker.wait()
+
+    def _use_polling(self, folder: Path):
+        self.polled_folders.add(folder)
+        if not self.poll_timer.isActive():
+            self.poll_timer.start()
+        logging.info(f"Polling {folder} every {self.poll_timer.interval() // 1000}s")
+
+    def _owning_folder(self, directory: Path):
+        for folder in self.detector.folders:
+            if directory == folder or folder in directory.parents:
+                return folder
+        return None
+
+    def _on_directory_changed(self, directory: str):
+        directory = Path(directory)
+        folder = self._owning_folder(directory)
+        if folder is None:
+            return
+        # New subdirectories need their own native watch
+        if directory.is_dir():
+            known = set(self.fs_watcher.directories())
+            new_dirs = [
+                entry.path for entry in os.scandir(directory)
+                if entry.is_dir(follow_symlinks=False) and entry.path not in known
+            ]
+            if new_dirs:
+                self.fs_watcher.addPaths(new_dirs)
+        self.dirty_folders.add(folder)
+        self.debounce_timer.start()
+
+    def _poll(self):
+        self.dirty_folders.update(self.polled_folders)
+        self._process_changes()
+
+    def _process_changes(self):
+        folders = list(self.dirty_folders)
+        self.dirty_folders.clear()
+        changes = self.detector.scan(folders)
+
+        # Anything still settling needs another look once the debounce expires
+        if self.detector.has_pending:
+            self.dirty_folders.update(folders)
+            self.debounce_timer.start()
+
+        if self.detector.db is not None and (changes['moved'] or changes['unresolved']):
+            worker = ChangeResolveWorker(self.detector, changes, self)
+            worker.completed.connect(self._emit_changes)
+            worker.finished.connect(lambda: self.resolvers.discard(worker))
+            worker.finished.connect(worker.deleteLater)
+            self.resolvers.add(worker)
+            worker.start()
+        else:
+            self._emit_changes(changes)
+
+    def _emit_changes(self, changes: dict):
+        if changes['moved']:
+            self.files_moved.emit(changes['moved'])
+        ready = changes['new'] + changes['changed']
+        if ready:
+            logging.info(f"Watcher queued {len(ready)} archives for analysis")
+            self.files_ready.emit(ready)
@@ -12,43 +12,105 @@ from PySide6.QtWidgets import (
     QMessageBox,
     QMenu,
     QHeaderView,
-    QSizePolicy
+    QSizePolicy,
+    QProgressDialog,
+    QLabel,
+    QLineEdit
 )
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer
 from datetime import datetime
 from typing import List, Dict
 from pathlib import Path
 import json
-import csv
 import logging
+import multiprocessing
+from time import perf_counter
+from concurrent.futures import ProcessPoolExecutor
 
-from ..database.models import File
 from ..database.database import DatabaseManager
 from ..core.file_hasher import FileHasher
 from ..core.archive_analyzer import ArchiveAnalyzer
 from ..core.settings_manager import Settings
 from ..core.rules_manager import RulesManager
 from ..core.name_analyzer import NameAnalyzer
+from ..core.directory_scanner import DirectoryScanner
+from ..core.dry_run import DryRunPlanner
+from ..core.rename_engine import RenameEngine
+from ..core.job_queue import JobQueue
+from ..core.scan_pipeline import ScanPipeline
+from ..core.rename_planner import RenamePlanner
+from ..core.rename_history import RenameHistory
+from ..core.directory_watcher import ChangeDetector
+from ..core.catalog_exporter import CatalogExporter
+from ..core.columnar_exporter import ColumnarExporter
+from .library_watcher import LibraryWatcher
+from .rules_watcher import RulesWatcher
+from ..core.thumbnail_cache import ThumbnailCache
+from ..core.thumbnail_renderer import ThumbnailRenderer
+from ..utils.instrumentation import metrics, timed
+from ..utils.logging_config import LogConfig
+from ..utils.profiling import ScanProfiler
+from .workers import ExportWorker, JobWorker
 from .dialogs.file_type_selector import FileTypeSelector
 from .dialogs.archive_preview import ArchivePreviewDialog
 from .dialogs.duplicate_handler import DuplicateHandlerDialog
 from .dialogs.preferences_dialog import PreferencesDialog
+from .dialogs.rename_history import RenameHistoryDialog
+from .dialogs.rename_preview import RenamePreviewDialog
+from .dialogs.diagnostics_dialog import DiagnosticsDialog
 from .widgets.tag_editor import TagEditor
 
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.settings = Settings()
-        self.rules_manager = RulesManager()
+        if self.settings.get("diagnostics", "instrumentation", False):
+            metrics.enable()
+        self.rules_manager = RulesManager.from_settings(self.settings)
         self.name_analyzer = NameAnalyzer(self.rules_manager)
         self.setWindowTitle("3D Print File Renamer")
         self.setMinimumSize(1200, 600)
         self.db = DatabaseManager()
-        self.analyzer = ArchiveAnalyzer()
+        self.analyzer = ArchiveAnalyzer(self.rules_manager)
+        self.rename_engine = RenameEngine(self.db)
+        self.rename_history = RenameHistory(self.db, self.rename_engine)
+        self.job_queue = JobQueue(
+            self.db,
+            lease_seconds=self.settings.get("jobs", "lease_seconds", 120),
+            max_attempts=self.settings.get("jobs", "max_attempts", 5)
+        )
+        self.scan_pipeline = ScanPipeline(
+            self.db, self.job_queue, self.analyzer, self.rename_engine,
+            batch_size=self.settings.get("jobs", "batch_size", 32),
+            name_formatter=self._format_name
+        )
+        self.job_worker = None
+        self.scan_run = None
+        # Row of each file the current scan is still working on
+        self.scan_rows: Dict[Path, int] = {}
+        # Conflicts resolved for the Apply All batch waiting in the queue
+        self.pending_conflicts: List[Dict] = []
         self.files_to_rename = []
+        self.file_ids: Dict[Path, int] = {}
+        # Archive analysis per loaded file, so rule changes only redo the name stage
+        self.analyses: Dict[Path, Dict] = {}
+        self.thumbnail_renderer = ThumbnailRenderer(
+            size=self.settings.get("thumbnails", "size", 256)
+        )
+        self.thumbnail_cache = ThumbnailCache(
+            self.settings.data_directory / "thumbnails",
+            max_bytes=self.settings.get("thumbnails", "cache_mb", 256) * 1024 * 1024
+        )
+        self.thumbnail_executor = None
+        self.setup_watcher()
+        self.setup_rules_watcher()
         self.setup_menu()
         self.setup_ui()
         self.load_window_state()
+        self.restore_watched_folders()
+        self.check_interrupted_renames()
+        self.resume_scan()
 
     def setup_menu(self):
         menubar = self.menuBar()
@@ -64,6 +126,12 @@ class MainWindow(QMainWindow):
         
         export_json = export_menu.addAction("Export to JSON")
         export_json.triggered.connect(lambda: self.export_data("json"))
+
+        export_jsonl = export_menu.addAction("Export to JSON Lines")
+        export_jsonl.triggered.connect(lambda: self.export_data("jsonl"))
+
+        export_columnar = export_menu.addAction("Export Catalog for Analytics...")
+        export_columnar.triggered.connect(self.export_columnar)
         
         file_menu.addMenu(export_menu)
         
@@ -75,8 +143,41 @@ class MainWindow(QMainWindow):
         export_rules = file_menu.addAction("Export Rename Rules")
         export_rules.triggered.connect(self.export_rules)
 
+        file_menu.addSeparator()
+
+        # Watch mode
+        watch_action = file_menu.addAction("Watch Folder...")
+        watch_action.triggered.connect(self.watch_folder)
+
+        stop_watch_action = file_menu.addAction("Stop Watching All Folders")
+        stop_watch_action.triggered.connect(self.stop_watching)
+
+        file_menu.addSeparator()
+
+        preview_action = file_menu.addAction("Preview Library Rename...")
+        preview_action.triggered.connect(self.preview_library_rename)
+
         # Add Edit menu
         edit_menu = menubar.addMenu("Edit")
+
+        undo_action = edit_menu.addAction("Undo Rename Batch")
+        undo_action.setShortcut("Ctrl+Z")
+        undo_action.triggered.connect(self.undo_rename_batch)
+
+        redo_action = edit_menu.addAction("Redo Rename Batch")
+        redo_action.setShortcut("Ctrl+Y")
+        redo_action.triggered.connect(self.redo_rename_batch)
+
+        history_action = edit_menu.addAction("Rename History...")
+        history_action.triggered.connect(self.show_rename_history)
+
+        duplicates_action = edit_menu.addAction("Find Duplicates and Shared Models...")
+        duplicates_action.triggered.connect(self.find_duplicates)
+
+        diagnostics_action = edit_menu.addAction("Diagnostics...")
+        diagnostics_action.triggered.connect(self.show_diagnostics)
+
+        edit_menu.addSeparator()
         preferences_action = edit_menu.addAction("Preferences")
         preferences_action.triggered.connect(self.show_preferences)
 
@@ -102,9 +203,35 @@ class MainWindow(QMainWindow):
         self.apply_all_btn = QPushButton("Apply All")
         self.apply_all_btn.clicked.connect(self.apply_all_changes)
         button_layout.addWidget(self.apply_all_btn)
+
+        button_layout.addStretch()
+
+        # Catalog search; runs shortly after typing stops
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText("Search catalog: names, tags, files inside archives")
+        self.search_box.setClearButtonEnabled(True)
+        self.search_box.setMinimumWidth(320)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(250)
+        self.search_timer.timeout.connect(self.run_search)
+        self.search_box.textChanged.connect(self.search_timer.start)
+        self.search_box.returnPressed.connect(self.run_search)
+        button_layout.addWidget(self.search_box)
         
         layout.addLayout(button_layout)
 
+        self.search_results = QTableWidget()
+        self.search_results.setColumnCount(3)
+        self.search_results.setHorizontalHeaderLabels(["Archive", "Location", "Matching Files"])
+        self.search_results.horizontalHeader().setStretchLastSection(True)
+        self.search_results.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.search_results.setSelectionBehavior(QTableWidget.SelectRows)
+        self.search_results.setMaximumHeight(200)
+        self.search_results.cellDoubleClicked.connect(self.open_search_result)
+        self.search_results.hide()
+        layout.addWidget(self.search_results)
+
         # Add tag editor
         self.tag_editor = TagEditor()
         layout.addWidget(self.tag_editor)
@@ -140,20 +267,28 @@ class MainWindow(QMainWindow):
         
         layout.addWidget(self.file_table)
 
+        self.jobs_label = QLabel()
+        self.statusBar().addPermanentWidget(self.jobs_label)
+
     def select_directory(self):
         dir_path = QFileDialog.getExistingDirectory(self, "Select Directory")
         if dir_path:
             dir_path = Path(dir_path)
             
+            # Walk the tree once; the same index feeds the counts and the load
+            scanner = DirectoryScanner(
+                ignore_patterns=self.settings.get("files", "ignore_patterns"),
+                max_workers=self.settings.get("files", "scan_workers", 1)
+            )
+            scan_result = scanner.scan(dir_path)
+
             # Show file type selector
-            selector = FileTypeSelector(dir_path, self)
+            selector = FileTypeSelector(dir_path, self, scan_result=scan_result)
             if selector.exec():
                 selected_types = selector.get_selected_types()
                 if selected_types:
                     # Get files of selected types
-                    files = []
-                    for ext in selected_types:
-                        files.extend(dir_path.glob(f"*{ext}"))
+                    files = scan_result.files(selected_types)
                     
                     if files:
                         self.load_files(files)
@@ -177,6 +312,7 @@ class MainWindow(QMainWindow):
     def load_files(self, input_files: List[Path]):
         """Load files with proper hash calculation and duplicate detection"""
         logging.info(f"Loading {len(input_files)} files")
+        metrics.reset()
         
         # Process files for duplicates
         file_hashes: Dict[str, Path] = {}
@@ -200,49 +336,209 @@ class MainWindow(QMainWindow):
 
         # Handle duplicates if found
         if duplicates:
-            duplicate_handler = DuplicateHandlerDialog(duplicates, self)
+            involved = sorted({file for pair in duplicates for file in pair})
+            duplicate_handler = DuplicateHandlerDialog(involved, self)
             duplicate_handler.exec()
 
         # Update the file list and table
         self.files_to_rename = files_to_process
-        self.file_table.setRowCount(len(self.files_to_rename))
-        
-        # Process each file
-        for row, filepath in enumerate(self.files_to_rename):
-            self._add_file_to_table(row, filepath)
+        self.start_scan(self.files_to_rename)
+        metrics.count('scan.files', len(self.files_to_rename))
 
-    def _add_file_to_table(self, row: int, filepath: Path):
-        """Add a single file to the table"""
-        try:
-            # Calculate hashes
-            quick_hash = FileHasher.get_quick_hash(filepath)
-            content_hash = FileHasher.get_content_hash(filepath)
-            
-            # Store in database
-            file_record = self.db.add_file(
-                filepath,
-                quick_hash=quick_hash,
-                content_hash=content_hash
-            )
-            
-            # Add to table
+    def start_scan(self, files: List[Path]):
+        """Queue hashing and analysis of the loaded files.
+
+        The work is kept in the database job queue and done by a
+        JobWorker, so the window stays responsive and a scan cut short by
+        a crash or by closing the app can be resumed on the next start.
+        """
+        if self.scan_run is not None:
+            self.job_queue.cancel_run(self.scan_run)
+        self.scan_run = self.job_queue.new_run()
+        self.job_queue.enqueue('hash', ({'path': f} for f in files), self.scan_run)
+        self._show_scan(files)
+        self.start_job_worker()
+
+    def resume_scan(self):
+        """Offer to finish a scan the last session left unfinished"""
+        self.job_queue.recover()
+        run_id = self.job_queue.unfinished_run()
+        if run_id is None:
+            return
+        hash_jobs = self.job_queue.run_jobs(run_id, 'hash')
+        reply = QMessageBox.question(
+            self, "Unfinished Scan",
+            f"A scan of {len(hash_jobs)} files did not finish last time. Resume it?",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        if reply != QMessageBox.Yes:
+            self.job_queue.cancel_run(run_id)
+            return
+
+        self.scan_run = run_id
+        self.files_to_rename = [Path(job['path']) for job in hash_jobs]
+        self._show_scan(self.files_to_rename)
+        for job in hash_jobs:
+            if job['status'] == 'failed':
+                self._on_job_failed(Path(job['path']), job['error'])
+        analyses = [
+            ({'path': job['path'], 'run_id': run_id}, job['result'])
+            for job in self.job_queue.run_jobs(run_id, 'analyze')
+            if job['status'] == 'done'
+        ]
+        self.on_jobs_done('analyze', analyses)
+        self.start_job_worker()
+
+    def _show_scan(self, files: List[Path]):
+        self.file_ids = {}
+        self.analyses = {}
+        self.scan_rows = {filepath: row for row, filepath in enumerate(files)}
+        self.file_table.setRowCount(len(files))
+        for row, filepath in enumerate(files):
             self.file_table.setItem(row, 0, QTableWidgetItem(filepath.name))
-            
-            # Generate and add suggested name
-            suggested_name = self.generate_new_name(filepath.name)
-            name_item = QTableWidgetItem(suggested_name)
-            name_item.setFlags(name_item.flags() | Qt.ItemIsEditable)
-            self.file_table.setItem(row, 1, name_item)
-            
-            # Create and add action buttons
-            self._create_action_buttons(row, filepath)
-            
-            # Set initial status
-            self.file_table.setItem(row, 3, QTableWidgetItem("Pending"))
-            
-        except Exception as e:
-            logging.error(f"Error adding file {filepath} to table: {e}")
-            self.file_table.setItem(row, 3, QTableWidgetItem(f"Error: {str(e)}"))
+            self.file_table.setItem(row, 1, QTableWidgetItem(""))
+            self.file_table.setItem(row, 3, QTableWidgetItem("Queued"))
+
+    def start_job_worker(self):
+        if self.job_worker is not None and self.job_worker.isRunning():
+            return
+        profiler = None
+        if ScanProfiler.requested(self.settings):
+            profiler = ScanProfiler(LogConfig.log_directory(), label="scan")
+        self.job_worker = JobWorker(self.scan_pipeline, self, profiler=profiler)
+        self.job_worker.batch_done.connect(self.on_jobs_done)
+        self.job_worker.jobs_failed.connect(self.on_jobs_failed)
+        self.job_worker.stats.connect(self.on_job_stats)
+        self.job_worker.start()
+
+    def on_jobs_done(self, stage: str, results: list):
+        if stage == 'rename':
+            for job, result in results:
+                self._on_rename_job_done(job, result)
+            return
+        for job, result in results:
+            if job['run_id'] != self.scan_run:
+                continue
+            filepath = Path(job['path'])
+            row = self.scan_rows.get(filepath)
+            if row is None:
+                continue
+            if stage == 'hash':
+                self.file_ids[filepath] = result['file_id']
+                self.file_table.item(row, 3).setText("Analyzing")
+            elif stage == 'analyze':
+                if result.get('file_id') is not None:
+                    self.file_ids[filepath] = result['file_id']
+                self.analyses[filepath] = result['analysis']
+                name_item = QTableWidgetItem(self.generate_new_name(filepath))
+                name_item.setFlags(name_item.flags() | Qt.ItemIsEditable)
+                self.file_table.setItem(row, 1, name_item)
+                self._create_action_buttons(row, filepath)
+                self.file_table.item(row, 3).setText("Pending")
+                del self.scan_rows[filepath]
+        if stage == 'analyze' and not self.scan_rows:
+            metrics.log_summary(f"Load of {len(self.files_to_rename)} files")
+
+    def on_jobs_failed(self, stage: str, failed: list):
+        for job, error in failed:
+            if stage == 'rename':
+                logging.error(f"Queued rename failed: {error}")
+                QMessageBox.warning(self, "Error", f"Batch rename failed: {error}")
+            elif job['run_id'] == self.scan_run:
+                self._on_job_failed(Path(job['path']), error)
+
+    def _on_job_failed(self, filepath: Path, error: str):
+        row = self.scan_rows.pop(filepath, None)
+        if row is not None:
+            self.file_table.item(row, 3).setText(f"Error: {error}")
+
+    def on_job_stats(self, stats: dict):
+        parts = []
+        for stage in ('hash', 'analyze', 'rename'):
+            counts = stats['counts'].get(stage, {})
+            waiting = counts.get('pending', 0) + counts.get('leased', 0)
+            rate = stats['throughput'].get(stage, 0.0)
+            if waiting or rate:
+                parts.append(f"{stage}: {waiting} queued, {rate:.1f}/s")
+        self.jobs_label.setText("  |  ".join(parts))
+
+    def run_search(self):
+        self.search_timer.stop()
+        query = self.search_box.text().strip()
+        results = self.db.search(query, limit=100) if query else []
+        self.search_results.setVisible(bool(query))
+        self.search_results.setRowCount(len(results))
+        for row, result in enumerate(results):
+            location = result['locations'][0] if result['locations'] else result['path']
+            name = Path(location).name
+            if result['tags']:
+                name += f"  [{', '.join(result['tags'])}]"
+            values = [name, str(Path(location).parent), ", ".join(result['members'])]
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                item.setData(Qt.UserRole, location)
+                item.setData(Qt.UserRole + 1, result['content_hash'])
+                self.search_results.setItem(row, col, item)
+        self.search_results.resizeColumnToContents(0)
+        if query:
+            self.statusBar().showMessage(f"{len(results)} archives match \"{query}\"", 5000)
+
+    def open_search_result(self, row: int, column: int):
+        item = self.search_results.item(row, 0)
+        path = Path(item.data(Qt.UserRole))
+        if not path.exists():
+            QMessageBox.information(self, "Search", f"{path} is no longer there")
+            return
+        dialog = ArchivePreviewDialog(
+            path, self,
+            content_hash=item.data(Qt.UserRole + 1),
+            analysis=self.analyses.get(path),
+            renderer=self.thumbnail_renderer,
+            cache=self.thumbnail_cache,
+            executor=self.thumbnail_pool(),
+            db=self.db,
+            analyzer=self.analyzer
+        )
+        dialog.exec()
+
+    def preview_library_rename(self):
+        """Dry run: suggested names for a whole folder tree, nothing is touched"""
+        dir_path = QFileDialog.getExistingDirectory(self, "Select Library to Preview")
+        if not dir_path:
+            return
+        planner = DryRunPlanner(self.name_analyzer, self.settings,
+                                cache_dir=self.settings.data_directory / "plan_cache")
+        dialog = RenamePreviewDialog(planner, Path(dir_path), self)
+        dialog.exec()
+
+    def find_duplicates(self):
+        """Check the loaded archives for identical files and shared models"""
+        if not self.files_to_rename:
+            QMessageBox.information(self, "Duplicates", "No files loaded")
+            return
+        dialog = DuplicateHandlerDialog(list(self.files_to_rename), self, db=self.db)
+        dialog.exec()
+
+    def append_files(self, input_files: List[Path]):
+        """Queue archives into the current scan, keeping the rows already
+        in the table; hashing and analysis happen in the job worker"""
+        if self.scan_run is None:
+            self.scan_run = self.job_queue.new_run()
+        for filepath in input_files:
+            if filepath in self.files_to_rename:
+                row = self.files_to_rename.index(filepath)
+                self.file_table.removeCellWidget(row, 2)
+            else:
+                self.files_to_rename.append(filepath)
+                row = len(self.files_to_rename) - 1
+                self.file_table.setRowCount(len(self.files_to_rename))
+            self.analyses.pop(filepath, None)
+            self.scan_rows[filepath] = row
+            self.file_table.setItem(row, 0, QTableWidgetItem(filepath.name))
+            self.file_table.setItem(row, 1, QTableWidgetItem(""))
+            self.file_table.setItem(row, 3, QTableWidgetItem("Queued"))
+        self.job_queue.enqueue('hash', ({'path': f} for f in input_files), self.scan_run)
+        self.start_job_worker()
 
     def _create_action_buttons(self, row: int, filepath: Path):
         """Create action buttons for a table row"""
@@ -270,18 +566,43 @@ class MainWindow(QMainWindow):
 
     def preview_file(self, row):
         filepath = self.files_to_rename[row]
-        dialog = ArchivePreviewDialog(filepath, self)
+        content_hash = None
+        if filepath in self.file_ids:
+            record = self.db.get_file(self.file_ids[filepath])
+            content_hash = record.content_hash if record else None
+        dialog = ArchivePreviewDialog(
+            filepath, self,
+            content_hash=content_hash,
+            analysis=self.analyses.get(filepath),
+            renderer=self.thumbnail_renderer,
+            cache=self.thumbnail_cache,
+            executor=self.thumbnail_pool(),
+            db=self.db,
+            analyzer=self.analyzer
+        )
         dialog.exec()
 
-    def generate_new_name(self, filename: str) -> str:
+    def thumbnail_pool(self) -> ProcessPoolExecutor:
+        """Process pool for thumbnail renders, started on first use"""
+        if self.thumbnail_executor is None:
+            # spawn, not fork: forking a process that runs a Qt event loop is unsafe
+            self.thumbnail_executor = ProcessPoolExecutor(
+                max_workers=self.settings.get("thumbnails", "workers", 2),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self.thumbnail_executor
+
+    @timed('names.generate_new_name')
+    def generate_new_name(self, filepath: Path) -> str:
         """Generate new name based on analysis"""
-        filepath = next((f for f in self.files_to_rename if f.name == filename), None)
-        if not filepath:
-            return f"MISC {filename}"
-            
-        analyzer = ArchiveAnalyzer()
-        analysis = analyzer.analyze_archive(filepath)
-        
+        analysis = self.analyses.get(filepath)
+        if analysis is None:
+            analysis = self.analyzer.analyze_archive(filepath)
+            self.analyses[filepath] = analysis
+        return self._format_name(filepath, analysis)
+
+    @staticmethod
+    def _format_name(filepath: Path, analysis: Dict) -> str:
         # Build new name
         category = analysis['suggested_category']
         base_name = filepath.stem
@@ -291,35 +612,97 @@ class MainWindow(QMainWindow):
         
         return f"{category} {base_name} {tags}".strip()
 
+    def _build_rename_plan(self, rows: List[int]) -> List[Dict]:
+        return [
+            {
+                'row': row,
+                'file_id': self.file_ids.get(self.files_to_rename[row]),
+                'source': self.files_to_rename[row],
+                'target': RenamePlanner.target_for(
+                    self.files_to_rename[row], self.file_table.item(row, 1).text()
+                )
+            }
+            for row in rows
+        ]
+
+    def _mark_renamed(self, row: int, new_path: Path):
+        self.analyses.pop(self.files_to_rename[row], None)
+        self.file_ids[new_path] = self.file_ids.pop(self.files_to_rename[row], None)
+        self.files_to_rename[row] = new_path
+        self.file_table.item(row, 3).setText("Renamed")
+        # Disable buttons after successful rename
+        actions_widget = self.file_table.cellWidget(row, 2)
+        for button in actions_widget.findChildren(QPushButton):
+            button.setEnabled(False)
+
+    def _prepare_rename_plan(self, plan: List[Dict]) -> Dict:
+        """Resolve conflicts and validate a plan, marking rejected rows.
+
+        Returns the entries that can be applied as 'valid', with the
+        validation 'errors' and the resolved 'conflicts'.
+        """
+        planner = RenamePlanner(
+            self.settings.get("naming", "conflict_strategy", "counter")
+        )
+        planned = planner.plan(plan)
+        for entry in planned['skipped']:
+            self.file_table.item(entry['row'], 3).setText("Skipped - Name conflict")
+        plan = planned['plan']
+        for entry in plan:
+            name_item = self.file_table.item(entry['row'], 1)
+            if entry['target'] != RenamePlanner.target_for(entry['source'], name_item.text()):
+                name_item.setText(entry['target'].stem)
+        if planned['conflicts']:
+            logging.info(
+                f"Resolved {len(planned['conflicts'])} name conflicts:\n"
+                + RenamePlanner.format_report(planned['conflicts'])
+            )
+
+        report = self.rename_engine.validate(plan)
+        for error in report['errors']:
+            self.file_table.item(error['row'], 3).setText(f"Error: {error['reason']}")
+        invalid_rows = {error['row'] for error in report['errors']}
+        valid = []
+        for entry in plan:
+            if entry['row'] in invalid_rows:
+                continue
+            if entry['source'] == entry['target']:
+                self.file_table.item(entry['row'], 3).setText("Unchanged")
+                continue
+            valid.append(entry)
+        return {'valid': valid, 'errors': report['errors'], 'conflicts': planned['conflicts']}
+
+    def _show_rename_result(self, valid: List[Dict], result: Dict):
+        """Update the rows of an executed plan from the engine's result"""
+        if result['status'] == 'applied':
+            for entry in valid:
+                self._mark_renamed(entry['row'], entry['target'])
+        else:
+            for error in result['errors']:
+                row = valid[error['seq']]['row']
+                self.file_table.item(row, 3).setText(f"Error: {error['error']}")
+
+    def _run_rename_plan(self, plan: List[Dict], description: str) -> Dict:
+        """Resolve conflicts, validate and apply a plan, updating the table"""
+        prepared = self._prepare_rename_plan(plan)
+        valid = prepared['valid']
+        if not valid:
+            return {'status': 'empty', 'renamed': [], 'errors': prepared['errors'],
+                    'conflicts': prepared['conflicts']}
+
+        result = self.rename_engine.execute(valid, description)
+        self._show_rename_result(valid, result)
+        return {**result, 'errors': prepared['errors'] + result['errors'],
+                'conflicts': prepared['conflicts']}
+
     def apply_single_change(self, row):
         try:
-            original_path = self.files_to_rename[row]
-            new_name = self.file_table.item(row, 1).text()
-            
-            if not new_name.endswith('.zip'):
-                new_name += '.zip'
-            
-            new_path = original_path.parent / new_name
-            
-            # Check if destination exists
-            if new_path.exists():
-                reply = QMessageBox.question(self, 'File exists',
-                    f'File {new_name} already exists. Overwrite?',
-                    QMessageBox.Yes | QMessageBox.No)
-                
-                if reply == QMessageBox.No:
-                    self.file_table.item(row, 3).setText("Skipped - File exists")
-                    return
-            
-            # Perform rename
-            original_path.rename(new_path)
-            self.file_table.item(row, 3).setText("Renamed")
-            
-            # Disable buttons after successful rename
-            actions_widget = self.file_table.cellWidget(row, 2)
-            for button in actions_widget.findChildren(QPushButton):
-                button.setEnabled(False)
-                
+            plan = self._build_rename_plan([row])
+            result = self._run_rename_plan(plan, plan[0]['source'].name)
+            if result['errors']:
+                error = result['errors'][0]
+                QMessageBox.warning(self, "Error",
+                    f"Failed to rename file: {error.get('reason') or error.get('error')}")
         except Exception as e:
             self.file_table.item(row, 3).setText(f"Error: {str(e)}")
             QMessageBox.warning(self, "Error", f"Failed to rename file: {str(e)}")
@@ -337,9 +720,151 @@ class MainWindow(QMainWindow):
             QMessageBox.Yes | QMessageBox.No)
         
         if reply == QMessageBox.Yes:
-            for row in range(self.file_table.rowCount()):
-                if self.file_table.item(row, 3).text() == "Pending":
-                    self.apply_single_change(row)
+            rows = [
+                row for row in range(self.file_table.rowCount())
+                if self.file_table.item(row, 3).text() == "Pending"
+            ]
+            if not rows:
+                return
+            try:
+                prepared = self._prepare_rename_plan(self._build_rename_plan(rows))
+            except Exception as e:
+                logging.error(f"Batch rename failed: {e}")
+                QMessageBox.warning(self, "Error", f"Batch rename failed: {str(e)}")
+                return
+            if not prepared['valid']:
+                self._report_batch_rename(prepared, [], 'empty')
+                return
+
+            # The batch goes through the job queue, so a file another program
+            # has open is retried later instead of failing the whole batch
+            for entry in prepared['valid']:
+                self.file_table.item(entry['row'], 3).setText("Queued")
+            if self.scan_run is None:
+                self.scan_run = self.job_queue.new_run()
+            self.job_queue.enqueue('rename', [{
+                'path': prepared['valid'][0]['source'].parent,
+                'payload': {
+                    'description': f"Apply All ({len(rows)} files)",
+                    'plan': prepared['valid'],
+                    'errors': prepared['errors']
+                }
+            }], self.scan_run)
+            self.pending_conflicts = prepared['conflicts']
+            self.start_job_worker()
+
+    def _on_rename_job_done(self, job: Dict, result: Dict):
+        """Apply a queued rename batch's result to the rows still shown"""
+        rows = {path: row for row, path in enumerate(self.files_to_rename)}
+        valid = []
+        for entry in job['payload']['plan']:
+            source = Path(entry['source'])
+            valid.append({'row': rows.get(source), 'source': source,
+                          'target': Path(entry['target'])})
+        if all(entry['row'] is not None for entry in valid):
+            self._show_rename_result(valid, result)
+        conflicts, self.pending_conflicts = self.pending_conflicts, []
+        self._report_batch_rename(
+            {'errors': job['payload'].get('errors', []), 'conflicts': conflicts},
+            result['errors'], result['status'], len(result['renamed'])
+        )
+
+    def _report_batch_rename(self, prepared: Dict, errors: List[Dict], status: str,
+                             renamed: int = 0):
+        if status == 'rolled_back':
+            QMessageBox.warning(self, "Rename Failed",
+                "A rename failed, so the whole batch was rolled back. "
+                "See the Status column for details.")
+            return
+        errors = prepared['errors'] + errors
+        if errors or prepared['conflicts']:
+            message = (
+                f"Renamed {renamed} files; "
+                f"{len(errors)} could not be renamed "
+                "(see the Status column)."
+            )
+            if prepared['conflicts']:
+                message += (
+                    f"\n\n{len(prepared['conflicts'])} name conflicts were "
+                    "resolved automatically:\n"
+                    + RenamePlanner.format_report(prepared['conflicts'][:20])
+                )
+            QMessageBox.information(self, "Apply All", message)
+
+    def undo_rename_batch(self):
+        self._run_history_action(undo=True)
+
+    def redo_rename_batch(self):
+        self._run_history_action(undo=False)
+
+    def _run_history_action(self, undo: bool):
+        try:
+            if undo:
+                result = self.rename_history.undo()
+            else:
+                result = self.rename_history.redo()
+        except ValueError as e:
+            self.statusBar().showMessage(str(e), 5000)
+            return
+        except Exception as e:
+            logging.error(f"{'Undo' if undo else 'Redo'} failed: {e}")
+            QMessageBox.warning(self, "Error", f"Operation failed: {str(e)}")
+            return
+        self.apply_history_result(result, undo)
+
+    def show_rename_history(self):
+        dialog = RenameHistoryDialog(self.rename_history, self)
+        dialog.history_changed.connect(self.apply_history_result)
+        dialog.exec()
+
+    def apply_history_result(self, result: dict, undo: bool):
+        """Point table rows at the names an undo/redo left on disk"""
+        if result['status'] not in ('undone', 'applied'):
+            QMessageBox.warning(self, "Error",
+                f"Batch {result['batch_id']} could not be fully "
+                f"{'undone' if undo else 'redone'}; see the log for details.")
+            return
+        moved = result['reverted'] if undo else result['renamed']
+        rows = {path: row for row, path in enumerate(self.files_to_rename)}
+        for entry in moved:
+            current, new_path = (
+                (entry['target'], entry['source']) if undo
+                else (entry['source'], entry['target'])
+            )
+            row = rows.get(current)
+            if row is None:
+                continue
+            if undo:
+                self.file_ids[new_path] = self.file_ids.pop(current, None)
+                self.files_to_rename[row] = new_path
+                self.file_table.item(row, 3).setText("Pending")
+                actions_widget = self.file_table.cellWidget(row, 2)
+                for button in actions_widget.findChildren(QPushButton):
+                    button.setEnabled(True)
+            else:
+                self._mark_renamed(row, new_path)
+        action = "Undid" if undo else "Redid"
+        self.statusBar().showMessage(
+            f"{action} rename batch {result['batch_id']} ({len(moved)} files)", 5000
+        )
+
+    def check_interrupted_renames(self):
+        """Offer to resume or roll back batches a crash left half applied"""
+        for batch_id in self.rename_engine.incomplete_batches():
+            box = QMessageBox(self)
+            box.setWindowTitle("Interrupted Rename")
+            box.setText(
+                f"Rename batch {batch_id} did not finish last time. "
+                "Resume it or roll it back?"
+            )
+            resume_btn = box.addButton("Resume", QMessageBox.AcceptRole)
+            box.addButton("Roll Back", QMessageBox.RejectRole)
+            box.exec()
+            if box.clickedButton() == resume_btn:
+                result = self.rename_engine.resume(batch_id)
+            else:
+                result = self.rename_engine.rollback(batch_id)
+            logging.info(f"Recovered rename batch {batch_id}: {result['status']}")
 
     def update_suggested_name(self, tags: list[str]):
         """Update the suggested name when tags change"""
@@ -350,81 +875,101 @@ class MainWindow(QMainWindow):
                 new_name = f"{base_name} {' '.join(tags)}"
                 current_item.setText(new_name)
 
+    EXPORT_FILTERS = {
+        "csv": ("Export to CSV", "csv",
+                "CSV Files (*.csv);;Gzipped CSV Files (*.csv.gz)"),
+        "json": ("Export to JSON", "json",
+                 "JSON Files (*.json);;Gzipped JSON Files (*.json.gz)"),
+        "jsonl": ("Export to JSON Lines", "jsonl",
+                  "JSON Lines Files (*.jsonl);;Gzipped JSON Lines Files (*.jsonl.gz)"),
+    }
+
     def export_data(self, format_type: str):
         """Export rename history and file data"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        if format_type == "csv":
-            filename, _ = QFileDialog.getSaveFileName(
+        title, extension, filters = self.EXPORT_FILTERS[format_type]
+        filename, selected_filter = QFileDialog.getSaveFileName(
+            self,
+            title,
+            f"rename_history_{timestamp}.{extension}",
+            filters
+        )
+        if not filename:
+            return
+        if "gz" in selected_filter and not filename.endswith(".gz"):
+            filename += ".gz"
+
+        exporter = CatalogExporter(self.db)
+        self.export_worker = ExportWorker(exporter, filename, format_type, self)
+
+        progress = QProgressDialog("Exporting rename history...", "Cancel", 0, 0, self)
+        progress.setWindowTitle(title)
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(500)
+        progress.canceled.connect(self.export_worker.cancel)
+
+        def on_progress(done, total):
+            progress.setMaximum(total)
+            progress.setValue(done)
+
+        def on_completed(written):
+            progress.close()
+            QMessageBox.information(self, "Export Successful",
+                f"Exported {written:,} records to {filename}")
+
+        def on_cancelled():
+            progress.close()
+            self.statusBar().showMessage("Export cancelled", 5000)
+
+        def on_failed(error):
+            progress.close()
+            QMessageBox.warning(self, "Export Failed",
+                f"Failed to export data: {error}")
+
+        self.export_worker.progress.connect(on_progress)
+        self.export_worker.completed.connect(on_completed)
+        self.export_worker.cancelled.connect(on_cancelled)
+        self.export_worker.failed.connect(on_failed)
+        self.export_worker.start()
+
+    def export_columnar(self):
+        """Export files, tags and archive listings as column tables"""
+        format_type = ColumnarExporter.default_format()
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        if format_type == "npz":
+            target, _ = QFileDialog.getSaveFileName(
                 self,
-                "Export to CSV",
-                f"rename_history_{timestamp}.csv",
-                "CSV Files (*.csv)"
+                "Export Catalog",
+                f"catalog_{timestamp}.npz",
+                "NumPy Archives (*.npz)"
             )
-            if filename:
-                try:
-                    with open(filename, 'w', newline='', encoding='utf-8') as f:
-                        writer = csv.writer(f)
-                        writer.writerow([
-                            "Original Name",
-                            "New Name",
-                            "Status",
-                            "Tags",
-                            "Category"
-                        ])
-                        
-                        # Export data from database
-                        with self.db.get_session() as session:
-                            files = session.query(File).all()
-                            for file in files:
-                                writer.writerow([
-                                    file.original_name,
-                                    file.new_name or "",
-                                    file.status,
-                                    ", ".join(tag.name for tag in file.tags),
-                                    file.category if hasattr(file, 'category') else ""
-                                ])
-                    
-                    QMessageBox.information(self, "Export Successful", 
-                        f"Data exported to {filename}")
-                        
-                except Exception as e:
-                    QMessageBox.warning(self, "Export Failed", 
-                        f"Failed to export data: {str(e)}")
-                    
-        elif format_type == "json":
-            filename, _ = QFileDialog.getSaveFileName(
-                self,
-                "Export to JSON",
-                f"rename_history_{timestamp}.json",
-                "JSON Files (*.json)"
+        else:
+            target = QFileDialog.getExistingDirectory(
+                self, "Select Folder for Parquet Tables"
             )
-            if filename:
-                try:
-                    export_data = []
-                    with self.db.get_session() as session:
-                        files = session.query(File).all()
-                        for file in files:
-                            export_data.append({
-                                "original_name": file.original_name,
-                                "new_name": file.new_name,
-                                "status": file.status,
-                                "tags": [tag.name for tag in file.tags],
-                                "category": file.category if hasattr(file, 'category') else "",
-                                "content_hash": file.content_hash,
-                                "processed_date": file.last_modified.isoformat() 
-                                    if file.last_modified else None
-                            })
-                    
-                    with open(filename, 'w', encoding='utf-8') as f:
-                        json.dump(export_data, f, indent=2)
-                    
-                    QMessageBox.information(self, "Export Successful", 
-                        f"Data exported to {filename}")
-                        
-                except Exception as e:
-                    QMessageBox.warning(self, "Export Failed", 
-                        f"Failed to export data: {str(e)}")
+        if not target:
+            return
+
+        self.export_worker = ExportWorker(
+            ColumnarExporter(self.db), target, format_type, self
+        )
+        self.export_worker.completed.connect(
+            lambda rows: QMessageBox.information(self, "Export Successful",
+                f"Exported {rows:,} rows to {target}")
+        )
+        self.export_worker.cancelled.connect(
+            lambda: self.statusBar().showMessage("Catalog export cancelled", 5000)
+        )
+        self.export_worker.failed.connect(
+            lambda error: QMessageBox.warning(self, "Export Failed",
+                f"Failed to export catalog: {error}")
+        )
+        self.statusBar().showMessage(f"Exporting catalog ({format_type})...")
+        self.export_worker.start()
+
+    def show_diagnostics(self):
+        dialog = DiagnosticsDialog(self.settings, self)
+        dialog.exec()
 
     def show_preferences(self):
        dialog = PreferencesDialog(self.settings, self)
@@ -434,6 +979,11 @@ class MainWindow(QMainWindow):
 
     def apply_settings(self):
        # Apply settings that affect the UI or behavior
+       metrics.enable(self.settings.get("diagnostics", "instrumentation", False))
+       shop_pack = self.settings.get("rules", "shop_pack") or None
+       if (Path(shop_pack) if shop_pack else None) != self.rules_manager.shop_pack:
+           self.rules_manager.shop_pack = Path(shop_pack) if shop_pack else None
+           self.rules_watcher.restart()
        if self.settings.get("naming", "add_category_prefix"):
            # Update any visible suggested names
            self.refresh_suggested_names()
@@ -447,7 +997,74 @@ class MainWindow(QMainWindow):
            if pos:
                self.move(pos[0], pos[1])
 
+    def setup_watcher(self):
+        detector = ChangeDetector(
+            self.settings.get("files", "archive_types"),
+            debounce_seconds=self.settings.get("watch", "debounce_seconds"),
+            db=self.db,
+            ignore_patterns=self.settings.get("files", "ignore_patterns")
+        )
+        self.library_watcher = LibraryWatcher(
+            detector,
+            poll_interval=self.settings.get("watch", "poll_interval_seconds"),
+            force_polling=self.settings.get("watch", "force_polling"),
+            parent=self
+        )
+        self.library_watcher.files_ready.connect(self.append_files)
+        self.library_watcher.files_moved.connect(self.on_files_moved)
+
+    def setup_rules_watcher(self):
+        self.rules_watcher = RulesWatcher(self.rules_manager, parent=self)
+        self.rules_watcher.rules_changed.connect(self.on_rules_changed)
+        self.rules_watcher.reload_failed.connect(
+            lambda error: self.statusBar().showMessage(f"Custom rules not reloaded: {error}")
+        )
+        self.rules_watcher.start()
+
+    def on_rules_changed(self, sections: set):
+        """Custom rule files changed on disk"""
+        updated = self.refresh_suggested_names(sections)
+        self.statusBar().showMessage(
+            f"Rules reloaded ({', '.join(sorted(sections))}); {updated} names updated"
+        )
+
+    def restore_watched_folders(self):
+        for folder in self.settings.get("watch", "folders", []):
+            if Path(folder).is_dir():
+                self.library_watcher.watch(Path(folder))
+
+    def watch_folder(self):
+        dir_path = QFileDialog.getExistingDirectory(self, "Select Folder to Watch")
+        if dir_path:
+            self.library_watcher.watch(Path(dir_path))
+            self.settings.set("watch", "folders",
+                [str(f) for f in self.library_watcher.folders])
+            self.statusBar().showMessage(f"Watching {dir_path}")
+
+    def stop_watching(self):
+        self.library_watcher.stop()
+        self.settings.set("watch", "folders", [])
+        self.statusBar().showMessage("Stopped watching folders")
+
+    def on_files_moved(self, moves: list):
+        """Keep table rows pointing at archives that moved on disk"""
+        for old_path, new_path in moves:
+            if old_path in self.files_to_rename:
+                row = self.files_to_rename.index(old_path)
+                self.files_to_rename[row] = new_path
+                if old_path in self.analyses:
+                    self.analyses[new_path] = self.analyses.pop(old_path)
+                self.file_table.item(row, 0).setText(new_path.name)
+
     def closeEvent(self, event):
+       self.library_watcher.stop()
+       self.rules_watcher.stop()
+       if self.job_worker is not None and self.job_worker.isRunning():
+           # Leases go back to the queue; the scan resumes on the next start
+           self.job_worker.cancel()
+           self.job_worker.wait()
+       if self.thumbnail_executor is not None:
+           self.thumbnail_executor.shutdown(wait=False, cancel_futures=True)
        # Save window state
        if self.settings.get("general", "save_window_size"):
            self.settings.set("window", "size", 
@@ -464,8 +1081,7 @@ class MainWindow(QMainWindow):
         )
         if filename:
             try:
-                self.rules_manager.save_rules(filename)
-                rules = self.rules_manager.rules
+                rules = dict(self.rules_manager.rules)
                 rules['tag_categories'] = TagEditor.CATEGORIES
                 with open(filename, 'w', encoding='utf-8') as f:
                     json.dump(rules, f, indent=2)
@@ -488,10 +1104,10 @@ class MainWindow(QMainWindow):
                 with open(filename, 'r', encoding='utf-8') as f:
                     rules = json.load(f)
                 self.rules_manager.validate_rules(rules)
-                self.rules_manager.rules = rules
+                changed = self.rules_manager.update_rules(rules)
                 if 'tag_categories' in rules:
                     TagEditor.CATEGORIES.update(rules['tag_categories'])
-                self.refresh_suggested_names()
+                self.refresh_suggested_names(changed)
                 QMessageBox.information(self, "Success", 
                     "Rules imported successfully")
             except ValueError as ve:
@@ -503,8 +1119,32 @@ class MainWindow(QMainWindow):
                 QMessageBox.warning(self, "Error", 
                     f"Failed to import rules: {str(e)}")
 
-    def refresh_suggested_names(self):
-        for row in range(self.file_table.rowCount()):
-            filename = self.file_table.item(row, 0).text()
-            suggested_name = self.generate_new_name(filename)
-            self.file_table.item(row, 1).setText(suggested_name)
\ No newline at end of file
+    def refresh_suggested_names(self, sections: set = None) -> int:
+        """Rebuild suggested names after the rules or naming settings changed.
+
+        Only the name-analysis stage runs again, on the archive listing kept
+        from the load. With ``sections`` (the rules sections that changed),
+        rows whose matches for those sections are unchanged are skipped.
+        Returns the number of rows whose name was rewritten.
+        """
+        started = perf_counter()
+        updated = 0
+        self.file_table.setUpdatesEnabled(False)
+        try:
+            for row, filepath in enumerate(self.files_to_rename):
+                analysis = self.analyses.get(filepath)
+                item = self.file_table.item(row, 1)
+                if analysis is None or item is None:
+                    continue
+                if sections is None:
+                    if not analysis.get('error'):
+                        self.analyzer.apply_name_rules(analysis)
+                elif not self.analyzer.refresh_names(analysis, sections):
+                    continue
+                item.setText(self._format_name(filepath, analysis))
+                updated += 1
+        finally:
+            self.file_table.setUpdatesEnabled(True)
+        logging.info(f"Refreshed {updated} of {len(self.files_to_rename)} suggested names "
+                     f"in {perf_counter() - started:.3f}s")
+        return updated
\ No newline at end of file
@@ -0,0 +1,69 @@
+from PySide6.QtCore import QObject, QFileSystemWatcher, QTimer, Signal
+import logging
+
+from ..core.rules_manager import RulesManager
+
+
+class RulesWatcher(QObject):
+    """Reload the shop and user rule layers when they change on disk.
+
+    Watches the folders holding those layers (for files being added,
+    removed or replaced by an editor's atomic save) and each rule file in
+    them. Changes are debounced so one save results in a single reload.
+    ``rules_changed`` carries the set of rules sections that actually
+    differ afterwards; a file that fails to parse or validate leaves the
+    current rules in place and is reported through ``reload_failed``.
+    """
+
+    rules_changed = Signal(set)
+    reload_failed = Signal(str)
+
+    def __init__(self, rules_manager: RulesManager, debounce_ms: int = 300, parent=None):
+        super().__init__(parent)
+        self.rules_manager = rules_manager
+
+        self.fs_watcher = QFileSystemWatcher(self)
+        self.fs_watcher.directoryChanged.connect(self._schedule)
+        self.fs_watcher.fileChanged.connect(self._schedule)
+
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(debounce_ms)
+        self.debounce_timer.timeout.connect(self._reload)
+
+    def start(self):
+        self._watch_files()
+
+    def restart(self):
+        """Pick up a different set of layer locations (e.g. a new shop pack)"""
+        self.stop()
+        self.start()
+        self._schedule()
+
+    def stop(self):
+        self.debounce_timer.stop()
+        paths = self.fs_watcher.files() + self.fs_watcher.directories()
+        if paths:
+            self.fs_watcher.removePaths(paths)
+
+    def _watch_files(self):
+        # Editors that save by rename drop the old inode from the watch list
+        watched = set(self.fs_watcher.files()) | set(self.fs_watcher.directories())
+        missing = [str(p) for p in self.rules_manager.watch_paths() if str(p) not in watched]
+        if missing:
+            self.fs_watcher.addPaths(missing)
+
+    def _schedule(self, _path: str = ""):
+        self.debounce_timer.start()
+
+    def _reload(self):
+        self._watch_files()
+        try:
+            changed = self.rules_manager.reload()
+        except (ValueError, OSError) as e:
+            logging.warning(f"Keeping previous rules, reload failed: {e}")
+            self.reload_failed.emit(str(e))
+            return
+        if changed:
+            logging.info(f"Rules reloaded, changed sections: {', '.join(sorted(changed))}")
+            self.rules_changed.emit(changed)
@@ -0,0 +1,263 @@
+from PySide6.QtCore import QThread, Signal
+from concurrent.futures import as_completed
+from contextlib import nullcontext
+from pathlib import Path
+import logging
+import time
+
+from ..core.archive_analyzer import ArchiveAnalyzer
+from ..core.catalog_exporter import CatalogExporter, ExportCancelled
+from ..core.directory_watcher import ChangeDetector
+from ..core.dry_run import DryRunPlanner
+from ..core.duplicate_finder import DuplicateFinder
+from ..core.file_hasher import FileHasher
+from ..core.scan_pipeline import ScanPipeline
+from ..core.thumbnail_cache import ThumbnailCache
+from ..core.thumbnail_renderer import ThumbnailRenderer
+
+
+class ExportWorker(QThread):
+    """Runs a catalog export off the GUI thread"""
+
+    progress = Signal(int, int)
+    completed = Signal(int)
+    cancelled = Signal()
+    failed = Signal(str)
+
+    def __init__(self, exporter: CatalogExporter, filename: str,
+                 format_type: str, parent=None):
+        super().__init__(parent)
+        self.exporter = exporter
+        self.filename = filename
+        self.format_type = format_type
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        try:
+            written = self.exporter.export(
+                self.filename,
+                self.format_type,
+                progress=self.progress.emit,
+                is_cancelled=lambda: self._cancelled
+            )
+            self.completed.emit(written)
+        except ExportCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            logging.error(f"Export to {self.filename} failed: {e}")
+            self.failed.emit(str(e))
+
+
+class ThumbnailWorker(QThread):
+    """Renders missing model thumbnails in a process pool and caches them.
+
+    The thread only waits on the pool's futures and writes finished PNGs to
+    the cache, so the GUI stays responsive while the renders run on other
+    cores.
+    """
+
+    rendered = Signal(str, str)  # member, cached PNG path
+    failed = Signal(str, str)  # member, error
+
+    def __init__(self, executor, renderer: ThumbnailRenderer, cache: ThumbnailCache,
+                 archive: Path, content_hash: str, members: list, parent=None):
+        super().__init__(parent)
+        self.executor = executor
+        self.renderer = renderer
+        self.cache = cache
+        self.archive = archive
+        self.content_hash = content_hash
+        self.members = members
+        self._futures = {}
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+        for future in self._futures:
+            future.cancel()
+
+    def run(self):
+        self._futures = {
+            self.executor.submit(self.renderer.render_member, str(self.archive), member): member
+            for member in self.members
+        }
+        for future in as_completed(self._futures):
+            if self._cancelled:
+                break
+            member = self._futures[future]
+            try:
+                png = future.result()
+                if png is None:
+                    self.failed.emit(member, "No geometry")
+                    continue
+                key = self.cache.key(self.content_hash, member, self.renderer.size)
+                self.rendered.emit(member, str(self.cache.put(key, png)))
+            except Exception as e:
+                logging.error(f"Thumbnail for {member} in {self.archive} failed: {e}")
+                self.failed.emit(member, str(e))
+
+
+class PreviewWorker(QThread):
+    """Reads what an archive preview is missing: the analysis, and the
+    content hash its thumbnails and catalog lookups are keyed by"""
+
+    completed = Signal(object, object)  # analysis, content hash
+    failed = Signal(str)
+
+    def __init__(self, analyzer: ArchiveAnalyzer, archive: Path, analysis: dict = None,
+                 content_hash: str = None, parent=None):
+        super().__init__(parent)
+        self.analyzer = analyzer
+        self.archive = archive
+        self.analysis = analysis
+        self.content_hash = content_hash
+
+    def run(self):
+        try:
+            analysis = self.analysis or self.analyzer.analyze_archive(self.archive)
+            content_hash = self.content_hash or FileHasher.get_content_hash(self.archive)
+            self.completed.emit(analysis, content_hash)
+        except Exception as e:
+            logging.error(f"Preview of {self.archive} failed: {e}")
+            self.failed.emit(str(e))
+
+
+class DryRunWorker(QThread):
+    """Plans a whole-library rename off the GUI thread"""
+
+    progress = Signal(str, int, int)  # stage, done, total
+    completed = Signal(object)  # DryRunPlanner.plan() result
+    failed = Signal(str)
+
+    def __init__(self, planner: DryRunPlanner, root: Path, parent=None):
+        super().__init__(parent)
+        self.planner = planner
+        self.root = root
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        try:
+            result = self.planner.plan(
+                self.root,
+                progress=self.progress.emit,
+                is_cancelled=lambda: self._cancelled
+            )
+            if result:
+                self.completed.emit(result)
+        except Exception as e:
+            logging.error(f"Dry run of {self.root} failed: {e}")
+            self.failed.emit(str(e))
+
+
+class ChangeResolveWorker(QThread):
+    """Checks watched-folder arrivals against stored hashes off the GUI thread"""
+
+    completed = Signal(object)  # ChangeDetector.resolve() result
+
+    def __init__(self, detector: ChangeDetector, changes: dict, parent=None):
+        super().__init__(parent)
+        self.detector = detector
+        self.changes = changes
+
+    def run(self):
+        try:
+            changes = self.detector.resolve(self.changes)
+        except Exception as e:
+            logging.error(f"Checking watched archives for moves failed: {e}")
+            # Analyzing them again is the safe fallback
+            changes = ChangeDetector.unresolved_as_found(self.changes)
+        self.completed.emit(changes)
+
+
+class DuplicateWorker(QThread):
+    """Hashes and fingerprints files for duplicates off the GUI thread"""
+
+    progress = Signal(str, int, int)  # stage, done, total
+    completed = Signal(object)  # DuplicateFinder.find() result
+    failed = Signal(str)
+
+    def __init__(self, finder: DuplicateFinder, files: list, parent=None):
+        super().__init__(parent)
+        self.finder = finder
+        self.files = files
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        try:
+            duplicates = self.finder.find(
+                self.files,
+                progress=self.progress.emit,
+                is_cancelled=lambda: self._cancelled
+            )
+            if not self._cancelled:
+                self.completed.emit(duplicates)
+        except Exception as e:
+            logging.error(f"Duplicate detection failed: {e}")
+            self.failed.emit(str(e))
+
+
+class JobWorker(QThread):
+    """Drains the persistent job queue until no work is left.
+
+    Emits each processed batch, permanent failures, and about once a
+    second the queue's per-stage counts and throughput. Jobs waiting out
+    a retry delay keep the worker alive; it sleeps until they are due.
+    Stopping hands unfinished leases back to the queue. A ScanProfiler
+    passed in is entered on the worker thread, since cProfile only sees
+    the thread that enables it.
+    """
+
+    batch_done = Signal(str, object)  # stage, [(job, result)]
+    jobs_failed = Signal(str, object)  # stage, [(job, error)]
+    stats = Signal(object)  # {'counts': ..., 'throughput': ...}
+
+    STATS_INTERVAL = 1.0
+    IDLE_SLEEP_MS = 500
+
+    def __init__(self, pipeline: ScanPipeline, parent=None, profiler=None):
+        super().__init__(parent)
+        self.pipeline = pipeline
+        self.profiler = profiler
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        queue = self.pipeline.queue
+        last_stats = 0.0
+        try:
+            with self.profiler or nullcontext():
+                while not self._cancelled:
+                    stage, results, failed = self.pipeline.run_once()
+                    if results:
+                        self.batch_done.emit(stage, results)
+                    if failed:
+                        self.jobs_failed.emit(stage, failed)
+                    if time.monotonic() - last_stats >= self.STATS_INTERVAL:
+                        self._emit_stats()
+                        last_stats = time.monotonic()
+                    if stage:
+                        continue
+                    wait = queue.next_due()
+                    if wait is None:
+                        break
+                    self.msleep(int(min(wait * 1000, self.IDLE_SLEEP_MS)) or 1)
+        except Exception as e:
+            logging.error(f"Job worker stopped: {e}")
+        finally:
+            queue.release()
+            self._emit_stats()
+
+    def _emit_stats(self):
+        queue = self.pipeline.queue
+        self.stats.emit({'counts': queue.counts(), 'throughput': queue.throughput()})
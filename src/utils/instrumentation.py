@@ -0,0 +1,234 @@
+# src/utils/instrumentation.py
+import functools
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, List
+
+
+class _NullTimer:
+    """Shared do-nothing context manager handed out while metrics are off"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics: 'Metrics', name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.record(self.name, perf_counter() - self.start)
+        return False
+
+
+class StageStats:
+    """Call count, total/min/max and a log2 histogram of durations.
+
+    Bucket i holds calls that took under 2**i microseconds (and at least
+    2**(i-1)), which is enough to read p50/p95 to within a factor of two
+    without keeping individual samples.
+    """
+
+    BUCKETS = 40
+
+    __slots__ = ('count', 'total', 'min', 'max', 'histogram')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        self.histogram = [0] * self.BUCKETS
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+        bucket = min(int(seconds * 1e6).bit_length(), self.BUCKETS - 1)
+        self.histogram[bucket] += 1
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the given fraction, in seconds"""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for bucket, hits in enumerate(self.histogram):
+            seen += hits
+            if seen >= target:
+                return min((1 << bucket) / 1e6, self.max)
+        return self.max
+
+    def as_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'total_s': round(self.total, 6),
+            'mean_ms': round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            'min_ms': round(self.min * 1000, 3) if self.count else 0.0,
+            'max_ms': round(self.max * 1000, 3),
+            'p50_ms': round(self.percentile(0.5) * 1000, 3),
+            'p95_ms': round(self.percentile(0.95) * 1000, 3),
+            'histogram_us_log2': self.histogram[:max(
+                (i + 1 for i, hits in enumerate(self.histogram) if hits), default=0
+            )]
+        }
+
+
+class Metrics:
+    """Process-wide timers, counters and cache hit rates for the hot paths.
+
+    Everything is off by default. While disabled ``timer`` returns a shared
+    no-op context manager and ``timed`` functions call straight through
+    after one attribute check, so instrumented code costs next to nothing.
+    Turn it on with ``enable()``, the diagnostics setting, or the
+    FILE_RENAMER_METRICS environment variable.
+
+    Stage names are dotted ('hash.content', 'db.add_file'); the part before
+    the first dot is the subsystem used to group the summary.
+    """
+
+    ENV_VAR = 'FILE_RENAMER_METRICS'
+
+    def __init__(self):
+        self.enabled = os.environ.get(self.ENV_VAR, '').lower() in ('1', 'true', 'yes')
+        self._lock = threading.Lock()
+        self.reset()
+
+    def enable(self, enabled: bool = True):
+        self.enabled = enabled
+
+    def reset(self):
+        with self._lock:
+            self.stages: Dict[str, StageStats] = {}
+            self.counters: Dict[str, int] = {}
+            self.caches: Dict[str, List[int]] = {}
+            self.started = datetime.now()
+
+    def timer(self, name: str):
+        """Context manager timing one stage"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            stats = self.stages.get(name)
+            if stats is None:
+                stats = self.stages[name] = StageStats()
+            stats.add(seconds)
+
+    def count(self, name: str, amount: int = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def add_bytes(self, name: str, amount: int):
+        """Bytes read (or written) by a stage, kept as the '<name>.bytes' counter"""
+        self.count(f"{name}.bytes", amount)
+
+    def cache(self, name: str, hit: bool):
+        if not self.enabled:
+            return
+        with self._lock:
+            stats = self.caches.get(name)
+            if stats is None:
+                stats = self.caches[name] = [0, 0]
+            stats[0 if hit else 1] += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            elapsed = (datetime.now() - self.started).total_seconds()
+            return {
+                'started': self.started.isoformat(),
+                'elapsed_s': round(elapsed, 3),
+                'stages': {name: s.as_dict() for name, s in sorted(self.stages.items())},
+                'counters': dict(sorted(self.counters.items())),
+                'caches': {
+                    name: {
+                        'hits': hits,
+                        'misses': misses,
+                        'hit_rate': round(hits / (hits + misses), 4) if hits + misses else 0.0
+                    }
+                    for name, (hits, misses) in sorted(self.caches.items())
+                }
+            }
+
+    def summary_lines(self, title: str = "Scan") -> List[str]:
+        snapshot = self.snapshot()
+        lines = [f"{title} metrics over {snapshot['elapsed_s']:.2f}s"]
+        for name, stats in snapshot['stages'].items():
+            lines.append(
+                f"  {name:<24} {stats['count']:>8} calls {stats['total_s']:>9.3f}s "
+                f"mean {stats['mean_ms']:.2f}ms p95 {stats['p95_ms']:.2f}ms "
+                f"max {stats['max_ms']:.2f}ms"
+            )
+        for name, value in snapshot['counters'].items():
+            if name.endswith('.bytes'):
+                stage = snapshot['stages'].get(name[:-len('.bytes')])
+                rate = ""
+                if stage and stage['total_s']:
+                    rate = f" ({value / stage['total_s'] / 1e6:.1f} MB/s)"
+                lines.append(f"  {name:<24} {value / 1e6:>10.2f} MB{rate}")
+            else:
+                lines.append(f"  {name:<24} {value:>10}")
+        for name, stats in snapshot['caches'].items():
+            lines.append(
+                f"  {name:<24} {stats['hits']} hits / {stats['misses']} misses "
+                f"({stats['hit_rate']:.0%})"
+            )
+        return lines
+
+    def log_summary(self, title: str = "Scan", logger: logging.Logger = None):
+        if not self.enabled:
+            return
+        logger = logger or logging.getLogger('FileRenamer.metrics')
+        logger.info("\n".join(self.summary_lines(title)))
+
+    def dump_json(self, filename) -> Path:
+        path = Path(filename)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=2)
+        return path
+
+
+metrics = Metrics()
+
+
+def timed(name: str):
+    """Decorator timing every call of a function as the given stage"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not metrics.enabled:
+                return func(*args, **kwargs)
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                metrics.record(name, perf_counter() - start)
+        return wrapper
+    return decorator
@@ -1,34 +1,176 @@
 # src/utils/logging_config.py
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
+import queue
+import threading
+import time
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
+
+# Attributes every LogRecord has; anything else came in through ``extra``
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {
+    'message', 'asctime', 'taskName'
+}
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per line.
+
+    Fields passed with ``extra=`` (for example ``file`` and ``timings_ms``
+    from the file loader) are included as top-level keys.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc)
+                  .isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            'module': record.module,
+            'line': record.lineno,
+            'thread': record.threadName,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread.
+
+    The stock ``prepare`` runs the full formatter in the calling thread;
+    here the caller only merges the message arguments and renders any
+    traceback (which cannot cross to another thread), so the structured
+    fields reach the JSON formatter intact.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class RateLimitFilter(logging.Filter):
+    """Lets through at most ``burst`` records per call site every ``interval`` s.
+
+    A call site is (file, line, level), so an error logged once per archive
+    from the same ``except`` block counts as one repeated message whatever
+    the archive name in it. Records below ``min_level`` are never limited.
+    When a window with suppressed records ends, the next record from that
+    site carries a ``suppressed`` count and a note in its message.
+    """
+
+    def __init__(self, interval: float = 60.0, burst: int = 5,
+                 min_level: int = logging.WARNING):
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        self.min_level = min_level
+        self._sites = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < self.min_level:
+            return True
+        key = (record.pathname, record.lineno, record.levelno)
+        now = time.monotonic()
+        with self._lock:
+            start, count, suppressed = self._sites.get(key, (now, 0, 0))
+            if now - start >= self.interval:
+                start, count = now, 0
+                if suppressed:
+                    record.suppressed = suppressed
+                    record.msg = f"{record.msg} (suppressed {suppressed} similar messages)"
+                    suppressed = 0
+            count += 1
+            allowed = count <= self.burst
+            if not allowed:
+                suppressed += 1
+            self._sites[key] = (start, count, suppressed)
+        return allowed
+
 
 class LogConfig:
+    LOG_FILE = "file_renamer.log"
+    TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+    _listener = None
+
+    @staticmethod
+    def log_directory() -> Path:
+        """Directory holding the log files (and profiles)"""
+        return Path(__file__).parent.parent / "logs"
+
     @staticmethod
-    def setup_logging(log_level=logging.INFO):
+    def setup_logging(log_level=logging.INFO, max_bytes: int = 5 * 1024 * 1024,
+                      backup_count: int = 5, rate_limit: bool = True):
+        """Asynchronous logging to a rotating JSON-lines file and the console.
+
+        Callers only pay for putting the record on a queue; a QueueListener
+        thread does the formatting and disk/console I/O, so logging inside
+        per-file loops no longer waits on the disk. The file rotates at
+        ``max_bytes`` keeping ``backup_count`` old files.
+        """
         # Create logs directory if it doesn't exist
-        log_dir = Path(__file__).parent.parent / "logs"
+        log_dir = LogConfig.log_directory()
         log_dir.mkdir(exist_ok=True)
-        
-        # Create log file with timestamp
-        log_file = log_dir / f"file_renamer_{datetime.now():%Y%m%d_%H%M%S}.log"
-        
-        # Configure logging
-        logging.basicConfig(
-            level=log_level,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(log_file),
-                logging.StreamHandler()
-            ]
+        LogConfig.shutdown()
+
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_dir / LogConfig.LOG_FILE, maxBytes=max_bytes,
+            backupCount=backup_count, encoding='utf-8'
+        )
+        file_handler.setFormatter(JsonLinesFormatter())
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter(LogConfig.TEXT_FORMAT))
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = _QueueHandler(log_queue)
+        if rate_limit:
+            # Filter before enqueueing so suppressed records cost nothing more
+            queue_handler.addFilter(RateLimitFilter())
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        root.setLevel(log_level)
+
+        LogConfig._listener = logging.handlers.QueueListener(
+            log_queue, file_handler, console_handler, respect_handler_level=True
         )
-        
+        LogConfig._listener.start()
+        atexit.register(LogConfig.shutdown)
+
         # Create logger for this application
         logger = logging.getLogger('FileRenamer')
-        
+
         return logger
 
+    @staticmethod
+    def shutdown():
+        """Flush queued records and stop the listener thread"""
+        listener, LogConfig._listener = LogConfig._listener, None
+        if listener is not None:
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
+
     @staticmethod
     def get_logger(name: str):
         """Get a logger with the given name"""
-        return logging.getLogger(f'FileRenamer.{name}')
\ No newline at end of file
+        return logging.getLogger(f'FileRenamer.{name}')
@@ -0,0 +1,183 @@
+# src/utils/profiling.py
+import cProfile
+import io
+import logging
+import os
+import pstats
+import sysconfig
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Tuple
+
+SRC_DIR = Path(__file__).resolve().parent.parent
+STDLIB_DIR = Path(sysconfig.get_paths()["stdlib"]).resolve()
+
+
+def module_group(filename: str) -> str:
+    """Which part of the program a source file belongs to.
+
+    Our own packages are reported by name ('core', 'database', 'ui',
+    'utils'), installed packages by their top-level package, everything
+    else as 'stdlib' or 'builtin'.
+    """
+    if not filename or filename.startswith('<') or filename == '~':
+        return 'builtin'
+    path = Path(filename)
+    try:
+        relative = path.resolve().relative_to(SRC_DIR)
+        return relative.parts[0] if len(relative.parts) > 1 else 'app'
+    except (ValueError, OSError):
+        pass
+    parts = path.parts
+    if 'site-packages' in parts:
+        index = parts.index('site-packages')
+        if index + 1 < len(parts):
+            return parts[index + 1].split('.')[0]
+    try:
+        path.resolve().relative_to(STDLIB_DIR)
+        return 'stdlib'
+    except (ValueError, OSError):
+        return 'other'
+
+
+class ScanProfiler:
+    """cProfile + tracemalloc capture around one scan, for bug reports.
+
+    Used as a context manager. On exit it writes three files next to the
+    application logs:
+
+    - ``<name>.prof``: raw cProfile data for snakeviz/pstats
+    - ``<name>.tracemalloc``: the end-of-scan allocation snapshot
+      (``tracemalloc.Snapshot.load``)
+    - ``<name>.txt``: a readable report with self time and allocated memory
+      per module group (core, database, ui, ... and third-party packages),
+      the slowest functions and the largest allocation sites. Time spent in
+      C builtins is charged to the module that called them.
+
+    Profiling slows the scan down several times; it is only switched on
+    through the 'diagnostics.profile_scans' setting or the
+    FILE_RENAMER_PROFILE environment variable.
+    """
+
+    ENV_VAR = 'FILE_RENAMER_PROFILE'
+
+    def __init__(self, log_dir: Path, label: str = "scan", top: int = 25,
+                 frames: int = 1):
+        self.log_dir = Path(log_dir)
+        self.label = label
+        self.top = top
+        self.frames = frames
+        self.profiler = cProfile.Profile()
+        self.paths: Dict[str, Path] = {}
+
+    @classmethod
+    def requested(cls, settings=None) -> bool:
+        if os.environ.get(cls.ENV_VAR, '').lower() in ('1', 'true', 'yes'):
+            return True
+        return bool(settings and settings.get("diagnostics", "profile_scans", False))
+
+    def __enter__(self):
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start(self.frames)
+        tracemalloc.reset_peak()
+        self._before = tracemalloc.take_snapshot()
+        self._started = datetime.now()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.disable()
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        if self._started_tracing:
+            tracemalloc.stop()
+        try:
+            self._write(after, peak)
+        except Exception as e:
+            logging.error(f"Could not write profile for {self.label}: {e}")
+        return False
+
+    def _write(self, after: tracemalloc.Snapshot, peak: int):
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        stem = f"profile_{self.label}_{self._started:%Y%m%d_%H%M%S}"
+        self.paths = {
+            'prof': self.log_dir / f"{stem}.prof",
+            'tracemalloc': self.log_dir / f"{stem}.tracemalloc",
+            'report': self.log_dir / f"{stem}.txt",
+        }
+        self.profiler.dump_stats(str(self.paths['prof']))
+        after.dump(str(self.paths['tracemalloc']))
+
+        report = io.StringIO()
+        elapsed = (datetime.now() - self._started).total_seconds()
+        report.write(f"Profile of {self.label} started {self._started:%Y-%m-%d %H:%M:%S}, "
+                     f"{elapsed:.2f}s wall, peak traced memory {peak / 2**20:.1f} MB\n\n")
+        self._write_time(report)
+        self._write_memory(report, after)
+        self.paths['report'].write_text(report.getvalue(), encoding='utf-8')
+        logging.info(f"Profile for {self.label} saved to {self.paths['report']}")
+
+    def _write_time(self, report: io.StringIO):
+        stats = pstats.Stats(self.profiler)
+        by_group: Dict[str, float] = defaultdict(float)
+        calls_by_group: Dict[str, int] = defaultdict(int)
+        for (filename, _, _), (_, ncalls, tottime, _, callers) in stats.stats.items():
+            group = module_group(filename)
+            calls_by_group[group] += ncalls
+            if group == 'builtin' and callers:
+                # C functions (read, sort, regex...) are charged to whoever called them
+                for (caller_file, _, _), caller_stats in callers.items():
+                    by_group[module_group(caller_file)] += caller_stats[2]
+            else:
+                by_group[group] += tottime
+        total = sum(by_group.values()) or 1.0
+
+        report.write("Self time by module group\n")
+        for group, seconds in sorted(by_group.items(), key=lambda kv: -kv[1]):
+            report.write(f"  {group:<16}{seconds:>10.3f}s {seconds / total:>7.1%}"
+                         f"{calls_by_group[group]:>12,} calls\n")
+
+        report.write(f"\nTop {self.top} functions by cumulative time\n")
+        buffer = io.StringIO()
+        pstats.Stats(self.profiler, stream=buffer).sort_stats('cumulative').print_stats(self.top)
+        report.write(self._trim_pstats(buffer.getvalue()))
+
+        report.write(f"\nTop {self.top} functions by self time\n")
+        buffer = io.StringIO()
+        pstats.Stats(self.profiler, stream=buffer).sort_stats('tottime').print_stats(self.top)
+        report.write(self._trim_pstats(buffer.getvalue()))
+
+    def _write_memory(self, report: io.StringIO, after: tracemalloc.Snapshot):
+        ignore = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ]
+        before = self._before.filter_traces(ignore)
+        after = after.filter_traces(ignore)
+        diff = after.compare_to(before, 'lineno')
+
+        by_group: Dict[str, Tuple[int, int]] = defaultdict(lambda: (0, 0))
+        for stat in diff:
+            group = module_group(stat.traceback[0].filename)
+            size, count = by_group[group]
+            by_group[group] = (size + stat.size_diff, count + stat.count_diff)
+
+        report.write("\nMemory still allocated after the scan, by module group\n")
+        for group, (size, count) in sorted(by_group.items(), key=lambda kv: -kv[1][0]):
+            report.write(f"  {group:<16}{size / 1024:>12,.1f} KiB{count:>12,} blocks\n")
+
+        report.write(f"\nTop {self.top} allocation sites (growth during the scan)\n")
+        for stat in diff[:self.top]:
+            frame = stat.traceback[0]
+            report.write(f"  {stat.size_diff / 1024:>10,.1f} KiB {stat.count_diff:>8,} blocks  "
+                         f"{frame.filename}:{frame.lineno}\n")
+
+    @staticmethod
+    def _trim_pstats(text: str) -> str:
+        # Drop the pstats preamble (timestamp and "Ordered by" lines)
+        lines = text.splitlines()
+        start = next((i for i, line in enumerate(lines) if 'ncalls' in line), 0)
+        return "\n".join(lines[start:]) + "\n"